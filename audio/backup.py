@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Kopie zapasowe Pico z deduplikacją (na hoście).
+
+Zawartość plików trafia do magazynu obiektów adresowanego treścią:
+pico_backups/objects/ab/abcdef... - nazwa to suma kontrolna, więc ten
+sam plik w wielu kopiach zapasowych zajmuje miejsce raz. Kopia to
+katalog pico_backups/<czas>/ z samym backup_metadata.json: ścieżka ->
+suma, rozmiar, czas modyfikacji. Przy tworzeniu kopii pliki są najpierw
+sumowane, a kopiowane tylko nieznane obiekty; sumy plików zgodnych
+z manifestem wdrożenia nie są liczone wcale.
+
+Starsze kopie (pełne kopie plików w katalogu, bez 'objects' w metadanych)
+są nadal czytane; migrate() przenosi je do magazynu.
+
+restore() przywraca stan z kopii: zapisywane są tylko pliki inne niż
+w kopii (z jej czasem modyfikacji), a pliki spoza kopii usuwane.
+
+    python backup.py list
+    python backup.py prune --keep 10
+    python backup.py gc
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from media import copy_file, drop_cache, file_digest
+
+METADATA = 'backup_metadata.json'
+FORMAT = 2
+
+
+class BackupStore:
+    def __init__(self, root: str or Path = 'pico_backups', algorithm: str = 'blake2b'):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.algorithm = algorithm
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def snapshots(self) -> List[Path]:
+        """Katalogi kopii od najstarszej"""
+        if not self.root.exists():
+            return []
+        return sorted(p for p in self.root.iterdir() if (p / METADATA).is_file())
+
+    def load(self, snapshot: Path) -> Dict:
+        with open(Path(snapshot) / METADATA) as f:
+            return json.load(f)
+
+    def is_legacy(self, metadata: Dict) -> bool:
+        return 'objects' not in metadata
+
+    def find(self, name: Optional[str] = None) -> Path:
+        """Kopia o nazwie name (katalog z czasem utworzenia) albo najnowsza"""
+        snapshots = self.snapshots()
+        if name is None:
+            if not snapshots:
+                raise ValueError(f"Brak kopii zapasowych w {self.root}")
+            return snapshots[-1]
+        for snapshot in snapshots:
+            if snapshot.name == name:
+                return snapshot
+        raise ValueError(f"Brak kopii zapasowej {name} w {self.root}")
+
+    def entries(self, snapshot: Path) -> Tuple[str, Dict[str, Dict]]:
+        """
+        (algorytm, ścieżka -> {'hash', 'size', 'mtime', 'path'}) - 'path'
+        to plik z treścią: obiekt w magazynie albo, w starszej kopii, plik
+        w jej katalogu (suma liczona przy odczycie)
+        """
+        metadata = self.load(snapshot)
+        if not self.is_legacy(metadata):
+            algorithm = metadata.get('algorithm', self.algorithm)
+            return algorithm, {rel_path: dict(entry, path=self.object_path(entry['hash']))
+                               for rel_path, entry in metadata['objects'].items()}
+        entries = {}
+        for rel_path in metadata['files']:
+            path = Path(snapshot) / rel_path
+            st = path.stat()
+            entries[Path(rel_path).as_posix()] = {'hash': file_digest(path, self.algorithm), 'size': st.st_size,
+                                                  'mtime': st.st_mtime_ns, 'path': path}
+        return self.algorithm, entries
+
+    def plan_restore(self, snapshot: Path, device: str or Path,
+                     paranoid: bool = False) -> Tuple[str, Dict[str, Dict], Dict[str, List[str]], int]:
+        """
+        Porównanie kopii ze stanem device: (algorytm, wpisy kopii, plan,
+        liczba sumowanych plików). Plan: 'write' - brak albo inna treść,
+        'touch' - ta sama treść, inny czas modyfikacji, 'delete' - pliki
+        spoza kopii, 'unchanged'. Plik o rozmiarze i czasie modyfikacji
+        z kopii jest bez zmian bez liczenia sumy (chyba że paranoid).
+        """
+        device = Path(device)
+        algorithm, entries = self.entries(snapshot)
+        plan = {'write': [], 'touch': [], 'delete': [], 'unchanged': []}
+        hashed = 0
+        for rel_path, entry in entries.items():
+            target = device / rel_path
+            if not target.is_file() or target.stat().st_size != entry['size']:
+                plan['write'].append(rel_path)
+                continue
+            same_time = target.stat().st_mtime_ns == entry['mtime']
+            if same_time and not paranoid:
+                plan['unchanged'].append(rel_path)
+                continue
+            hashed += 1
+            if file_digest(target, algorithm) != entry['hash']:
+                plan['write'].append(rel_path)
+            else:
+                plan['unchanged' if same_time else 'touch'].append(rel_path)
+
+        for path in sorted(device.rglob('*')):
+            rel_path = path.relative_to(device).as_posix()
+            if path.is_file() and rel_path not in entries:
+                plan['delete'].append(rel_path)
+        return algorithm, entries, plan, hashed
+
+    def restore(self, device: str or Path, algorithm: str, entries: Dict[str, Dict], plan: Dict[str, List[str]],
+                paranoid: bool = False) -> List[str]:
+        """
+        Wykonaj plan z plan_restore; zwraca błędy weryfikacji. Suma
+        zapisanego pliku liczona jest z zapisywanych bajtów i porównywana
+        z sumą w kopii; paranoid - także odczytem zwrotnym z device.
+        """
+        device = Path(device)
+        missing = [rel_path for rel_path in plan['write'] if not entries[rel_path]['path'].is_file()]
+        if missing:
+            return [f"Brak treści w kopii: {rel_path}" for rel_path in missing]
+
+        for rel_path in plan['delete']:
+            target = device / rel_path
+            target.unlink()
+            for parent in target.parents:
+                if parent == device or any(parent.iterdir()):
+                    break
+                parent.rmdir()
+
+        errors = []
+        for rel_path in plan['write']:
+            entry = entries[rel_path]
+            target = device / rel_path
+            if target.is_dir():
+                shutil.rmtree(target)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if copy_file(entry['path'], target, algorithm) != entry['hash']:
+                errors.append(f"Suma niezgodna z kopią: {rel_path}")
+                continue
+            os.utime(target, ns=(entry['mtime'], entry['mtime']))
+            if paranoid:
+                drop_cache(target)
+                if file_digest(target, algorithm) != entry['hash']:
+                    errors.append(f"Odczyt zwrotny niezgodny z kopią: {rel_path}")
+
+        for rel_path in plan['touch']:
+            os.utime(device / rel_path, ns=(entries[rel_path]['mtime'], entries[rel_path]['mtime']))
+        return errors
+
+    def put(self, path: Path, digest: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Dodaj plik do magazynu; zwraca (suma, czy zapisano nowy obiekt).
+        Znany obiekt nie jest kopiowany - wystarcza suma.
+        """
+        if digest is None:
+            digest = file_digest(path, self.algorithm)
+        target = self.object_path(digest)
+        if target.exists():
+            return digest, False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + '.tmp')
+        written = copy_file(path, partial, self.algorithm)
+        if written != digest:
+            # Plik zmienił się między sumowaniem a kopiowaniem - obiekt wg tego, co zapisano
+            digest, target = written, self.object_path(written)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if target.exists():
+                partial.unlink()
+                return digest, False
+        os.replace(partial, target)
+        return digest, True
+
+    def _new_snapshot_dir(self) -> Path:
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        path = self.root / timestamp
+        index = 1
+        while path.exists():
+            # Kilka kopii w tej samej sekundzie
+            path = self.root / f"{timestamp}_{index}"
+            index += 1
+        path.mkdir(parents=True)
+        return path
+
+    def snapshot(self, device: str or Path, known: Optional[Dict[str, Dict]] = None,
+                 source: Optional[str] = None) -> Tuple[Path, Dict]:
+        """
+        Kopia zawartości device. known: ścieżka -> {'hash', 'size',
+        'mtime'} z manifestu wdrożenia - dla plików o tym samym rozmiarze
+        i czasie modyfikacji suma nie jest liczona (bez odczytu z Pico).
+        Zwraca (katalog kopii, statystyki).
+        """
+        device = Path(device)
+        known = known or {}
+        objects = {}
+        stats = {'files': 0, 'size': 0, 'stored': 0, 'stored_size': 0, 'hashed': 0, 'known': 0}
+
+        for path in sorted(device.rglob('*')):
+            if not path.is_file():
+                continue
+            rel_path = path.relative_to(device).as_posix()
+            st = path.stat()
+            entry = known.get(rel_path)
+            digest = None
+            if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns:
+                digest = entry['hash']
+                stats['known'] += 1
+            else:
+                stats['hashed'] += 1
+            digest, stored = self.put(path, digest)
+            objects[rel_path] = {'hash': digest, 'size': st.st_size, 'mtime': st.st_mtime_ns}
+            stats['files'] += 1
+            stats['size'] += st.st_size
+            if stored:
+                stats['stored'] += 1
+                stats['stored_size'] += st.st_size
+
+        snapshot = self._new_snapshot_dir()
+        metadata = {
+            'format': FORMAT,
+            'timestamp': snapshot.name,
+            'source': source or str(device),
+            'algorithm': self.algorithm,
+            'files': list(objects),
+            'objects': objects,
+        }
+        with open(snapshot / METADATA, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        return snapshot, stats
+
+    def prune(self, keep: int) -> List[Path]:
+        """Usuń kopie poza keep najnowszymi; zwraca usunięte katalogi"""
+        snapshots = self.snapshots()
+        removed = snapshots[:-keep] if keep > 0 else []
+        for snapshot in removed:
+            shutil.rmtree(snapshot)
+        return removed
+
+    def gc(self) -> Tuple[int, int]:
+        """Usuń obiekty, do których nie odwołuje się żadna kopia; zwraca (liczba, bajty)"""
+        if not self.objects.exists():
+            return 0, 0
+        referenced = set()
+        for snapshot in self.snapshots():
+            metadata = self.load(snapshot)
+            if not self.is_legacy(metadata):
+                referenced.update(entry['hash'] for entry in metadata['objects'].values())
+
+        count = size = 0
+        for path in self.objects.glob('*/*'):
+            # Pliki .tmp to pozostałości przerwanych kopii
+            if path.name not in referenced:
+                size += path.stat().st_size
+                path.unlink()
+                count += 1
+        for shard in self.objects.iterdir():
+            if shard.is_dir() and not any(shard.iterdir()):
+                shard.rmdir()
+        return count, size
+
+    def migrate(self) -> int:
+        """Przenieś starsze kopie (pełne kopie plików) do magazynu obiektów; zwraca ich liczbę"""
+        migrated = 0
+        for snapshot in self.snapshots():
+            metadata = self.load(snapshot)
+            if not self.is_legacy(metadata):
+                continue
+            objects = {}
+            for path in sorted(snapshot.rglob('*')):
+                if path.is_file() and path.name != METADATA:
+                    st = path.stat()
+                    digest, _ = self.put(path)
+                    objects[path.relative_to(snapshot).as_posix()] = {
+                        'hash': digest, 'size': st.st_size, 'mtime': st.st_mtime_ns}
+            metadata.update(format=FORMAT, algorithm=self.algorithm, files=list(objects), objects=objects)
+            partial = snapshot / (METADATA + '.tmp')
+            with open(partial, 'w') as f:
+                json.dump(metadata, f, indent=2)
+            os.replace(partial, snapshot / METADATA)
+            for item in snapshot.iterdir():
+                if item.name != METADATA:
+                    if item.is_dir():
+                        shutil.rmtree(item)
+                    else:
+                        item.unlink()
+            migrated += 1
+        return migrated
+
+    def disk_usage(self) -> int:
+        """Miejsce zajęte przez magazyn (bajty zaalokowane na dysku)"""
+        if not self.root.exists():
+            return 0
+        return sum(p.stat().st_blocks * 512 for p in self.root.rglob('*') if p.is_file())
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kopie zapasowe Pico z deduplikacją")
+    parser.add_argument("command", choices=['list', 'prune', 'gc', 'migrate'], help="Polecenie")
+    parser.add_argument("--dir", default='pico_backups', help="Katalog kopii (domyślnie: pico_backups)")
+    parser.add_argument("--keep", type=int, default=10, help="Liczba zachowanych kopii (prune)")
+    parser.add_argument("--hash", default='blake2b', help="Algorytm sumy kontrolnej (domyślnie: blake2b)")
+    args = parser.parse_args()
+
+    store = BackupStore(args.dir, args.hash)
+    if args.command == 'list':
+        for snapshot in store.snapshots():
+            metadata = store.load(snapshot)
+            kind = 'pełna kopia' if store.is_legacy(metadata) else 'obiekty'
+            print(f"📂 {snapshot.name}: {len(metadata['files'])} plików ({kind})")
+        print(f"💾 Zajęte miejsce: {store.disk_usage() / 1024:.1f}KB")
+    elif args.command == 'prune':
+        removed = store.prune(args.keep)
+        count, size = store.gc()
+        print(f"🗑️ Usunięto {len(removed)} kopii i {count} obiektów ({size / 1024:.1f}KB)")
+    elif args.command == 'gc':
+        count, size = store.gc()
+        print(f"🗑️ Usunięto {count} nieużywanych obiektów ({size / 1024:.1f}KB)")
+    else:
+        print(f"✅ Przeniesiono {store.migrate()} kopii do magazynu obiektów")
+        count, size = store.gc()
+        print(f"💾 Zajęte miejsce: {store.disk_usage() / 1024:.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
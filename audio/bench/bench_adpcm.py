@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark IMA-ADPCM: koder na hoście (audio/convert.py
+--adpcm) i dekoder z src3 (adpcm.py).
+
+1. Poprawność: dekoder zgodny bit w bit z audioop.adpcm2lin (CPython
+   do 3.12; przy nowszym kontrola jest pomijana), SNR względem wyniku
+   16 bit, liczba próbek z fragmentu 'fact', rozmiar pliku ~1/4 PCM.
+2. Odtwarzanie przez PCMStream w picosim (zegar wirtualny, DMA):
+   wszystkie próbki, tempo PWM, bez niedoborów - bloki pliku (1024 B,
+   2041 próbek) dłuższe niż bufor DMA (512 próbek).
+3. Koszt bloku bufora DMA (512 próbek): wczytanie i przeliczenie PCM
+   16 bit wobec wczytania i dekodowania ADPCM - czas CPython na hoście,
+   bajty czytane z pliku na blok i cykle hosta na próbkę (MHz z
+   /proc/cpuinfo albo --host-mhz).
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_adpcm.py --repeat 200
+"""
+import argparse
+import io
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+import warnings
+import wave
+from array import array
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "audio"))
+sys.path.insert(0, os.path.join(ROOT, "audio", "src3"))
+
+from convert import AudioConverter
+import picosim
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+
+def host_mhz():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("cpu MHz"):
+                    return float(line.split(":")[1])
+    except OSError:
+        pass
+    return 0.0
+
+
+def write_wav(path, samples, rate=44100):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(array("h", samples).tobytes())
+
+
+def corpus(rate=44100, seconds=1.0):
+    """Sygnały testowe: ton, przemiatanie, akord z obwiednią, szum"""
+    n = int(rate * seconds)
+    sweep_phase = 0.0
+    sweep = []
+    for i in range(n):
+        sweep_phase += 2 * math.pi * (100 + 8000 * i / n) / rate
+        sweep.append(int(12000 * math.sin(sweep_phase)))
+    seed = 0xACE1
+    noise = []
+    for _ in range(n):
+        seed = (seed >> 1) ^ (0xB400 if seed & 1 else 0)
+        noise.append((seed - 32768) >> 2)
+    return {
+        "ton 440 Hz": [int(16000 * math.sin(2 * math.pi * 440 * i / rate)) for i in range(n)],
+        "przemiatanie": sweep,
+        "akord": [int(8000 * math.exp(-3 * i / n) * sum(math.sin(2 * math.pi * f * i / rate)
+                                                        for f in (262, 330, 392))) for i in range(n)],
+        "szum": noise,
+    }
+
+
+# Minimalny SNR (dB): IMA-ADPCM traci więcej przy wysokich częstotliwościach i szumie
+MIN_SNR = {"ton 440 Hz": 35, "przemiatanie": 20, "akord": 30, "szum": 12}
+
+
+def decode_all(path):
+    from adpcm import AdpcmDecoder
+    from wavfile import WavFile
+    with open(path, "rb") as f:
+        wav = WavFile(f)
+        out = array("H", [0] * wav.frames)
+        count = AdpcmDecoder(wav).decode(out, wav.frames, 65536)
+        return wav, [v - 32768 for v in out[:count]]
+
+
+def reference(path):
+    """Dekodowanie blokami przez audioop (półbajty w odwrotnej kolejności)"""
+    from wavfile import WavFile
+    with open(path, "rb") as f:
+        wav = WavFile(f)
+        raw = bytearray(wav.block_align)
+        result = []
+        while wav.readinto(raw):
+            predictor, index = struct.unpack_from("<hB", raw)
+            data = bytes(((b & 15) << 4) | (b >> 4) for b in raw[4:])
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)
+                pcm = audioop.adpcm2lin(data, 2, (predictor, index))[0]
+            block = array("h")
+            block.frombytes(pcm)
+            result.append(predictor)
+            result.extend(block)
+        # Dekoder PCMStream ma rozdzielczość 12 bitów (jak przeliczenie PCM)
+        return [v & ~15 for v in result[:wav.frames]]
+
+
+def snr(decoded, original):
+    noise = sum((a - b) ** 2 for a, b in zip(decoded, original))
+    signal = sum(b * b for b in original)
+    return 10 * math.log10(signal / noise) if noise else 200.0
+
+
+def check(ok, text):
+    print(f"  {'✅' if ok else '❌'} {text}")
+    return ok
+
+
+def check_codec(tmp):
+    print("Koder i dekoder:")
+    ok = True
+    converter = AudioConverter(adpcm=True)
+    paths = {}
+    for name, samples in corpus().items():
+        source = os.path.join(tmp, name.replace(" ", "_") + ".wav")
+        target = source.replace(".wav", "_adpcm.wav")
+        write_wav(source, samples)
+        converter.convert_file(source, target)
+        wav, decoded = decode_all(target)
+        ratio = os.path.getsize(source) / os.path.getsize(target)
+        quality = snr(decoded, [v & ~15 for v in samples])
+        exact = reference(target) == decoded if audioop else True
+        ok &= check(wav.frames == len(samples) and len(decoded) == len(samples) and
+                    exact and ratio > 3.8 and quality > MIN_SNR[name],
+                    f"{name:14} {len(decoded)} próbek, SNR {quality:5.1f} dB, {ratio:.2f}:1"
+                    f"{', zgodny z audioop' if audioop else ''}")
+        paths[name] = (source, target)
+    if audioop is None:
+        print("  ⚠️  brak audioop - zgodność bit w bit nie sprawdzona")
+    return ok, paths
+
+
+def check_playback(paths):
+    print("\nOdtwarzanie (picosim, DMA):")
+    from pcmstream import PCMStream
+    from wavfile import WavFile
+    stream = PCMStream(0, sample_rate=22050)
+    ok = True
+    for name in ("ton 440 Hz", "akord"):
+        with open(paths[name][1], "rb") as f:
+            wav = WavFile(f)
+            played = stream.play_wav(wav)
+        stats = stream.stats()
+        report = picosim.pwm_report(stream.pwm)
+        ok &= check(played == wav.frames and stats["underruns"] == 0 and
+                    abs(report["rate"] - 44100) < 44100 * 1e-4,
+                    f"{name:14} {played} próbek, {stats['blocks']} bloków, tempo {report['rate']:.0f} Hz, "
+                    f"niedobory {stats['underruns']}")
+    return ok, stream
+
+
+def load_cost(stream, make_source, load, repeat):
+    """Czas wczytania jednego bloku bufora DMA (s), najlepszy z trzech pomiarów"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            stream.source = make_source()
+            load(0)
+        elapsed = (time.perf_counter() - start) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrola i benchmark IMA-ADPCM")
+    parser.add_argument("--repeat", type=int, default=200, help="Powtórzenia pomiaru bloku")
+    parser.add_argument("--host-mhz", type=float, default=0, help="Taktowanie hosta (MHz)")
+    args = parser.parse_args()
+
+    picosim.install(virtual=True)
+    tmp = tempfile.mkdtemp()
+    ok, paths = check_codec(tmp)
+    good, stream = check_playback(paths)
+    ok &= good
+
+    from adpcm import AdpcmDecoder
+    from wavfile import WavFile
+    source, target = paths["akord"]
+    with open(source, "rb") as f:
+        pcm = f.read()
+    with open(target, "rb") as f:
+        adpcm = f.read()
+
+    block = stream.block
+    stream.configure(44100)
+
+    def pcm_source():
+        return WavFile(io.BytesIO(pcm))
+
+    def adpcm_source():
+        return AdpcmDecoder(WavFile(io.BytesIO(adpcm)))
+
+    # Otwarcie pliku liczone osobno i odejmowane
+    open_pcm = load_cost(stream, pcm_source, lambda index: 0, args.repeat)
+    open_adpcm = load_cost(stream, adpcm_source, lambda index: 0, args.repeat)
+    cost_pcm = load_cost(stream, pcm_source, stream._load, args.repeat) - open_pcm
+    cost_adpcm = load_cost(stream, adpcm_source, stream._load_adpcm, args.repeat) - open_adpcm
+
+    # Bajty z pliku na blok: PCM - blok ramek, ADPCM - średnio wg bloków kodu
+    wav = WavFile(io.BytesIO(adpcm))
+    per_sample = wav.block_align / ((wav.block_align - 4) * 2 + 1)
+    period = block / 44100
+    mhz = args.host_mhz or host_mhz()
+    print(f"\n⏱️  Blok bufora DMA ({block} próbek, {period * 1000:.1f} ms przy 44,1 kHz, CPython):")
+    for name, cost, read in (("PCM 16 bit", cost_pcm, block * 2), ("IMA-ADPCM", cost_adpcm, block * per_sample)):
+        cycles = f", {cost * mhz * 1e6 / block:6.0f} cykli hosta/próbkę" if mhz else ""
+        print(f"  {name:11} {cost * 1e6:8.0f} µs ({cost / period * 100:5.1f}% czasu bloku), "
+              f"z pliku {read:6.0f} B{cycles}")
+    print(f"  ADPCM: {cost_adpcm / cost_pcm:.2f}x czasu CPU, {block * 2 / (block * per_sample):.2f}x mniej danych z flash")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
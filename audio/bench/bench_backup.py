@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark kopii zapasowych z deduplikacją (audio/backup.py).
+
+N kolejnych wdrożeń tego samego projektu (w każdym zmienia się jeden
+mały plik), po każdym kopia zapasowa Pico:
+
+- pierwotna: pełna kopia katalogu Pico do nowego katalogu;
+- magazyn obiektów, sumy liczone z plików;
+- magazyn obiektów, sumy z manifestu wdrożenia (jak w deploy_circuit).
+
+Czas kopii i miejsce na dysku po N wdrożeniach. Kontrole: każda kopia
+odtwarza dokładnie stan Pico z chwili utworzenia, obiekty zapisane raz,
+retencja i usuwanie nieużywanych obiektów, migracja pełnych kopii.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_backup.py --deploys 20
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "audio"))
+sys.path.insert(0, os.path.join(ROOT, "audio", "bench"))
+
+from backup import METADATA, BackupStore
+from bench_deploy import DirectoryFinder
+from deploy_circuit import MANIFEST_NAME, PicoRP2Deployer
+from media import file_digest
+
+
+def legacy_backup(device, root, name):
+    """Pierwotne create_backup: pełna kopia zawartości Pico"""
+    backup_dir = root / name
+    backup_dir.mkdir(parents=True)
+    for item in device.iterdir():
+        if item.is_file():
+            shutil.copy2(item, backup_dir)
+        else:
+            shutil.copytree(item, backup_dir / item.name)
+    metadata = {'timestamp': name, 'source': str(device),
+                'files': [str(f.relative_to(backup_dir)) for f in backup_dir.rglob('*') if f.is_file()]}
+    with open(backup_dir / METADATA, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def disk_usage(root):
+    return sum(p.stat().st_blocks * 512 for p in Path(root).rglob('*') if p.is_file())
+
+
+def device_state(device):
+    """Ścieżka -> suma kontrolna wszystkich plików Pico"""
+    return {p.relative_to(device).as_posix(): file_digest(p, 'blake2b')
+            for p in sorted(device.rglob('*')) if p.is_file()}
+
+
+def restored_state(store, snapshot):
+    """Stan odtworzony z kopii; sprawdza, czy obiekty mają zapisaną treść"""
+    state = {}
+    for rel_path, entry in store.load(snapshot)['objects'].items():
+        path = store.object_path(entry['hash'])
+        state[rel_path] = file_digest(path, 'blake2b') if path.exists() else None
+    return state
+
+
+def check(ok, text):
+    print(f"  {'✅' if ok else '❌'} {text}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrola i benchmark kopii zapasowych z deduplikacją")
+    parser.add_argument("--deploys", type=int, default=20, help="Liczba kolejnych wdrożeń")
+    parser.add_argument("--wav-kb", type=int, default=1024, help="Rozmiar pliku dźwiękowego (KB)")
+    parser.add_argument("--keep", type=int, default=5, help="Retencja w kontroli prune/gc")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    os.chdir(tmp)  # logi wdrożeń
+    source, device = tmp / "project", tmp / "pico"
+    device.mkdir()
+    (device / "INDEX.HTM").write_text("<html><head><meta http-equiv='refresh' content='0;URL=...'></head></html>\n")
+    (device / "INFO_UF2.TXT").write_text("UF2 Bootloader v3.0\nModel: Raspberry Pi RP2\nBoard-ID: RPI-RP2\n")
+    (source / "lib").mkdir(parents=True)
+    (source / "test.wav").write_bytes(os.urandom(args.wav_kb * 1024))
+    for i in range(20):
+        (source / "lib" / f"module{i}.py").write_bytes(os.urandom(8192))
+
+    deployer = PicoRP2Deployer()
+    deployer.finder = DirectoryFinder(device, size=1 << 40)
+    deployer.config.update(make_backup=False, manifest_cache_dir=str(tmp / "cache"))
+
+    legacy_root, hashed_root, known_root = tmp / "legacy", tmp / "hashed", tmp / "known"
+    hashed, known = BackupStore(hashed_root), BackupStore(known_root)
+    times = {"legacy": 0.0, "hashed": 0.0, "known": 0.0}
+    expected = {}
+    ok = True
+    for i in range(args.deploys):
+        (source / "code.py").write_text(f"print('wersja {i}')\n")
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok &= deployer.deploy(source)
+
+        start = time.perf_counter()
+        legacy_backup(device, legacy_root, f"{i:04d}")
+        times["legacy"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        snapshot, _ = hashed.snapshot(device)
+        times["hashed"] += time.perf_counter() - start
+
+        manifest = deployer.load_manifest(device / MANIFEST_NAME)['files']
+        start = time.perf_counter()
+        snapshot, stats = known.snapshot(device, known=manifest)
+        times["known"] += time.perf_counter() - start
+        expected[snapshot] = device_state(device)
+
+    size = sum(p.stat().st_size for p in device.rglob('*') if p.is_file())
+    print(f"Pico: {len(expected[snapshot])} plików, {size / 1024:.0f} KB; {args.deploys} wdrożeń\n")
+    print("⏱️  Kopia zapasowa po wdrożeniu:")
+    base_time, base_disk = times["legacy"], disk_usage(legacy_root)
+    for label, name, root in (("pełna kopia (pierwotnie)", "legacy", legacy_root),
+                              ("obiekty, sumy z plików", "hashed", hashed_root),
+                              ("obiekty, sumy z manifestu", "known", known_root)):
+        per = times[name] / args.deploys
+        disk = disk_usage(root)
+        print(f"  {label:28} {per * 1000:7.2f} ms/kopię ({base_time / times[name]:5.2f}x), "
+              f"dysk {disk / 1024:8.0f} KB ({base_disk / disk:5.1f}x mniej)")
+
+    print("\nKontrole:")
+    ok &= check(all(restored_state(known, s) == state for s, state in expected.items()),
+                f"każda z {len(expected)} kopii odtwarza stan Pico z chwili utworzenia")
+    objects = sorted(p.name for p in known.objects.glob("*/*"))
+    unique = {h for state in expected.values() for h in state.values()}
+    ok &= check(len(objects) == len(unique) and set(objects) == unique,
+                f"obiekty zapisane raz: {len(objects)} obiektów dla {len(unique)} różnych treści")
+    ok &= check(stats["known"] == len(manifest) and stats["hashed"] == stats["files"] - len(manifest),
+                f"sumy z manifestu: {stats['known']} plików bez odczytu, sumowane tylko {stats['hashed']} "
+                f"spoza manifestu (INDEX.HTM, INFO_UF2.TXT, sam manifest)")
+
+    removed = known.prune(args.keep)
+    count, freed = known.gc()
+    remaining = known.snapshots()
+    orphaned = ({h for s in removed for h in expected[s].values()} -
+                {h for s in remaining for h in expected[s].values()})
+    ok &= check(len(removed) == max(0, args.deploys - args.keep) and
+                len(remaining) == min(args.deploys, args.keep) and
+                count == len(orphaned) and
+                all(restored_state(known, s) == expected[s] for s in remaining),
+                f"retencja {args.keep}: usunięto {len(removed)} kopii i {count} obiektów "
+                f"({freed / 1024:.1f} KB), pozostałe kopie kompletne")
+
+    migrated = BackupStore(legacy_root)
+    before = disk_usage(legacy_root)
+    count = migrated.migrate()
+    snapshots = migrated.snapshots()
+    ok &= check(count == args.deploys and
+                all(restored_state(migrated, s) == expected[known_root / s.name]
+                    for s in snapshots if known_root / s.name in expected) and
+                all(migrated.load(s)['objects'] for s in snapshots),
+                f"migracja {count} pełnych kopii: {before / 1024:.0f} KB -> {disk_usage(legacy_root) / 1024:.0f} KB")
+
+    os.chdir(ROOT)
+    shutil.rmtree(tmp, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
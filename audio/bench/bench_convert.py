@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark konwertera audio na hoście (audio/convert.py).
+
+1. Jakość: sinus 1 kHz 48 kHz / 24 bit / stereo -> 44,1 kHz / 16 bit /
+   mono (amplituda, faza - kompensacja opóźnienia filtra, SNR), ton
+   23 kHz powyżej nowej częstotliwości Nyquista (tłumienie aliasów),
+   22,05 kHz / 8 bit -> 44,1 kHz, miksowanie kanałów stereo do mono.
+   Wynik nie zależy od wielkości bloku.
+2. Pliki .pwm: skala zgodna z TOP licznika PWM w symulatorze picosim,
+   wartości zgodne z wynikiem 16 bit, odtwarzanie przez PCMStream
+   z DMA (bez przeliczania) i bez DMA (przeskalowanie).
+3. Pamięć: szczyt zajętej pamięci (tracemalloc) nie rośnie z długością
+   pliku.
+4. Czas konwersji katalogu w jednym i w wielu procesach.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_convert.py --files 4 --seconds 5
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from array import array
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "audio"))
+sys.path.insert(0, os.path.join(ROOT, "audio", "src3"))
+
+from convert import AudioConverter
+
+# Próbki pomijane na brzegach przy dopasowaniu sinusa
+EDGE = 256
+
+
+def write_wav(path, rate, width, channels, seconds, amplitude=0.5):
+    """channels - lista częstotliwości (Hz), po jednej na kanał"""
+    frames = int(rate * seconds)
+    full = (1 << (8 * width - 1)) - 1
+    data = bytearray()
+    for i in range(frames):
+        for frequency in channels:
+            v = int(round(amplitude * full * math.sin(2 * math.pi * frequency * i / rate)))
+            if width == 1:
+                data.append(v + 128)
+            else:
+                data += v.to_bytes(width, "little", signed=True)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(len(channels))
+        f.setsampwidth(width)
+        f.setframerate(rate)
+        f.writeframes(bytes(data))
+
+
+def read_samples(path):
+    """Wynik 16 bit mono jako lista float -1..1"""
+    with wave.open(path, "rb") as f:
+        samples = array("h")
+        samples.frombytes(f.readframes(f.getnframes()))
+        return [s / 32768 for s in samples], f.getframerate()
+
+
+def fit(samples, frequency, rate):
+    """Dopasowanie sinusa metodą najmniejszych kwadratów: (amplituda, faza, SNR dB)"""
+    part = samples[EDGE:-EDGE]
+    n = len(part)
+    basis = [(math.sin(w), math.cos(w))
+             for w in (2 * math.pi * frequency * (i + EDGE) / rate for i in range(n))]
+    ss = sum(s * s for s, _ in basis)
+    cc = sum(c * c for _, c in basis)
+    sc = sum(s * c for s, c in basis)
+    xs = sum(x * s for x, (s, _) in zip(part, basis))
+    xc = sum(x * c for x, (_, c) in zip(part, basis))
+    det = ss * cc - sc * sc
+    a = (xs * cc - xc * sc) / det
+    b = (xc * ss - xs * sc) / det
+    noise = sum((x - a * s - b * c) ** 2 for x, (s, c) in zip(part, basis))
+    amplitude = math.hypot(a, b)
+    snr = 10 * math.log10(amplitude ** 2 / 2 / (noise / n)) if noise else 200.0
+    return amplitude, math.atan2(b, a), snr
+
+
+def rms(samples):
+    part = samples[EDGE:-EDGE]
+    return math.sqrt(sum(x * x for x in part) / len(part))
+
+
+def check(ok, text):
+    print(f"  {'✅' if ok else '❌'} {text}")
+    return ok
+
+
+def check_quality(tmp):
+    print("Jakość konwersji:")
+    converter = AudioConverter()
+    ok = True
+
+    source = os.path.join(tmp, "tone48.wav")
+    target = os.path.join(tmp, "tone48_out.wav")
+    write_wav(source, 48000, 3, [1000, 1000], 1.0)
+    stats = converter.convert_file(source, target)
+    samples, rate = read_samples(target)
+    amplitude, phase, snr = fit(samples, 1000, rate)
+    gain = 20 * math.log10(amplitude / 0.5)
+    ok &= check(stats["frames_out"] == 44100 and rate == 44100,
+                f"48 kHz -> 44,1 kHz: {stats['frames_out']} ramek")
+    ok &= check(abs(gain) < 0.05 and abs(phase) < 0.01 and snr > 80,
+                f"1 kHz: wzmocnienie {gain:+.3f} dB, faza {phase:+.4f} rad, SNR {snr:.1f} dB")
+
+    # Wynik nie zależy od podziału na bloki
+    chunked = AudioConverter(chunk=1000)
+    other = os.path.join(tmp, "tone48_chunk.wav")
+    chunked.convert_file(source, other)
+    with open(target, "rb") as a, open(other, "rb") as b:
+        ok &= check(a.read() == b.read(), "ten sam wynik dla bloków 1000 i 8192 ramek")
+
+    source = os.path.join(tmp, "alias.wav")
+    write_wav(source, 48000, 2, [23000], 1.0)
+    converter.convert_file(source, target)
+    samples, _ = read_samples(target)
+    rejection = 20 * math.log10(rms(samples) / (0.5 / math.sqrt(2)))
+    ok &= check(rejection < -60, f"23 kHz (powyżej 22,05 kHz): tłumienie {rejection:.1f} dB")
+
+    source = os.path.join(tmp, "low.wav")
+    write_wav(source, 22050, 1, [3000], 1.0)
+    stats = converter.convert_file(source, target)
+    samples, rate = read_samples(target)
+    amplitude, phase, snr = fit(samples, 3000, rate)
+    gain = 20 * math.log10(amplitude / 0.5)
+    ok &= check(stats["frames_out"] == 44100 and abs(gain) < 0.1 and snr > 40,
+                f"22,05 kHz 8 bit -> 44,1 kHz: wzmocnienie {gain:+.3f} dB, SNR {snr:.1f} dB")
+
+    source = os.path.join(tmp, "stereo.wav")
+    write_wav(source, 44100, 2, [1000, 2500], 1.0)
+    converter.convert_file(source, target)
+    samples, rate = read_samples(target)
+    left = fit(samples, 1000, rate)[0]
+    right = fit(samples, 2500, rate)[0]
+    ok &= check(abs(left - 0.25) < 0.001 and abs(right - 0.25) < 0.001,
+                f"stereo -> mono: kanały {left:.4f} i {right:.4f} (oczekiwane 0.25)")
+
+    # Błąd zapisu w połowie (np. brak miejsca) - bez pozostałego pliku .tmp
+    def full(*args):
+        raise OSError("No space left on device")
+    converter._write = full
+    failed = os.path.join(tmp, "failed.wav")
+    try:
+        converter.convert_file(source, failed)
+        raised = False
+    except OSError:
+        raised = True
+    del converter._write
+    ok &= check(raised and not os.path.exists(failed) and not os.path.exists(failed + ".tmp"),
+                "błąd w trakcie konwersji: wyjątek przekazany, plik .tmp usunięty")
+    return ok
+
+
+def check_pwm(tmp):
+    print("\nPliki .pwm:")
+    source = os.path.join(tmp, "tone48.wav")
+    wav_target = os.path.join(tmp, "tone48_16.wav")
+    target = os.path.join(tmp, "tone48.pwm")
+    AudioConverter().convert_file(source, wav_target)
+    AudioConverter(pwm=True).convert_file(source, target)
+
+    import picosim
+    picosim.install(virtual=True)
+    from dutyfile import DutyFile
+    from pcmstream import PCMStream
+
+    ok = True
+    reference, _ = read_samples(wav_target)
+    with open(target, "rb") as f:
+        duty = DutyFile(f)
+        values = array("H", [0] * duty.frames)
+        duty.readinto(values)
+    error = max(abs(d * 2 / duty.scale - 1 - r) for d, r in zip(values, reference))
+    limit = 3 / duty.scale + 2 / 32768
+    ok &= check(duty.frames == len(reference) and error <= limit,
+                f"{duty}: odchyłka od wyniku 16 bit {error:.5f} (limit {limit:.5f})")
+
+    for use_dma in (True, False):
+        stream = PCMStream(use_dma and 2 or 4, sample_rate=44100, use_dma=use_dma)
+        with open(target, "rb") as f:
+            duty = DutyFile(f)
+            played = stream.play_duty(duty)
+        report = picosim.pwm_report(stream.pwm)
+        name = "DMA, bez przeliczania" if use_dma else "bez DMA, przeskalowanie"
+        direct = duty.scale == stream.scale
+        ok &= check(played == duty.frames and report["clipped"] == 0 and direct == use_dma and
+                    abs(report["rate"] - 44100) < 44100 * 1e-4,
+                    f"{name}: {played} ramek, tempo {report['rate']:.0f} Hz, skala PWM {stream.scale}")
+        stream.deinit()
+    return ok
+
+
+def peak_memory(converter, source, target):
+    tracemalloc.start()
+    converter.convert_file(source, target)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrola i benchmark konwertera audio")
+    parser.add_argument("--files", type=int, default=4, help="Liczba plików w pomiarze czasu")
+    parser.add_argument("--seconds", type=float, default=5, help="Długość plików (s)")
+    parser.add_argument("--jobs", type=int, default=0, help="Liczba procesów (domyślnie: liczba rdzeni)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    ok = check_quality(tmp)
+
+    print("\nPamięć (48 kHz / 24 bit / stereo -> 44,1 kHz / 16 bit / mono):")
+    converter = AudioConverter()
+    peaks = []
+    for seconds in (args.seconds, args.seconds * 4):
+        source = os.path.join(tmp, f"long{seconds:g}.wav")
+        write_wav(source, 48000, 3, [440, 660], seconds)
+        peak = peak_memory(converter, source, os.path.join(tmp, "long_out.wav"))
+        peaks.append(peak)
+        print(f"  {seconds:5.1f} s ({os.path.getsize(source) / 1024:7.0f} KB): szczyt {peak / 1024:6.0f} KB")
+    ok &= check(peaks[1] < peaks[0] * 1.2, "szczyt pamięci nie zależy od długości pliku")
+
+    corpus = os.path.join(tmp, "corpus")
+    os.mkdir(corpus)
+    for i in range(args.files):
+        write_wav(os.path.join(corpus, f"track{i}.wav"), 48000, 3, [440 * (i + 1), 330], args.seconds)
+    jobs = args.jobs or os.cpu_count() or 1
+    total = args.files * args.seconds
+    print(f"\n⏱️  Konwersja {args.files} plików po {args.seconds:g} s (48 kHz / 24 bit / stereo):")
+    for count in sorted({1, jobs}):
+        start = time.perf_counter()
+        converter.convert_tree(corpus, os.path.join(tmp, f"out{count}"), count, force=True)
+        elapsed = time.perf_counter() - start
+        print(f"  procesy {count:2}: {elapsed:6.2f} s, {total / elapsed:5.1f}x czasu rzeczywistego")
+
+    ok &= check_pwm(tmp)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark wdrażania przyrostowego (audio/deploy_circuit.py).
+
+Pico zastępuje katalog tymczasowy (dysk RPI-RP2 wskazany na sztywno,
+bez szukania urządzenia). Kolejne wdrożenia tego samego drzewa:
+
+1. pierwsze - wszystkie pliki, manifest na "Pico";
+2. bez zmian - nic nie jest kopiowane, bez kopii zapasowej, < 1 s;
+3. zmieniony, dotknięty (tylko mtime), dodany i usunięty plik - kopiowane
+   tylko zmieniony i dodany, usunięty znika z Pico, pliki spoza
+   manifestu (boot_out.txt) zostają;
+4. plik zmieniony na Pico poza wdrożeniem - kopiowany ponownie;
+5. --full - wszystkie pliki.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_deploy.py --files 300
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "audio"))
+
+from deploy_circuit import MANIFEST_NAME, PicoRP2Deployer
+from media import file_digest
+
+
+class DirectoryFinder:
+    """Katalog w roli dysku RPI-RP2"""
+
+    def __init__(self, path, size=16 << 20):
+        self.path = str(path)
+        self.size = size
+
+    def wait_for_rp2(self, timeout=30):
+        return self.path
+
+    def verify_rp2_disk(self, path):
+        return True
+
+    def get_disk_info(self, path):
+        used = sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+        return {"path": path, "size": self.size, "free_space": self.size - used,
+                "filesystem": None, "writable": True}
+
+
+def make_tree(source, files, size):
+    for i in range(files):
+        path = source / f"lib/mod{i // 50}/file{i}.py" if i % 4 else source / f"sounds/clip{i}.wav"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(size if i % 4 else size * 8))
+
+
+def run(tmp, device, source, full=False):
+    """Jedno wdrożenie: (wynik, czas s, skopiowane, usunięte, nowe kopie zapasowe)"""
+    deployer = PicoRP2Deployer()
+    deployer.finder = DirectoryFinder(device)
+    deployer.config["backup_dir"] = str(tmp / "backups")
+    deployer.config["manifest_cache_dir"] = str(tmp / "cache")
+    deployer.config["incremental"] = not full
+    backups = len(list((tmp / "backups").glob("*"))) if (tmp / "backups").exists() else 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = deployer.deploy(source)
+    elapsed = time.perf_counter() - start
+    copied = [e for e in deployer.deployment_log if e.startswith("Skopiowano")]
+    deleted = [e for e in deployer.deployment_log if e.startswith("Usunięto")]
+    new_backups = len(list((tmp / "backups").glob("*"))) - backups if (tmp / "backups").exists() else 0
+    return ok, elapsed, len(copied), len(deleted), new_backups
+
+
+def same_tree(source, device):
+    """Pliki źródła na Pico z tą samą zawartością"""
+    for path in source.rglob("*"):
+        if path.is_file():
+            target = device / path.relative_to(source)
+            if not target.exists() or file_digest(target) != file_digest(path):
+                return False
+    return True
+
+
+def check(ok, text):
+    print(f"  {'✅' if ok else '❌'} {text}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrola i benchmark wdrażania przyrostowego")
+    parser.add_argument("--files", type=int, default=200, help="Liczba plików w drzewie")
+    parser.add_argument("--size", type=int, default=16384, help="Rozmiar pliku .py (B); .wav 8 razy większe")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    os.chdir(tmp)  # logi wdrożeń
+    source, device = tmp / "project", tmp / "pico"
+    device.mkdir()
+    (device / "boot_out.txt").write_text("Adafruit CircuitPython\n")
+    make_tree(source, args.files, args.size)
+    total = sum(f.stat().st_size for f in source.rglob("*") if f.is_file())
+    print(f"Drzewo: {args.files} plików, {total / 1024:.0f} KB\n")
+
+    ok = True
+    result, first, copied, _, backups = run(tmp, device, source)
+    ok &= check(result and copied == args.files and (device / MANIFEST_NAME).exists() and
+                same_tree(source, device),
+                f"pierwsze wdrożenie: {copied} plików, {first:.2f} s, manifest zapisany")
+
+    result, again, copied, deleted, backups = run(tmp, device, source)
+    ok &= check(result and copied == 0 and deleted == 0 and backups == 0 and again < 1.0,
+                f"bez zmian: {copied} plików, {again:.3f} s, bez kopii zapasowej ({first / again:.0f}x szybciej)")
+
+    files = sorted(p for p in source.rglob("*.py"))
+    changed, touched, removed = files[0], files[1], files[2]
+    changed.write_bytes(os.urandom(args.size))
+    stamp = time.time() + 10
+    os.utime(touched, (stamp, stamp))
+    removed.unlink()
+    added = source / "lib" / "new_module.py"
+    added.write_bytes(os.urandom(args.size))
+    result, elapsed, copied, deleted, backups = run(tmp, device, source)
+    removed_target = device / removed.relative_to(source)
+    ok &= check(result and copied == 2 and deleted == 1 and not removed_target.exists() and
+                (device / "boot_out.txt").exists() and same_tree(source, device),
+                f"zmieniony + dodany: {copied} pliki, usunięty: {deleted}, dotknięty pominięty, {elapsed:.3f} s")
+
+    tampered = device / files[3].relative_to(source)
+    tampered.write_bytes(b"zmienione na Pico")
+    result, elapsed, copied, _, _ = run(tmp, device, source)
+    ok &= check(result and copied == 1 and same_tree(source, device),
+                f"plik zmieniony na Pico: {copied} skopiowany ponownie, {elapsed:.3f} s")
+
+    result, elapsed, copied, _, _ = run(tmp, device, source, full=True)
+    ok &= check(result and copied == args.files, f"--full: {copied} plików, {elapsed:.2f} s")
+
+    print(f"\n⏱️  Wdrożenie bez zmian {again * 1000:.0f} ms wobec {first * 1000:.0f} ms pełnego "
+          f"(dysk lokalny; na Pico przez USB różnica rośnie z czasem zapisu na flash)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
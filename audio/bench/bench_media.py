@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark dostępu do plików na hoście (audio/media.py).
+
+Dotychczasowy odczyt (pętla f.read(4096) w sumach kontrolnych,
+shutil.copy2 i osobny odczyt do sumy, wave.readframes, bloki UF2 przez
+f.read(512)) wobec widoków mmap/memoryview z media.py, na katalogu
+dużych plików WAV i UF2 - wygenerowanym albo podanym przez --dir.
+
+1. Poprawność: sumy kontrolne i kopie zgodne z hashlib/shutil,
+   nagłówek i ramki WavView zgodne z modułem wave, weryfikacja UF2
+   (w tym odrzucenie uszkodzonego pliku), pusty plik.
+2. Przepustowość (MB/s) i szczyt RSS - każda metoda w osobnym procesie,
+   żeby szczyt pamięci jednej nie zasłaniał innej. Strony mapowania
+   liczą się do RSS, dlatego media.py zwalnia przeczytane fragmenty.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_media.py --size-mb 256
+    python audio/bench/bench_media.py --dir ~/muzyka
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+import zlib
+from pathlib import Path
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "audio"))
+
+from media import (RP2040_FAMILY, UF2_BLOCK, UF2_FLAG_FAMILY, UF2_MAGIC_END, UF2_MAGIC_START0,
+                   UF2_MAGIC_START1, Uf2View, WavView, copy_file, file_digest)
+
+FRAMES = 8192
+
+
+def write_wav(path, size):
+    """WAV 44,1 kHz / 16 bit / stereo o rozmiarze ~size bajtów (dane losowe)"""
+    remaining = size // 4
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(44100)
+        while remaining > 0:
+            frames = min(1 << 18, remaining)
+            f.writeframesraw(os.urandom(frames * 4))
+            remaining -= frames
+
+
+def write_uf2(path, size, address=0x10000000):
+    """UF2 dla RP2040 z blokami po 256 B danych, ~size bajtów"""
+    total = max(1, size // UF2_BLOCK)
+    with open(path, "wb") as f:
+        for number in range(total):
+            header = struct.pack("<8I", UF2_MAGIC_START0, UF2_MAGIC_START1, UF2_FLAG_FAMILY,
+                                 address + number * 256, 256, number, total, RP2040_FAMILY)
+            f.write(header + os.urandom(256) + bytes(476 - 256) + struct.pack("<I", UF2_MAGIC_END))
+
+
+# Metody mierzone w procesach potomnych: pliki -> przetworzone bajty
+
+def hash_read(paths, out):
+    total = 0
+    for path in paths:
+        digest = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(4096), b""):
+                digest.update(chunk)
+        total += os.path.getsize(path)
+    return total
+
+
+def hash_mmap(paths, out):
+    for path in paths:
+        file_digest(path)
+    return sum(os.path.getsize(p) for p in paths)
+
+
+def copy_copy2(paths, out):
+    """Dotychczasowe wdrożenie: suma kontrolna źródła, potem shutil.copy2"""
+    hash_read(paths, out)
+    for path in paths:
+        shutil.copy2(path, os.path.join(out, os.path.basename(path)))
+    return sum(os.path.getsize(p) for p in paths)
+
+
+def copy_media(paths, out):
+    for path in paths:
+        copy_file(path, os.path.join(out, os.path.basename(path)), "md5")
+    return sum(os.path.getsize(p) for p in paths)
+
+
+def wav_wave(paths, out):
+    """Bloki ramek z modułu wave; CRC32 jako minimalne przetwarzanie danych"""
+    total = 0
+    for path in paths:
+        with wave.open(path, "rb") as f:
+            while True:
+                raw = f.readframes(FRAMES)
+                if not raw:
+                    break
+                zlib.crc32(raw)
+                total += len(raw)
+    return total
+
+
+def wav_view(paths, out):
+    total = 0
+    for path in paths:
+        with WavView(path) as wav:
+            for raw in wav.blocks(FRAMES):
+                zlib.crc32(raw)
+                total += len(raw)
+            del raw
+    return total
+
+
+def uf2_read(paths, out):
+    """Te same kontrole co Uf2View.verify, blok po bloku"""
+    total = 0
+    for path in paths:
+        count = os.path.getsize(path) // UF2_BLOCK
+        with open(path, "rb") as f:
+            for index, block in enumerate(iter(lambda: f.read(UF2_BLOCK), b"")):
+                start0, start1, _, _, size, number, blocks, _ = struct.unpack_from("<8I", block)
+                end = struct.unpack_from("<I", block, UF2_BLOCK - 4)[0]
+                if (start0 != UF2_MAGIC_START0 or start1 != UF2_MAGIC_START1 or end != UF2_MAGIC_END or
+                        size > 476 or number != index or blocks != count):
+                    raise ValueError(f"bad UF2 block {index}")
+                total += len(block[32:32 + size])
+    return total
+
+
+def uf2_view(paths, out):
+    total = 0
+    for path in paths:
+        with Uf2View(path) as uf2:
+            total += uf2.verify()
+    return total
+
+
+METHODS = {
+    "hash_read": hash_read, "hash_mmap": hash_mmap,
+    "copy_copy2": copy_copy2, "copy_media": copy_media,
+    "wav_wave": wav_wave, "wav_view": wav_view,
+    "uf2_read": uf2_read, "uf2_view": uf2_view,
+}
+
+GROUPS = [
+    ("Suma kontrolna MD5", "wav", [("f.read(4096)", "hash_read"), ("mmap (media.file_digest)", "hash_mmap")]),
+    ("Kopiowanie z sumą kontrolną", "wav", [("suma + shutil.copy2", "copy_copy2"),
+                                           ("media.copy_file(..., 'md5')", "copy_media")]),
+    ("Odczyt ramek WAV", "wav", [("wave.readframes", "wav_wave"), ("WavView.blocks", "wav_view")]),
+    ("Bloki UF2", "uf2", [("f.read(512)", "uf2_read"), ("Uf2View.verify", "uf2_view")]),
+]
+
+
+def peak_rss_kb():
+    """Szczyt RSS procesu (VmHWM) w KB"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def worker(name, out, repeat, paths):
+    method = METHODS[name]
+    start_rss = peak_rss_kb()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processed = method(paths, out)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(json.dumps({"seconds": best, "bytes": processed, "rss": peak_rss_kb(), "start_rss": start_rss}))
+
+
+def measure(name, out, repeat, paths):
+    result = subprocess.run([sys.executable, __file__, "--worker", name, "--out", out,
+                             "--repeat", str(repeat)] + [str(p) for p in paths],
+                            check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
+
+
+def check(ok, text):
+    print(f"  {'✅' if ok else '❌'} {text}")
+    return ok
+
+
+def check_correctness(wavs, uf2s, tmp):
+    print("Poprawność:")
+    ok = True
+    path = wavs[0]
+    with open(path, "rb") as f:
+        data = f.read()
+    ok &= check(file_digest(path) == hashlib.md5(data).hexdigest() and
+                file_digest(path, "sha256") == hashlib.sha256(data).hexdigest(),
+                "sumy MD5 i SHA-256 zgodne z hashlib")
+    empty = os.path.join(tmp, "empty.bin")
+    open(empty, "wb").close()
+    ok &= check(file_digest(empty) == hashlib.md5(b"").hexdigest() and
+                copy_file(empty, empty + ".copy", "md5") == hashlib.md5(b"").hexdigest(),
+                "pusty plik")
+
+    target = os.path.join(tmp, "copy.wav")
+    digest = copy_file(path, target, "md5")
+    with open(target, "rb") as f:
+        same = f.read() == data
+    ok &= check(same and digest == hashlib.md5(data).hexdigest() and
+                int(os.stat(target).st_mtime) == int(os.stat(path).st_mtime),
+                "kopia identyczna, suma z jednego odczytu, czas modyfikacji zachowany")
+
+    rng = random.Random(1)
+    with wave.open(str(path), "rb") as ref, WavView(path) as wav:
+        ok &= check((wav.channels, wav.sample_rate, wav.bits, wav.frames) ==
+                    (ref.getnchannels(), ref.getframerate(), 8 * ref.getsampwidth(), ref.getnframes()),
+                    f"nagłówek zgodny z modułem wave: {wav!r}")
+        same = True
+        for _ in range(20):
+            start = rng.randrange(wav.frames)
+            ref.setpos(start)
+            same &= wav.frames_view(start, 1000) == ref.readframes(1000)
+        samples = wav.samples()
+        ok &= check(same and isinstance(wav.frames_view(0, 1), memoryview) and
+                    len(samples) == wav.frames * 2 and
+                    samples[1] == struct.unpack_from("<h", data, 44 + 2)[0],
+                    "ramki (wycinki memoryview) i próbki 'h' zgodne z plikiem")
+        del samples
+
+    with Uf2View(uf2s[0]) as uf2:
+        payload = uf2.verify()
+        ok &= check(payload == len(uf2) * 256 and uf2.family() == RP2040_FAMILY,
+                    f"UF2: {len(uf2)} bloków, {payload // 1024} KB danych, rodzina RP2040")
+    broken = os.path.join(tmp, "broken.uf2")
+    with open(uf2s[0], "rb") as f:
+        raw = bytearray(f.read(UF2_BLOCK * 4))
+    raw[UF2_BLOCK * 2] ^= 0xFF
+    with open(broken, "wb") as f:
+        f.write(raw)
+    try:
+        with Uf2View(broken) as uf2:
+            uf2.verify()
+        rejected = False
+    except ValueError:
+        rejected = True
+    ok &= check(rejected, "uszkodzony blok UF2 odrzucony")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrola i benchmark dostępu do plików (media.py)")
+    parser.add_argument("--dir", help="Katalog z plikami .wav i .uf2 (domyślnie: wygenerowane)")
+    parser.add_argument("--size-mb", type=int, default=64, help="Łączny rozmiar wygenerowanych plików WAV (MB)")
+    parser.add_argument("--files", type=int, default=4, help="Liczba wygenerowanych plików WAV")
+    parser.add_argument("--repeat", type=int, default=3, help="Powtórzenia pomiaru (najlepszy wynik)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.out, args.repeat, args.paths)
+        return
+
+    tmp = tempfile.mkdtemp()
+    try:
+        if args.dir:
+            source = Path(args.dir)
+        else:
+            source = Path(tmp) / "media"
+            source.mkdir()
+            size = args.size_mb * (1 << 20) // args.files
+            for i in range(args.files):
+                write_wav(source / f"track{i}.wav", size)
+            write_uf2(source / "firmware.uf2", max(UF2_BLOCK * 4, args.size_mb * (1 << 20) // 8))
+        wavs = sorted(str(p) for p in source.rglob("*.wav"))
+        uf2s = sorted(str(p) for p in source.rglob("*.uf2"))
+        if not wavs or not uf2s:
+            print("❌ Katalog musi zawierać pliki .wav i .uf2")
+            sys.exit(1)
+
+        ok = check_correctness(wavs, uf2s, tmp)
+
+        out = os.path.join(tmp, "out")
+        os.mkdir(out)
+        files = {"wav": wavs, "uf2": uf2s}
+        idle = measure("hash_mmap", out, 1, [os.path.join(tmp, "empty.bin")])["rss"]
+        for title, kind, methods in GROUPS:
+            size = sum(os.path.getsize(p) for p in files[kind])
+            print(f"\n⏱️  {title}: {len(files[kind])} plików, {size / (1 << 20):.0f} MB "
+                  f"(RSS pustego procesu {idle / 1024:.1f} MB):")
+            results = []
+            for label, name in methods:
+                result = measure(name, out, args.repeat, files[kind])
+                rate = result["bytes"] / result["seconds"] / (1 << 20)
+                results.append(rate)
+                print(f"  {label:30} {rate:8.0f} MB/s, szczyt RSS {result['rss'] / 1024:6.1f} MB "
+                      f"(+{max(0, result['rss'] - idle) / 1024:4.1f} MB)")
+            print(f"  media.py: {results[1] / results[0]:.2f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
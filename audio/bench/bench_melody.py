@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Melodie z src3/main.py w symulatorze picosim (zegar wirtualny).
+
+1. RTTTL: częstotliwości i czasy przykładowych nut (strój A4 = 440 Hz).
+2. Tempo: czas odtwarzania MARIO_THEME, TETRIS_THEME, JINGLE_BELLS i melodii
+   RTTTL ze skompilowanych zdarzeń w porównaniu z czasem nominalnym oraz
+   brak przerw w strumieniu próbek między nutami. (Drgania tempa
+   dotychczasowego sleep(0.01) zależą od interpretera na Pico - zegar
+   wirtualny ich nie odtwarza.)
+3. Kompilacja: czas i rozmiar listy zdarzeń wobec listy krotek; melodia
+   zmieniona w miejscu kompilowana od nowa, ograniczona liczba wpisów.
+4. Pamięć podręczna: pierwsze odtworzenie renderuje do pliku, kolejne
+   czyta plik; po przekroczeniu limitu usuwane są najdawniej używane
+   nagrania (LRU); pozostałości przerwanego renderowania (.tmp) usuwane
+   przy starcie.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_melody.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "audio", "src3"))
+
+import picosim
+
+ITCHY = "itchy:d=8,o=6,b=160:c,a5,4p,c,a,4p,c,a5,c,a5,c,a,4p,p,c,d,e,p,e,f,g,4p,d,c,4d,f,4a#,4a,2c7"
+
+
+def check_rtttl():
+    from melody import parse_rtttl, ARTICULATION
+    name, notes = parse_rtttl("t:d=4,o=5,b=120:a,8a4,c#6,p,2g.,16h")
+    sounding = [n for n in notes if n[0]]
+    expected = [(880.0, 0.5), (440.0, 0.25), (1108.73, 0.5), (783.99, 1.5), (987.77, 0.125)]
+    ok = name == "t" and len(sounding) == len(expected)
+    for (freq, seconds), (want_freq, want_seconds) in zip(sounding, expected):
+        ok = ok and abs(freq - want_freq) < 0.01 and abs(seconds + ARTICULATION - want_seconds) < 1e-9
+    ok = ok and (0, 0.5) in notes
+    try:
+        parse_rtttl("zla:d=4:x")
+        ok = False
+    except ValueError:
+        pass
+    print(f"{'✅' if ok else '❌'} RTTTL: {len(notes)} zdarzeń, częstotliwości i czasy zgodne")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Melodie: kompilacja, tempo, pamięć podręczna")
+    parser.add_argument("--cache-bytes", type=int, default=400 * 1024, help="Limit pamięci podręcznej")
+    args = parser.parse_args()
+
+    clock = picosim.install(virtual=True)
+    import main as player_main
+    from melody import MelodyCache, compile_sequence, parse_rtttl
+
+    audio = player_main.audio
+    ok = check_rtttl()
+
+    themes = [("MARIO_THEME", player_main.MARIO_THEME), ("TETRIS_THEME", player_main.TETRIS_THEME),
+              ("JINGLE_BELLS", player_main.JINGLE_BELLS), ("itchy (RTTTL)", ITCHY)]
+
+    print(f"\nTempo (czas nominalny z odstępem 10 ms po nucie):")
+    print(f"{'melodia':16} {'nominalnie':>11} {'odtworzona':>11} {'przerwy':>8}")
+    for name, sequence in themes:
+        if isinstance(sequence, str):
+            nominal = sum(d for _, d in parse_rtttl(sequence)[1])
+        else:
+            nominal = sum(d for _, d in sequence) + 0.01 * len(sequence)
+
+        start = clock.now_us()
+        first = len(audio.pwm.times)
+        audio.play_sequence(sequence)
+        played = (clock.now_us() - start) / 1e6
+        # Przerwy w strumieniu zdarzeń (pauzy grane są jako wypełnienie 0, bez przerw)
+        times = audio.pwm.times[first:]
+        period = 1e6 / audio.pwm.freq()
+        gaps = sum(1 for i in range(2, len(times) - 1) if times[i] - times[i - 1] > 1.5 * period)
+        good = abs(played - nominal) < 0.002 and gaps == 0
+        ok = ok and good
+        print(f"{name:16} {nominal:10.3f}s {played:10.3f}s {gaps:8} {'✅' if good else '❌'}")
+
+    sequence = player_main.TETRIS_THEME
+    start = time.perf_counter()
+    for _ in range(200):
+        events = compile_sequence(sequence, 44100, 0.01)
+    compile_us = (time.perf_counter() - start) / 200 * 1e6
+    tuples = sys.getsizeof(sequence) + sum(sys.getsizeof(note) for note in sequence)
+    # Melodia zmieniona w miejscu kompilowana od nowa, liczba wpisów ograniczona
+    melody = list(player_main.MARIO_THEME)
+    before = audio.compile(melody)
+    melody[0] = (880, melody[0][1])
+    changed = audio.compile(melody) != before
+    for i in range(3 * player_main.COMPILED_MAX):
+        audio.compile([(200 + i, 0.05)])
+    audio.play_together()
+    good = changed and len(audio.compiled) <= player_main.COMPILED_MAX
+    print(f"\n{'✅' if good else '❌'} Kompilacja: zmiana w miejscu widoczna, "
+          f"{len(audio.compiled)}/{player_main.COMPILED_MAX} wpisów, play_together() bez melodii")
+    ok = ok and good
+    print(f"\nKompilacja TETRIS_THEME: {compile_us:.0f} µs, {len(events) // 2} zdarzeń, "
+          f"{len(events) * 4} B (lista krotek: {tuples} B na CPython)")
+
+    directory = tempfile.mkdtemp()
+    audio.cache = MelodyCache(os.path.join(directory, "melodies"), args.cache_bytes)
+    print(f"\nPamięć podręczna (limit {args.cache_bytes // 1024} KB):")
+    # Trzy melodie dwa razy (renderowanie, potem plik), na końcu najdłuższa
+    for name, sequence in themes[:3] + themes[:3] + themes[3:]:
+        audio.play_sequence(sequence)
+        cache = audio.cache
+        used = sum(size for _, size, _ in cache.files())
+        print(f"  {name:16} trafienia {cache.hits}, chybienia {cache.misses}, "
+              f"usunięte {cache.evictions}, zajęte {used // 1024} KB")
+        ok = ok and used <= args.cache_bytes
+    cache = audio.cache
+    good = cache.hits == 3 and cache.misses == 4 and cache.evictions >= 1
+    print(f"{'✅' if good else '❌'} Ponowne odtworzenie z pliku, limit rozmiaru zachowany")
+    ok = ok and good
+
+    # LRU: A i B w pamięci, A odtworzone ponownie - przy braku miejsca usuwane B
+    melodies = os.path.join(directory, "lru")
+    os.mkdir(melodies)
+    stray = os.path.join(melodies, "0000000000000000.wav.tmp")
+    open(stray, "wb").close()
+    audio.cache = cache = MelodyCache(melodies, 1 << 30)
+    (_, first), (_, second) = themes[:2]
+    rendered = []
+    for sequence in (first, second, first):
+        audio.play_sequence(sequence)
+        rendered += [path for _, _, path in cache.files() if path not in rendered]
+    kept, dropped = rendered
+    cache.max_bytes = sum(size for _, size, _ in cache.files())
+    cache.evict(1)
+    good = (not os.path.exists(stray) and os.path.exists(kept) and not os.path.exists(dropped) and
+            not [n for n in os.listdir(melodies) if n.endswith(".tmp")])
+    print(f"{'✅' if good else '❌'} Usuwane najdawniej używane nagranie, pliki .tmp sprzątnięte przy starcie")
+    ok = ok and good
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark miksera src3 (mixer.py) na CPython.
+
+1. Poprawność (picosim, zegar wirtualny): jeden głos odtwarzany bez zmian,
+   suma dwóch głosów, obcięcie przy przesterowaniu, głośność główna
+   z AudioPlayer.set_volume, zajmowanie miejsc (priorytet, potem wiek)
+   oraz głos WAV.
+2. Koszt: czas wypełnienia bloku dla 0..N głosów tonów i WAV, koszt
+   jednego głosu na próbkę i wynikająca z niego liczba głosów na MHz
+   przy 22,05 i 44,1 kHz. Liczby dotyczą CPython na hoście (MHz hosta
+   z /proc/cpuinfo albo --host-mhz) - na Pico z emiterem native koszt
+   na cykl jest inny, ale proporcje między głosami zostają.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_mixer.py --voices 8
+"""
+import argparse
+import io
+import os
+import struct
+import sys
+import time
+from array import array
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "audio", "src3"))
+
+import picosim
+
+
+def host_mhz():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("cpu MHz"):
+                    return float(line.split(":")[1])
+    except OSError:
+        pass
+    return 0.0
+
+
+def wav_bytes(samples, rate=44100):
+    data = struct.pack("<%dh" % len(samples), *samples)
+    return (b"RIFF" + struct.pack("<I", len(data) + 36) + b"WAVEfmt " +
+            struct.pack("<IHHIIHH", 16, 1, 1, rate, rate * 2, 2, 16) +
+            b"data" + struct.pack("<I", len(data)) + data)
+
+
+def expected_duty(value, scale):
+    value = max(-32768, min(32767, value))
+    return (((value + 32768) >> 4) * scale) >> 12
+
+
+def check(name, good):
+    print(f"  {'✅' if good else '❌'} {name}")
+    return good
+
+
+def check_mixer():
+    from mixer import Mixer
+    from pcmstream import PCMStream
+    from wavfile import WavFile
+    from waveforms import phase_step
+
+    print("Poprawność:")
+    stream = PCMStream(4, block=256)
+    scale = stream.scale
+    ok = True
+
+    def render(mixer, frames):
+        dst = array("H", [0] * frames)
+        mixer._fill(dst, frames)
+        return dst
+
+    # Jeden głos, pełna głośność: wypełnienie = wartości z tablicy
+    mixer = Mixer(stream)
+    table = mixer.table("triangle")
+    step = phase_step(440, stream.sample_rate)
+    mixer.tone(440, 1.0)
+    dst = render(mixer, 256)
+    want = [expected_duty(table[((i * step) & 0xFFFFFF) >> 16], scale) for i in range(256)]
+    ok &= check("jeden głos = tablica przebiegu", list(dst) == want)
+
+    # Dwa głosy po 50 %: suma połówek
+    mixer = Mixer(stream)
+    mixer.tone(440, 1.0, volume=50)
+    mixer.tone(660, 1.0, volume=50, shape="square")
+    square = mixer.table("square")
+    step2 = phase_step(660, stream.sample_rate)
+    dst = render(mixer, 256)
+    want = [expected_duty((table[((i * step) & 0xFFFFFF) >> 16] * 128 >> 8) +
+                          (square[((i * step2) & 0xFFFFFF) >> 16] * 128 >> 8), scale)
+            for i in range(256)]
+    ok &= check("dwa głosy po 50 % = suma", list(dst) == want)
+
+    # Przesterowanie: obcięcie zamiast zawinięcia
+    mixer = Mixer(stream)
+    for _ in range(4):
+        mixer.tone(100, 1.0, shape="square")
+    dst = render(mixer, 256)
+    ok &= check(f"4 prostokąty pełnej skali: obcięte {mixer.clipped} próbek, zakres "
+                f"{min(dst)}..{max(dst)} z 0..{scale - 1}",
+                mixer.clipped == 256 and max(dst) <= scale - 1)
+
+    # Głośność główna
+    mixer = Mixer(stream, volume=25)
+    mixer.tone(440, 1.0)
+    dst = render(mixer, 256)
+    want = [expected_duty(table[((i * step) & 0xFFFFFF) >> 16] * 64 >> 8, scale) for i in range(256)]
+    ok &= check("głośność główna 25 %", list(dst) == want)
+
+    # Zajmowanie miejsc: najniższy priorytet, potem najstarszy; niższy priorytet odrzucony
+    mixer = Mixer(stream, voices=3)
+    slots = [mixer.tone(440, 1.0, priority=p) for p in (1, 0, 0)]
+    stolen = mixer.tone(440, 1.0, priority=0)       # zastępuje starszy z priorytetem 0
+    stolen2 = mixer.tone(440, 1.0, priority=2)      # zastępuje drugi głos z priorytetem 0
+    rejected = mixer.tone(440, 1.0, priority=-1)    # wszystkie ważniejsze
+    ok &= check(f"zajmowanie miejsc: {slots} -> {stolen}, {stolen2}, odrzucony {rejected}",
+                slots == [0, 1, 2] and stolen == 1 and stolen2 == 2 and rejected is None
+                and mixer.steals == 2 and mixer.rejected == 1)
+
+    # Głos WAV i ton razem
+    samples = [((i * 523) % 20000) - 10000 for i in range(300)]
+    mixer = Mixer(stream)
+    mixer.wav(WavFile(io.BytesIO(wav_bytes(samples))))
+    mixer.tone(440, 300 / 44100)
+    dst = render(mixer, 256)
+    want = [expected_duty(samples[i] + table[((i * step) & 0xFFFFFF) >> 16], scale) for i in range(256)]
+    ok &= check("głos WAV + ton", list(dst) == want)
+
+    # AudioPlayer.set_volume ustawia głośność miksera, play_together gra bez przerw
+    import main as player_main
+    audio = player_main.audio
+    audio.set_volume(40)
+    first = len(audio.pwm.times)
+    audio.play_together(player_main.MARIO_THEME, player_main.TETRIS_THEME)
+    times = audio.pwm.times[first:]
+    expected = max(sum(d for _, d in theme) + 0.01 * len(theme)
+                   for theme in (player_main.MARIO_THEME, player_main.TETRIS_THEME))
+    played = (times[-2] - times[1]) / 1e6 if len(times) > 2 else 0
+    ok &= check(f"set_volume(40) -> mikser {audio.mixer.master}/256, play_together {played:.3f} s "
+                f"(najdłuższa melodia {expected:.3f} s)",
+                audio.mixer.master == 102 and abs(played - expected) < 0.002)
+    audio.set_volume(100)
+    return ok, stream
+
+
+def block_cost(stream, make_voices, repeat):
+    """Czas wypełnienia jednego bloku (s), najlepszy z trzech pomiarów"""
+    from mixer import Mixer
+    mixer = Mixer(stream, voices=max(1, len(make_voices)))
+    for make in make_voices:
+        make(mixer)
+    dst = array("H", [0] * stream.block)
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for voice in mixer.slots:
+                if voice is not None:
+                    voice.remaining = 1 << 30
+                    if hasattr(voice, "wav"):
+                        voice.wav.rewind()
+            mixer._fill(dst, stream.block)
+        elapsed = (time.perf_counter() - start) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark miksera głosów")
+    parser.add_argument("--voices", type=int, default=8, help="Maks. liczba głosów w pomiarze")
+    parser.add_argument("--repeat", type=int, default=200, help="Powtórzenia pomiaru bloku")
+    parser.add_argument("--host-mhz", type=float, default=0, help="Taktowanie hosta (MHz)")
+    args = parser.parse_args()
+
+    picosim.install(virtual=True)
+    ok, stream = check_mixer()
+
+    from wavfile import WavFile
+    mhz = args.host_mhz or host_mhz()
+    block = stream.block
+    data = wav_bytes([(i * 37) % 30000 - 15000 for i in range(block * 4)])
+
+    def tone(mixer):
+        mixer.tone(440, 10.0, volume=10)
+
+    def wav(mixer):
+        mixer.wav(WavFile(io.BytesIO(data)), volume=10)
+
+    print(f"\n⏱️  Wypełnienie bloku {block} próbek (CPython, host {mhz:.0f} MHz):")
+    print(f"{'głosy':>6} {'tony µs':>9} {'WAV µs':>9}")
+    base = block_cost(stream, [], args.repeat)
+    costs = {}
+    for count in range(0, args.voices + 1, max(1, args.voices // 4)):
+        tones = block_cost(stream, [tone] * count, args.repeat)
+        wavs = block_cost(stream, [wav] * count, args.repeat)
+        costs[count] = (tones, wavs)
+        print(f"{count:6} {tones * 1e6:9.0f} {wavs * 1e6:9.0f}")
+
+    top = max(costs)
+    if top and mhz:
+        for kind, index in (("ton", 0), ("WAV", 1)):
+            per_sample = (costs[top][index] - base) / top / block
+            for rate in (22050, 44100):
+                needed = per_sample * rate * mhz  # MHz na jeden głos
+                print(f"  {kind:4} przy {rate / 1000:.2f} kHz: {needed:7.1f} MHz na głos, "
+                      f"{1 / needed:.4f} głosów/MHz")
+        overhead = base / block * 44100 * mhz
+        print(f"  stały koszt wyjścia (obcięcie + PWM) przy 44.1 kHz: {overhead:.1f} MHz")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
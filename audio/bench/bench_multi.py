@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark wdrażania na wiele Pico naraz (audio/multi_deploy.py).
+
+Pico zastępują katalogi w katalogu tymczasowym, nazwane jak woluminy
+montowane przez system: CIRCUITPY, CIRCUITPY1, ... (boot_out.txt z UID
+płytki) i RPI-RP2, RPI-RP21 (INFO_UF2.TXT, bootloader). Zapis na flash
+przez USB symuluje opóźnienie kopiowania (--flash-kbs), każde Pico
+niezależnie - jak osobne łącza USB.
+
+1. wyszukiwanie: wszystkie woluminy, stałe i różne id, inne katalogi
+   pominięte;
+2. wdrożenie na wszystkie CIRCUITPY: po kolei wobec puli wątków;
+   zawartość każdego Pico, logi urządzeń, podsumowanie, kopie zapasowe
+   w osobnych katalogach, wyjście wątków z prefiksem [id] bez przeplatania;
+3. weryfikacja (odczyt zwrotny) - wykrywa Pico zmienione poza wdrożeniem;
+4. UF2 na wszystkie woluminy bootloadera;
+5. przywrócenie kopii na wszystkich Pico.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_multi.py --devices 4 --flash-kbs 1024
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "audio"))
+sys.path.insert(0, os.path.join(ROOT, "audio", "bench"))
+
+import deploy_circuit
+from backup import BackupStore
+from bench_backup import check, device_state
+from bench_deploy import DirectoryFinder, make_tree, same_tree
+from bench_media import write_uf2
+from deploy_circuit import PicoRP2Deployer
+from disc import PicoDiskFinder
+from multi_deploy import MultiDeployer
+
+
+def make_devices(root, circuitpy, bootloaders):
+    """Woluminy jak po podłączeniu kilku płytek; obok katalog, który nie jest Pico"""
+    for i in range(circuitpy):
+        path = root / (f"CIRCUITPY{i}" if i else "CIRCUITPY")
+        path.mkdir(parents=True)
+        (path / "boot_out.txt").write_text(
+            f"Adafruit CircuitPython 8.2.0 on 2023-07-05; Raspberry Pi Pico with rp2040\n"
+            f"Board ID:raspberry_pi_pico\nUID:E6614103E7{i:06X}\n")
+    for i in range(bootloaders):
+        path = root / (f"RPI-RP2{i}" if i else "RPI-RP2")
+        path.mkdir(parents=True)
+        (path / "INDEX.HTM").write_text("<html><head><meta http-equiv='refresh' content='0;URL=...'></head></html>\n")
+        (path / "INFO_UF2.TXT").write_text("UF2 Bootloader v3.0\nModel: Raspberry Pi RP2\nBoard-ID: RPI-RP2\n")
+    (root / "USB_STICK").mkdir()
+
+
+def throttle(kbs):
+    """Kopiowanie na Pico z opóźnieniem zapisu na flash (kbs KB/s); zwraca przywrócenie"""
+    original = deploy_circuit.copy_file
+
+    def copy_file(source, target, algorithm=None, *args, **kwargs):
+        digest = original(source, target, algorithm, *args, **kwargs)
+        time.sleep(os.path.getsize(target) / (kbs * 1024))
+        return digest
+
+    deploy_circuit.copy_file = copy_file
+    return lambda: setattr(deploy_circuit, "copy_file", original)
+
+
+def multi(tmp, workers=None):
+    config = PicoRP2Deployer().config
+    config.update(backup_dir=str(tmp / "backups"), manifest_cache_dir=str(tmp / "cache"))
+    return MultiDeployer(config, finder_factory=lambda path: DirectoryFinder(path, size=1 << 40),
+                         workers=workers, log_dir=str(tmp / "logs"))
+
+
+def quiet(run):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        result = run()
+    return result, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrola i benchmark wdrażania na wiele Pico naraz")
+    parser.add_argument("--devices", type=int, default=4, help="Liczba Pico z CircuitPython")
+    parser.add_argument("--bootloaders", type=int, default=2, help="Liczba Pico w trybie bootloadera")
+    parser.add_argument("--files", type=int, default=40, help="Liczba plików w drzewie")
+    parser.add_argument("--size", type=int, default=16384, help="Rozmiar pliku .py (B); .wav 8 razy większe")
+    parser.add_argument("--flash-kbs", type=int, default=1024, help="Symulowany zapis na flash (KB/s, 0 - bez)")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    os.chdir(tmp)  # logi wdrożeń
+    media, source = tmp / "media", tmp / "project"
+    make_devices(media, args.devices, args.bootloaders)
+    make_tree(source, args.files, args.size)
+    total = sum(f.stat().st_size for f in source.rglob("*") if f.is_file())
+    print(f"Drzewo: {args.files} plików, {total / 1024:.0f} KB; Pico: {args.devices} CIRCUITPY + "
+          f"{args.bootloaders} RPI-RP2, zapis {args.flash_kbs or '∞'} KB/s na każde\n")
+
+    ok = True
+    finder = PicoDiskFinder()
+    found = finder.find_devices([str(media)])
+    ids = [d["id"] for d in found]
+    ok &= check(len(found) == args.devices + args.bootloaders and len(set(ids)) == len(ids) and
+                ids == [d["id"] for d in finder.find_devices([str(media)])] and
+                sum(d["kind"] == "bootloader" for d in found) == args.bootloaders and
+                all(d["serial"] for d in found if d["kind"] == "circuitpython"),
+                f"wyszukiwanie: {len(found)} woluminów, stałe i różne id (np. {ids[0]}), USB_STICK pominięty")
+
+    restore = throttle(args.flash_kbs) if args.flash_kbs else lambda: None
+    try:
+        circuitpy = [d for d in found if d["kind"] == "circuitpython"]
+        initial = {d["id"]: device_state(Path(d["path"])) for d in circuitpy}
+
+        # Po kolei: pierwotnie jedno Pico na raz (po kolejnym podłączeniu), na kopii woluminów
+        serial_root = tmp / "serial"
+        shutil.copytree(media, serial_root)
+        start = time.perf_counter()
+        for device in circuitpy:
+            deployer = PicoRP2Deployer()
+            deployer.finder = DirectoryFinder(serial_root / device["label"], size=1 << 40)
+            deployer.config.update(make_backup=False, manifest_cache_dir=str(tmp / "serial_cache"))
+            ok &= quiet(lambda: deployer.deploy(source))[0]
+        serial = time.perf_counter() - start
+
+        orchestrator = multi(tmp)
+        start = time.perf_counter()
+        result, output = quiet(lambda: orchestrator.run(orchestrator.devices(roots=[str(media)],
+                                                                             kind="circuitpython"), "deploy",
+                                                        str(source)))
+        parallel = time.perf_counter() - start
+    finally:
+        restore()
+
+    logs = [Path(r["log"]) for r in orchestrator.results]
+    summary = list((tmp / "logs").glob("multi_*/summary.txt"))
+    ok &= check(result and all(same_tree(source, Path(d["path"])) for d in circuitpy) and
+                all(log.exists() and log.stat().st_size for log in logs) and len(summary) == 1 and
+                all(len(BackupStore(tmp / "backups" / d["id"]).snapshots()) == 1 for d in circuitpy) and
+                not list(media.glob("RPI-RP2*/lib")),
+                f"wdrożenie na {len(circuitpy)} Pico: zawartość zgodna, {len(logs)} logów urządzeń, "
+                f"podsumowanie, kopie zapasowe w pico_backups/<id>/, bootloadery pominięte")
+    prefixed = re.compile(r"^\[([\w.-]+)\] ")
+    device_lines = [line for line in output.splitlines() if prefixed.match(line)]
+    ok &= check(all(prefixed.match(line).group(1) in ids and
+                    not any(f"[{i}] " in line[prefixed.match(line).end():] for i in ids) for line in device_lines) and
+                {prefixed.match(line).group(1) for line in device_lines} == {d["id"] for d in circuitpy},
+                f"wyjście urządzeń: {len(device_lines)} linii z prefiksem [id], bez przeplatania")
+
+    tampered = circuitpy[-1]
+    (Path(tampered["path"]) / "lib" / "mod0" / "file1.py").write_bytes(b"zmienione na Pico")
+    orchestrator = multi(tmp)
+    result, _ = quiet(lambda: orchestrator.run(orchestrator.devices(roots=[str(media)], kind="circuitpython"),
+                                               "verify", str(source)))
+    failed = [r["device"]["id"] for r in orchestrator.results if not r["ok"]]
+    ok &= check(not result and failed == [tampered["id"]],
+                f"weryfikacja: wykryte zmienione Pico ({failed[0] if failed else '-'}), pozostałe zgodne")
+
+    uf2 = tmp / "firmware.uf2"
+    write_uf2(uf2, 64 * 1024)
+    orchestrator = multi(tmp)
+    bootloaders = orchestrator.devices(roots=[str(media)], kind="bootloader")
+    result, _ = quiet(lambda: orchestrator.run(bootloaders, "uf2", str(uf2)))
+    ok &= check(result and len(orchestrator.results) == args.bootloaders and
+                all((Path(d["path"]) / uf2.name).read_bytes() == uf2.read_bytes() for d in bootloaders),
+                f"UF2 na {len(bootloaders)} woluminy bootloadera")
+
+    orchestrator = multi(tmp)
+    result, _ = quiet(lambda: orchestrator.run(orchestrator.devices(roots=[str(media)], kind="circuitpython"),
+                                               "rollback"))
+    restored = [d for d in circuitpy if device_state(Path(d["path"])) == initial[d["id"]]]
+    ok &= check(result and len(restored) == len(circuitpy),
+                f"przywrócenie kopii sprzed wdrożenia na {len(restored)} Pico")
+
+    print(f"\n⏱️  Wdrożenie na {len(circuitpy)} Pico: po kolei {serial:.2f} s, pula wątków {parallel:.2f} s "
+          f"({serial / parallel:.1f}x)")
+    os.chdir(ROOT)
+    shutil.rmtree(tmp, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Porównanie odtwarzania PCM w src3 na CPython (symulator picosim, zegar wirtualny).
+
+1. przed: AudioPlayer.play - f.read(2), duty_u16() i sleep_us(20) na próbkę,
+2. PCMStream z DMA taktowanym przez PWM (rp2.DMA),
+3. PCMStream bez DMA - duty_u16() w rytmie terminów ticks_us.
+
+Dla każdego wariantu: osiągnięte tempo próbek na PWM (odchyłka wysokości
+dźwięku), przerwy dłuższe niż 1,5 okresu, wartości poza zakresem PWM.
+Na końcu czas przeliczenia jednego bloku na CPython w porównaniu
+z czasem odtwarzania bloku.
+
+    python audio/bench/bench_pcmstream.py --seconds 1 --block 512
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "audio", "src3"))
+
+import picosim
+
+SAMPLE_RATE = 44100
+
+
+def write_tone(path, seconds, frequency=440):
+    count = int(SAMPLE_RATE * seconds)
+    samples = [int(32767 * 0.8 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))
+               for i in range(count)]
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(struct.pack("<%dh" % count, *samples))
+
+
+def legacy_play(path):
+    """Dotychczasowa pętla z AudioPlayer.play (łącznie z konwersją bez znaku)"""
+    from machine import Pin, PWM
+    import time as mptime
+
+    pwm = PWM(Pin(1))
+    pwm.freq(SAMPLE_RATE)
+    pwm.duty_u16(0)
+    with open(path, "rb") as f:
+        f.seek(44)
+        while True:
+            sample = f.read(2)
+            if not sample or len(sample) != 2:
+                break
+            value = sample[0] | (sample[1] << 8)
+            pwm.duty_u16(value + 32768)
+            mptime.sleep_us(20)
+    pwm.duty_u16(0)
+    return pwm
+
+
+def stream_play(path, block, use_dma):
+    from pcmstream import PCMStream
+
+    stream = PCMStream(1, SAMPLE_RATE, block, use_dma=use_dma)
+    with open(path, "rb") as f:
+        f.seek(44)
+        stream.play(f)
+    stream.deinit()
+    return stream.pwm
+
+
+def show(name, pwm):
+    result = picosim.pwm_report(pwm)
+    error = (result["rate"] / SAMPLE_RATE - 1) * 100
+    print(f"{name:26} {result['rate']:9.0f} Hz {error:+8.2f} % {result['gaps']:8} {pwm.clipped:10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark odtwarzania PCM przez PWM")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Długość nagrania testowego (s)")
+    parser.add_argument("--block", type=int, default=512, help="Liczba próbek w bloku")
+    parser.add_argument("--repeat", type=int, default=200, help="Powtórzenia pomiaru przeliczenia bloku")
+    args = parser.parse_args()
+
+    picosim.install(virtual=True)
+    path = os.path.join(tempfile.mkdtemp(), "test.wav")
+    write_tone(path, args.seconds)
+
+    print(f"Odtwarzanie {args.seconds:.1f} s przy {SAMPLE_RATE} Hz (blok {args.block} próbek):")
+    print(f"{'wariant':26} {'tempo':>12} {'odchyłka':>10} {'przerwy':>8} {'poza zakr.':>10}")
+    show("przed: read(2)+sleep_us", legacy_play(path))
+    show("po: PCMStream + DMA", stream_play(path, args.block, True))
+    show("po: PCMStream bez DMA", stream_play(path, args.block, False))
+
+    import pcmstream
+    from array import array
+    raw = bytearray(array("h", range(-args.block // 2, args.block // 2)).tobytes())
+    duty = array("H", [0] * args.block)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        pcmstream._mono16(raw, duty, args.block, 2834)
+    convert = (time.perf_counter() - start) / args.repeat * 1000000
+    budget = args.block * 1000000 / SAMPLE_RATE
+    print(f"\n⏱️  Przeliczenie bloku na CPython: {convert:.0f} µs "
+          f"(odtwarzanie bloku: {budget:.0f} µs, {convert / budget * 100:.0f} % czasu)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Benchmark potoku wdrożenia (audio/deploy_circuit.py) wobec pierwotnej
+implementacji: suma MD5 każdego źródła (f.read(4096)), shutil.copy2 po
+kolei, potem weryfikacja - drugi pełny odczyt MD5 każdego pliku z Pico.
+
+Potok: sumy plików do sprawdzenia w wątkach, kopiowanie z sumą
+zapisanych bajtów (BLAKE2b), bez odczytu zwrotnego; z --paranoid
+odczyt zwrotny z pominięciem pamięci podręcznej. Scenariusze:
+
+1. pełne wdrożenie drzewa;
+2. drzewo "dotknięte" (zmieniony mtime wszystkich plików, ta sama
+   zawartość) - potok liczy sumy w wątkach i niczego nie kopiuje.
+
+Pico zastępuje obraz FAT montowany przez pętlę (--fat: root, mkfs.vfat
+i obsługa vfat w jądrze), a gdy to niemożliwe - katalog lokalny.
+Kończy się kodem 1, gdy zawartość na Pico nie zgadza się ze źródłem.
+
+    sudo python audio/bench/bench_pipeline.py --fat --files 100
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "audio"))
+sys.path.insert(0, os.path.join(ROOT, "audio", "bench"))
+
+from bench_deploy import DirectoryFinder, same_tree
+from deploy_circuit import PicoRP2Deployer
+
+
+def mount_fat(tmp, size_mb):
+    """Obraz FAT32 zamontowany przez pętlę; (katalog, None) albo (None, powód)"""
+    if os.geteuid() != 0:
+        return None, "montowanie wymaga roota"
+    if not shutil.which("mkfs.vfat"):
+        return None, "brak mkfs.vfat (dosfstools)"
+    with open("/proc/filesystems") as f:
+        if "vfat" not in f.read():
+            return None, "jądro bez obsługi vfat"
+    image = tmp / "pico.img"
+    with open(image, "wb") as f:
+        f.truncate(size_mb << 20)
+    subprocess.run(["mkfs.vfat", "-F", "32", "-n", "CIRCUITPY", str(image)], check=True, capture_output=True)
+    mount = tmp / "fat"
+    mount.mkdir()
+    result = subprocess.run(["mount", "-o", "loop", str(image), str(mount)], capture_output=True, text=True)
+    if result.returncode:
+        return None, result.stderr.strip() or "mount nie powiódł się"
+    return mount, None
+
+
+def clear(device):
+    for item in device.iterdir():
+        if item.is_dir():
+            shutil.rmtree(item)
+        else:
+            item.unlink()
+
+
+def legacy_deploy(source, device):
+    """
+    Pierwotne wdrożenie: suma MD5, copy2, weryfikacja ponownym odczytem
+    (jak w oryginale - z pamięci podręcznej systemu, nie z urządzenia)
+    """
+    def checksum(path):
+        digest = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(4096), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    files = {}
+    for path in source.rglob("*"):
+        if path.is_file():
+            files[str(path.relative_to(source))] = checksum(path)
+    for rel_path in files:
+        target = device / rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source / rel_path, target)
+    for rel_path, digest in files.items():
+        if checksum(device / rel_path) != digest:
+            return False
+    return True
+
+
+def pipeline_deploy(tmp, source, device, **config):
+    deployer = PicoRP2Deployer()
+    deployer.finder = DirectoryFinder(device, size=1 << 40)
+    deployer.config.update(make_backup=False, manifest_cache_dir=str(tmp / "cache"), **config)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = deployer.deploy(source)
+    copied = sum(1 for e in deployer.deployment_log if e.startswith("Skopiowano"))
+    return ok, copied
+
+
+def timed(run, reset=None):
+    """Czas wywołania run; reset wykonywany przed pomiarem, bez wliczania"""
+    if reset:
+        reset()
+    start = time.perf_counter()
+    result = run()
+    return time.perf_counter() - start, result
+
+
+def make_tree(source, files, size):
+    """Moduły .py po size B i co ósmy plik - dźwięk 32 razy większy"""
+    for i in range(files):
+        big = i % 8 == 0
+        path = source / (f"sounds/clip{i}.wav" if big else f"lib/mod{i // 40}/file{i}.py")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(size * 32 if big else size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark potoku wdrożenia")
+    parser.add_argument("--files", type=int, default=100, help="Liczba plików w drzewie")
+    parser.add_argument("--size", type=int, default=32768, help="Rozmiar pliku .py (B); .wav 32 razy większe")
+    parser.add_argument("--fat", action="store_true", help="Pico jako obraz FAT montowany przez pętlę")
+    parser.add_argument("--workers", type=int, default=0, help="Wątki sum kontrolnych (domyślnie: do 4)")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    os.chdir(tmp)  # logi wdrożeń
+    source = tmp / "project"
+    make_tree(source, args.files, args.size)
+    total = sum(f.stat().st_size for f in source.rglob("*") if f.is_file())
+
+    device, mounted = None, False
+    if args.fat:
+        device, reason = mount_fat(tmp, max(64, total * 3 >> 20))
+        if device:
+            mounted = True
+        else:
+            print(f"⚠️  Obraz FAT niedostępny ({reason}) - Pico jako katalog lokalny")
+    if device is None:
+        device = tmp / "pico"
+        device.mkdir()
+
+    ok = True
+    try:
+        print(f"Drzewo: {args.files} plików, {total / (1 << 20):.1f} MB, Pico: "
+              f"{'obraz FAT (pętla)' if mounted else 'katalog lokalny'}\n")
+        workers = args.workers or None
+
+        def fresh():
+            clear(device)
+            shutil.rmtree(tmp / "cache", ignore_errors=True)
+
+        print("⏱️  Pełne wdrożenie:")
+        elapsed, good = timed(lambda: legacy_deploy(source, device), fresh)
+        ok &= good and same_tree(source, device)
+        base = elapsed
+        print(f"  {'pierwotne (MD5, copy2, odczyt zwrotny)':42} {elapsed:6.2f} s, {total / elapsed / (1 << 20):6.1f} MB/s")
+        for label, config in (("potok (BLAKE2b z zapisu)", {}),
+                              ("potok --paranoid (odczyt z urządzenia)", {"paranoid": True})):
+            config.setdefault("hash_workers", workers)
+            elapsed, (good, copied) = timed(lambda: pipeline_deploy(tmp, source, device, **config), fresh)
+            ok &= good and copied == args.files and same_tree(source, device)
+            print(f"  {label:42} {elapsed:6.2f} s, {total / elapsed / (1 << 20):6.1f} MB/s ({base / elapsed:.2f}x)")
+
+        print("\n⏱️  Drzewo dotknięte (nowy mtime, ta sama zawartość):")
+
+        def touch():
+            stamp = time.time() + 10
+            for path in source.rglob("*"):
+                if path.is_file():
+                    os.utime(path, (stamp, stamp))
+
+        elapsed, good = timed(lambda: legacy_deploy(source, device), touch)
+        ok &= good
+        base = elapsed
+        print(f"  {'pierwotne':42} {elapsed:6.2f} s, skopiowane {args.files}")
+
+        def deployed_then_touched():
+            fresh()
+            pipeline_deploy(tmp, source, device, hash_workers=workers)
+            touch()
+
+        elapsed, (good, copied) = timed(lambda: pipeline_deploy(tmp, source, device, hash_workers=workers),
+                                        deployed_then_touched)
+        ok &= good and copied == 0 and same_tree(source, device)
+        print(f"  {'potok (sumy w wątkach, bez kopiowania)':42} {elapsed:6.2f} s, skopiowane {copied} "
+              f"({base / elapsed:.2f}x)")
+    finally:
+        if mounted:
+            subprocess.run(["umount", str(device)], check=False)
+        os.chdir(ROOT)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"\n  {'✅' if ok else '❌'} zawartość Pico zgodna ze źródłem po każdym wdrożeniu")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
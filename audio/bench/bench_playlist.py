@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Odtwarzanie playlisty w audio/src1 (AudioManager) w symulatorze picosim.
+
+1. Przejścia między utworami (zegar wirtualny, usb_audio zapisuje czas
+   każdego odtworzenia): dotychczasowa pętla co 1 ms z otwieraniem pliku
+   i WaveFile przy każdym utworze oraz AudioManager z playlistą
+   w buforze pierścieniowym i następnym utworem otwartym zawczasu.
+   Raportowane są przerwy między utworami, liczba obudzeń pętli
+   i liczniki urządzenia (wypełnienia, przejścia, niedobory). Co drugi
+   utwór ma fragment LIST przed danymi (nagłówek dłuższy niż 44 B).
+   Playlista z plikiem, którego nie ma - pominięty, odtwarzanie trwa.
+2. Koszt przejścia dalej w playliście: list.pop(0) + append
+   wobec Playlist.advance() dla długich list (CPython).
+
+Kończy się kodem 1, gdy przejścia nie są ciągłe.
+
+    python audio/bench/bench_playlist.py --tracks 5 --loops 3
+"""
+import argparse
+import contextlib
+import io
+import os
+import struct
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "audio", "src1"))
+
+import picosim
+
+
+def write_wav(path, seconds, rate=22050, info=b""):
+    frames = int(seconds * rate)
+    data = bytes(frames * 2)
+    extra = b"LIST" + struct.pack("<I", len(info) + 4) + b"INFO" + info if info else b""
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", len(data) + len(extra) + 36) + b"WAVEfmt " +
+                struct.pack("<IHHIIHH", 16, 1, 1, rate, rate * 2, 2, 16) + extra +
+                b"data" + struct.pack("<I", len(data)) + data)
+
+
+def gaps(out, first):
+    spans = out.spans[first:]
+    return [spans[i][0] - spans[i - 1][1] for i in range(1, len(spans))]
+
+
+def legacy_run(device, names, plays):
+    """Dotychczasowy schemat: pop(0)/append, nowy plik i WaveFile, pętla co 1 ms"""
+    from audiocore import WaveFile
+    import time as mptime
+    playlist = list(names)
+    wakeups = 0
+    started = 0
+    while started < plays:
+        wakeups += 1
+        if not device.usb_audio.playing:
+            next_file = playlist.pop(0)
+            wave = WaveFile(open(f"{device.root}/{next_file}", "rb"))
+            device.usb_audio.play(wave)
+            playlist.append(next_file)
+            started += 1
+        mptime.sleep(0.001)
+    while device.usb_audio.playing:
+        mptime.sleep(0.001)
+    return wakeups
+
+
+def engine_run(manager, plays, name="main"):
+    import time as mptime
+    wakeups = 0
+    out = manager.audio_device.usb_audio
+    first = len(out.spans)
+    manager.play_playlist(name)
+    while len(out.spans) - first < plays:
+        wakeups += 1
+        mptime.sleep(manager.handle_usb_events() / 1000)
+    while out.playing:
+        mptime.sleep(0.001)
+    return wakeups
+
+
+def show(name, values, wakeups):
+    worst = max(values) if values else 0
+    average = sum(values) / len(values) if values else 0
+    print(f"  {name:32} przejść {len(values):3}, przerwa śr. {average:7.1f} µs, "
+          f"maks. {worst:6} µs, obudzeń pętli {wakeups:6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Przejścia między utworami w src1")
+    parser.add_argument("--tracks", type=int, default=5, help="Liczba utworów")
+    parser.add_argument("--loops", type=int, default=3, help="Liczba przejść przez playlistę")
+    parser.add_argument("--entries", type=int, default=10000, help="Długość listy w pomiarze advance")
+    args = parser.parse_args()
+
+    picosim.install(virtual=True)
+    import main as src1
+
+    root = tempfile.mkdtemp()
+    names = []
+    for i in range(args.tracks):
+        name = f"track{i}.wav"
+        write_wav(os.path.join(root, name), 0.2 + 0.1 * i, info=b"INAM" + struct.pack("<I", 4096) +
+                  bytes(4096) if i % 2 else b"")
+        names.append(name)
+    plays = args.tracks * args.loops
+
+    print(f"Przejścia ({args.tracks} utworów x {args.loops}, zegar wirtualny):")
+    device = src1.USBAudioDevice(root)
+    first = len(device.usb_audio.spans)
+    wakeups = legacy_run(device, names, plays)
+    show("przed: pętla 1 ms", gaps(device.usb_audio, first), wakeups)
+
+    manager = src1.AudioManager(src1.USBAudioDevice(root))
+    manager.create_playlist("main")
+    for name in names:
+        manager.add_to_playlist("main", name)
+    out = manager.audio_device.usb_audio
+    wakeups = engine_run(manager, plays)
+    values = gaps(out, 0)
+    show("po: zdarzenia + następny z góry", values, wakeups)
+    stats = manager.stats()
+    print(f"  liczniki: {stats}")
+    order = [sample.file.name.rsplit("/", 1)[-1] for _, sample in out.played]
+    ok = (max(values) <= src1.UNDERRUN_US and stats["underruns"] == 0 and
+          order == (names * args.loops)[:len(order)])
+    print(f"{'✅' if ok else '❌'} Przejścia bez niedoborów, kolejność utworów zgodna z playlistą")
+
+    manager = src1.AudioManager(src1.USBAudioDevice(root))
+    manager.create_playlist("broken")
+    for name in ("missing.wav", names[0], "missing.wav", names[1]):
+        manager.add_to_playlist("broken", name)
+    out = manager.audio_device.usb_audio
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        engine_run(manager, 4, "broken")
+    order = [sample.file.name.rsplit("/", 1)[-1] for _, sample in out.played]
+    skipped = log.getvalue().count("missing.wav")
+    broken = order == [names[0], names[1]] * 2 and skipped and manager.stats()["underruns"] == 0
+    print(f"{'✅' if broken else '❌'} Brakujący plik pominięty ({skipped} błędów w logu), odtwarzanie trwa")
+    ok &= bool(broken)
+
+    print(f"\n⏱️  Przejście dalej w playliście ({args.entries} pozycji):")
+    items = [f"t{i}.wav" for i in range(args.entries)]
+    start = time.perf_counter()
+    for _ in range(args.entries):
+        items.append(items.pop(0))
+    legacy = (time.perf_counter() - start) / args.entries
+    ring = src1.Playlist(args.entries)
+    for item in items:
+        ring.append(item)
+    start = time.perf_counter()
+    for _ in range(args.entries):
+        ring.advance()
+    engine = (time.perf_counter() - start) / args.entries
+    print(f"  przed: pop(0) + append  {legacy * 1e6:8.2f} µs")
+    print(f"  po: Playlist.advance()  {engine * 1e6:8.2f} µs")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark przywracania kopii zapasowych (deploy_circuit.py
+--rollback).
+
+Dwa wdrożenia (v1, potem v2: zmieniony, usunięty i dodany plik) tworzą
+kopie zapasowe stanu sprzed każdego z nich. Scenariusze:
+
+1. przywrócenie najnowszej kopii (stan v1) - zapisywane tylko pliki
+   inne niż w kopii, plik dodany w v2 usunięty; porównanie z pierwotnym
+   sposobem (wyczyszczenie Pico i skopiowanie całej kopii);
+2. ponowne przywrócenie tej samej kopii - bez żadnego zapisu;
+3. wdrożenie v2 po przywróceniu - manifest zgodny z Pico, kopiowane
+   tylko różnice;
+4. przywrócenie starszej kopii w pierwotnym formacie (pełna kopia plików);
+5. --paranoid - plik zmieniony na Pico z zachowanym rozmiarem i czasem
+   modyfikacji wykryty sumą i przywrócony.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_rollback.py --files 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "audio"))
+sys.path.insert(0, os.path.join(ROOT, "audio", "bench"))
+
+from backup import BackupStore
+from bench_backup import check, device_state, legacy_backup
+from bench_deploy import DirectoryFinder, make_tree, same_tree
+from deploy_circuit import PicoRP2Deployer
+
+
+def deployer_for(tmp, device, **config):
+    deployer = PicoRP2Deployer()
+    deployer.finder = DirectoryFinder(device, size=1 << 40)
+    deployer.config.update(backup_dir=str(tmp / "backups"), manifest_cache_dir=str(tmp / "cache"), **config)
+    return deployer
+
+
+def deploy(tmp, device, source):
+    deployer = deployer_for(tmp, device)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = deployer.deploy(source)
+    return ok, sum(1 for e in deployer.deployment_log if e.startswith("Skopiowano"))
+
+
+def rollback(tmp, device, name=None, **config):
+    """Przywrócenie: (wynik, czas s, zapisane ścieżki, usunięte, nowe kopie zapasowe)"""
+    deployer = deployer_for(tmp, device, **config)
+    backups = len(BackupStore(tmp / "backups").snapshots())
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = deployer.rollback(name)
+    elapsed = time.perf_counter() - start
+    written = [e.split(": ", 1)[1] for e in deployer.deployment_log if e.startswith("Przywrócono")]
+    deleted = sum(1 for e in deployer.deployment_log if e.startswith("Usunięto"))
+    return ok, elapsed, written, deleted, len(BackupStore(tmp / "backups").snapshots()) - backups
+
+
+def legacy_restore(snapshot, device):
+    """Pierwotny sposób: wyczyszczenie Pico i skopiowanie całej kopii"""
+    for item in device.iterdir():
+        if item.is_dir():
+            shutil.rmtree(item)
+        else:
+            item.unlink()
+    store = BackupStore(snapshot.parent)
+    for rel_path, entry in store.entries(snapshot)[1].items():
+        target = device / rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(entry["path"], target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrola i benchmark przywracania kopii zapasowych")
+    parser.add_argument("--files", type=int, default=200, help="Liczba plików w drzewie")
+    parser.add_argument("--size", type=int, default=16384, help="Rozmiar pliku .py (B); .wav 8 razy większe")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    os.chdir(tmp)  # logi wdrożeń
+    source, device = tmp / "project", tmp / "pico"
+    device.mkdir()
+    (device / "boot_out.txt").write_text("Adafruit CircuitPython\n")
+    make_tree(source, args.files, args.size)
+
+    ok = True
+    ok &= deploy(tmp, device, source)[0]
+    v1 = device_state(device)
+    files = sorted(source.rglob("*.py"))
+    changed, removed = files[0], files[1]
+    changed.write_bytes(os.urandom(args.size))
+    removed.unlink()
+    added = source / "lib" / "new_module.py"
+    added.write_bytes(os.urandom(args.size))
+    ok &= deploy(tmp, device, source)[0]
+    v2 = device_state(device)
+    total = sum(f.stat().st_size for f in device.rglob("*") if f.is_file())
+    print(f"Pico: {len(v2)} plików, {total / 1024:.0f} KB; kopie zapasowe przed v1 i przed v2\n")
+
+    # 1. Najnowsza kopia = stan v1; różnice: zmieniony, usunięty, manifest - i dodany w v2 do usunięcia
+    store = BackupStore(tmp / "backups")
+    snapshot = store.snapshots()[-1]
+    result, first, written, deleted, backups = rollback(tmp, device)
+    written_size = sum((device / rel_path).stat().st_size for rel_path in written)
+    ok &= check(result and device_state(device) == v1 and len(written) == 3 and deleted == 1 and backups == 1,
+                f"przywrócenie v1: zapisane {len(written)} pliki, usunięty {deleted}, {first * 1000:.0f} ms, "
+                f"stan Pico zgodny z kopią, stan sprzed przywrócenia w nowej kopii")
+
+    result, again, written, deleted, backups = rollback(tmp, device, snapshot.name)
+    ok &= check(result and not written and deleted == 0 and backups == 0 and device_state(device) == v1,
+                f"ponowne przywrócenie: bez zapisu ({again * 1000:.0f} ms), bez nowej kopii zapasowej")
+
+    # 3. Z powrotem v2, potem pierwotny sposób na tym samym stanie wyjściowym
+    result, copied = deploy(tmp, device, source)
+    ok &= check(result and copied == 2 and same_tree(source, device) and set(device_state(device)) == set(v2),
+                f"wdrożenie v2 po przywróceniu: skopiowane {copied} (tylko różnice - manifest zgodny z Pico)")
+    start = time.perf_counter()
+    legacy_restore(snapshot, device)
+    legacy = time.perf_counter() - start
+    ok &= device_state(device) == v1
+    ok &= deploy(tmp, device, source)[0]
+
+    # 4. Kopia w pierwotnym formacie (pełna kopia plików), stan v1
+    rollback(tmp, device, snapshot.name)
+    legacy_backup(device, tmp / "backups", "00000000_000000")
+    ok &= deploy(tmp, device, source)[0]
+    result, elapsed, written, deleted, _ = rollback(tmp, device, "00000000_000000")
+    ok &= check(result and device_state(device) == v1 and len(written) == 3 and deleted == 1,
+                f"kopia w pierwotnym formacie: zapisane {len(written)}, usunięty {deleted}, stan Pico zgodny")
+
+    # 5. Treść zmieniona na Pico, rozmiar i czas modyfikacji te same
+    tampered = device / files[2].relative_to(source)
+    st = tampered.stat()
+    tampered.write_bytes(os.urandom(st.st_size))
+    os.utime(tampered, ns=(st.st_atime_ns, st.st_mtime_ns))
+    result, _, written, _, _ = rollback(tmp, device, snapshot.name)
+    missed = not written
+    result, _, written, _, _ = rollback(tmp, device, snapshot.name, paranoid=True)
+    ok &= check(missed and result and len(written) == 1 and device_state(device) == v1,
+                "--paranoid: treść zmieniona przy tym samym rozmiarze i mtime wykryta sumą i przywrócona")
+
+    print(f"\n⏱️  Przywrócenie kopii: zapis na Pico {written_size / 1024:.0f} KB wobec {total / 1024:.0f} KB "
+          f"pierwotnie (wyczyszczenie i pełna kopia, {total / written_size:.0f}x mniej)")
+    print(f"    czas {first * 1000:.0f} ms (z kopią zapasową stanu sprzed) wobec {legacy * 1000:.0f} ms "
+          f"(dysk lokalny; na Pico przez USB decyduje ilość zapisu na flash), bez zmian {again * 1000:.0f} ms")
+    os.chdir(ROOT)
+    shutil.rmtree(tmp, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Dokładność wysokości tonów z src3/main.py w symulatorze picosim (zegar wirtualny).
+
+Każda nuta NOTE_* grana jest przez dotychczasowy generate_tone (trójkąt
+liczony na próbkę, tempo z sleep_us(10)) oraz przez ToneEngine (tablica
++ akumulator fazy, próbki taktowane przez PWM i DMA albo - z --no-dma -
+przez terminy ticks_us). Częstotliwość odczytywana jest z przebiegu
+wypełnienia PWM: przejścia przez środek zakresu w górę, z interpolacją
+czasu między próbkami.
+
+Kończy się kodem 1, gdy któraś nuta ToneEngine odbiega o więcej niż
+--tolerance centów.
+
+    python audio/bench/bench_tone.py --duration 0.2
+"""
+import argparse
+import math
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "audio", "src3"))
+
+import picosim
+
+
+def legacy_tone(pwm, frequency, duration, volume=100):
+    """Dotychczasowa pętla AudioPlayer.generate_tone"""
+    import time
+    sample_rate = 44100
+    samples_per_cycle = sample_rate // frequency
+    start_time = time.ticks_ms()
+    while (time.ticks_ms() - start_time) < (duration * 1000):
+        for i in range(samples_per_cycle):
+            if i < samples_per_cycle // 2:
+                value = i * 65535 // (samples_per_cycle // 2)
+            else:
+                value = (samples_per_cycle - i) * 65535 // (samples_per_cycle // 2)
+            value = value * volume // 100
+            pwm.duty_u16(value)
+            time.sleep_us(10)
+    pwm.duty_u16(0)
+
+
+def measured_frequency(pwm, start):
+    """Częstotliwość z przejść przez środek zakresu w górę (od indeksu start)"""
+    times = pwm.times[start:]
+    duties = pwm.duties[start:]
+    # Pomija wyciszenie na końcu
+    while len(duties) > 1 and duties[-1] == 0:
+        times = times[:-1]
+        duties = duties[:-1]
+    middle = (max(duties) + min(duties)) / 2
+    crossings = []
+    for i in range(1, len(duties)):
+        a, b = duties[i - 1], duties[i]
+        if a < middle <= b:
+            crossings.append(times[i - 1] + (times[i] - times[i - 1]) * (middle - a) / (b - a))
+    if len(crossings) < 2:
+        return 0.0
+    return (len(crossings) - 1) * 1000000 / (crossings[-1] - crossings[0])
+
+
+def cents(measured, expected):
+    return 1200 * math.log2(measured / expected) if measured else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dokładność wysokości tonów src3")
+    parser.add_argument("--duration", type=float, default=0.2, help="Czas trwania nuty (s)")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Dopuszczalny błąd (centy)")
+    parser.add_argument("--no-dma", action="store_true", help="ToneEngine bez rp2.DMA")
+    args = parser.parse_args()
+
+    picosim.install(virtual=True, dma=not args.no_dma)
+    import main as player_main
+    from machine import PWM, Pin
+
+    audio = player_main.audio
+    legacy_pwm = PWM(Pin(2))
+    legacy_pwm.freq(44100)
+    notes = sorted((value, name) for name, value in vars(player_main).items()
+                   if name.startswith("NOTE_"))
+
+    ok = True
+    worst_legacy = worst_engine = 0.0
+    print(f"{'nuta':8} {'Hz':>5} {'przed (Hz)':>11} {'centy':>8} {'po (Hz)':>10} {'centy':>7}")
+    for frequency, name in notes:
+        start = len(legacy_pwm.times)
+        legacy_tone(legacy_pwm, frequency, args.duration)
+        legacy = measured_frequency(legacy_pwm, start)
+
+        start = len(audio.pwm.times)
+        audio.tone.play(frequency, args.duration)
+        engine = measured_frequency(audio.pwm, start)
+
+        legacy_cents = cents(legacy, frequency)
+        engine_cents = cents(engine, frequency)
+        worst_legacy = max(worst_legacy, abs(legacy_cents))
+        worst_engine = max(worst_engine, abs(engine_cents))
+        good = abs(engine_cents) <= args.tolerance
+        ok = ok and good
+        print(f"{name[5:]:8} {frequency:5} {legacy:11.2f} {legacy_cents:+8.1f} "
+              f"{engine:10.3f} {engine_cents:+7.3f} {'✅' if good else '❌'}")
+
+    print(f"\nMaks. błąd: przed {worst_legacy:.1f} centów, po {worst_engine:.3f} centów "
+          f"(próg {args.tolerance} centów)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
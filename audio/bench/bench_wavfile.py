@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark parsera WAV z src3 (wavfile.py) na CPython.
+
+1. Korpus testowy: pliki z fragmentami LIST/fact, WAVE_FORMAT_EXTENSIBLE,
+   stereo, 8 bit, różne częstotliwości, rozmiar danych 0 / 0xFFFFFFFF,
+   obcięte dane oraz pliki błędne. Dla każdego sprawdzany jest format,
+   liczba ramek i dane odczytane blokami przez readinto().
+2. Odtwarzanie plików PCM z korpusu przez PCMStream w symulatorze
+   picosim: tempo PWM równe częstotliwości pliku, wypełnienie zgodne
+   ze średnią kanałów z dokładnością do 12 bitów i jednego kroku
+   licznika PWM (TOP zależy od częstotliwości).
+3. Czas otwarcia pliku, parsowania nagłówka i wczytania pierwszego
+   bloku - w porównaniu z dotychczasowym seek(44) + read(2) na próbkę.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_wavfile.py --corpus /tmp/wav-corpus
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "audio", "src3"))
+
+import picosim
+from wavfile import WavFile
+
+BLOCK = 512
+
+
+def chunk(name, payload):
+    return name + struct.pack("<I", len(payload)) + payload + (b"\0" if len(payload) & 1 else b"")
+
+
+def fmt_chunk(channels, rate, bits, format=1, extensible=False):
+    align = channels * bits // 8
+    payload = struct.pack("<HHIIHH", 0xFFFE if extensible else format, channels, rate,
+                          rate * align, align, bits)
+    if extensible:
+        payload += struct.pack("<HHI", 22, bits, 0) + struct.pack("<H", format) + bytes(14)
+    return chunk(b"fmt ", payload)
+
+
+def riff(*chunks):
+    body = b"WAVE" + b"".join(chunks)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def pattern(frames, channels, bits):
+    """Przewidywalne dane: piła w każdym kanale, kanały przesunięte"""
+    if bits == 8:
+        return bytes((i * 7 + c * 64) & 0xFF for i in range(frames) for c in range(channels))
+    return b"".join(struct.pack("<h", ((i * 911 + c * 16384) & 0xFFFF) - 32768)
+                    for i in range(frames) for c in range(channels))
+
+
+def corpus():
+    """(nazwa, zawartość, oczekiwany (format, kanały, częstotliwość, bity, dane) lub None)"""
+    cases = []
+
+    def case(name, channels, rate, bits, frames, extra=(), format=1, extensible=False,
+             size=None, tail=b""):
+        data = pattern(frames, channels, bits)
+        declared = len(data) if size is None else size
+        content = riff(fmt_chunk(channels, rate, bits, format, extensible), *extra)
+        content += b"data" + struct.pack("<I", declared) + data + tail
+        expected = data + tail
+        align = channels * bits // 8
+        expected = expected[:min(len(expected), declared or len(expected)) // align * align]
+        cases.append((name, content, (format, channels, rate, bits, expected)))
+
+    case("pcm16_mono_44k", 1, 44100, 16, 3000)
+    case("pcm16_stereo_22k", 2, 22050, 16, 2000)
+    case("pcm8_mono_8k", 1, 8000, 8, 1500)
+    case("pcm8_stereo_11k", 2, 11025, 8, 1001)
+    case("list_odd_chunk", 1, 44100, 16, 700, extra=(chunk(b"LIST", b"INFOx"),))
+    case("fact_chunk", 1, 16000, 16, 700, extra=(chunk(b"fact", struct.pack("<I", 700)),))
+    case("extensible_stereo", 2, 48000, 16, 900, extensible=True)
+    case("streaming_size_0", 1, 44100, 16, 800, size=0)
+    case("streaming_size_ffffffff", 1, 44100, 16, 800, size=0xFFFFFFFF)
+    case("truncated_data", 1, 44100, 16, 600, size=5000)
+    case("partial_frame", 2, 44100, 16, 600, tail=b"\x01\x02\x03")
+    case("float32", 1, 44100, 32, 100, format=3)
+
+    cases.append(("not_riff", b"RIFX" + bytes(40), None))
+    cases.append(("no_data", riff(fmt_chunk(1, 44100, 16)), None))
+    cases.append(("data_before_fmt", riff(chunk(b"data", bytes(8)), fmt_chunk(1, 44100, 16)), None))
+    cases.append(("short_fmt", riff(chunk(b"fmt ", bytes(10)), chunk(b"data", bytes(8))), None))
+    return cases
+
+
+def check_corpus(directory):
+    ok = True
+    buf = bytearray(BLOCK * 4)
+    print(f"Korpus ({directory}):")
+    for name, content, expected in corpus():
+        path = os.path.join(directory, name + ".wav")
+        with open(path, "wb") as f:
+            f.write(content)
+
+        with open(path, "rb") as f:
+            try:
+                wav = WavFile(f)
+            except ValueError as e:
+                result = "odrzucony (%s)" % e
+                good = expected is None
+            else:
+                data = b"".join(bytes(buf[:count]) for count in wav.blocks(buf))
+                result = repr(wav)
+                good = (expected is not None and
+                        (wav.format, wav.channels, wav.sample_rate, wav.bits, data) == expected and
+                        wav.frames * wav.block_align == len(data))
+                wav.rewind()
+                good = good and wav.readinto(buf) == min(len(buf) // wav.block_align * wav.block_align,
+                                                         len(data))
+        print(f"  {'✅' if good else '❌'} {name:26} {result}")
+        ok = ok and good
+    return ok
+
+
+def check_playback(directory):
+    """Odtworzenie plików PCM przez PCMStream i porównanie przebiegu PWM"""
+    picosim.install(virtual=True)
+    from pcmstream import PCMStream
+
+    ok = True
+    print("\nOdtwarzanie przez PCMStream (picosim):")
+    for name, content, expected in corpus():
+        if expected is None or expected[0] != 1:
+            continue
+        _, channels, rate, bits, data = expected
+        stream = PCMStream(1, block=BLOCK)
+        with open(os.path.join(directory, name + ".wav"), "rb") as f:
+            frames = stream.play_wav(WavFile(f))
+        stream.deinit()
+
+        # Wartości bez znaku 0..1 - średnia kanałów
+        if bits == 8:
+            values = [sum(data[i + c] for c in range(channels)) / channels / 256
+                      for i in range(0, len(data), channels)]
+        else:
+            samples = struct.unpack("<%dh" % (len(data) // 2), data)
+            values = [(sum(samples[i + c] for c in range(channels)) / channels + 32768) / 65536
+                      for i in range(0, len(samples), channels)]
+        played = [duty / 65536 for duty in stream.pwm.duties[1:-1]]
+        worst = max(abs(a - b) for a, b in zip(values, played))
+        tolerance = 1 / 4096 + 1 / (stream.pwm.top + 1) + 1 / 65536
+        result = picosim.pwm_report(stream.pwm)
+        good = (frames == len(values) == len(played) and worst <= tolerance and
+                abs(result["rate"] / rate - 1) < 1e-4 and stream.pwm.freq() == rate)
+        print(f"  {'✅' if good else '❌'} {name:26} {frames:5} ramek, tempo {result['rate']:7.0f} Hz, "
+              f"maks. błąd {worst * 4096:.2f}/4096 (TOP {stream.pwm.top})")
+        ok = ok and good
+    return ok
+
+
+def legacy_first_block(path):
+    with open(path, "rb") as f:
+        f.seek(44)
+        for _ in range(BLOCK):
+            f.read(2)
+
+
+def parser_first_block(path, buf):
+    with open(path, "rb") as f:
+        WavFile(f).readinto(buf)
+
+
+def measure(name, function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {name:40} {elapsed * 1000000:8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kontrola i benchmark parsera WAV")
+    parser.add_argument("--corpus", help="Katalog na pliki korpusu (domyślnie tymczasowy)")
+    parser.add_argument("--repeat", type=int, default=2000, help="Powtórzenia pomiaru czasu")
+    args = parser.parse_args()
+
+    directory = args.corpus or tempfile.mkdtemp()
+    os.makedirs(directory, exist_ok=True)
+
+    ok = check_corpus(directory)
+    ok = check_playback(directory) and ok
+
+    buf = bytearray(BLOCK * 2)
+    plain = os.path.join(directory, "pcm16_mono_44k.wav")
+    tagged = os.path.join(directory, "list_odd_chunk.wav")
+    print(f"\n⏱️  Otwarcie, nagłówek i pierwszy blok ({BLOCK} próbek, {args.repeat} powtórzeń):")
+    measure("przed: seek(44) + read(2) na próbkę", lambda: legacy_first_block(plain), args.repeat)
+    measure("po: WavFile + readinto", lambda: parser_first_block(plain, buf), args.repeat)
+    measure("po: WavFile + readinto (z LIST)", lambda: parser_first_block(tagged, buf), args.repeat)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Kontrola i benchmark syntezy plików WAV z src3 (waveforms.py) na CPython.
+
+1. Kształty fali: sinus porównany z math.sin dla faktycznej częstotliwości
+   akumulatora fazy (oraz błąd tej częstotliwości w ppm), prostokąt
+   i trójkąt z przebiegiem idealnym, szum - zakres i średnia. Dotychczasowy
+   wzór (piła) pokazany dla porównania.
+2. Czas zapisu próbek: dotychczasowe struct.pack + write na próbkę,
+   bloki array('h') i - jeśli jest - NumPy dla całego pliku. Pliki
+   otwierane są bez buforowania (buffering=0), jak zapis na Pico, gdzie
+   każdy write() trafia do systemu plików.
+
+Kończy się kodem 1, gdy któraś kontrola się nie powiedzie.
+
+    python audio/bench/bench_wavgen.py --seconds 1 --frequency 440
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, os.path.join(ROOT, "audio", "src3"))
+
+import waveforms
+
+SAMPLE_RATE = 44100
+AMPLITUDE = 32767
+
+
+def legacy_write(file, frequency, count):
+    """Dotychczasowa pętla z WavGenerator.generate_test_file"""
+    for i in range(count):
+        t = i / SAMPLE_RATE
+        value = int(AMPLITUDE * ((t * frequency) % 2 - 1))
+        file.write(struct.pack('<h', value))
+
+
+def samples(path):
+    with open(path, "rb") as f:
+        return array("h", f.read())
+
+
+def ideal(waveform, phase):
+    """Przebieg idealny -1..1 dla fazy 0..1"""
+    if waveform == "sine":
+        return math.sin(2 * math.pi * phase)
+    if waveform == "square":
+        return 1.0 if phase < 0.5 else -1.0
+    return 4 * phase - 1 if phase < 0.5 else 3 - 4 * phase
+
+
+def check(name, values, frequency, tolerance):
+    """Maks. odchyłka (LSB) od przebiegu idealnego; dla prostokąta pomija zbocza"""
+    worst = 0
+    for i, value in enumerate(values):
+        phase = (i * frequency / SAMPLE_RATE) % 1.0
+        if name == "square" and min(phase, abs(phase - 0.5), 1 - phase) * SAMPLE_RATE / frequency < 1:
+            continue
+        worst = max(worst, abs(value - ideal(name, phase) * AMPLITUDE))
+    return worst, worst <= tolerance
+
+
+def check_waveforms(directory, frequency, count, use_numpy):
+    ok = True
+    numpy = waveforms.np
+    if not use_numpy:
+        waveforms.np = None
+    effective = waveforms.phase_step(frequency, SAMPLE_RATE) * SAMPLE_RATE / (1 << waveforms.PHASE_BITS)
+    if waveforms.np is not None:
+        effective = frequency
+    print(f"\nKształty fali ({'NumPy' if waveforms.np is not None else 'bloki array'}, "
+          f"{frequency} Hz, faktycznie {effective:.4f} Hz, "
+          f"{(effective / frequency - 1) * 1e6:+.2f} ppm):")
+
+    # Trójkąt liczony z 15 bitów fazy - krok 4 LSB
+    for name, tolerance in (("sine", 3), ("square", 1), ("triangle", 5)):
+        path = os.path.join(directory, name + ".raw")
+        with open(path, "wb") as f:
+            waveforms.write_samples(f, name, frequency, count, SAMPLE_RATE, AMPLITUDE)
+        values = samples(path)
+        worst, good = check(name, values, effective, tolerance)
+        good = good and len(values) == count
+        print(f"  {'✅' if good else '❌'} {name:10} maks. odchyłka {worst:8.2f} LSB")
+        ok = ok and good
+
+    path = os.path.join(directory, "noise.raw")
+    with open(path, "wb") as f:
+        waveforms.write_samples(f, "noise", frequency, count, SAMPLE_RATE, AMPLITUDE)
+    values = samples(path)
+    mean = sum(values) / len(values)
+    good = len(values) == count and abs(mean) < 0.02 * AMPLITUDE and max(values) - min(values) > AMPLITUDE
+    print(f"  {'✅' if good else '❌'} {'noise':10} średnia {mean:8.1f}, zakres {min(values)}..{max(values)}")
+    ok = ok and good
+
+    waveforms.np = numpy
+    return ok
+
+
+def measure(name, write, path, count, buffering=0):
+    start = time.perf_counter()
+    with open(path, "wb", buffering=buffering) as f:
+        write(f)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:34} {count / elapsed:14,.0f} próbek/s  ({elapsed * 1000:8.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark syntezy plików WAV")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Długość generowanego dźwięku (s)")
+    parser.add_argument("--frequency", type=float, default=440, help="Częstotliwość tonu (Hz)")
+    args = parser.parse_args()
+
+    count = int(SAMPLE_RATE * args.seconds)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "bench.raw")
+
+    # Dotychczasowy wzór to piła o połowie częstotliwości, nie sinus
+    with open(path, "wb") as f:
+        legacy_write(f, args.frequency, count)
+    worst, _ = check("sine", samples(path), args.frequency, 0)
+    print(f"Dotychczasowy wzór: odchyłka od sinusa {worst:.0f} LSB (piła)")
+
+    ok = check_waveforms(directory, args.frequency, count, False)
+    if waveforms.np is not None:
+        ok = check_waveforms(directory, args.frequency, count, True) and ok
+
+    print(f"\n⏱️  Zapis {count} próbek ({args.seconds:.1f} s dźwięku):")
+    measure("przed: struct.pack + write", lambda f: legacy_write(f, args.frequency, count), path, count)
+    numpy = waveforms.np
+    waveforms.np = None
+    for name in waveforms.WAVEFORMS:
+        measure(f"po: bloki array, {name}",
+                lambda f: waveforms.write_samples(f, name, args.frequency, count, SAMPLE_RATE),
+                path, count)
+    waveforms.np = numpy
+    if numpy is not None:
+        measure("po: NumPy, sine",
+                lambda f: waveforms.write_samples(f, "sine", args.frequency, count, SAMPLE_RATE),
+                path, count)
+    else:
+        print("  (NumPy niedostępne - pominięto)")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+# !/usr/bin/env python3
+"""
+Konwersja plików WAV na format odtwarzacza Pico (na hoście).
+
+Plik PCM w dowolnym formacie (8/16/24/32 bit lub float 32 bit, także
+WAVE_FORMAT_EXTENSIBLE, dowolna liczba kanałów i częstotliwość)
+przeliczany jest strumieniowo, blokami o stałej wielkości czytanymi
+wprost z mapowania pliku (media.WavView): miksowanie kanałów, zmiana
+częstotliwości filtrem polifazowym (sinc z oknem Kaisera), dithering
+TPDF i kwantyzacja do formatu docelowego - domyślnie 44,1 kHz, 16 bit,
+mono, jak w firmware.
+
+Z opcją --pwm zapisywany jest plik .pwm: gotowe wypełnienia PWM
+(0..TOP) dla danej częstotliwości, które odtwarzacz przesyła przez DMA
+bez obliczeń na próbkę (audio/src3/dutyfile.py). Z --adpcm - WAV
+IMA-ADPCM mono (4 bity na próbkę, audio/src3/adpcm.py). Katalogi
+przetwarzane są równolegle, jeden plik na proces.
+
+    python convert.py muzyka/ przekonwertowane/ --rate 22050 --pwm
+"""
+import argparse
+import math
+import os
+import random
+import struct
+import sys
+import time
+import wave
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from operator import mul
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from media import FORMAT_FLOAT, FORMAT_PCM, WavView
+
+# Plik .pwm - nagłówek jak w audio/src3/dutyfile.py:
+# magic, wersja, flagi, częstotliwość, skala (TOP+1), liczba ramek
+PWM_MAGIC = b"PWMD"
+PWM_VERSION = 1
+PWM_HEADER = "<4sHHIII"
+
+# IMA-ADPCM: WAV format 0x11, tablica kroków jak w audio/src3/adpcm.py
+ADPCM_FORMAT = 0x11
+ADPCM_BLOCK = 1024
+ADPCM_STEPS = [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+]
+
+# Zegar systemowy RP2040 (MHz) - od niego zależy TOP licznika PWM
+CPU_FREQ = 125_000_000
+
+
+def pwm_scale(sample_rate: int, cpu_freq: int = CPU_FREQ) -> int:
+    """TOP+1 licznika PWM dla częstotliwości - jak machine.PWM.freq() w porcie rp2"""
+    divider = max(1, -(-cpu_freq // (sample_rate * 65536)))
+    return min(65535, cpu_freq // (sample_rate * divider) - 1) + 1
+
+
+def _bessel_i0(x: float) -> float:
+    total = term = 1.0
+    k = 1
+    while term > 1e-12 * total:
+        term *= (x / (2 * k)) ** 2
+        total += term
+        k += 1
+    return total
+
+
+def _decode(raw: bytes, width: int, floating: bool = False):
+    """Bajty PCM -> (próbki całkowite ze znakiem, mnożnik do zakresu -1..1)"""
+    if floating:
+        if width != 4:
+            raise ValueError(f"unsupported float width: {width}")
+        samples = array("f")
+        samples.frombytes(raw)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return samples, 1.0
+    if width == 1:
+        return [b - 128 for b in raw], 1 / 128
+    if width == 3:
+        # 24 bit -> 32 bit: najmłodszy bajt zerowy, znak zostaje na miejscu
+        padded = bytearray(len(raw) // 3 * 4)
+        padded[1::4] = raw[0::3]
+        padded[2::4] = raw[1::3]
+        padded[3::4] = raw[2::3]
+        raw = padded
+        width = 4
+    if width not in (2, 4):
+        raise ValueError(f"unsupported sample width: {width}")
+    samples = array("h" if width == 2 else "i")
+    samples.frombytes(raw)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples, 1 / (1 << (8 * width - 1))
+
+
+class PolyphaseResampler:
+    """
+    Zmiana częstotliwości o wymierny współczynnik L/M, blokami.
+
+    Filtr dolnoprzepustowy (taps współczynników na fazę) liczony jest
+    raz i rozkładany na L faz - na próbkę wyjściową przypada jedna faza,
+    czyli taps mnożeń, bez wstawiania zer. Opóźnienie filtra jest
+    kompensowane, więc wyjście jest wyrównane z wejściem.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int, taps: int = 64,
+                 cutoff: float = 0.9, beta: float = 10.0):
+        g = math.gcd(source_rate, target_rate)
+        self.up = target_rate // g
+        self.down = source_rate // g
+        self.taps = taps
+        self.received = 0
+        self.produced = 0
+        self.buffer: List[float] = [0.0] * (taps - 1)
+        self.offset = -(taps - 1)  # indeks bezwzględny buffer[0]
+        self.phases: List[List[float]] = []
+        if self.up == self.down:
+            return
+
+        # Długość nieparzysta - opóźnienie to całkowita liczba próbek
+        length = taps * self.up - 1
+        self.delay = (length - 1) // 2
+        # Częstotliwość graniczna względem częstotliwości po nadpróbkowaniu
+        fc = cutoff * min(source_rate, target_rate) / (2 * source_rate * self.up)
+        norm = _bessel_i0(beta)
+        h = []
+        for n in range(length):
+            x = n - self.delay
+            ideal = 2 * fc if x == 0 else math.sin(2 * math.pi * fc * x) / (math.pi * x)
+            w = _bessel_i0(beta * math.sqrt(max(0.0, 1 - (x / self.delay) ** 2))) / norm
+            h.append(ideal * w)
+        gain = self.up / sum(h)
+        h = [c * gain for c in h] + [0.0]
+        # Faza p: h[p], h[p+L], ... odwrócone - iloczyn z kolejnym wycinkiem wejścia
+        self.phases = [h[p::self.up][::-1] for p in range(self.up)]
+
+    def output_frames(self, frames: int) -> int:
+        return -(-frames * self.up // self.down)
+
+    def _run(self, limit: Optional[int] = None) -> List[float]:
+        buf = self.buffer
+        up, down, delay, taps = self.up, self.down, self.delay, self.taps
+        phases = self.phases
+        end = self.offset + len(buf)
+        offset = self.offset
+        m = self.produced
+        out = []
+        append = out.append
+        while limit is None or m < limit:
+            t = m * down + delay
+            base = t // up
+            if base >= end:
+                break
+            i = base - offset + 1
+            append(sum(map(mul, phases[t % up], buf[i - taps:i])))
+            m += 1
+        self.produced = m
+        # Zostaje tylko historia potrzebna następnej próbce
+        drop = (m * down + delay) // up - taps + 1 - offset
+        if drop > 0:
+            del buf[:drop]
+            self.offset += drop
+        return out
+
+    def process(self, samples: List[float]) -> List[float]:
+        self.received += len(samples)
+        if not self.phases:
+            self.produced += len(samples)
+            return samples
+        self.buffer.extend(samples)
+        return self._run()
+
+    def flush(self) -> List[float]:
+        """Dokończ strumień: ogon filtra liczony na zerach"""
+        total = self.output_frames(self.received)
+        if not self.phases or self.produced >= total:
+            return []
+        last = ((total - 1) * self.down + self.delay) // self.up
+        missing = last + 1 - (self.offset + len(self.buffer))
+        if missing > 0:
+            self.buffer.extend([0.0] * missing)
+        return self._run(total)
+
+
+class Quantizer:
+    """Kwantyzacja z ditheringiem TPDF (±1 LSB) do bajtów formatu docelowego"""
+
+    def __init__(self, bits: int = 16, scale: Optional[int] = None, dither: bool = True, seed: int = 0):
+        if scale:
+            # Wypełnienie PWM 0..scale-1, cisza w połowie zakresu
+            self.gain, self.offset, self.low, self.high = scale / 2, scale / 2, 0, scale - 1
+            self.typecode = "H"
+        elif bits == 16:
+            self.gain, self.offset, self.low, self.high = 32768, 0, -32768, 32767
+            self.typecode = "h"
+        elif bits == 8:
+            self.gain, self.offset, self.low, self.high = 128, 128, 0, 255
+            self.typecode = "B"
+        else:
+            raise ValueError(f"unsupported target bits: {bits}")
+        self.dither = dither
+        self.random = random.Random(seed)
+        self.clipped = 0
+
+    def __call__(self, values: List[float]) -> bytes:
+        gain, offset, low, high = self.gain, self.offset + 0.5, self.low, self.high
+        floor = math.floor
+        if self.dither:
+            rnd = self.random.random
+            quantized = [floor(v * gain + offset + rnd() - rnd()) for v in values]
+        else:
+            quantized = [floor(v * gain + offset) for v in values]
+        for i, q in enumerate(quantized):
+            if q > high:
+                quantized[i] = high
+                self.clipped += 1
+            elif q < low:
+                quantized[i] = low
+                self.clipped += 1
+        out = array(self.typecode, quantized)
+        if sys.byteorder == "big":
+            out.byteswap()
+        return out.tobytes()
+
+
+def adpcm_header(sample_rate: int, block_align: int, samples: int, data_size: int) -> bytes:
+    """Nagłówek WAV IMA-ADPCM mono z fragmentem 'fact' (liczba próbek)"""
+    per_block = (block_align - 4) * 2 + 1
+    fmt = struct.pack("<HHIIHHHH", ADPCM_FORMAT, 1, sample_rate, sample_rate * block_align // per_block,
+                      block_align, 4, 2, per_block)
+    return (b"RIFF" + struct.pack("<I", 52 + data_size) + b"WAVE" +
+            b"fmt " + struct.pack("<I", len(fmt)) + fmt +
+            b"fact" + struct.pack("<II", 4, samples) +
+            b"data" + struct.pack("<I", data_size))
+
+
+class AdpcmEncoder:
+    """
+    Koder IMA-ADPCM mono blokami po block_align bajtów. Przyjmuje bajty
+    PCM 16 bit (jak Quantizer); kodowanie odtwarza kroki dekodera, więc
+    predyktor kodera i dekodera się nie rozjeżdża.
+    """
+
+    def __init__(self, file, block_align: int = ADPCM_BLOCK):
+        self.file = file
+        self.block_align = block_align
+        self.samples_per_block = (block_align - 4) * 2 + 1
+        self.pending = array("h")
+        self.index = 0
+        self.samples = 0
+        self.data_size = 0
+
+    def write(self, pcm: bytes):
+        samples = array("h")
+        samples.frombytes(pcm)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        self.pending.extend(samples)
+        n = self.samples_per_block
+        start = 0
+        while len(self.pending) - start >= n:
+            self._block(self.pending[start:start + n])
+            start += n
+        del self.pending[:start]
+
+    def close(self):
+        """Ostatni niepełny blok uzupełniany ciszą (fact podaje liczbę próbek)"""
+        if self.pending:
+            count = len(self.pending)
+            self.pending.extend([0] * (self.samples_per_block - count))
+            self._block(self.pending, count)
+            self.pending = array("h")
+
+    def _block(self, samples, count: Optional[int] = None):
+        predictor = samples[0]
+        index = self.index
+        out = bytearray(self.block_align)
+        struct.pack_into("<hBB", out, 0, predictor, index, 0)
+        steps = ADPCM_STEPS
+        for j in range(1, len(samples)):
+            step = steps[index]
+            diff = samples[j] - predictor
+            code = 0
+            if diff < 0:
+                code = 8
+                diff = -diff
+            delta = step >> 3
+            if diff >= step:
+                code |= 4
+                diff -= step
+                delta += step
+            if diff >= step >> 1:
+                code |= 2
+                diff -= step >> 1
+                delta += step >> 1
+            if diff >= step >> 2:
+                code |= 1
+                delta += step >> 2
+            if code & 8:
+                predictor = max(-32768, predictor - delta)
+            else:
+                predictor = min(32767, predictor + delta)
+            if code & 4:
+                index = min(88, index + ((code & 3) + 1) * 2)
+            elif index:
+                index -= 1
+            position = 4 + ((j - 1) >> 1)
+            out[position] |= code << 4 if (j - 1) & 1 else code
+        self.index = index
+        self.file.write(out)
+        self.samples += len(samples) if count is None else count
+        self.data_size += self.block_align
+
+
+class AudioConverter:
+    def __init__(self, sample_rate: int = 44100, bits: int = 16, channels: int = 1,
+                 pwm: bool = False, cpu_freq: int = CPU_FREQ, taps: int = 64,
+                 dither: bool = True, chunk: int = 8192, adpcm: bool = False):
+        if channels not in (1, 2):
+            raise ValueError("target must be mono or stereo")
+        self.sample_rate = sample_rate
+        # ADPCM koduje próbki 16 bit; wypełnienie PWM i ADPCM są zawsze mono
+        self.bits = 16 if adpcm else bits
+        self.channels = 1 if pwm or adpcm else channels
+        self.pwm = pwm
+        self.adpcm = adpcm and not pwm
+        self.scale = pwm_scale(sample_rate, cpu_freq) if pwm else None
+        self.taps = taps
+        self.dither = dither
+        self.chunk = chunk
+
+    @property
+    def suffix(self) -> str:
+        return ".pwm" if self.pwm else ".wav"
+
+    def format_tag(self) -> str:
+        """Krótki opis formatu docelowego (np. nazwa katalogu pamięci podręcznej)"""
+        if self.pwm:
+            return f"{self.sample_rate}_pwm{self.scale}"
+        if self.adpcm:
+            return f"{self.sample_rate}_adpcm"
+        return f"{self.sample_rate}_{self.bits}_{self.channels}"
+
+    def _split(self, raw: bytes, width: int, channels: int, floating: bool = False) -> List[List[float]]:
+        """Ramki -> lista torów (float -1..1) do przeliczenia"""
+        samples, scale = _decode(raw, width, floating)
+        if channels == 1:
+            return [[s * scale for s in samples]]
+        if self.channels == 2 and channels == 2:
+            return [[s * scale for s in samples[0::2]], [s * scale for s in samples[1::2]]]
+        k = scale / channels
+        return [[sum(frame) * k for frame in zip(*[samples[c::channels] for c in range(channels)])]]
+
+    def _write(self, write, paths: List[List[float]], quantize: Quantizer) -> int:
+        frames = len(paths[0])
+        if not frames:
+            return 0
+        if self.channels == 2:
+            # Mono do stereo - ten sam tor w obu kanałach
+            left, right = paths if len(paths) == 2 else (paths[0], paths[0])
+            values = [v for frame in zip(left, right) for v in frame]
+        else:
+            values = paths[0]
+        write(quantize(values))
+        return frames
+
+    def convert_file(self, source: Path, target: Path) -> Dict:
+        """Przekonwertuj jeden plik; wynik zapisywany atomowo (przez plik .tmp)"""
+        started = time.perf_counter()
+        source, target = Path(source), Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + ".tmp")
+
+        with WavView(source) as src:
+            if src.format not in (FORMAT_PCM, FORMAT_FLOAT):
+                raise ValueError(f"unsupported WAV format: 0x{src.format:04x}")
+            channels, rate = src.channels, src.sample_rate
+            width = src.block_align // channels
+            floating = src.format == FORMAT_FLOAT
+            if self.channels == 2 and channels > 2:
+                raise ValueError(f"cannot downmix {channels} channels to stereo")
+            paths = 1 if channels == 1 or self.channels == 1 else 2
+            resamplers = [PolyphaseResampler(rate, self.sample_rate, self.taps) for _ in range(paths)]
+            # Dithering tylko gdy kwantyzacja traci informację
+            lossless = rate == self.sample_rate and channels == 1 and not floating and 8 * width <= self.bits
+            quantize = Quantizer(self.bits, self.scale, self.dither and (self.pwm or not lossless))
+
+            try:
+                frames_in = frames_out = 0
+                with open(partial, "wb") as f:
+                    if self.pwm:
+                        f.write(struct.pack(PWM_HEADER, PWM_MAGIC, PWM_VERSION, 0, self.sample_rate, self.scale, 0))
+                        write = f.write
+                    elif self.adpcm:
+                        f.write(adpcm_header(self.sample_rate, ADPCM_BLOCK, 0, 0))
+                        encoder = AdpcmEncoder(f)
+                        write = encoder.write
+                    else:
+                        out = wave.open(f, "wb")
+                        out.setnchannels(self.channels)
+                        out.setsampwidth(self.bits // 8)
+                        out.setframerate(self.sample_rate)
+                        write = out.writeframesraw
+
+                    for raw in src.blocks(self.chunk):
+                        blocks = self._split(raw, width, channels, floating)
+                        frames_in += len(blocks[0])
+                        frames_out += self._write(write, [r.process(b) for r, b in zip(resamplers, blocks)], quantize)
+                    frames_out += self._write(write, [r.flush() for r in resamplers], quantize)
+
+                    if self.pwm:
+                        f.seek(0)
+                        f.write(struct.pack(PWM_HEADER, PWM_MAGIC, PWM_VERSION, 0, self.sample_rate, self.scale,
+                                            frames_out))
+                    elif self.adpcm:
+                        encoder.close()
+                        f.seek(0)
+                        f.write(adpcm_header(self.sample_rate, ADPCM_BLOCK, encoder.samples, encoder.data_size))
+                    else:
+                        out.close()
+            except Exception:
+                # Przerwana konwersja nie zostawia niepełnego pliku .tmp
+                if partial.exists():
+                    partial.unlink()
+                raise
+        os.replace(partial, target)
+
+        return {
+            "source": str(source),
+            "target": str(target),
+            "frames_in": frames_in,
+            "frames_out": frames_out,
+            "seconds": frames_out / self.sample_rate,
+            "clipped": quantize.clipped,
+            "elapsed": time.perf_counter() - started,
+        }
+
+    def convert_tree(self, source: Path, target: Path, jobs: Optional[int] = None,
+                     force: bool = False) -> Dict[str, Path]:
+        """
+        Przekonwertuj wszystkie pliki .wav z katalogu source do target,
+        równolegle. Pliki aktualne (nowsze od źródła) są pomijane.
+        Zwraca ścieżkę względną źródła -> plik wynikowy; statystyki
+        i błędy trafiają do self.results.
+        """
+        source, target = Path(source), Path(target)
+        converted = {}
+        tasks = []
+        for path in sorted(source.rglob("*")):
+            if not path.is_file() or path.suffix.lower() != ".wav":
+                continue
+            rel = path.relative_to(source)
+            out = (target / rel).with_suffix(self.suffix)
+            converted[str(rel)] = out
+            if force or not out.exists() or out.stat().st_mtime < path.stat().st_mtime:
+                tasks.append((self, path, out))
+
+        jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                self.results = list(pool.map(_convert, tasks))
+        else:
+            self.results = [_convert(task) for task in tasks]
+
+        for result in self.results:
+            if "error" in result:
+                del converted[str(Path(result["source"]).relative_to(source))]
+        return converted
+
+
+def _convert(task) -> Dict:
+    """Zadanie dla puli procesów; błąd pliku nie przerywa pozostałych"""
+    converter, source, target = task
+    try:
+        return converter.convert_file(source, target)
+    except (wave.Error, EOFError, ValueError, OSError) as e:
+        return {"source": str(source), "target": str(target), "error": str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Konwersja plików WAV na format odtwarzacza Pico")
+    parser.add_argument("source", help="Plik WAV lub katalog z plikami WAV")
+    parser.add_argument("target", help="Plik lub katalog wynikowy")
+    parser.add_argument("--rate", type=int, default=44100, help="Częstotliwość próbkowania (domyślnie: 44100)")
+    parser.add_argument("--bits", type=int, choices=[8, 16], default=16, help="Bity na próbkę (domyślnie: 16)")
+    parser.add_argument("--channels", type=int, choices=[1, 2], default=1, help="Liczba kanałów (domyślnie: 1)")
+    parser.add_argument("--pwm", action="store_true", help="Zapisz wypełnienia PWM (.pwm) zamiast WAV")
+    parser.add_argument("--adpcm", action="store_true", help="Zapisz WAV IMA-ADPCM (4 bity na próbkę)")
+    parser.add_argument("--cpu-freq", type=int, default=CPU_FREQ, help="Zegar Pico w Hz (skala PWM)")
+    parser.add_argument("--taps", type=int, default=64, help="Długość filtra na fazę (domyślnie: 64)")
+    parser.add_argument("--no-dither", action="store_true", help="Wyłącz dithering")
+    parser.add_argument("--jobs", type=int, default=None, help="Liczba procesów (domyślnie: liczba rdzeni)")
+    parser.add_argument("--force", action="store_true", help="Konwertuj także pliki aktualne")
+
+    args = parser.parse_args()
+
+    converter = AudioConverter(args.rate, args.bits, args.channels, args.pwm, args.cpu_freq,
+                               args.taps, not args.no_dither, adpcm=args.adpcm)
+    source, target = Path(args.source), Path(args.target)
+    if not source.exists():
+        print(f"❌ Ścieżka źródłowa nie istnieje: {source}")
+        sys.exit(1)
+
+    print(f"🎵 Format docelowy: {converter.format_tag()}")
+    started = time.perf_counter()
+    if source.is_file():
+        if target.is_dir():
+            target = (target / source.name).with_suffix(converter.suffix)
+        results = [_convert((converter, source, target))]
+    else:
+        converter.convert_tree(source, target, args.jobs, args.force)
+        results = converter.results
+
+    errors = 0
+    seconds = 0.0
+    for result in results:
+        if "error" in result:
+            errors += 1
+            print(f"  ❌ {result['source']}: {result['error']}")
+            continue
+        seconds += result["seconds"]
+        clipped = f", obcięte próbki: {result['clipped']}" if result["clipped"] else ""
+        print(f"  ✓ {result['target']} ({result['seconds']:.1f}s, {result['elapsed']:.1f}s{clipped})")
+
+    print(f"\n✅ Przekonwertowano {len(results) - errors} plików "
+          f"({seconds:.1f}s audio w {time.perf_counter() - started:.1f}s)")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,20 @@
 import os
 import sys
 import time
-import shutil
 import hashlib
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 import subprocess
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from disc import PicoDiskFinder
+from backup import BackupStore
+from media import Uf2View, copy_file, drop_cache, file_digest
+
+# Manifest wdrożenia na Pico: ścieżka -> rozmiar, czas modyfikacji, suma kontrolna
+MANIFEST_NAME = '.deploy_manifest.json'
+MANIFEST_VERSION = 2
 
 class PicoRP2Deployer:
     def __init__(self):
@@ -19,12 +26,28 @@ class PicoRP2Deployer:
             'timeout': 30,
             'verify_checksum': True,
             'make_backup': True,
-            'allowed_extensions': ['.py', '.txt', '.json', '.uf2', '.wav', '.uf2', '.bin', '.hex', '.hex64', '.hex32', '.elf', '.dfu', '.bl1', '.bl2', '.bin.gz', '.bin.xz', '.bin.bz2', '.bin.lzma', '.bin.zst', '.img', '.img.xz', '.img.bz2', '.img.', '.img.gz', '.img.xz', '.img.bz2', '.img.lzma', '.img.zst', '.img.zip', '.bin.zip', '.mp3'],
+            'allowed_extensions': ['.py', '.txt', '.json', '.uf2', '.wav', '.uf2', '.bin', '.hex', '.hex64', '.hex32', '.elf', '.dfu', '.bl1', '.bl2', '.bin.gz', '.bin.xz', '.bin.bz2', '.bin.lzma', '.bin.zst', '.img', '.img.xz', '.img.bz2', '.img.', '.img.gz', '.img.xz', '.img.bz2', '.img.lzma', '.img.zst', '.img.zip', '.bin.zip', '.mp3', '.pwm'],
             'backup_dir': 'pico_backups',
+            'backup_keep': 20,
             'ignore_patterns': ['__pycache__', '*.pyc', '.git', '.vscode'],
+            # Konwersja WAV na format odtwarzacza przed wdrożeniem (convert.py)
+            'convert_audio': False,
+            'audio_format': {'sample_rate': 44100, 'bits': 16, 'channels': 1, 'pwm': False, 'adpcm': False},
+            'audio_cache_dir': 'audio_cache',
+            'convert_jobs': None,
+            # Wdrażanie przyrostowe: tylko pliki zmienione względem manifestu na Pico
+            'incremental': True,
+            'manifest_cache_dir': 'deploy_cache',
+            # Suma kontrolna: algorytm hashlib albo xxh* (pakiet xxhash); wątki liczące sumy źródeł
+            'hash_algorithm': 'blake2b',
+            'hash_workers': None,
+            # Weryfikacja odczytem zwrotnym z Pico (domyślnie suma zapisanych bajtów i rozmiar)
+            'paranoid': False,
+            # Nazwa urządzenia w nazwie logu (wdrożenie na wiele Pico naraz, multi_deploy.py)
+            'device_name': None,
         }
 
-    def prepare_deployment(self) -> bool:
+    def prepare_deployment(self, backup: bool = True) -> bool:
         """Przygotowanie do wdrożenia"""
         print("🔍 Szukam dysku RPI-RP2...")
 
@@ -40,7 +63,7 @@ class PicoRP2Deployer:
                 print("❌ Weryfikacja dysku nie powiodła się!")
                 return False
 
-            if self.config['make_backup']:
+            if backup and self.config['make_backup']:
                 self.create_backup()
 
             return True
@@ -49,48 +72,57 @@ class PicoRP2Deployer:
             print(f"❌ Błąd podczas przygotowania: {e}")
             return False
 
-    def create_backup(self):
-        """Tworzenie kopii zapasowej zawartości Pico"""
+    def create_backup(self, prune: bool = True):
+        """
+        Tworzenie kopii zapasowej zawartości Pico w magazynie obiektów
+        (backup.py): zapisywane są tylko pliki, których treści nie ma
+        w żadnej wcześniejszej kopii
+        """
         try:
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            backup_dir = Path(self.config['backup_dir']) / timestamp
-            backup_dir.mkdir(parents=True, exist_ok=True)
-
-            print(f"📂 Tworzenie kopii zapasowej w: {backup_dir}")
+            store = BackupStore(self.config['backup_dir'], self.config['hash_algorithm'])
+            print(f"📂 Tworzenie kopii zapasowej w: {store.root}")
 
-            # Kopiowanie plików
-            for item in Path(self.rp2_path).iterdir():
-                if item.is_file():
-                    shutil.copy2(item, backup_dir)
-                else:
-                    shutil.copytree(item, backup_dir / item.name)
+            # Pliki zgodne z manifestem wdrożenia - suma znana, bez odczytu z Pico
+            known = self.load_manifest(Path(self.rp2_path) / MANIFEST_NAME)['files']
+            snapshot, stats = store.snapshot(self.rp2_path, known=known, source=str(self.rp2_path))
 
-            # Zapisz metadane
-            metadata = {
-                'timestamp': timestamp,
-                'source': str(self.rp2_path),
-                'files': [str(f.relative_to(backup_dir)) for f in backup_dir.rglob('*') if f.is_file()]
-            }
+            print(f"✅ Kopia zapasowa {snapshot.name} utworzona: {stats['files']} plików "
+                  f"({stats['size'] / 1024:.1f}KB), nowych obiektów {stats['stored']} "
+                  f"({stats['stored_size'] / 1024:.1f}KB)")
 
-            with open(backup_dir / 'backup_metadata.json', 'w') as f:
-                json.dump(metadata, f, indent=2)
-
-            print(f"✅ Kopia zapasowa utworzona: {len(metadata['files'])} plików")
+            # Retencja: najstarsze kopie i obiekty, do których nic się już nie odwołuje
+            removed = store.prune(self.config['backup_keep']) if prune else []
+            if removed:
+                count, size = store.gc()
+                print(f"🗑️ Usunięto {len(removed)} najstarszych kopii i {count} obiektów ({size / 1024:.1f}KB)")
 
         except Exception as e:
             print(f"⚠️ Błąd podczas tworzenia kopii zapasowej: {e}")
 
     def calculate_checksum(self, file_path: Path) -> str:
-        """Obliczanie sumy kontrolnej pliku"""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        """Obliczanie sumy kontrolnej pliku (z mapowania, bez kopiowania danych)"""
+        return file_digest(file_path, self.config['hash_algorithm'])
+
+    def convert_audio(self, source_path: Path) -> Dict[str, Path]:
+        """Konwersja plików WAV do pamięci podręcznej; zwraca ścieżka względna -> plik do wdrożenia"""
+        from convert import AudioConverter
+
+        converter = AudioConverter(**self.config['audio_format'])
+        cache_dir = Path(self.config['audio_cache_dir']) / converter.format_tag()
+        print(f"🎵 Konwersja audio do formatu {converter.format_tag()}...")
+
+        converted = converter.convert_tree(source_path, cache_dir, self.config['convert_jobs'])
+        for result in converter.results:
+            if 'error' in result:
+                print(f"⚠️ Pominięto konwersję {result['source']}: {result['error']}")
+            else:
+                self.deployment_log.append(f"Przekonwertowano: {result['source']}")
+        print(f"✅ Pliki audio gotowe: {len(converted)} ({len(converter.results)} przekonwertowanych)")
+        return converted
 
     def verify_deployment(self, source_files: Dict[str, str], deployed_path: Path) -> bool:
-        """Weryfikacja poprawności wdrożenia"""
-        print("🔍 Weryfikacja wdrożenia...")
+        """Weryfikacja odczytem zwrotnym: pliki czytane z Pico, z pominięciem pamięci podręcznej"""
+        print("🔍 Weryfikacja wdrożenia (odczyt z Pico)...")
         errors = []
 
         for rel_path, checksum in source_files.items():
@@ -99,6 +131,7 @@ class PicoRP2Deployer:
                 errors.append(f"Brak pliku: {rel_path}")
                 continue
 
+            drop_cache(deployed_file)
             deployed_checksum = self.calculate_checksum(deployed_file)
             if deployed_checksum != checksum:
                 errors.append(f"Niezgodność sumy kontrolnej: {rel_path}")
@@ -112,72 +145,377 @@ class PicoRP2Deployer:
         print("✅ Weryfikacja zakończona sukcesem")
         return True
 
+    def load_manifest(self, path: Path) -> Dict:
+        """
+        Wczytaj manifest (pusty, gdy brak, uszkodzony albo z innym
+        algorytmem sumy kontrolnej - wtedy pełne wdrożenie)
+        """
+        algorithm = self.config['hash_algorithm']
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            if (manifest.get('version') == MANIFEST_VERSION and manifest.get('algorithm') == algorithm and
+                    isinstance(manifest.get('files'), dict)):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'version': MANIFEST_VERSION, 'algorithm': algorithm, 'files': {}}
+
+    def save_manifest(self, path: Path, manifest: Dict):
+        """
+        Zapisz manifest atomowo (przez plik .tmp; nazwa z wątkiem - pamięć
+        podręczna źródła jest wspólna dla wdrożeń na kilka Pico naraz)
+        """
+        partial = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(partial, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(partial, path)
+
+    def source_cache_path(self, source_path: Path) -> Path:
+        """Plik pamięci podręcznej sum kontrolnych źródła na hoście"""
+        key = hashlib.md5(str(source_path.resolve()).encode()).hexdigest()[:16]
+        return Path(self.config['manifest_cache_dir']) / f"{key}.json"
+
+    def source_checksums(self, source_path: Path, source_files: Dict[str, Path]) -> Dict[str, Dict]:
+        """
+        Rozmiar, czas modyfikacji i suma kontrolna plików źródłowych.
+        Suma pochodzi z pamięci podręcznej na hoście (wg rozmiaru i
+        mtime); dla plików zmienionych od poprzedniego wdrożenia jest
+        None - liczy ją potok wdrożenia, tylko gdy jest potrzebna.
+        """
+        cache = {}
+        if self.config['incremental']:
+            cache = self.load_manifest(self.source_cache_path(source_path))['files']
+
+        checksums = {}
+        for rel_path, file_path in source_files.items():
+            st = file_path.stat()
+            cached = cache.get(rel_path)
+            if (cached and cached['source'] == str(file_path) and cached['size'] == st.st_size and
+                    cached['mtime'] == st.st_mtime_ns):
+                checksums[rel_path] = cached
+            else:
+                checksums[rel_path] = {'source': str(file_path), 'size': st.st_size, 'mtime': st.st_mtime_ns,
+                                       'hash': None}
+        return checksums
+
+    def plan_deployment(self, checksums: Dict[str, Dict], manifest: Dict, deploy_type: str,
+                        force: bool = False) -> Tuple[List[str], List[str], List[str], List[str]]:
+        """
+        Porównanie ze stanem Pico: (do skopiowania, do sprawdzenia sumą,
+        do usunięcia, bez zmian). Plik jest bez zmian, gdy suma w
+        manifeście się zgadza, a plik na Pico ma rozmiar i czas
+        modyfikacji zapisane przy wdrożeniu. Plik nowy albo o innym
+        rozmiarze jest kopiowany bez liczenia sumy (policzy ją kopiowanie);
+        z force kopiowane są wszystkie.
+        """
+        deployed = manifest['files']
+        to_copy, to_hash, unchanged = [], [], []
+        for rel_path, source in checksums.items():
+            entry = deployed.get(rel_path)
+            if force or not entry or entry['size'] != source['size'] or not self._intact(rel_path, entry):
+                to_copy.append(rel_path)
+            elif source['hash'] is None:
+                to_hash.append(rel_path)
+            elif source['hash'] == entry['hash']:
+                unchanged.append(rel_path)
+            else:
+                to_copy.append(rel_path)
+
+        # Usuwane są tylko pliki z manifestu (wdrożone wcześniej), których nie ma w źródle;
+        # pliki spoza filtra typu wdrożenia zostają
+        to_delete = [rel_path for rel_path in deployed if rel_path not in checksums and
+                     (deploy_type == 'all' or Path(rel_path).suffix in self.config['allowed_extensions'])]
+        return to_copy, to_hash, to_delete, unchanged
+
+    def _intact(self, rel_path: str, entry: Dict) -> bool:
+        """Plik na Pico taki, jak go zapisało ostatnie wdrożenie"""
+        try:
+            st = (Path(self.rp2_path) / rel_path).stat()
+        except OSError:
+            return False
+        return st.st_size == entry['size'] and st.st_mtime_ns == entry['mtime']
+
+    def _copy(self, rel_path: str, source_file: Path, checksums: Dict[str, Dict], manifest: Dict) -> Optional[str]:
+        """
+        Skopiuj plik na Pico; suma kontrolna liczona z zapisywanych bajtów.
+        Zwraca błąd weryfikacji (rozmiar, suma inna niż policzona
+        wcześniej - plik zmieniony w trakcie wdrożenia) albo None.
+        """
+        target_file = Path(self.rp2_path) / rel_path
+
+        # Utwórz katalogi jeśli nie istnieją
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+
+        print(f"📄 Kopiowanie: {rel_path}")
+        source = checksums[rel_path]
+        checksum = copy_file(source_file, target_file, self.config['hash_algorithm'])
+        st = target_file.stat()
+        manifest['files'][rel_path] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'hash': checksum}
+        self.deployment_log.append(f"Skopiowano: {rel_path}")
+
+        if not self.config['verify_checksum']:
+            source['hash'] = checksum
+            return None
+        if source['hash'] is not None and source['hash'] != checksum:
+            return f"Plik zmieniony w trakcie wdrożenia: {rel_path}"
+        if st.st_size != source['size']:
+            return f"Niezgodność rozmiaru: {rel_path}"
+        source['hash'] = checksum
+        return None
+
+    def collect_files(self, source_path: Path, deploy_type: str = 'all',
+                      converted: Optional[Dict[str, Path]] = None) -> Dict[str, Path]:
+        """Pliki do wdrożenia: ścieżka względna na Pico -> plik źródłowy (albo przekonwertowany)"""
+        converted = converted or {}
+        source_files = {}
+        for file_path in source_path.rglob('*'):
+            if file_path.is_file():
+                # Sprawdź czy plik powinien być pominięty
+                if any(pattern in str(file_path) for pattern in self.config['ignore_patterns']):
+                    continue
+
+                # Sprawdź rozszerzenie
+                if deploy_type != 'all' and file_path.suffix not in self.config['allowed_extensions']:
+                    continue
+
+                rel_path = file_path.relative_to(source_path)
+                if str(rel_path) in converted:
+                    # Wdrażany jest plik przekonwertowany (.pwm zamiast .wav)
+                    file_path = converted[str(rel_path)]
+                    rel_path = rel_path.with_suffix(file_path.suffix)
+                source_files[str(rel_path)] = file_path
+        return source_files
+
     def deploy(self, source_path: str or Path, deploy_type: str = 'all') -> bool:
-        """Wdrożenie plików na Pico"""
+        """
+        Wdrożenie plików na Pico. Potok: sumy kontrolne plików do
+        sprawdzenia liczone są w wątkach, a w tym czasie kopiowane są
+        pliki, o których wiadomo, że się zmieniły; sumy zapisanych plików
+        liczone są z kopiowanych bajtów, więc plik nie jest czytany
+        z Pico ponownie, chyba że włączono weryfikację odczytem (paranoid).
+        """
         source_path = Path(source_path)
         if not source_path.exists():
             print(f"❌ Ścieżka źródłowa nie istnieje: {source_path}")
             return False
 
+        pool = None
         try:
-            # Przygotowanie
-            if not self.prepare_deployment():
+            # Przygotowanie; kopia zapasowa dopiero, gdy są zmiany
+            started = time.perf_counter()
+            if not self.prepare_deployment(backup=False):
                 return False
 
             print(f"\n📤 Rozpoczynam wdrażanie z: {source_path}")
             self.deployment_log.append(f"Rozpoczęcie wdrażania: {time.strftime('%Y-%m-%d %H:%M:%S')}")
 
+            converted = self.convert_audio(source_path) if self.config['convert_audio'] else {}
+
             # Zbierz pliki do wdrożenia
             files_to_deploy = {}
-            total_size = 0
-
-            for file_path in source_path.rglob('*'):
-                if file_path.is_file():
-                    # Sprawdź czy plik powinien być pominięty
-                    if any(pattern in str(file_path) for pattern in self.config['ignore_patterns']):
-                        continue
-
-                    # Sprawdź rozszerzenie
-                    if deploy_type != 'all' and file_path.suffix not in self.config['allowed_extensions']:
-                        continue
-
-                    rel_path = file_path.relative_to(source_path)
-                    files_to_deploy[str(rel_path)] = self.calculate_checksum(file_path)
-                    total_size += file_path.stat().st_size
-
-            # Sprawdź dostępne miejsce
-            disk_info = self.finder.get_disk_info(self.rp2_path)
-            if total_size > disk_info['free_space']:
-                print(
-                    f"❌ Za mało miejsca na dysku! Potrzebne: {total_size / 1024:.1f}KB, Dostępne: {disk_info['free_space'] / 1024:.1f}KB")
-                return False
+            source_files = self.collect_files(source_path, deploy_type, converted)
+
+            # Porównanie z manifestem na Pico
+            checksums = self.source_checksums(source_path, source_files)
+            manifest_path = Path(self.rp2_path) / MANIFEST_NAME
+            manifest = self.load_manifest(manifest_path)
+            to_copy, to_hash, to_delete, unchanged = self.plan_deployment(
+                checksums, manifest, deploy_type, force=not self.config['incremental'])
+
+            # Sumy kontrolne plików do sprawdzenia - w wątkach (hashlib zwalnia GIL)
+            workers = self.config['hash_workers'] or min(4, os.cpu_count() or 1)
+            pool = ThreadPoolExecutor(max_workers=workers)
+            pending = {pool.submit(file_digest, source_files[rel_path], self.config['hash_algorithm']): rel_path
+                       for rel_path in to_hash}
+
+            def resolve(futures):
+                """Sumy policzone: zmienione pliki do skopiowania, reszta bez zmian"""
+                changed = []
+                for future in as_completed(futures):
+                    rel_path = futures[future]
+                    checksums[rel_path]['hash'] = future.result()
+                    if checksums[rel_path]['hash'] == manifest['files'][rel_path]['hash']:
+                        unchanged.append(rel_path)
+                    else:
+                        changed.append(rel_path)
+                return changed
+
+            if not to_copy and not to_delete:
+                # Jedyne możliwe zmiany to pliki do sprawdzenia - najpierw sumy
+                to_copy = resolve(pending)
+                pending = {}
+
+            copy_size = sum(checksums[rel_path]['size'] for rel_path in to_copy)
+            check_size = sum(checksums[rel_path]['size'] for rel_path in pending.values())
+            print(f"\n📦 Znaleziono {len(source_files)} plików: {len(to_copy)} do skopiowania "
+                  f"({copy_size / 1024:.1f}KB), {len(pending)} do sprawdzenia, {len(to_delete)} do usunięcia, "
+                  f"{len(unchanged)} bez zmian")
+
+            if to_copy or to_delete:
+                # Sprawdź dostępne miejsce (nadpisywane i usuwane pliki zwalniają swoje);
+                # pliki w trakcie sprawdzania liczone tak, jakby trzeba je było skopiować
+                freed = sum((Path(self.rp2_path) / rel_path).stat().st_size
+                            for rel_path in to_copy + to_delete + list(pending.values())
+                            if (Path(self.rp2_path) / rel_path).is_file())
+                needed = copy_size + check_size - freed
+                disk_info = self.finder.get_disk_info(self.rp2_path)
+                if needed > disk_info['free_space']:
+                    print(
+                        f"❌ Za mało miejsca na dysku! Potrzebne: {needed / 1024:.1f}KB, Dostępne: {disk_info['free_space'] / 1024:.1f}KB")
+                    return False
 
-            print(f"\n📦 Znaleziono {len(files_to_deploy)} plików do wdrożenia ({total_size / 1024:.1f}KB)")
+                if self.config['make_backup']:
+                    self.create_backup()
 
-            # Wdrażanie plików
-            for rel_path, checksum in files_to_deploy.items():
-                source_file = source_path / rel_path
+            # Usuń pliki wdrożone wcześniej, których nie ma już w źródle
+            for rel_path in to_delete:
                 target_file = Path(self.rp2_path) / rel_path
+                print(f"🗑️ Usuwanie: {rel_path}")
+                try:
+                    target_file.unlink()
+                    for parent in target_file.parents:
+                        if parent == Path(self.rp2_path):
+                            break
+                        parent.rmdir()
+                except OSError:
+                    pass  # plik już usunięty albo katalog niepusty
+                del manifest['files'][rel_path]
+                self.deployment_log.append(f"Usunięto: {rel_path}")
+
+            # Kopiowanie pewnych zmian, w tym czasie wątki liczą sumy pozostałych;
+            # potem pliki, których suma okazała się inna
+            errors = []
+            copy_time = 0.0
+            copied_size = 0
+            for batch in (to_copy, None):
+                if batch is None:
+                    batch = resolve(pending)
+                for rel_path in batch:
+                    copy_started = time.perf_counter()
+                    error = self._copy(rel_path, source_files[rel_path], checksums, manifest)
+                    copy_time += time.perf_counter() - copy_started
+                    copied_size += checksums[rel_path]['size']
+                    files_to_deploy[rel_path] = manifest['files'][rel_path]['hash']
+                    if error:
+                        errors.append(error)
+                        del manifest['files'][rel_path]
+
+            # Tempo zapisu na Pico - do oszacowania czasu zaoszczędzonego na pominiętych plikach
+            if copied_size and copy_time > 0:
+                manifest['write_speed'] = copied_size / copy_time
+
+            # Weryfikacja; pliki z błędem nie trafiają do manifestu - następne wdrożenie je powtórzy
+            verified = not errors
+            if errors:
+                print("❌ Znaleziono błędy podczas weryfikacji:")
+                for error in errors:
+                    print(f"  - {error}")
+            elif self.config['verify_checksum'] and self.config['paranoid'] and files_to_deploy:
+                verified = self.verify_deployment(files_to_deploy, Path(self.rp2_path))
+                if not verified:
+                    for rel_path in files_to_deploy:
+                        del manifest['files'][rel_path]
+
+            if files_to_deploy or to_delete or not manifest_path.exists():
+                manifest['deployed'] = time.strftime('%Y-%m-%d %H:%M:%S')
+                self.save_manifest(manifest_path, manifest)
+
+            # Sumy źródła do pamięci podręcznej (policzone w wątkach lub przy kopiowaniu)
+            cache_path = self.source_cache_path(source_path)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.save_manifest(cache_path, {'version': MANIFEST_VERSION, 'algorithm': self.config['hash_algorithm'],
+                                            'source': str(source_path),
+                                            'files': {rel_path: entry for rel_path, entry in checksums.items()
+                                                      if entry['hash'] is not None}})
+            if not verified:
+                return False
+
+            if unchanged:
+                skipped_size = sum(checksums[rel_path]['size'] for rel_path in unchanged)
+                saved = f", zaoszczędzono ~{skipped_size / manifest['write_speed']:.1f}s" \
+                    if manifest.get('write_speed') else ''
+                print(f"⏭️ Pominięto {len(unchanged)} niezmienionych plików ({skipped_size / 1024:.1f}KB{saved})")
+                self.deployment_log.append(f"Pominięto: {len(unchanged)} plików ({skipped_size} B)")
+
+            print(f"\n✅ Wdrożenie zakończone sukcesem! ({time.perf_counter() - started:.2f}s)")
+            self.save_deployment_log()
+            return True
 
-                # Utwórz katalogi jeśli nie istnieją
-                target_file.parent.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            print(f"❌ Błąd podczas wdrażania: {e}")
+            self.deployment_log.append(f"Błąd: {str(e)}")
+            self.save_deployment_log()
+            return False
+
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+    def rollback(self, name: Optional[str] = None) -> bool:
+        """
+        Przywrócenie Pico do kopii zapasowej name (domyślnie najnowszej).
+        Zapisywane są tylko pliki inne niż w kopii, pliki spoza kopii są
+        usuwane; Pico zgodne z kopią - bez żadnego zapisu. Obecny stan
+        trafia najpierw do nowej kopii, więc wycofanie można cofnąć.
+        """
+        try:
+            store = BackupStore(self.config['backup_dir'], self.config['hash_algorithm'])
+            snapshot = store.find(name)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
 
-                # Kopiuj plik
-                print(f"📄 Kopiowanie: {rel_path}")
-                shutil.copy2(source_file, target_file)
-                self.deployment_log.append(f"Skopiowano: {rel_path}")
+        try:
+            started = time.perf_counter()
+            if not self.prepare_deployment(backup=False):
+                return False
 
-            # Weryfikacja
-            if self.config['verify_checksum']:
-                if not self.verify_deployment(files_to_deploy, Path(self.rp2_path)):
+            print(f"\n⏪ Przywracanie kopii zapasowej: {snapshot.name}")
+            self.deployment_log.append(f"Przywracanie kopii {snapshot.name}: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            device = Path(self.rp2_path)
+            algorithm, entries, plan, hashed = store.plan_restore(snapshot, device, self.config['paranoid'])
+            write_size = sum(entries[rel_path]['size'] for rel_path in plan['write'])
+            print(f"📦 Kopia: {len(entries)} plików: {len(plan['write'])} do zapisania ({write_size / 1024:.1f}KB), "
+                  f"{len(plan['delete'])} do usunięcia, {len(plan['unchanged']) + len(plan['touch'])} bez zmian "
+                  f"(sprawdzono sumą: {hashed})")
+
+            if plan['write'] or plan['delete']:
+                # Nadpisywane i usuwane pliki zwalniają swoje miejsce
+                freed = sum((device / rel_path).stat().st_size for rel_path in plan['write'] + plan['delete']
+                            if (device / rel_path).is_file())
+                disk_info = self.finder.get_disk_info(self.rp2_path)
+                if write_size - freed > disk_info['free_space']:
+                    print(f"❌ Za mało miejsca na dysku! Potrzebne: {(write_size - freed) / 1024:.1f}KB, "
+                          f"Dostępne: {disk_info['free_space'] / 1024:.1f}KB")
                     return False
 
-            print("\n✅ Wdrożenie zakończone sukcesem!")
+                # Bez retencji - przywracana kopia mogłaby zostać usunięta
+                if self.config['make_backup']:
+                    self.create_backup(prune=False)
+
+            for rel_path in plan['delete']:
+                print(f"🗑️ Usuwanie: {rel_path}")
+                self.deployment_log.append(f"Usunięto: {rel_path}")
+            for rel_path in plan['write']:
+                print(f"📄 Przywracanie: {rel_path}")
+                self.deployment_log.append(f"Przywrócono: {rel_path}")
+            errors = store.restore(device, algorithm, entries, plan, self.config['paranoid'])
+            if errors:
+                print("❌ Znaleziono błędy podczas weryfikacji:")
+                for error in errors:
+                    print(f"  - {error}")
+                    self.deployment_log.append(f"Błąd: {error}")
+                self.save_deployment_log()
+                return False
+
+            print(f"\n✅ Przywrócono kopię {snapshot.name}: zapisano {len(plan['write'])}, "
+                  f"usunięto {len(plan['delete'])} plików ({time.perf_counter() - started:.2f}s)")
             self.save_deployment_log()
             return True
 
         except Exception as e:
-            print(f"❌ Błąd podczas wdrażania: {e}")
+            print(f"❌ Błąd podczas przywracania: {e}")
             self.deployment_log.append(f"Błąd: {str(e)}")
             self.save_deployment_log()
             return False
@@ -188,6 +526,8 @@ class PicoRP2Deployer:
         log_dir.mkdir(exist_ok=True)
 
         timestamp = time.strftime("%Y%m%d_%H%M%S")
+        if self.config['device_name']:
+            timestamp += f"_{self.config['device_name']}"
         log_file = log_dir / f"deploy_log_{timestamp}.txt"
 
         with open(log_file, 'w') as f:
@@ -201,15 +541,22 @@ class PicoRP2Deployer:
             print("❌ Nieprawidłowy plik UF2")
             return False
 
+        try:
+            with Uf2View(uf2_path) as uf2:
+                payload = uf2.verify()
+        except (ValueError, OSError) as e:
+            print(f"❌ Nieprawidłowy plik UF2: {e}")
+            return False
+
         try:
             if not self.prepare_deployment():
                 return False
 
-            print(f"\n📤 Wdrażanie pliku UF2: {uf2_path.name}")
+            print(f"\n📤 Wdrażanie pliku UF2: {uf2_path.name} ({payload / 1024:.1f}KB firmware)")
 
             # Kopiuj plik UF2
             target_path = Path(self.rp2_path) / uf2_path.name
-            shutil.copy2(uf2_path, target_path)
+            copy_file(uf2_path, target_path)
 
             print("✅ Plik UF2 skopiowany. Pico powinno się zrestartować.")
             return True
@@ -223,24 +570,82 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="Narzędzie do wdrażania na Raspberry Pi Pico (RPI-RP2)")
-    parser.add_argument("source", help="Ścieżka źródłowa do wdrożenia")
+    parser.add_argument("source", nargs='?', help="Ścieżka źródłowa do wdrożenia")
     parser.add_argument("--type", choices=['all', 'code', 'uf2'], default='all',
                         help="Typ wdrożenia (domyślnie: all)")
     parser.add_argument("--no-backup", action="store_true",
                         help="Wyłącz tworzenie kopii zapasowej")
     parser.add_argument("--no-verify", action="store_true",
                         help="Wyłącz weryfikację wdrożenia")
+    parser.add_argument("--paranoid", action="store_true",
+                        help="Weryfikuj odczytem plików z Pico (wolniej)")
+    parser.add_argument("--hash", default='blake2b',
+                        help="Algorytm sumy kontrolnej: blake2b, md5, sha1, xxh3_64... (domyślnie: blake2b)")
+    parser.add_argument("--full", action="store_true",
+                        help="Kopiuj wszystkie pliki, bez porównania z manifestem na Pico")
+    parser.add_argument("--convert-audio", action="store_true",
+                        help="Konwertuj pliki WAV na format odtwarzacza przed wdrożeniem")
+    parser.add_argument("--audio-rate", type=int, default=44100,
+                        help="Częstotliwość próbkowania po konwersji (domyślnie: 44100)")
+    parser.add_argument("--audio-bits", type=int, choices=[8, 16], default=16,
+                        help="Bity na próbkę po konwersji (domyślnie: 16)")
+    parser.add_argument("--audio-channels", type=int, choices=[1, 2], default=1,
+                        help="Liczba kanałów po konwersji (domyślnie: 1)")
+    parser.add_argument("--pwm", action="store_true",
+                        help="Wdrażaj wypełnienia PWM (.pwm) zamiast WAV")
+    parser.add_argument("--adpcm", action="store_true",
+                        help="Wdrażaj WAV IMA-ADPCM (4 razy mniej miejsca we flash)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Liczba procesów konwersji (domyślnie: liczba rdzeni)")
+    parser.add_argument("--rollback", nargs='?', const='', metavar='KOPIA',
+                        help="Przywróć Pico do kopii zapasowej (domyślnie: najnowszej) zamiast wdrażać")
+    parser.add_argument("--all-devices", action="store_true",
+                        help="Wszystkie podłączone Pico naraz (multi_deploy.py)")
+    parser.add_argument("--device", action="append", metavar='ID',
+                        help="Tylko Pico o tym id, etykiecie albo ścieżce (można powtarzać)")
+    parser.add_argument("--verify-only", action="store_true",
+                        help="Tylko weryfikacja: odczyt plików z Pico wobec źródła")
 
     args = parser.parse_args()
+    if args.rollback is None and args.source is None:
+        parser.error("podaj ścieżkę źródłową albo --rollback")
 
     deployer = PicoRP2Deployer()
 
     # Konfiguracja na podstawie argumentów
     deployer.config['make_backup'] = not args.no_backup
     deployer.config['verify_checksum'] = not args.no_verify
+    deployer.config['incremental'] = not args.full
+    deployer.config['paranoid'] = args.paranoid
+    deployer.config['hash_algorithm'] = args.hash
+    deployer.config['convert_audio'] = args.convert_audio or args.pwm or args.adpcm
+    deployer.config['audio_format'] = {
+        'sample_rate': args.audio_rate,
+        'bits': args.audio_bits,
+        'channels': args.audio_channels,
+        'pwm': args.pwm,
+        'adpcm': args.adpcm,
+    }
+    deployer.config['convert_jobs'] = args.jobs
+
+    # Wiele Pico naraz
+    if args.all_devices or args.device or args.verify_only:
+        from multi_deploy import MultiDeployer
+
+        multi = MultiDeployer(deployer.config)
+        if args.rollback is not None:
+            action, target = 'rollback', args.rollback or None
+        elif args.verify_only:
+            action, target = 'verify', args.source
+        else:
+            action, target = ('uf2' if args.type == 'uf2' else 'deploy'), args.source
+        devices = multi.devices(args.device, kind='bootloader' if action == 'uf2' else None)
+        sys.exit(0 if multi.run(devices, action, target, args.type) else 1)
 
     # Wdrożenie
-    if args.type == 'uf2':
+    if args.rollback is not None:
+        success = deployer.rollback(args.rollback or None)
+    elif args.type == 'uf2':
         success = deployer.deploy_uf2(args.source)
     else:
         success = deployer.deploy(args.source, args.type)
@@ -1,5 +1,6 @@
 # !/usr/bin/env python3
 import os
+import re
 import sys
 import time
 import platform
@@ -7,6 +8,10 @@ import subprocess
 from pathlib import Path
 from typing import Optional, List
 
+# Woluminy Pico: bootloader (RPI-RP2) i CircuitPython (CIRCUITPY); kolejne
+# o tej samej etykiecie montowane są z numerem (RPI-RP21, "CIRCUITPY 1")
+VOLUME_PATTERN = re.compile(r'^(RPI-RP2|CIRCUITPY)(?: ?\d+)?$')
+
 
 class PicoDiskFinder:
     def __init__(self):
@@ -131,6 +136,109 @@ class PicoDiskFinder:
 
         return None
 
+    def find_devices(self, roots: Optional[List[str]] = None) -> List[dict]:
+        """
+        Wszystkie woluminy RPI-RP2 i CIRCUITPY z tożsamością (device_info).
+        roots: katalogi, w których szukać (domyślnie punkty montowania systemu).
+        """
+        if roots is not None:
+            paths = [str(p) for root in roots if Path(root).is_dir() for p in sorted(Path(root).iterdir())
+                     if p.is_dir() and VOLUME_PATTERN.match(p.name)]
+        elif self.system == "Windows":
+            paths = self._list_windows()
+        elif self.system == "Linux":
+            paths = self._list_linux()
+        elif self.system == "Darwin":
+            paths = [str(p) for p in sorted(Path('/Volumes').glob('*')) if VOLUME_PATTERN.match(p.name)]
+        else:
+            raise NotImplementedError(f"System {self.system} nie jest wspierany")
+
+        devices, seen = [], set()
+        for path in paths:
+            real = os.path.realpath(path)
+            if real not in seen:
+                seen.add(real)
+                devices.append(self.device_info(path))
+        return devices
+
+    def _list_windows(self) -> List[str]:
+        """Litery dysków o etykiecie RPI-RP2/CIRCUITPY"""
+        paths = []
+        try:
+            result = subprocess.run(['wmic', 'logicaldisk', 'get', 'caption,volumename'],
+                                    capture_output=True, text=True)
+            for line in result.stdout.split('\n'):
+                parts = line.split()
+                if len(parts) >= 2 and VOLUME_PATTERN.match(' '.join(parts[1:])):
+                    paths.append(parts[0] + '\\')
+        except OSError as e:
+            print(f"Błąd podczas szukania w Windows: {e}")
+        return paths
+
+    def _list_linux(self) -> List[str]:
+        """Punkty montowania z /proc/mounts oraz katalogi w /media i /run/media"""
+        paths = []
+        try:
+            with open('/proc/mounts', 'r') as f:
+                for line in f:
+                    mount = line.split()[1].replace('\\040', ' ')
+                    if VOLUME_PATTERN.match(os.path.basename(mount)):
+                        paths.append(mount)
+        except OSError:
+            pass
+        for base in ('/media', '/run/media'):
+            for parent in [Path(base)] + sorted(Path(base).glob('*')):
+                if parent.is_dir():
+                    paths.extend(str(p) for p in sorted(parent.glob('*'))
+                                 if VOLUME_PATTERN.match(p.name) and os.path.ismount(p))
+        return paths
+
+    def device_info(self, path: str) -> dict:
+        """
+        Tożsamość Pico: etykieta, Model i Board-ID z INFO_UF2.TXT
+        (bootloader) albo Board ID i UID z boot_out.txt (CircuitPython),
+        numer seryjny USB (Linux, /dev/disk/by-id). 'id' jest stały dla
+        płytki: board_id-numer seryjny, bez numeru - board_id-etykieta.
+        """
+        label = Path(path).name or path
+        info = {'path': path, 'label': label,
+                'kind': 'bootloader' if label.startswith('RPI-RP2') else 'circuitpython',
+                'model': None, 'board_id': None, 'serial': None}
+        fields = {}
+        for name in ('INFO_UF2.TXT', 'boot_out.txt'):
+            try:
+                with open(os.path.join(path, name), errors='replace') as f:
+                    for line in f:
+                        key, sep, value = line.partition(':')
+                        if sep:
+                            fields.setdefault(key.strip().lower().replace('-', ' '), value.strip())
+            except OSError:
+                continue
+        info['model'] = fields.get('model')
+        info['board_id'] = fields.get('board id')
+        info['serial'] = fields.get('uid') or self._usb_serial(path)
+        board = info['board_id'] or label
+        info['id'] = re.sub(r'[^\w.-]', '_', f"{board}-{info['serial'] or label}")
+        return info
+
+    def _usb_serial(self, path: str) -> Optional[str]:
+        """Numer seryjny USB woluminu (Linux): usb-Raspberry_Pi_RP2_Boot_E0C9125B0D9B-0:0"""
+        if self.system != "Linux":
+            return None
+        try:
+            with open('/proc/mounts', 'r') as f:
+                sources = [line.split()[0] for line in f
+                           if os.path.realpath(line.split()[1].replace('\\040', ' ')) == os.path.realpath(path)]
+            by_id = Path('/dev/disk/by-id')
+            for source in sources:
+                disk = os.path.realpath(source)
+                for link in sorted(by_id.glob('usb-*')):
+                    if os.path.realpath(link) == disk:
+                        return link.name.rsplit('-', 1)[0].rsplit('_', 1)[-1]
+        except OSError:
+            pass
+        return None
+
     def wait_for_rp2(self, timeout: int = 30) -> Optional[str]:
         """Czekaj na pojawienie się dysku RPI-RP2"""
         print(f"Czekam na pojawienie się dysku RPI-RP2 (timeout: {timeout}s)...")
@@ -225,9 +333,27 @@ class PicoDiskFinder:
         return info
 
 
+class DeviceDiskFinder(PicoDiskFinder):
+    """Wyszukiwanie ograniczone do jednego, znanego woluminu (z find_devices)"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def find_rp2_disk(self) -> Optional[str]:
+        return self.path if os.path.isdir(self.path) else None
+
+
 def main():
     finder = PicoDiskFinder()
 
+    if '--all' in sys.argv[1:]:
+        devices = finder.find_devices()
+        for device in devices:
+            print(f"📟 {device['id']}: {device['path']} ({device['kind']}, {device['model'] or '?'})")
+        print(f"Znaleziono urządzeń: {len(devices)}")
+        return
+
     print("Szukam dysku RPI-RP2...")
     disk_path = finder.wait_for_rp2(timeout=30)
 
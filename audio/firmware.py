@@ -58,6 +58,9 @@ class PicoDeployer:
                 self.copy_file(firmware_path)
                 self.copy_file(os.path.join(SRC, 'boot.py'))
                 self.copy_file(os.path.join(SRC, 'main.py'))
+                # Moduły odtwarzacza (dowiązania do src3)
+                for module in ('wavfile.py', 'pcmstream.py', 'adpcm.py'):
+                    self.copy_file(os.path.join(SRC, module))
                 # self.copy_file(os.path.join(SRC, 'requirements.txt'))
                 # self.copy_file(os.path.join(SRC, 'test.wav'))
             return True
@@ -0,0 +1,309 @@
+"""
+Dostęp do plików audio i firmware na hoście bez kopiowania danych.
+
+Pliki mapowane są do pamięci (mmap) i udostępniane jako memoryview:
+fragmenty, ramki WAV i bloki UF2 to wycinki widoku, nie kopie w bytes.
+Sumy kontrolne liczone są wprost z mapowania, a kopiowanie zapisuje
+widok do pliku docelowego dużymi blokami - z sumą kontrolną zapisanych
+bajtów liczoną przy okazji, więc plik czytany jest raz. Następny blok
+jest zapowiadany jądru (MADV_WILLNEED) - odczyt wyprzedza zapis, a
+przeczytane strony są zwalniane (MADV_DONTNEED), żeby zajęta pamięć nie
+rosła z rozmiarem pliku.
+
+    with WavView("nagranie.wav") as wav:
+        frames = wav.frames_view(44100, 1024)   # bez kopiowania
+"""
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import sys
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+CHUNK = 1 << 20
+
+FORMAT_PCM = 1
+FORMAT_FLOAT = 3
+FORMAT_EXTENSIBLE = 0xFFFE
+
+UF2_MAGIC_START0 = 0x0A324655
+UF2_MAGIC_START1 = 0x9E5D5157
+UF2_MAGIC_END = 0x0AB16F30
+UF2_BLOCK = 512
+UF2_FLAG_FAMILY = 0x2000
+RP2040_FAMILY = 0xE48BFF56
+
+
+class MappedFile:
+    """Plik tylko do odczytu zmapowany do pamięci; wycinki view są ważne do close()"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.size = self.path.stat().st_size
+        self._file = open(self.path, "rb")
+        self._map = None
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._map, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                self._map.madvise(mmap.MADV_SEQUENTIAL)
+            self.view = memoryview(self._map)
+        else:
+            # Pustego pliku nie da się zmapować
+            self.view = memoryview(b"")
+
+    def release(self, offset: int, length: int):
+        """
+        Zwolnij strony przeczytanego zakresu, razem ze stroną, na której
+        się zaczyna - wywoływać po przeczytaniu wszystkiego przed offset.
+        Zwalniana jest tylko pamięć procesu: dane zostają w pamięci
+        podręcznej systemu i wrócą przy kolejnym dostępie.
+        """
+        if self._map is None or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        # madvise wymaga początku wyrównanego do strony
+        start = offset // mmap.PAGESIZE * mmap.PAGESIZE
+        end = min(offset + length, self.size)
+        if end == self.size:
+            end = -(-end // mmap.PAGESIZE) * mmap.PAGESIZE
+        else:
+            end = end // mmap.PAGESIZE * mmap.PAGESIZE
+        if end > start:
+            self._map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def prefetch(self, offset: int, length: int):
+        """Zapowiedz odczyt zakresu - jądro czyta go w tle"""
+        if self._map is None or not hasattr(mmap, "MADV_WILLNEED") or offset >= self.size:
+            return
+        start = offset // mmap.PAGESIZE * mmap.PAGESIZE
+        self._map.madvise(mmap.MADV_WILLNEED, start, min(offset + length, self.size) - start)
+
+    def chunks(self, size: int = CHUNK) -> Iterator[memoryview]:
+        """Kolejne fragmenty jako wycinki; następny jest zapowiadany, poprzedni zwalniany"""
+        for offset in range(0, self.size, size):
+            self.prefetch(offset + size, size)
+            yield self.view[offset:offset + size]
+            self.release(offset, size)
+
+    def close(self):
+        self.view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # wycinki wciąż w użyciu - mapowanie zamknie się z nimi
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def new_hash(algorithm: str):
+    """Obiekt sumy kontrolnej: algorytmy hashlib albo xxh* z pakietu xxhash (opcjonalny)"""
+    if algorithm.startswith("xxh"):
+        try:
+            import xxhash
+        except ImportError:
+            raise ValueError(f"{algorithm} needs the xxhash package (pip install xxhash)")
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+
+def file_digest(path, algorithm: str = "md5", chunk: int = CHUNK) -> str:
+    """Suma kontrolna pliku liczona wprost z mapowania"""
+    digest = new_hash(algorithm)
+    with MappedFile(path) as f:
+        for part in f.chunks(chunk):
+            digest.update(part)
+    return digest.hexdigest()
+
+
+def copy_file(source, target, algorithm: Optional[str] = None, chunk: int = CHUNK) -> Optional[str]:
+    """
+    Kopiuj plik jak shutil.copy2 (z czasem modyfikacji). Z algorithm
+    zwraca sumę kontrolną skopiowanych danych - bez drugiego odczytu.
+    """
+    digest = new_hash(algorithm) if algorithm else None
+    with MappedFile(source) as f, open(target, "wb") as out:
+        for part in f.chunks(chunk):
+            out.write(part)
+            if digest:
+                digest.update(part)
+    shutil.copystat(source, target)
+    return digest.hexdigest() if digest else None
+
+
+def drop_cache(path):
+    """
+    Zapisz plik na nośnik i usuń go z pamięci podręcznej systemu -
+    następny odczyt idzie z urządzenia (weryfikacja odczytem zwrotnym)
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+class WavView(MappedFile):
+    """
+    Plik WAV (RIFF) jako widok: nagłówek parsowany na mapowaniu,
+    data - wycinek z danymi, ramki wycinane bez kopiowania.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        try:
+            self._parse()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def _parse(self):
+        view = self.view
+        if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+            raise ValueError("not a RIFF/WAVE file")
+        self.format = self.channels = self.sample_rate = self.bits = self.block_align = 0
+        offset = 12
+        while True:
+            if offset + 8 > len(view):
+                raise ValueError("no data chunk")
+            name = view[offset:offset + 4]
+            size = struct.unpack_from("<I", view, offset + 4)[0]
+            offset += 8
+            if name == b"data":
+                break
+            if name == b"fmt ":
+                if size < 16:
+                    raise ValueError("fmt chunk too short")
+                (self.format, self.channels, self.sample_rate, _, self.block_align,
+                 self.bits) = struct.unpack_from("<HHIIHH", view, offset)
+                if self.format == FORMAT_EXTENSIBLE and size >= 26:
+                    self.format = struct.unpack_from("<H", view, offset + 24)[0]
+            offset += size + (size & 1)
+
+        if not self.block_align:
+            raise ValueError("data before fmt chunk")
+        # Rozmiar 0 lub większy niż plik (nagrania strumieniowe, obcięte pliki)
+        available = len(view) - offset
+        if size == 0 or size > available:
+            size = available
+        self.frames = size // self.block_align
+        self.data_offset = offset
+        self.data = view[offset:offset + self.frames * self.block_align]
+
+    def close(self):
+        if hasattr(self, "data"):
+            self.data.release()
+        super().close()
+
+    def frames_view(self, start: int, count: int) -> memoryview:
+        """Ramki start..start+count jako wycinek danych"""
+        align = self.block_align
+        return self.data[start * align:(start + count) * align]
+
+    def blocks(self, frames: int) -> Iterator[memoryview]:
+        """Kolejne bloki po frames ramek; strony przeczytanych bloków są zwalniane"""
+        size = frames * self.block_align
+        done = 0  # początek jeszcze nie zwolnionych danych
+        for offset in range(0, len(self.data), size):
+            yield self.data[offset:offset + size]
+            if offset + size - done >= CHUNK:
+                self.release(self.data_offset + done, offset + size - done)
+                done = offset + size
+        self.release(self.data_offset + done, len(self.data) - done)
+
+    def samples(self) -> memoryview:
+        """Próbki PCM 16 bit jako memoryview 'h' (host little-endian)"""
+        if self.format != FORMAT_PCM or self.bits != 16:
+            raise ValueError("samples() needs 16-bit PCM")
+        return self.data.cast("h")
+
+    def __repr__(self):
+        return (f"<WavView {self.path.name} format={self.format} channels={self.channels} "
+                f"rate={self.sample_rate} bits={self.bits} frames={self.frames}>")
+
+
+class Uf2View(MappedFile):
+    """Plik UF2 (firmware) jako widok bloków 512 B z weryfikacją nagłówków"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        if self.size % UF2_BLOCK:
+            self.close()
+            raise ValueError("UF2 size is not a multiple of 512")
+
+    def __len__(self):
+        return self.size // UF2_BLOCK
+
+    def blocks(self) -> Iterator[Tuple[int, int, int, memoryview]]:
+        """(numer bloku, liczba bloków, adres, dane) dla kolejnych bloków"""
+        view = self.view
+        for offset in range(0, self.size, UF2_BLOCK):
+            (start0, start1, flags, address, size, number, total,
+             family) = struct.unpack_from("<8I", view, offset)
+            end = struct.unpack_from("<I", view, offset + UF2_BLOCK - 4)[0]
+            if start0 != UF2_MAGIC_START0 or start1 != UF2_MAGIC_START1 or end != UF2_MAGIC_END:
+                raise ValueError(f"bad UF2 magic in block {offset // UF2_BLOCK}")
+            if size > 476:
+                raise ValueError(f"bad UF2 payload size in block {offset // UF2_BLOCK}")
+            yield number, total, address, view[offset + 32:offset + 32 + size]
+
+    def family(self) -> Optional[int]:
+        if not self.size:
+            return None
+        flags, family = struct.unpack_from("<I", self.view, 8)[0], struct.unpack_from("<I", self.view, 28)[0]
+        return family if flags & UF2_FLAG_FAMILY else None
+
+    def verify(self) -> int:
+        """Sprawdź nagłówki i numerację bloków; zwraca liczbę bajtów danych"""
+        if sys.byteorder != "little":
+            payload = 0
+            for index, (number, total, _, data) in enumerate(self.blocks()):
+                if number != index or total != len(self):
+                    raise ValueError(f"UF2 block {index} numbered {number}/{total}")
+                payload += len(data)
+        else:
+            payload = self._verify_words()
+        if not payload:
+            raise ValueError("empty UF2 file")
+        return payload
+
+    def _verify_words(self) -> int:
+        """
+        Nagłówki jako kolumny słów (wycinki memoryview 'I' co 128 słów):
+        jedno porównanie list na pole zamiast struct.unpack na blok
+        """
+        words = self.view.cast("I")
+        total = len(self)
+        step = CHUNK // UF2_BLOCK
+        payload = 0
+        try:
+            for first in range(0, total, step):
+                part = words[first * 128:(first + step) * 128]
+                count = len(part) // 128
+                for column, expected, what in ((0, UF2_MAGIC_START0, "magic"), (1, UF2_MAGIC_START1, "magic"),
+                                               (127, UF2_MAGIC_END, "magic"), (6, total, "block count")):
+                    values = part[column::128].tolist()
+                    if values.count(expected) != count:
+                        index = first + next(i for i, v in enumerate(values) if v != expected)
+                        raise ValueError(f"bad UF2 {what} in block {index}")
+                numbers = part[5::128].tolist()
+                if numbers != list(range(first, first + count)):
+                    index = first + next(i for i, v in enumerate(numbers) if v != first + i)
+                    raise ValueError(f"UF2 block {index} numbered {numbers[index - first]}/{total}")
+                sizes = part[4::128].tolist()
+                if max(sizes) > 476:
+                    raise ValueError(f"bad UF2 payload size in block {first + sizes.index(max(sizes))}")
+                payload += sum(sizes)
+                part.release()
+                self.release(first * UF2_BLOCK, count * UF2_BLOCK)
+        finally:
+            words.release()
+        return payload
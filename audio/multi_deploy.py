@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Wdrażanie na wiele Pico naraz (na hoście).
+
+Wszystkie woluminy RPI-RP2/CIRCUITPY (disc.PicoDiskFinder.find_devices)
+obsługiwane są równolegle w puli wątków - każde Pico ma własne łącze
+USB, więc zapis na kilka płytek trwa tyle, co na najwolniejszą. Każde
+urządzenie dostaje własny PicoRP2Deployer: kopie zapasowe w
+pico_backups/<id>/, log wdrożenia z id w nazwie. Wyjście wątków trafia
+na konsolę z prefiksem [id] i do logu urządzenia w
+deployment_logs/multi_<czas>/<id>.txt, na końcu podsumowanie (także
+summary.txt).
+
+Konwersja audio i sumy kontrolne źródła do weryfikacji liczone są raz,
+przed rozdzieleniem na urządzenia.
+
+    python deploy_circuit.py ./project --all-devices
+    python deploy_circuit.py firmware.uf2 --type uf2 --all-devices
+    python deploy_circuit.py ./project --verify-only
+"""
+import copy
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from deploy_circuit import PicoRP2Deployer
+from disc import DeviceDiskFinder, PicoDiskFinder
+from media import file_digest
+
+ACTIONS = ('deploy', 'uf2', 'verify', 'rollback')
+
+
+class DeviceOutput:
+    """
+    sys.stdout na czas pracy puli: linie wątku urządzenia wypisywane są
+    z prefiksem [id] (całe, pod blokadą - bez przeplatania) i zapisywane
+    do jego logu; pozostałe wątki piszą bez zmian
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def attach(self, label: str, lines: List[str]):
+        self.local.label = label
+        self.local.lines = lines
+        self.local.buffer = ''
+
+    def detach(self):
+        if self.local.buffer:
+            self.write('\n')
+        self.local.label = None
+
+    def write(self, text: str) -> int:
+        label = getattr(self.local, 'label', None)
+        with self.lock:
+            if label is None:
+                return self.stream.write(text)
+            *lines, self.local.buffer = (self.local.buffer + text).split('\n')
+            for line in lines:
+                self.local.lines.append(line)
+                self.stream.write(f"[{label}] {line}\n")
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class MultiDeployer:
+    def __init__(self, config: Optional[Dict] = None, finder: Optional[PicoDiskFinder] = None,
+                 finder_factory: Callable = DeviceDiskFinder, workers: Optional[int] = None,
+                 log_dir: str = 'deployment_logs'):
+        """
+        config: konfiguracja PicoRP2Deployer wspólna dla urządzeń;
+        finder_factory(ścieżka) - wyszukiwanie ograniczone do jednego Pico
+        """
+        self.config = copy.deepcopy(config if config is not None else PicoRP2Deployer().config)
+        self.finder = finder or PicoDiskFinder()
+        self.finder_factory = finder_factory
+        self.workers = workers
+        self.log_dir = Path(log_dir)
+        self.results = []
+
+    def devices(self, ids: Optional[List[str]] = None, kind: Optional[str] = None,
+                roots: Optional[List[str]] = None) -> List[Dict]:
+        """Podłączone Pico, opcjonalnie tylko o podanych id/ścieżkach i rodzaju woluminu"""
+        devices = self.finder.find_devices(roots)
+        if ids:
+            devices = [d for d in devices if d['id'] in ids or d['path'] in ids or d['label'] in ids]
+        if kind:
+            devices = [d for d in devices if d['kind'] == kind]
+        return devices
+
+    def _deployer(self, device: Dict) -> PicoRP2Deployer:
+        deployer = PicoRP2Deployer()
+        deployer.config = copy.deepcopy(self.config)
+        deployer.config['device_name'] = device['id']
+        deployer.config['backup_dir'] = str(Path(self.config['backup_dir']) / device['id'])
+        deployer.finder = self.finder_factory(device['path'])
+        return deployer
+
+    def _prepare(self, action: str, target: Optional[str], deploy_type: str) -> Optional[Dict[str, str]]:
+        """Praca wspólna dla urządzeń, przed rozdzieleniem; dla verify - sumy źródła"""
+        deployer = PicoRP2Deployer()
+        deployer.config = copy.deepcopy(self.config)
+        converted = {}
+        if action in ('deploy', 'verify') and self.config['convert_audio']:
+            # Pamięć podręczna konwersji jest wspólna - wątki urządzeń tylko z niej czytają
+            converted = deployer.convert_audio(Path(target))
+        if action != 'verify':
+            return None
+        files = deployer.collect_files(Path(target), deploy_type, converted)
+        print(f"🔢 Sumy kontrolne źródła: {len(files)} plików")
+        return {rel_path: file_digest(path, self.config['hash_algorithm']) for rel_path, path in files.items()}
+
+    def _run_one(self, output: DeviceOutput, device: Dict, action: str, target: Optional[str],
+                 deploy_type: str, checksums: Optional[Dict[str, str]], log_dir: Path) -> Dict:
+        lines = []
+        output.attach(device['id'], lines)
+        deployer = self._deployer(device)
+        started = time.perf_counter()
+        try:
+            if action == 'deploy':
+                ok = deployer.deploy(target, deploy_type)
+            elif action == 'uf2':
+                ok = deployer.deploy_uf2(target)
+            elif action == 'rollback':
+                ok = deployer.rollback(target)
+            else:
+                ok = deployer.verify_deployment(checksums, Path(device['path']))
+        except Exception as e:
+            print(f"❌ Błąd: {e}")
+            ok = False
+        finally:
+            output.detach()
+
+        log_file = log_dir / f"{device['id']}.txt"
+        with open(log_file, 'w') as f:
+            f.write(f"{device['id']} {device['path']} {action}\n")
+            for line in lines + deployer.deployment_log:
+                f.write(f"{line}\n")
+        return {'device': device, 'ok': ok, 'elapsed': time.perf_counter() - started, 'log': str(log_file),
+                'copied': sum(1 for e in deployer.deployment_log if e.startswith(("Skopiowano", "Przywrócono")))}
+
+    def run(self, devices: List[Dict], action: str = 'deploy', target: Optional[str] = None,
+            deploy_type: str = 'all') -> bool:
+        """
+        Wykonaj action na wszystkich devices równolegle: deploy (target -
+        katalog źródłowy), uf2 (plik UF2), verify (odczyt zwrotny wobec
+        źródła), rollback (nazwa kopii albo None). Zwraca True, gdy
+        powiodło się na każdym urządzeniu.
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Nieznana operacja: {action}")
+        if not devices:
+            print("❌ Nie znaleziono żadnego Pico!")
+            return False
+
+        started = time.perf_counter()
+        print(f"📟 Urządzenia ({len(devices)}): " + ", ".join(f"{d['id']} ({d['path']})" for d in devices))
+        checksums = self._prepare(action, target, deploy_type)
+
+        log_dir = self.log_dir / f"multi_{time.strftime('%Y%m%d_%H%M%S')}"
+        index = 1
+        while log_dir.exists():
+            log_dir = self.log_dir / f"multi_{time.strftime('%Y%m%d_%H%M%S')}_{index}"
+            index += 1
+        log_dir.mkdir(parents=True)
+
+        output = DeviceOutput(sys.stdout)
+        sys.stdout = output
+        self.results = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers or len(devices)) as pool:
+                futures = [pool.submit(self._run_one, output, device, action, target, deploy_type,
+                                       checksums, log_dir) for device in devices]
+                for future in as_completed(futures):
+                    result = future.result()
+                    self.results.append(result)
+                    print(f"{'✅' if result['ok'] else '❌'} [{len(self.results)}/{len(devices)}] "
+                          f"{result['device']['id']}: {result['elapsed']:.2f}s")
+        finally:
+            sys.stdout = output.stream
+
+        return self.summary(action, log_dir, time.perf_counter() - started)
+
+    def summary(self, action: str, log_dir: Path, elapsed: float) -> bool:
+        """Podsumowanie na konsolę i do summary.txt"""
+        results = sorted(self.results, key=lambda r: r['device']['id'])
+        failed = [r for r in results if not r['ok']]
+        lines = [f"{'✅' if r['ok'] else '❌'} {r['device']['id']:32} {r['device']['path']:32} "
+                 f"{r['elapsed']:6.2f}s  plików: {r['copied']:4}  log: {r['log']}" for r in results]
+        lines.append(f"{action}: {len(results) - len(failed)}/{len(results)} urządzeń OK w {elapsed:.2f}s")
+        print("\n📋 Podsumowanie:")
+        for line in lines:
+            print(f"  {line}")
+        with open(log_dir / 'summary.txt', 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return not failed
@@ -9,12 +9,23 @@ import audiobusio
 import audiocore
 import usb_hid
 from audiocore import WaveFile
+# Nagłówek WAV fragment po fragmencie (dowiązanie do src3/wavfile.py)
+from wavfile import WavFile
 
 # Stałe USB Audio Class
 AUDIO_CONTROL_INTERFACE = const(0)
 AUDIO_STREAMING_INTERFACE = const(1)
 AUDIO_OUT_ENDPOINT = const(0x01)
 
+# Przejście między utworami później niż tyle po końcu to niedobór (cisza)
+UNDERRUN_US = const(1000)
+# Od tylu µs przed końcem utworu pętla sprawdza stan co POLL_MS
+SPIN_US = const(2000)
+# Najdłuższe uśpienie pętli bez odtwarzania (ms)
+IDLE_MS = const(100)
+# Krok sprawdzania stanu tuż przed końcem utworu (ms)
+POLL_MS = 0.1
+
 from machine import Pin, Timer
 
 timer = Timer()
@@ -37,17 +48,69 @@ timer.init(freq=2, mode=Timer.PERIODIC, callback=blink)
 
 
 
+class Playlist:
+    """Playlista w buforze pierścieniowym - przejście dalej w O(1)"""
+
+    def __init__(self, capacity=64):
+        self.items = [None] * capacity
+        self.head = 0
+        self.count = 0
+
+    def append(self, item):
+        if self.count == len(self.items):
+            raise IndexError("playlist full")
+        self.items[(self.head + self.count) % len(self.items)] = item
+        self.count += 1
+
+    def current(self):
+        return self.items[self.head] if self.count else None
+
+    def peek(self, offset=1):
+        """Utwór offset pozycji dalej (po ostatnim - znowu pierwszy)"""
+        if not self.count:
+            return None
+        return self.items[(self.head + offset % self.count) % len(self.items)]
+
+    def advance(self):
+        """Bieżący utwór na koniec kolejki (zamiast pop(0) + append)"""
+        if self.count:
+            capacity = len(self.items)
+            self.items[(self.head + self.count) % capacity] = self.items[self.head]
+            if self.count < capacity:
+                self.items[self.head] = None
+            self.head = (self.head + 1) % capacity
+        return self.current()
+
+    def __len__(self):
+        return self.count
+
+
+class Track:
+    """Otwarty plik WAV gotowy do odtworzenia"""
+
+    def __init__(self, name, file, wave, duration_us, half):
+        self.name = name
+        self.file = file
+        self.wave = wave
+        self.duration_us = duration_us
+        self.half = half
+
+
 class USBAudioDevice:
-    def __init__(self):
+    def __init__(self, root='/audio'):
         # Konfiguracja USB Audio
         self.usb_audio = usb_audio.AudioOut()
         self.sample_rate = 44100
         self.channels = 1
         self.bits_per_sample = 16
         self.buffer_size = 1024
+        self.root = root
 
-        # Bufor audio
+        # Jeden bufor dekodowania na wszystkie utwory: połowa dla bieżącego,
+        # połowa dla następnego, otwartego zawczasu
         self.audio_buffer = array.array('H', [0] * self.buffer_size)
+        half = self.buffer_size // 2
+        self.halves = (memoryview(self.audio_buffer)[:half], memoryview(self.audio_buffer)[half:])
 
         # Storage na pliki WAV
         self.setup_storage()
@@ -55,14 +118,78 @@ class USBAudioDevice:
         # Status odtwarzania
         self.playing = False
         self.current_file = None
+        self.current = None
+        self.started_us = 0
+        self.end_us = 0
+        # Ostatnia chwila, w której bieżący utwór jeszcze grał (jego koniec
+        # nie jest zgłaszany - przerwa liczona jest od tej chwili)
+        self.last_playing_us = 0
+
+        # Liczniki: otwarcia z wypełnieniem bufora, przejścia, niedobory
+        self.fills = 0
+        self.transitions = 0
+        self.underruns = 0
+        self.max_gap_us = 0
 
     def setup_storage(self):
         """Konfiguracja pamięci wewnętrznej"""
         try:
-            os.mkdir('/audio')
+            os.mkdir(self.root)
         except:
             pass
 
+    def open_track(self, filename, half=None):
+        """Otwórz plik i przygotuj WaveFile na wolnej połowie bufora"""
+        if half is None:
+            half = 1 - self.current.half if self.current else 0
+        path = f'{self.root}/{filename}'
+        wav_file = open(path, 'rb')
+        try:
+            # Długość z rozmiaru fragmentu 'data' (nagłówek bywa dłuższy niż 44 B: LIST, fact...)
+            header = WavFile(wav_file)
+            duration_us = header.frames * 1000000 // header.sample_rate
+            wav_file.seek(0)
+            wave = WaveFile(wav_file, self.halves[half])
+        except Exception:
+            wav_file.close()
+            raise
+        self.fills += 1
+        return Track(filename, wav_file, wave, duration_us, half)
+
+    def start_track(self, track):
+        """Rozpocznij odtwarzanie przygotowanego utworu"""
+        self.usb_audio.play(track.wave)
+        self.started_us = time.ticks_us()
+        self.last_playing_us = self.started_us
+        self.end_us = time.ticks_add(self.started_us, track.duration_us)
+        self.current = track
+        self.current_file = track.wave
+        self.playing = True
+
+    def close_track(self, track):
+        track.wave.deinit()
+        track.file.close()
+
+    def remaining_us(self):
+        """Szacowany czas do końca bieżącego utworu"""
+        return time.ticks_diff(self.end_us, time.ticks_us())
+
+    def track_finished(self):
+        if not self.playing:
+            return False
+        if self.usb_audio.playing:
+            self.last_playing_us = time.ticks_us()
+            return False
+        return True
+
+    def stats(self):
+        return {
+            "fills": self.fills,
+            "transitions": self.transitions,
+            "underruns": self.underruns,
+            "max_gap_us": self.max_gap_us,
+        }
+
     def setup_usb_descriptor(self):
         """Konfiguracja deskryptora USB Audio"""
         self.audio_descriptor = bytes([
@@ -133,15 +260,8 @@ class USBAudioDevice:
     def play_wav_file(self, filename):
         """Odtwarzanie pliku WAV z pamięci wewnętrznej"""
         try:
-            # Otwórz plik WAV
-            wav_file = open(f'/audio/{filename}', 'rb')
-            wave = WaveFile(wav_file)
-
-            # Skonfiguruj audio
-            self.usb_audio.play(wave)
-            self.playing = True
-            self.current_file = wave
-
+            self.stop_playback()
+            self.start_track(self.open_track(filename, 0))
             return True
         except Exception as e:
             print("Error playing WAV file:", e)
@@ -151,9 +271,10 @@ class USBAudioDevice:
         """Zatrzymanie odtwarzania"""
         if self.playing:
             self.usb_audio.stop()
-            if self.current_file:
-                self.current_file.close()
             self.playing = False
+        if self.current:
+            self.close_track(self.current)
+            self.current = None
             self.current_file = None
 
     def copy_to_storage(self, filename, data):
@@ -168,14 +289,18 @@ class USBAudioDevice:
 
 
 class AudioManager:
-    def __init__(self):
-        self.audio_device = USBAudioDevice()
+    def __init__(self, audio_device=None):
+        self.audio_device = audio_device or USBAudioDevice()
         self.playlists = {}
         self.current_playlist = None
+        # Następny utwór otwarty zawczasu (przejście bez otwierania pliku)
+        # i o ile pozycji dalej jest w playliście (pominięte pliki błędne)
+        self.next_track = None
+        self.next_offset = 1
 
-    def create_playlist(self, name):
+    def create_playlist(self, name, capacity=64):
         """Tworzenie nowej playlisty"""
-        self.playlists[name] = []
+        self.playlists[name] = Playlist(capacity)
 
     def add_to_playlist(self, playlist_name, filename):
         """Dodawanie pliku do playlisty"""
@@ -184,22 +309,96 @@ class AudioManager:
 
     def play_playlist(self, name):
         """Odtwarzanie playlisty"""
-        if name in self.playlists:
+        if name in self.playlists and len(self.playlists[name]):
             self.current_playlist = name
-            self._play_next()
+            self._drop_next()
+            device = self.audio_device
+            device.stop_playback()
+            playlist = self.playlists[name]
+            track, offset = self._open(0, 0)
+            if not track:
+                return
+            for _ in range(offset):
+                playlist.advance()
+            device.start_track(track)
+            self._preload()
+
+    def _open(self, start, half=None):
+        """
+        Otwórz pierwszy poprawny utwór od pozycji start; błędne są
+        pomijane. Zwraca (utwór, pozycja) albo (None, 0), gdy żaden
+        utwór w playliście się nie otwiera.
+        """
+        playlist = self.playlists[self.current_playlist]
+        for offset in range(start, start + len(playlist)):
+            name = playlist.peek(offset)
+            try:
+                return self.audio_device.open_track(name, half), offset
+            except Exception as e:
+                print("Error opening WAV file %s: %s" % (name, e))
+        return None, 0
+
+    def _preload(self):
+        """Otwórz następny utwór na wolnej połowie bufora"""
+        self.next_track, self.next_offset = self._open(1)
+
+    def _drop_next(self):
+        if self.next_track:
+            self.audio_device.close_track(self.next_track)
+            self.next_track = None
 
     def _play_next(self):
-        """Odtwarzanie następnego utworu z playlisty"""
-        if self.current_playlist and self.playlists[self.current_playlist]:
-            next_file = self.playlists[self.current_playlist].pop(0)
-            self.audio_device.play_wav_file(next_file)
-            # Dodaj z powrotem na koniec listy
-            self.playlists[self.current_playlist].append(next_file)
+        """Przejście do następnego utworu z playlisty"""
+        device = self.audio_device
+        playlist = self.playlists[self.current_playlist]
+
+        finished = device.current
+        if not self.next_track:
+            # Żaden utwór w playliście się nie otwiera
+            device.playing = False
+            device.current = None
+            if finished:
+                device.close_track(finished)
+            return
+
+        previous_end = device.last_playing_us
+        device.start_track(self.next_track)
+        self.next_track = None
+        # Zmierzona przerwa: od ostatniej chwili gry poprzedniego do startu następnego
+        gap = time.ticks_diff(device.started_us, previous_end)
+        device.transitions += 1
+        if gap > device.max_gap_us:
+            device.max_gap_us = gap
+        if gap > UNDERRUN_US:
+            device.underruns += 1
+
+        # Zamknięcie i otwarcie kolejnego pliku już po starcie następnego utworu
+        if finished:
+            device.close_track(finished)
+        for _ in range(self.next_offset):
+            playlist.advance()
+        self._preload()
 
     def handle_usb_events(self):
-        """Obsługa zdarzeń USB"""
+        """
+        Obsługa zdarzeń: koniec utworu -> następny z playlisty.
+        Zwraca czas w ms, na jaki pętla główna może zasnąć.
+        """
         # Tu można dodać obsługę komend z hosta
-        pass
+        device = self.audio_device
+        if not device.playing or not self.current_playlist:
+            return IDLE_MS
+        if device.track_finished():
+            self._play_next()
+            return 0
+        remaining = device.remaining_us()
+        wait = (remaining - SPIN_US) // 1000
+        if wait <= 0:
+            return POLL_MS
+        return min(IDLE_MS, wait)
+
+    def stats(self):
+        return self.audio_device.stats()
 
 
 # Przykład użycia
@@ -218,11 +417,11 @@ def main():
     # Główna pętla
     while True:
         try:
-            # Obsługa zdarzeń USB
-            audio_manager.handle_usb_events()
+            # Obsługa zdarzeń USB; śpi do następnego zdarzenia
+            wait_ms = audio_manager.handle_usb_events()
 
             # Można tu dodać więcej logiki
-            time.sleep(0.001)
+            time.sleep(wait_ms / 1000)
 
         except Exception as e:
             print("Main loop error:", e)
@@ -0,0 +1 @@
+../src3/wavfile.py
\ No newline at end of file
@@ -0,0 +1 @@
+../src3/adpcm.py
\ No newline at end of file
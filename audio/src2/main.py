@@ -1,8 +1,12 @@
 # main.py
-from machine import Pin, PWM
+# wavfile.py, pcmstream.py, adpcm.py - dowiązania do modułów z src3
+from machine import Pin
 import time
 import struct
 
+from pcmstream import PCMStream
+from wavfile import WavFile
+
 
 class WavGenerator:
     def __init__(self):
@@ -68,10 +72,9 @@ class WavGenerator:
 
 class AudioPlayer:
     def __init__(self, PORT=1):
-        # PWM dla audio
-        self.audio_out = PWM(Pin(PORT))  # GP0
-        self.audio_out.freq(44100)
-        self.audio_out.duty_u16(0)
+        # PWM dla audio: próbki taktowane przez PWM i DMA (PCMStream)
+        self.stream = PCMStream(PORT, sample_rate=44100)
+        self.audio_out = self.stream.pwm
 
         # LED do sygnalizacji
         self.led = Pin("LED", Pin.OUT)
@@ -86,33 +89,19 @@ class AudioPlayer:
             time.sleep(0.1)
 
     def play(self, filename="test.wav"):
-        """Odtwórz plik WAV"""
+        """Odtwórz plik WAV w jego formacie (nagłówek czytany fragmentami, nie f.seek(44))"""
         try:
             with open(filename, 'rb') as f:
-                # Pomiń nagłówek WAV
-                f.seek(44)
+                wav = WavFile(f)
 
-                print("Rozpoczynam odtwarzanie...")
+                print("Rozpoczynam odtwarzanie...", wav)
                 self.led.value(1)
-
-                while True:
-                    # Czytaj próbkę 16-bit
-                    sample = f.read(2)
-                    if not sample or len(sample) != 2:
-                        break
-
-                    # Konwertuj na wartość 16-bit
-                    value = sample[0] | (sample[1] << 8)
-                    # Przeskaluj na zakres PWM
-                    pwm_value = value + 32768  # Przesuń z -32768..32767 na 0..65535
-
-                    # Wyślij na PWM
-                    self.audio_out.duty_u16(pwm_value)
-                    time.sleep_us(20)  # Małe opóźnienie dla stabilności
-
-                print("Zakończono odtwarzanie")
-                self.led.value(0)
-                self.audio_out.duty_u16(0)
+                try:
+                    self.stream.play_wav(wav)
+                finally:
+                    self.led.value(0)
+                    self.audio_out.duty_u16(0)
+                print("Zakończono odtwarzanie", self.stream.stats())
 
         except OSError as e:
             print(f"Nie znaleziono pliku {filename}")
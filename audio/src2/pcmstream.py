@@ -0,0 +1 @@
+../src3/pcmstream.py
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Dekoder IMA-ADPCM (WAV format 0x11, mono) dla PCMStream.
+
+4 bity na próbkę - cztery razy mniej danych z flash niż PCM 16 bit.
+Blok pliku: nagłówek (predyktor int16, indeks kroku, bajt zerowy),
+potem półbajty kolejnych próbek, młodszy pierwszy. Dekodowanie idzie
+z tablicy kroków wprost do bufora wypełnień PWM, w jednym przebiegu;
+blok pliku może być dłuższy niż bufor DMA - stan dekodera przechodzi
+między wywołaniami.
+
+Pliki tworzy audio/convert.py --adpcm.
+"""
+from array import array
+
+try:
+    from micropython import const
+    import micropython
+    _native = micropython.native
+except ImportError:
+    def const(value):
+        return value
+
+    def _native(f):
+        return f
+
+FORMAT_IMA_ADPCM = const(0x11)
+
+STEPS = array("H", [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+])
+
+
+@_native
+def _decode(raw, nibble, dst, start, count, state, steps, scale):
+    """
+    count próbek od półbajtu nibble bloku raw do dst[start:], jako
+    wypełnienie 0..scale-1; state - [predyktor, indeks kroku]
+    """
+    predictor = state[0]
+    index = state[1]
+    for i in range(start, start + count):
+        byte = raw[4 + (nibble >> 1)]
+        code = (byte >> 4) if nibble & 1 else (byte & 15)
+        nibble += 1
+        step = steps[index]
+        diff = step >> 3
+        if code & 4:
+            diff += step
+        if code & 2:
+            diff += step >> 1
+        if code & 1:
+            diff += step >> 2
+        if code & 8:
+            predictor -= diff
+            if predictor < -32768:
+                predictor = -32768
+        else:
+            predictor += diff
+            if predictor > 32767:
+                predictor = 32767
+        if code & 4:
+            index += ((code & 3) + 1) << 1
+            if index > 88:
+                index = 88
+        elif index:
+            index -= 1
+        dst[i] = (((predictor + 32768) >> 4) * scale) >> 12
+    state[0] = predictor
+    state[1] = index
+
+
+class AdpcmDecoder:
+    """Źródło ramek dla PCMStream: kolejne próbki WavFile IMA-ADPCM"""
+
+    def __init__(self, wav):
+        if wav.format != FORMAT_IMA_ADPCM or wav.channels != 1 or wav.bits != 4:
+            raise ValueError("not a mono IMA-ADPCM file")
+        self.wav = wav
+        self.raw = bytearray(wav.block_align)
+        self.state = array("i", [0, 0])
+        self.samples_per_block = (wav.block_align - 4) * 2 + 1
+        self.remaining = wav.frames
+        self.left = 0  # próbki do końca bieżącego bloku
+        self.nibble = 0
+
+    def _next_block(self):
+        if not self.wav.readinto(self.raw):
+            return False
+        raw = self.raw
+        predictor = raw[0] | (raw[1] << 8)
+        self.state[0] = predictor - 65536 if predictor & 0x8000 else predictor
+        self.state[1] = raw[2] if raw[2] <= 88 else 88
+        self.nibble = 0
+        self.left = self.samples_per_block
+        return True
+
+    def decode(self, dst, count, scale):
+        """Zdekoduj do count próbek do dst jako wypełnienie; zwraca liczbę próbek"""
+        if count > self.remaining:
+            count = self.remaining
+        done = 0
+        while done < count:
+            if not self.left:
+                if not self._next_block():
+                    # Danych mniej niż w nagłówku - po tym bloku koniec
+                    self.remaining = done
+                    break
+                # Pierwsza próbka bloku to predyktor z nagłówka
+                dst[done] = (((self.state[0] + 32768) >> 4) * scale) >> 12
+                done += 1
+                self.left -= 1
+                continue
+            n = count - done
+            if n > self.left:
+                n = self.left
+            _decode(self.raw, self.nibble, dst, done, n, self.state, STEPS, scale)
+            self.nibble += n
+            self.left -= n
+            done += n
+        self.remaining -= done
+        return done
+
+    def rewind(self):
+        self.wav.rewind()
+        self.remaining = self.wav.frames
+        self.left = 0
@@ -0,0 +1,54 @@
+"""
+Odczyt plików .pwm - wypełnień PWM przygotowanych na hoście
+(audio/convert.py --pwm).
+
+Nagłówek (20 bajtów, little-endian): b"PWMD", wersja, flagi,
+częstotliwość próbkowania, skala (TOP+1), liczba ramek. Dalej ramki
+uint16 0..skala-1, mono - gotowe do przesłania przez DMA do rejestru
+CC, bez przeliczania próbek.
+"""
+import struct
+
+MAGIC = b"PWMD"
+VERSION = 1
+HEADER_SIZE = 20
+
+
+class DutyFile:
+    def __init__(self, f):
+        """f - plik otwarty w trybie binarnym, ustawiony na początku"""
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[0:4] != MAGIC:
+            raise ValueError("not a PWM duty file")
+        version, _, self.sample_rate, self.scale, self.frames = struct.unpack_from("<HHIII", header, 4)
+        if version != VERSION:
+            raise ValueError("unsupported duty file version %d" % version)
+        self.file = f
+        self.remaining = self.frames
+
+    def readinto(self, buf):
+        """
+        Wczytaj do buf (array('H')) tyle ramek, ile się zmieści;
+        zwraca liczbę ramek (0 na końcu danych).
+        """
+        count = len(buf) if len(buf) < self.remaining else self.remaining
+        if not count:
+            return 0
+        read = self.file.readinto(buf if count == len(buf) else memoryview(buf)[:count])
+        count = (read or 0) >> 1
+        if not count:
+            self.remaining = 0
+            return 0
+        self.remaining -= count
+        return count
+
+    def rewind(self):
+        """Wróć na początek danych"""
+        self.file.seek(HEADER_SIZE)
+        self.remaining = self.frames
+
+    def duration_ms(self):
+        return self.frames * 1000 // self.sample_rate if self.sample_rate else 0
+
+    def __repr__(self):
+        return "<DutyFile rate=%d scale=%d frames=%d>" % (self.sample_rate, self.scale, self.frames)
@@ -1,8 +1,13 @@
 # main.py
-from machine import Pin, PWM
+from machine import Pin
 import time
 import struct
 
+import waveforms
+from dutyfile import DutyFile
+from pcmstream import PCMStream
+from wavfile import WavFile
+
 
 class WavGenerator:
     def __init__(self):
@@ -38,25 +43,24 @@ class WavGenerator:
 
         return header
 
-    def generate_test_file(self, filename="test.wav", duration=1, frequency=440):
-        """Generowanie pliku testowego WAV"""
+    def generate_test_file(self, filename="test.wav", duration=1, frequency=440,
+                           waveform="sine", amplitude=32767):
+        """
+        Generowanie pliku testowego WAV.
+        waveform: "sine", "square", "triangle" lub "noise"
+        """
         # Oblicz parametry
         num_samples = int(self.sample_rate * duration)
-        amplitude = 32767  # Maksymalna amplituda dla 16-bit
 
         try:
             with open(filename, 'wb') as file:
-                # Zapisz tymczasowy nagłówek
                 data_size = num_samples * 2  # 2 bajty na próbkę
                 header = self.create_wav_header(data_size)
                 file.write(header)
 
-                # Generuj i zapisz dane
-                for i in range(num_samples):
-                    # Uproszczona generacja sinusoidy
-                    t = i / self.sample_rate
-                    value = int(amplitude * ((t * frequency) % 2 - 1))
-                    file.write(struct.pack('<h', value))
+                # Generuj i zapisz dane blokami
+                waveforms.write_samples(file, waveform, frequency, num_samples,
+                                        self.sample_rate, amplitude)
 
             print(f"Wygenerowano plik: {filename}")
             return True
@@ -68,10 +72,9 @@ class WavGenerator:
 
 class AudioPlayer:
     def __init__(self, PORT=1):
-        # PWM dla audio
-        self.audio_out = PWM(Pin(PORT))  # GP0
-        self.audio_out.freq(44100)
-        self.audio_out.duty_u16(0)
+        # PWM dla audio, próbki podawane blokami przez DMA
+        self.stream = PCMStream(PORT, sample_rate=44100)
+        self.audio_out = self.stream.pwm
 
         # LED do sygnalizacji
         self.led = Pin("LED", Pin.OUT)
@@ -86,33 +89,26 @@ class AudioPlayer:
             time.sleep(0.1)
 
     def play(self, filename="test.wav"):
-        """Odtwórz plik WAV"""
+        """Odtwórz plik WAV albo .pwm (wypełnienia z audio/convert.py)"""
         try:
             with open(filename, 'rb') as f:
-                # Pomiń nagłówek WAV
-                f.seek(44)
-
-                print("Rozpoczynam odtwarzanie...")
-                self.led.value(1)
-
-                while True:
-                    # Czytaj próbkę 16-bit
-                    sample = f.read(2)
-                    if not sample or len(sample) != 2:
-                        break
-
-                    # Konwertuj na wartość 16-bit
-                    value = sample[0] | (sample[1] << 8)
-                    # Przeskaluj na zakres PWM
-                    pwm_value = value + 32768  # Przesuń z -32768..32767 na 0..65535
-
-                    # Wyślij na PWM
-                    self.audio_out.duty_u16(pwm_value)
-                    time.sleep_us(20)  # Małe opóźnienie dla stabilności
-
+                if filename.endswith('.pwm'):
+                    duty = DutyFile(f)
+                    print("Rozpoczynam odtwarzanie...", duty)
+                    self.led.value(1)
+                    self.stream.play_duty(duty)
+                else:
+                    # Format i początek danych z nagłówka RIFF
+                    wav = WavFile(f)
+                    print("Rozpoczynam odtwarzanie...", wav)
+                    self.led.value(1)
+                    self.stream.play_wav(wav)
+
+                stats = self.stream.stats()
                 print("Zakończono odtwarzanie")
+                print(f"Próbki: {stats['samples']}, tempo: {stats['rate']} Hz, "
+                      f"niedobory: {stats['underruns']}")
                 self.led.value(0)
-                self.audio_out.duty_u16(0)
 
         except OSError as e:
             print(f"Nie znaleziono pliku {filename}")
@@ -141,4 +137,6 @@ player.play("test.wav")
 print("\nSystem gotowy!")
 print("Dostępne komendy:")
 print("player.play() - odtwórz dźwięk")
+print("player.play('nagranie.pwm') - odtwórz wypełnienia z audio/convert.py --pwm")
 print("generator.generate_test_file(frequency=440) - generuj nowy plik")
+print("generator.generate_test_file(waveform='square') - sine/square/triangle/noise")
@@ -1,18 +1,38 @@
 from machine import Pin, PWM, Timer
 import time
 
+from melody import compile_rtttl, compile_sequence
+from mixer import Mixer
+from pcmstream import PCMStream
+from tone import ToneEngine
+from wavfile import WavFile
+
+# Liczba skompilowanych melodii trzymanych w pamięci
+COMPILED_MAX = 8
+
 
 class AudioPlayer:
-    def __init__(self, pin_number=0):
-        """Inicjalizacja audio na wybranym pinie"""
-        self.pwm = PWM(Pin(pin_number))
-        self.pwm.freq(44100)  # Częstotliwość próbkowania
-        self.pwm.duty_u16(0)  # Startujemy z zerem
+    def __init__(self, pin_number=0, cache=None):
+        """
+        Inicjalizacja audio na wybranym pinie.
+        cache - opcjonalny MelodyCache: melodie renderowane raz do plików
+        """
+        # Próbki tonu taktowane przez PWM (44,1 kHz) i DMA
+        self.stream = PCMStream(pin_number, sample_rate=44100)
+        self.pwm = self.stream.pwm
+        self.tone = ToneEngine(self.stream)
+        # Kilka głosów naraz (melodie, tony, pliki WAV)
+        self.mixer = Mixer(self.stream, voices=4)
 
         self.led = Pin("LED", Pin.OUT)
         self.playing = False
         self.volume = 100
 
+        # Skompilowane melodie: krotka nut lub tekst RTTTL -> zdarzenia
+        # (kolejność wstawiania = kolejność użycia, najdawniej używane usuwane)
+        self.compiled = {}
+        self.cache = cache
+
     def generate_tone(self, frequency, duration=1.0):
         """Generowanie tonu o zadanej częstotliwości"""
         if frequency <= 0:  # Cisza
@@ -22,35 +42,13 @@ class AudioPlayer:
 
         print(f"Generuję ton {frequency}Hz przez {duration}s")
 
-        # Parametry
-        sample_rate = 44100
-        samples_per_cycle = sample_rate // frequency
-
         # Włącz LED na czas odtwarzania
         self.led.value(1)
 
         try:
-            # Generuj i odtwarzaj ton
+            # Trójkąt z tablicy, faza liczona w stałym przecinku
             self.playing = True
-            start_time = time.ticks_ms()
-
-            while self.playing and (time.ticks_ms() - start_time) < (duration * 1000):
-                for i in range(samples_per_cycle):
-                    if not self.playing:
-                        break
-
-                    # Generuj wartość PWM (trójkąt)
-                    if i < samples_per_cycle // 2:
-                        value = i * 65535 // (samples_per_cycle // 2)
-                    else:
-                        value = (samples_per_cycle - i) * 65535 // (samples_per_cycle // 2)
-
-                    # Zastosuj głośność
-                    value = value * self.volume // 100
-
-                    # Wyślij na PWM
-                    self.pwm.duty_u16(value)
-                    time.sleep_us(10)
+            self.tone.play(frequency, duration)
 
         finally:
             self.pwm.duty_u16(0)
@@ -62,25 +60,69 @@ class AudioPlayer:
         self.pwm.duty_u16(0)
         time.sleep(duration)
 
+    def compile(self, sequence):
+        """Zdarzenia melodii (lista nut albo tekst RTTTL), kompilowane raz"""
+        # Klucz z treści - melodia zmieniona w miejscu kompiluje się od nowa
+        key = sequence if isinstance(sequence, str) else tuple(sequence)
+        events = self.compiled.pop(key, None)
+        if events is None:
+            rate = self.stream.sample_rate
+            if isinstance(sequence, str):
+                events = compile_rtttl(sequence, rate)
+            else:
+                # Małe opóźnienie między nutami (dotychczas sleep(0.01))
+                events = compile_sequence(sequence, rate, gap=0.01)
+            if len(self.compiled) >= COMPILED_MAX:
+                del self.compiled[next(iter(self.compiled))]
+        self.compiled[key] = events
+        return events
+
     def play_sequence(self, sequence):
-        """Odtwórz sekwencję dźwięków"""
+        """Odtwórz sekwencję dźwięków (lista (Hz, s) albo tekst RTTTL)"""
         print("Odtwarzam sekwencję")
-        for note in sequence:
-            freq, duration = note
-            if freq > 0:
-                self.generate_tone(freq, duration)
+        events = self.compile(sequence)
+        self.led.value(1)
+        self.playing = True
+        try:
+            path = self.cache.get(self.tone, events) if self.cache else None
+            if path:
+                with open(path, "rb") as f:
+                    self.stream.play_wav(WavFile(f))
             else:
-                self.rest(duration)
-            time.sleep(0.01)  # Małe opóźnienie między nutami
+                self.tone.play_events(events)
+        finally:
+            self.pwm.duty_u16(0)
+            self.led.value(0)
+            self.playing = False
+
+    def play_together(self, *sequences):
+        """Odtwórz kilka melodii naraz (każda jako osobny głos miksera)"""
+        if not sequences:
+            return
+        print(f"Odtwarzam {len(sequences)} głosy")
+        for sequence in sequences:
+            # Głosy dzielą zakres, żeby suma nie była obcinana
+            self.mixer.melody(self.compile(sequence), volume=100 // len(sequences))
+        self.led.value(1)
+        self.playing = True
+        try:
+            self.mixer.play()
+        finally:
+            self.pwm.duty_u16(0)
+            self.led.value(0)
+            self.playing = False
 
     def set_volume(self, volume):
         """Ustaw głośność (0-100)"""
         self.volume = max(0, min(100, volume))
+        self.tone.set_volume(self.volume)
+        self.mixer.set_volume(self.volume)
         print(f"Głośność: {self.volume}%")
 
     def stop(self):
         """Zatrzymaj odtwarzanie"""
         self.playing = False
+        self.stream.stop()
         self.pwm.duty_u16(0)
 
 
@@ -145,7 +187,9 @@ print("Dostępne melodie:")
 print("1. audio.play_sequence(MARIO_THEME)")
 print("2. audio.play_sequence(TETRIS_THEME)")
 print("3. audio.play_sequence(JINGLE_BELLS)")
+print('4. audio.play_sequence("itchy:d=8,o=6,b=160:c,a5,4p,c,a") - RTTTL')
 print("\nKontrola:")
+print("- audio.play_together(MARIO_THEME, TETRIS_THEME) - kilka głosów naraz")
 print("- audio.set_volume(0-100) - głośność")
 print("- audio.stop() - zatrzymaj")
 
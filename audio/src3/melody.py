@@ -0,0 +1,229 @@
+"""
+Kompilacja melodii i pamięć podręczna nagrań.
+
+Melodia - lista (częstotliwość, czas s) albo tekst RTTTL - kompilowana
+jest raz do array('I') par (przyrost fazy, liczba próbek); przyrost 0
+to pauza. Liczba próbek wynika z łącznego czasu od początku melodii,
+więc zaokrąglenia się nie sumują i tempo jest dokładne.
+
+MelodyCache zapisuje wyrenderowane melodie jako WAV 8 bit we flash
+i usuwa najstarsze pliki, gdy łączny rozmiar przekracza limit.
+Ponowne odtworzenie to już tylko strumień z pliku.
+
+    events = compile_rtttl("itchy:d=8,o=6,b=160:c,a5,4p,c,a")
+    audio.tone.play_events(events)
+"""
+import binascii
+import hashlib
+import os
+import struct
+from array import array
+
+from waveforms import phase_step
+
+# Półtony od C w oktawie
+_NOTES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11, "h": 11}
+
+# Krótka cisza na końcu nut RTTTL, żeby powtórzone nuty były słyszalne
+ARTICULATION = 0.01
+
+
+def note_frequency(semitone, octave):
+    """Częstotliwość w stroju równomiernie temperowanym (A4 = 440 Hz)"""
+    return 440 * 2 ** ((octave * 12 + semitone - 57) / 12)
+
+
+def parse_rtttl(text):
+    """Tekst RTTTL -> (nazwa, lista (częstotliwość Hz, czas s))"""
+    try:
+        name, settings, body = text.split(":")
+    except ValueError:
+        raise ValueError("RTTTL needs name:settings:notes")
+
+    duration, octave, bpm = 4, 6, 63
+    for item in settings.split(","):
+        item = item.strip().lower()
+        if item.startswith("d="):
+            duration = int(item[2:])
+        elif item.startswith("o="):
+            octave = int(item[2:])
+        elif item.startswith("b="):
+            bpm = int(item[2:])
+
+    whole = 240 / bpm  # cała nuta w sekundach (ćwierćnuta = jedno uderzenie)
+    notes = []
+    for token in body.split(","):
+        token = token.strip().lower()
+        if not token:
+            continue
+        i = 0
+        while i < len(token) and token[i].isdigit():
+            i += 1
+        length = int(token[:i]) if i else duration
+        if i >= len(token) or (token[i] not in _NOTES and token[i] != "p"):
+            raise ValueError("bad RTTTL note: %s" % token)
+        letter = token[i]
+        i += 1
+        semitone = _NOTES.get(letter, 0)
+        if i < len(token) and token[i] == "#":
+            semitone += 1
+            i += 1
+        dotted = False
+        note_octave = octave
+        for char in token[i:]:
+            if char == ".":
+                dotted = True
+            elif char.isdigit():
+                note_octave = int(char)
+            else:
+                raise ValueError("bad RTTTL note: %s" % token)
+
+        seconds = whole / length * (1.5 if dotted else 1)
+        if letter == "p":
+            notes.append((0, seconds))
+        else:
+            notes.append((note_frequency(semitone, note_octave), seconds - ARTICULATION))
+            notes.append((0, ARTICULATION))
+    return name, notes
+
+
+def compile_sequence(sequence, sample_rate, gap=0.0):
+    """
+    Lista (częstotliwość, czas s) -> array('I') par (przyrost fazy, próbki).
+    gap - cisza po każdej nucie (jak dotychczasowe sleep(0.01)).
+    """
+    events = array("I")
+    elapsed = 0.0
+    position = 0
+    for frequency, duration in sequence:
+        for step, seconds in ((phase_step(frequency, sample_rate) if frequency > 0 else 0, duration),
+                              (0, gap)):
+            if seconds <= 0:
+                continue
+            elapsed += seconds
+            end = int(elapsed * sample_rate + 0.5)
+            if end > position:
+                # Sąsiednie pauzy łączone w jedno zdarzenie
+                if not step and len(events) and not events[-2]:
+                    events[-1] += end - position
+                else:
+                    events.append(step)
+                    events.append(end - position)
+                position = end
+    return events
+
+
+def compile_rtttl(text, sample_rate):
+    return compile_sequence(parse_rtttl(text)[1], sample_rate)
+
+
+def _wav_header(data_size, sample_rate):
+    """Nagłówek WAV: PCM 8 bit mono"""
+    return (b"RIFF" + struct.pack("<I", data_size + 36) + b"WAVEfmt " +
+            struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate, 1, 8) +
+            b"data" + struct.pack("<I", data_size))
+
+
+class MelodyCache:
+    def __init__(self, directory="/melodies", max_bytes=256 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Kolejność użycia w tej sesji (ścieżka -> licznik); na Pico nie ma
+        # os.utime, a sam odczyt nie zmienia czasu modyfikacji pliku
+        self.clock = 0
+        self.used = {}
+        try:
+            os.mkdir(directory)
+        except OSError:
+            pass  # już istnieje
+        # Pozostałości renderowania przerwanego resetem
+        for name in os.listdir(directory):
+            if name.endswith(".tmp"):
+                os.remove(directory + "/" + name)
+
+    def key(self, events, sample_rate, table):
+        digest = hashlib.sha256(bytes(events) + bytes(table) + struct.pack("<I", sample_rate)).digest()
+        return binascii.hexlify(digest[:8]).decode()
+
+    def path(self, key):
+        return self.directory + "/" + key + ".wav"
+
+    def files(self):
+        """Pliki w pamięci podręcznej: lista (czas modyfikacji, rozmiar, ścieżka)"""
+        result = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".wav"):
+                path = self.directory + "/" + name
+                stat = os.stat(path)
+                result.append((stat[8], stat[6], path))
+        return result
+
+    def touch(self, path):
+        """Oznacz nagranie jako ostatnio użyte"""
+        self.clock += 1
+        self.used[path] = self.clock
+        if hasattr(os, "utime"):
+            os.utime(path, None)
+
+    def evict(self, needed):
+        """
+        Usuń najdawniej używane nagrania, aż zmieści się needed bajtów.
+        Nieużyte w tej sesji idą pierwsze, według czasu modyfikacji.
+        """
+        files = self.files()
+        files.sort(key=lambda f: (self.used.get(f[2], 0), f[0]))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total + needed <= self.max_bytes:
+                break
+            os.remove(path)
+            self.used.pop(path, None)
+            total -= size
+            self.evictions += 1
+        return total + needed <= self.max_bytes
+
+    def get(self, engine, events):
+        """
+        Ścieżka nagrania melodii (renderowanego przy pierwszym użyciu)
+        albo None, gdy melodia nie mieści się w limicie.
+        """
+        table = engine.pcm_table()
+        sample_rate = engine.stream.sample_rate
+        path = self.path(self.key(events, sample_rate, table))
+        try:
+            os.stat(path)
+            self.hits += 1
+            self.touch(path)
+            return path
+        except OSError:
+            pass
+
+        self.misses += 1
+        total = engine.start_events(events)
+        if not self.evict(total + 44):
+            return None
+        # Zapis do pliku tymczasowego - przerwane renderowanie nie zostawia
+        # uciętego nagrania pod właściwą nazwą
+        tmp = path + ".tmp"
+        buf = bytearray(512)
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_wav_header(total, sample_rate))
+                left = total
+                while left:
+                    count = 512 if left > 512 else left
+                    engine.fill_events(buf, count, table)
+                    f.write(buf if count == 512 else memoryview(buf)[:count])
+                    left -= count
+            os.rename(tmp, path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self.touch(path)
+        return path
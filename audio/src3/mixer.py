@@ -0,0 +1,258 @@
+"""
+Mikser programowy: kilka głosów w jednym strumieniu PCMStream.
+
+Głosy (tony z tablicy, melodie, pliki WAV) dodawane są w stałym
+przecinku do wspólnego bufora array('i'), z własną głośnością (Q8).
+Suma przechodzi przez głośność główną (AudioPlayer.set_volume),
+obcięcie do 16 bitów i zamianę na wypełnienie PWM - wprost do bufora
+DMA. Koszt bloku jest ograniczony: stała liczba miejsc na głosy, a gdy
+brakuje miejsca, nowy głos zajmuje miejsce głosu o najniższym
+priorytecie (przy równych - najstarszego).
+"""
+from array import array
+
+from tone import SHAPES
+from waveforms import PHASE_MASK, phase_step
+
+try:
+    from micropython import const
+    import micropython
+    _native = micropython.native
+except ImportError:
+    def const(value):
+        return value
+
+    def _native(f):
+        return f
+
+_TABLE_SIZE = const(256)
+_TABLE_SHIFT = const(16)
+
+
+@_native
+def _mix_table(acc, start, end, table, phase, step, gain):
+    for i in range(start, end):
+        acc[i] += (table[phase >> _TABLE_SHIFT] * gain) >> 8
+        phase = (phase + step) & PHASE_MASK
+    return phase
+
+
+@_native
+def _mix_mono16(acc, raw, count, gain):
+    for i in range(count):
+        j = i << 1
+        s = raw[j] | (raw[j + 1] << 8)
+        if s & 0x8000:
+            s -= 65536
+        acc[i] += (s * gain) >> 8
+
+
+@_native
+def _mix_stereo16(acc, raw, count, gain):
+    for i in range(count):
+        j = i << 2
+        left = raw[j] | (raw[j + 1] << 8)
+        right = raw[j + 2] | (raw[j + 3] << 8)
+        if left & 0x8000:
+            left -= 65536
+        if right & 0x8000:
+            right -= 65536
+        acc[i] += ((left + right) * gain) >> 9
+
+
+@_native
+def _mix_mono8(acc, raw, count, gain):
+    for i in range(count):
+        acc[i] += ((raw[i] - 128) * gain)
+
+
+@_native
+def _mix_stereo8(acc, raw, count, gain):
+    for i in range(count):
+        j = i << 1
+        acc[i] += ((raw[j] + raw[j + 1] - 256) * gain) >> 1
+
+
+@_native
+def _output(acc, dst, count, master, scale):
+    """Suma * głośność główna, obcięcie, wypełnienie PWM; zeruje acc"""
+    clipped = 0
+    for i in range(count):
+        v = (acc[i] * master) >> 8
+        if v > 32767:
+            v = 32767
+            clipped += 1
+        elif v < -32768:
+            v = -32768
+            clipped += 1
+        dst[i] = (((v + 32768) >> 4) * scale) >> 12
+        acc[i] = 0
+    return clipped
+
+
+# (bity, kanały) -> (funkcja mieszająca, bajty na ramkę)
+_PCM_MIXERS = {
+    (16, 1): (_mix_mono16, 2),
+    (16, 2): (_mix_stereo16, 4),
+    (8, 1): (_mix_mono8, 1),
+    (8, 2): (_mix_stereo8, 2),
+}
+
+
+def signed_table(shape):
+    """Okres przebiegu jako array('h') ze znakiem"""
+    function = SHAPES[shape]
+    return array("h", [min(32767, function(i) - 32768) for i in range(_TABLE_SIZE)])
+
+
+class ToneVoice:
+    """Ton lub melodia (pary przyrost fazy, liczba próbek) z tablicy"""
+
+    def __init__(self, table, events, gain=256):
+        self.table = table
+        self.events = events
+        self.gain = gain
+        self.priority = 0
+        self.order = 0
+        self.index = -2
+        self.left = 0
+        self.step = 0
+        self.phase = 0
+        self.remaining = 0
+        for i in range(1, len(events), 2):
+            self.remaining += events[i]
+
+    def mix(self, acc, count):
+        events = self.events
+        offset = 0
+        while offset < count and self.remaining:
+            if not self.left:
+                self.index += 2
+                self.step = events[self.index]
+                self.left = events[self.index + 1]
+            end = offset + self.left
+            if end > count:
+                end = count
+            if self.step:
+                self.phase = _mix_table(acc, offset, end, self.table, self.phase, self.step, self.gain)
+            self.left -= end - offset
+            self.remaining -= end - offset
+            offset = end
+
+
+class WavVoice:
+    """Plik WAV (WavFile) PCM 8/16 bit, mono lub stereo"""
+
+    def __init__(self, wav, block, gain=256):
+        if wav.format != 1 or (wav.bits, wav.channels) not in _PCM_MIXERS:
+            raise ValueError("unsupported WAV format")
+        self.wav = wav
+        self.gain = gain
+        self.priority = 0
+        self.order = 0
+        self.add, frame = _PCM_MIXERS[(wav.bits, wav.channels)]
+        self.frame = frame
+        self.raw = bytearray(block * frame)
+        self.remaining = wav.remaining // frame
+
+    def mix(self, acc, count):
+        size = count * self.frame
+        read = self.wav.readinto(self.raw if size == len(self.raw) else memoryview(self.raw)[:size])
+        frames = read // self.frame
+        self.add(acc, self.raw, frames, self.gain)
+        self.remaining = self.wav.remaining // self.frame if frames else 0
+
+
+class Mixer:
+    def __init__(self, stream, voices=4, volume=100):
+        self.stream = stream
+        self.slots = [None] * voices
+        self.acc = array("i", [0] * stream.block)
+        self.master = 256
+        self.tables = {}
+        self.order = 0
+        self.steals = 0
+        self.rejected = 0
+        self.clipped = 0
+        self._fill_block = self._fill
+        self.set_volume(volume)
+
+    def set_volume(self, volume):
+        """Głośność główna 0-100 (Q8)"""
+        self.master = max(0, min(100, volume)) * 256 // 100
+
+    def table(self, shape):
+        if shape not in self.tables:
+            self.tables[shape] = signed_table(shape)
+        return self.tables[shape]
+
+    def add(self, voice, priority=0):
+        """
+        Dodaj głos; zwraca numer miejsca albo None, gdy wszystkie miejsca
+        zajmują głosy o wyższym priorytecie.
+        """
+        voice.priority = priority
+        self.order += 1
+        voice.order = self.order
+        victim = None
+        for i, current in enumerate(self.slots):
+            if current is None or not current.remaining:
+                victim = i
+                break
+            if current.priority <= priority and (
+                    victim is None or (current.priority, current.order) <
+                    (self.slots[victim].priority, self.slots[victim].order)):
+                victim = i
+        if victim is None:
+            self.rejected += 1
+            return None
+        if self.slots[victim] is not None and self.slots[victim].remaining:
+            self.steals += 1
+        self.slots[victim] = voice
+        return victim
+
+    def tone(self, frequency, duration, volume=100, shape="triangle", priority=0):
+        rate = self.stream.sample_rate
+        events = array("I", [phase_step(frequency, rate), int(duration * rate)])
+        return self.add(ToneVoice(self.table(shape), events, volume * 256 // 100), priority)
+
+    def melody(self, events, volume=100, shape="triangle", priority=0):
+        """Skompilowana melodia (melody.compile_sequence) jako jeden głos"""
+        return self.add(ToneVoice(self.table(shape), events, volume * 256 // 100), priority)
+
+    def wav(self, wav, volume=100, priority=0):
+        if wav.sample_rate != self.stream.sample_rate:
+            raise ValueError("sample rate differs from mixer")
+        return self.add(WavVoice(wav, self.stream.block, volume * 256 // 100), priority)
+
+    def active(self):
+        return sum(1 for voice in self.slots if voice is not None and voice.remaining)
+
+    def frames_left(self):
+        return max([voice.remaining for voice in self.slots if voice is not None] + [0])
+
+    def _fill(self, dst, count):
+        acc = self.acc
+        for i in range(len(self.slots)):
+            voice = self.slots[i]
+            if voice is not None:
+                voice.mix(acc, count)
+                if not voice.remaining:
+                    self.slots[i] = None
+        self.clipped += _output(acc, dst, count, self.master, self.stream.scale)
+
+    def play(self):
+        """
+        Odtwarzaj, aż skończy się najdłuższy głos. Głosy dodane w trakcie
+        grają najwyżej do tego momentu.
+        """
+        return self.stream.play_frames(self._fill_block, self.frames_left())
+
+    def stats(self):
+        return {
+            "voices": len(self.slots),
+            "active": self.active(),
+            "steals": self.steals,
+            "rejected": self.rejected,
+            "clipped": self.clipped,
+        }
@@ -0,0 +1,297 @@
+"""
+Strumieniowe odtwarzanie PCM (8/16 bit, mono/stereo) przez PWM.
+
+Dane czytane są blokami (readinto) na zmianę do dwóch stałych buforów:
+gdy jeden blok jest odtwarzany, drugi jest wczytywany i w jednym
+przebiegu przeliczany na wypełnienie PWM. Tempo wyznacza sprzęt - kanał
+DMA zapisuje kolejne wartości do rejestru CC przy każdym zawinięciu
+licznika PWM (DREQ_PWM_WRAP), a PWM pracuje z częstotliwością
+próbkowania, więc na okres przypada dokładnie jedna próbka. Stereo
+jest miksowane do mono.
+
+Pliki .pwm (DutyFile) zawierają gotowe wypełnienia - bloki wczytywane
+są wprost do buforów DMA. IMA-ADPCM dekodowany jest blokami prosto
+do buforów wypełnień.
+
+Bez rp2.DMA (starsze firmware) próbki wysyłane są przez duty_u16()
+w pętli pilnującej terminów z ticks_us.
+"""
+from array import array
+import time
+
+import machine
+from machine import Pin, PWM
+
+from adpcm import AdpcmDecoder, FORMAT_IMA_ADPCM
+
+try:
+    from rp2 import DMA
+except ImportError:
+    DMA = None
+
+try:
+    from micropython import const
+    import micropython
+    _native = micropython.native
+except ImportError:
+    def const(value):
+        return value
+
+    def _native(f):
+        return f
+
+_PWM_BASE = const(0x40050000)
+_PWM_SLICE_SIZE = const(0x14)
+_PWM_CC = const(0x0C)
+_PWM_TOP = const(0x10)
+_DREQ_PWM_WRAP0 = const(24)
+
+
+# Przeliczenie ramek na wypełnienie 0..scale-1 (12 bitów rozdzielczości).
+# Próbka 16-bit ze znakiem XOR 0x8000 to ta sama próbka bez znaku,
+# próbki 8-bit w WAV są bez znaku.
+
+@_native
+def _mono16(raw, dst, count, scale):
+    for i in range(count):
+        j = i << 1
+        u = (raw[j] | (raw[j + 1] << 8)) ^ 0x8000
+        dst[i] = ((u >> 4) * scale) >> 12
+
+
+@_native
+def _stereo16(raw, dst, count, scale):
+    for i in range(count):
+        j = i << 2
+        u = ((raw[j] | (raw[j + 1] << 8)) ^ 0x8000) + ((raw[j + 2] | (raw[j + 3] << 8)) ^ 0x8000)
+        dst[i] = ((u >> 5) * scale) >> 12
+
+
+@_native
+def _mono8(raw, dst, count, scale):
+    for i in range(count):
+        dst[i] = (raw[i] * scale) >> 8
+
+
+@_native
+def _stereo8(raw, dst, count, scale):
+    for i in range(count):
+        j = i << 1
+        dst[i] = ((raw[j] + raw[j + 1]) * scale) >> 9
+
+
+@_native
+def _rescale(dst, count, factor):
+    # Wypełnienie z innej skali (factor w Q12)
+    for i in range(count):
+        dst[i] = (dst[i] * factor) >> 12
+
+
+# (bity, kanały) -> (funkcja przeliczająca, bajty na ramkę)
+_CONVERTERS = {
+    (16, 1): (_mono16, 2),
+    (16, 2): (_stereo16, 4),
+    (8, 1): (_mono8, 1),
+    (8, 2): (_stereo8, 2),
+}
+
+
+class PCMStream:
+    def __init__(self, pin, sample_rate=44100, block=512, use_dma=True):
+        self.pwm = PWM(Pin(pin))
+        self.pwm.duty_u16(0)
+        self.block = block
+
+        # Bufory tworzone raz - odtwarzanie nie alokuje pamięci.
+        # Surowe bufory mieszczą blok w najszerszym formacie (16 bit stereo).
+        self.raw = (bytearray(4 * block), bytearray(4 * block))
+        self.duty = (array("H", [0] * block), array("H", [0] * block))
+        self.views = self.raw
+        self.convert = _mono16
+
+        self.dma = None
+        self.top_address = _PWM_BASE + ((pin >> 1) & 7) * _PWM_SLICE_SIZE + _PWM_TOP
+        if use_dma and DMA is not None:
+            self.dma = DMA()
+            self.cc = _PWM_BASE + ((pin >> 1) & 7) * _PWM_SLICE_SIZE + _PWM_CC
+            self.ctrl = self.dma.pack_ctrl(size=1, inc_read=True, inc_write=False,
+                                           treq_sel=_DREQ_PWM_WRAP0 + ((pin >> 1) & 7))
+        self.deadline = 0
+        self.sample_rate = 0
+        self.configure(sample_rate)
+
+        self.playing = False
+        self.blocks = 0
+        self.samples_played = 0
+        self.underruns = 0
+        self.elapsed_us = 0
+        self.source = None
+        self.fill = None
+        self.remaining = 0
+
+    def configure(self, sample_rate, bits=16, channels=1):
+        """Ustaw format danych; ValueError dla nieobsługiwanego"""
+        if (bits, channels) not in _CONVERTERS:
+            raise ValueError("unsupported PCM format: %d bit, %d channels" % (bits, channels))
+        self.convert, frame = _CONVERTERS[(bits, channels)]
+        size = self.block * frame
+        self.views = (memoryview(self.raw[0])[:size], memoryview(self.raw[1])[:size])
+        self.frame = frame
+
+        if sample_rate != self.sample_rate:
+            self.pwm.freq(sample_rate)
+            self.sample_rate = sample_rate
+            # Okres próbki w µs: część całkowita i ułamek (Bresenham)
+            self.period_us, self.period_rest = divmod(1000000, sample_rate)
+        if self.dma is not None:
+            # Wypełnienie zapisywane bezpośrednio w jednostkach licznika
+            self.scale = (machine.mem32[self.top_address] & 0xFFFF) + 1
+        else:
+            self.scale = 65536
+
+    def _load(self, index):
+        """Wczytaj i przelicz blok do bufora index; zwraca liczbę ramek"""
+        read = self.source.readinto(self.views[index])
+        if not read:
+            return 0
+        count = read // self.frame
+        self.convert(self.raw[index], self.duty[index], count, self.scale)
+        return count
+
+    def _load_duty(self, index):
+        """Wczytaj gotowe wypełnienia wprost do bufora index"""
+        return self.source.readinto(self.duty[index])
+
+    def _load_rescaled(self, index):
+        count = self.source.readinto(self.duty[index])
+        _rescale(self.duty[index], count, self.factor)
+        return count
+
+    def _load_adpcm(self, index):
+        return self.source.decode(self.duty[index], self.block, self.scale)
+
+    def _generate(self, index):
+        """Wygeneruj blok funkcją fill do bufora index; zwraca liczbę ramek"""
+        count = self.block if self.remaining > self.block else self.remaining
+        if count:
+            self.fill(self.duty[index], count)
+            self.remaining -= count
+        return count
+
+    def _paced(self, duty, count):
+        """Wyślij blok przez duty_u16 w rytmie próbkowania"""
+        write = self.pwm.duty_u16
+        period = self.period_us
+        rest = self.period_rest
+        rate = self.sample_rate
+        deadline = self.deadline
+        error = 0
+        for i in range(count):
+            while time.ticks_diff(time.ticks_us(), deadline) < 0:
+                pass
+            write(duty[i])
+            deadline = time.ticks_add(deadline, period)
+            error += rest
+            if error >= rate:
+                error -= rate
+                deadline = time.ticks_add(deadline, 1)
+        self.deadline = deadline
+
+    def play(self, source, sample_rate=None, bits=16, channels=1):
+        """
+        Odtwórz dane PCM ze źródła z metodą readinto() (plik ustawiony na
+        początku danych albo WavFile). Zwraca liczbę odtworzonych ramek.
+        """
+        self.configure(sample_rate or self.sample_rate, bits, channels)
+        self.source = source
+        return self._run(self._load)
+
+    def play_frames(self, fill, frames):
+        """
+        Odtwórz frames ramek z generatora: fill(duty, count) wpisuje
+        wypełnienie (0..scale-1) wprost do bufora DMA.
+        """
+        self.fill = fill
+        self.remaining = frames
+        return self._run(self._generate)
+
+    def _run(self, load):
+        self.playing = True
+        self.blocks = 0
+        self.samples_played = 0
+        self.underruns = 0
+        current = 0
+        count = load(current)
+        start = time.ticks_us()
+        if self.dma is None:
+            self.deadline = start
+
+        while count and self.playing:
+            if self.dma is not None:
+                self.dma.config(read=self.duty[current], write=self.cc, count=count,
+                                ctrl=self.ctrl, trigger=True)
+            else:
+                # Spóźnienie ponad okres próbki - dziura w dźwięku
+                if time.ticks_diff(time.ticks_us(), self.deadline) > self.period_us:
+                    self.underruns += 1
+                    self.deadline = time.ticks_us()
+                self._paced(self.duty[current], count)
+
+            self.blocks += 1
+            self.samples_played += count
+            current ^= 1
+            count = load(current)
+
+            if self.dma is not None:
+                # DMA skończył zanim następny blok był gotowy
+                if count and not self.dma.active():
+                    self.underruns += 1
+                while self.dma.active():
+                    pass
+
+        self.elapsed_us = time.ticks_diff(time.ticks_us(), start)
+        self.pwm.duty_u16(0)
+        self.playing = False
+        return self.samples_played
+
+    def play_wav(self, wav):
+        """Odtwórz WavFile w jego formacie i częstotliwości próbkowania"""
+        if wav.format == FORMAT_IMA_ADPCM:
+            self.configure(wav.sample_rate)
+            self.source = AdpcmDecoder(wav)
+            return self._run(self._load_adpcm)
+        if wav.format != 1:  # PCM
+            raise ValueError("unsupported WAV format %d" % wav.format)
+        return self.play(wav, wav.sample_rate, wav.bits, wav.channels)
+
+    def play_duty(self, duty):
+        """
+        Odtwórz DutyFile bez przeliczania próbek. Plik przygotowany dla
+        innej skali (inny zegar albo brak DMA) jest przeskalowywany.
+        """
+        self.configure(duty.sample_rate)
+        self.source = duty
+        if duty.scale == self.scale:
+            return self._run(self._load_duty)
+        self.factor = (self.scale << 12) // duty.scale
+        return self._run(self._load_rescaled)
+
+    def stop(self):
+        """Przerwij odtwarzanie po bieżącym bloku"""
+        self.playing = False
+
+    def stats(self):
+        """Liczniki ostatniego odtwarzania"""
+        rate = self.samples_played * 1000000 // self.elapsed_us if self.elapsed_us else 0
+        return {
+            "blocks": self.blocks,
+            "samples": self.samples_played,
+            "underruns": self.underruns,
+            "elapsed_us": self.elapsed_us,
+            "rate": rate,
+        }
+
+    def deinit(self):
+        if self.dma is not None:
+            self.dma.close()
+        self.pwm.deinit()
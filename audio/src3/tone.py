@@ -0,0 +1,142 @@
+"""
+Generator tonów z akumulatorem fazy.
+
+Jeden okres przebiegu liczony jest raz do tablicy 256 wartości
+wypełnienia PWM (z uwzględnieniem głośności). Każda próbka to przyrost
+24-bitowej fazy i odczyt z tablicy, a tempo próbek wyznacza PWM
+(DMA w PCMStream) - wysokość dźwięku nie zależy od szybkości
+interpretera, a obciążenie procesora jest stałe.
+"""
+from array import array
+
+from waveforms import PHASE_MASK, phase_step
+
+try:
+    from micropython import const
+    import micropython
+    _native = micropython.native
+except ImportError:
+    def const(value):
+        return value
+
+    def _native(f):
+        return f
+
+_TABLE_SIZE = const(256)
+_TABLE_SHIFT = const(16)  # 24 bity fazy - 8 bitów indeksu
+
+
+@_native
+def _table_fill(dst, start, end, table, phase, step):
+    for i in range(start, end):
+        dst[i] = table[phase >> _TABLE_SHIFT]
+        phase = (phase + step) & PHASE_MASK
+    return phase
+
+
+@_native
+def _silence(dst, start, end, value):
+    for i in range(start, end):
+        dst[i] = value
+
+
+def _triangle(i):
+    """Trójkąt 0..65535 (jak dotychczasowy generate_tone)"""
+    half = _TABLE_SIZE // 2
+    return i * 65535 // half if i < half else (_TABLE_SIZE - i) * 65535 // half
+
+
+def _square(i):
+    return 65535 if i < _TABLE_SIZE // 2 else 0
+
+
+SHAPES = {
+    "triangle": _triangle,
+    "square": _square,
+}
+
+
+class ToneEngine:
+    def __init__(self, stream, shape="triangle", volume=100):
+        self.stream = stream
+        self.shape = SHAPES[shape]
+        self.volume = volume
+        self.table = array("H", [0] * _TABLE_SIZE)
+        self.phase = 0
+        self.step = 0
+        self.frequency = 0
+        self.scale = 0
+        # Melodia: lista zdarzeń (przyrost fazy, liczba próbek), 0 = pauza
+        self.events = None
+        self.index = 0
+        self.left = 0
+        self._fill_block = self._fill
+        self._fill_events_block = self._fill_events
+        self.build_table()
+
+    def build_table(self):
+        """Przelicz okres przebiegu na wypełnienie PWM (raz, nie na próbkę)"""
+        self.scale = self.stream.scale
+        for i in range(_TABLE_SIZE):
+            value = self.shape(i) * self.volume // 100
+            self.table[i] = ((value >> 4) * self.scale) >> 12
+
+    def pcm_table(self):
+        """Ten sam okres jako PCM 8 bit bez znaku (do renderowania do pliku)"""
+        return bytearray(self.shape(i) * self.volume // 100 >> 8 for i in range(_TABLE_SIZE))
+
+    def set_volume(self, volume):
+        self.volume = volume
+        self.build_table()
+
+    def _fill(self, dst, count):
+        self.phase = _table_fill(dst, 0, count, self.table, self.phase, self.step)
+
+    def _fill_events(self, dst, count):
+        self.fill_events(dst, count, self.table)
+
+    def fill_events(self, dst, count, table):
+        """Kolejne count próbek melodii (zdarzenia mogą przechodzić przez bloki)"""
+        events = self.events
+        offset = 0
+        while offset < count:
+            if not self.left:
+                self.index += 2
+                self.step = events[self.index]
+                self.left = events[self.index + 1]
+            end = offset + self.left
+            if end > count:
+                end = count
+            if self.step:
+                self.phase = _table_fill(dst, offset, end, table, self.phase, self.step)
+            else:
+                _silence(dst, offset, end, 0)
+            self.left -= end - offset
+            offset = end
+
+    def start_events(self, events):
+        """Ustaw melodię; zwraca łączną liczbę próbek"""
+        self.events = events
+        self.index = -2
+        self.left = 0
+        self.frequency = 0
+        total = 0
+        for i in range(1, len(events), 2):
+            total += events[i]
+        return total
+
+    def play_events(self, events):
+        """Odtwórz skompilowaną melodię jednym ciągłym strumieniem"""
+        if self.scale != self.stream.scale:
+            self.build_table()
+        return self.stream.play_frames(self._fill_events_block, self.start_events(events))
+
+    def play(self, frequency, duration):
+        """Odtwórz ton frequency Hz przez duration s; zwraca liczbę próbek"""
+        if self.scale != self.stream.scale:
+            self.build_table()
+        if frequency != self.frequency:
+            self.frequency = frequency
+            self.step = phase_step(frequency, self.stream.sample_rate)
+        frames = int(self.stream.sample_rate * duration)
+        return self.stream.play_frames(self._fill_block, frames)
@@ -0,0 +1,150 @@
+"""
+Synteza przebiegów PCM 16 bit blokami (MicroPython i CPython).
+
+Sinus, prostokąt, trójkąt i szum liczone są w stałym przecinku
+z akumulatorem fazy (24 bity) prosto do stałego array('h') - bez
+struct.pack i bez alokacji na próbkę. Blok zapisuje się jednym write().
+Na hoście, jeśli jest NumPy, cały plik liczony jest naraz.
+"""
+import math
+from array import array
+
+try:
+    from micropython import const
+    import micropython
+    _native = micropython.native
+except ImportError:
+    def const(value):
+        return value
+
+    def _native(f):
+        return f
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PHASE_BITS = const(24)
+PHASE_MASK = const(0xFFFFFF)
+_HALF = const(0x800000)
+TABLE_BITS = const(10)
+_SHIFT = const(14)  # PHASE_BITS - TABLE_BITS
+_FRACTION = const(0x3FFF)
+
+BLOCK = const(512)
+
+_table = None
+
+
+def sine_table():
+    """Okres sinusa, 1024 próbki Q15 (liczony raz)"""
+    global _table
+    if _table is None:
+        size = 1 << TABLE_BITS
+        _table = array("h", [int(round(32767 * math.sin(2 * math.pi * i / size))) for i in range(size)])
+    return _table
+
+
+@_native
+def _sine(buf, count, table, phase, step, amplitude):
+    for i in range(count):
+        index = phase >> _SHIFT
+        a = table[index]
+        b = table[(index + 1) & 1023]
+        value = a + (((b - a) * (phase & _FRACTION)) >> _SHIFT)
+        buf[i] = (value * amplitude) >> 15
+        phase = (phase + step) & PHASE_MASK
+    return phase
+
+
+@_native
+def _square(buf, count, table, phase, step, amplitude):
+    low = -amplitude
+    for i in range(count):
+        buf[i] = amplitude if phase < _HALF else low
+        phase = (phase + step) & PHASE_MASK
+    return phase
+
+
+@_native
+def _triangle(buf, count, table, phase, step, amplitude):
+    for i in range(count):
+        x = phase >> 9
+        if x < 16384:
+            value = (x << 2) - 32768
+        else:
+            value = 98303 - (x << 2)
+        buf[i] = (value * amplitude) >> 15
+        phase = (phase + step) & PHASE_MASK
+    return phase
+
+
+@_native
+def _noise(buf, count, table, state, step, amplitude):
+    # Rejestr LFSR 16 bit (Galois, wielomian 0xB400) zamiast fazy
+    for i in range(count):
+        if state & 1:
+            state = (state >> 1) ^ 0xB400
+        else:
+            state >>= 1
+        buf[i] = ((state - 32768) * amplitude) >> 15
+    return state
+
+
+WAVEFORMS = {
+    "sine": _sine,
+    "square": _square,
+    "triangle": _triangle,
+    "noise": _noise,
+}
+
+
+def phase_step(frequency, sample_rate):
+    """Przyrost fazy na próbkę (liczony raz, poza pętlą próbek)"""
+    return ((int(frequency * 256) << 16) // sample_rate) & PHASE_MASK
+
+
+def start_phase(waveform):
+    """Faza początkowa; dla szumu - niezerowy stan LFSR"""
+    return 0xACE1 if waveform == "noise" else 0
+
+
+def fill(waveform, buf, count, phase, step, amplitude=32767):
+    """Wypełnij buf[:count] próbkami; zwraca fazę dla następnego bloku"""
+    return WAVEFORMS[waveform](buf, count, sine_table(), phase, step, amplitude)
+
+
+def _synthesize_np(waveform, frequency, count, sample_rate, amplitude):
+    """Cały przebieg naraz (NumPy), jako bajty int16 little-endian"""
+    phase = (np.arange(count) * (frequency / sample_rate)) % 1.0
+    if waveform == "sine":
+        values = np.sin(2 * np.pi * phase)
+    elif waveform == "square":
+        values = np.where(phase < 0.5, 1.0, -1.0)
+    elif waveform == "triangle":
+        values = np.where(phase < 0.5, 4 * phase - 1, 3 - 4 * phase)
+    else:
+        values = np.random.default_rng(0xACE1).uniform(-1.0, 1.0, count)
+    return np.rint(values * amplitude).astype("<i2").tobytes()
+
+
+def write_samples(file, waveform, frequency, count, sample_rate, amplitude=32767):
+    """Zapisz count próbek przebiegu do pliku blokami (albo naraz przez NumPy)"""
+    if waveform not in WAVEFORMS:
+        raise ValueError("unknown waveform: %s" % waveform)
+    if np is not None:
+        file.write(_synthesize_np(waveform, frequency, count, sample_rate, amplitude))
+        return
+
+    buf = array("h", [0] * BLOCK)
+    view = memoryview(buf)
+    generate = WAVEFORMS[waveform]
+    table = sine_table()
+    phase = start_phase(waveform)
+    step = phase_step(frequency, sample_rate)
+    while count:
+        n = BLOCK if count > BLOCK else count
+        phase = generate(buf, n, table, phase, step, amplitude)
+        file.write(view[:n] if n < BLOCK else buf)
+        count -= n
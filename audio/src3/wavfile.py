@@ -0,0 +1,130 @@
+"""
+Odczyt plików WAV (RIFF) na MicroPython i CPython.
+
+Nagłówek czytany jest leniwie, fragment po fragmencie (chunk): 'fmt '
+daje format, pozostałe fragmenty (LIST, fact, ...) są przeskakiwane
+przez seek(), a odczyt zatrzymuje się na początku 'data'. Dane czyta się
+potem blokami całych ramek przez readinto() - bez kopiowania i bez
+alokacji na blok.
+
+Dla IMA-ADPCM ramką jest blok kodu (block_align bajtów), a frames to
+liczba próbek - z fragmentu 'fact', jeśli jest.
+"""
+import struct
+
+FORMAT_PCM = 1
+FORMAT_IMA_ADPCM = 0x11
+FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavFile:
+    def __init__(self, f):
+        """f - plik otwarty w trybie binarnym, ustawiony na początku"""
+        self.file = f
+        self.format = 0
+        self.channels = 0
+        self.sample_rate = 0
+        self.bits = 0
+        self.block_align = 0
+        self.data_offset = 0
+        self.data_size = 0
+        self.frames = 0
+        self.remaining = 0
+        self.fact = 0
+        self._parse()
+
+    def _parse(self):
+        header = self.file.read(12)
+        if len(header) < 12 or header[0:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError("not a RIFF/WAVE file")
+
+        while True:
+            chunk = self.file.read(8)
+            if len(chunk) < 8:
+                raise ValueError("no data chunk")
+            size = struct.unpack_from("<I", chunk, 4)[0]
+            if chunk[0:4] == b"data":
+                break
+            if chunk[0:4] == b"fmt ":
+                self._parse_format(size)
+            elif chunk[0:4] == b"fact" and size >= 4:
+                # Liczba próbek w formatach skompresowanych
+                self.fact = struct.unpack("<I", self.file.read(4))[0]
+                self.file.seek(size - 4 + (size & 1), 1)
+            else:
+                # Fragmenty mają parzystą długość (bajt wyrównania)
+                self.file.seek(size + (size & 1), 1)
+
+        if not self.block_align:
+            raise ValueError("data before fmt chunk")
+
+        # Rozmiar 0 lub 0xFFFFFFFF zapisują programy nagrywające strumieniowo,
+        # obcięte pliki mają mniej danych niż w nagłówku - liczy się koniec pliku
+        self.data_offset = self.file.tell()
+        end = self.file.seek(0, 2)
+        self.file.seek(self.data_offset)
+        available = end - self.data_offset
+        if size == 0 or size > available:
+            size = available
+        self.frames = size // self.block_align
+        self.data_size = self.frames * self.block_align
+        self.remaining = self.data_size
+        if self.format == FORMAT_IMA_ADPCM and self.channels:
+            # Próbki w bloku: nagłówek 4 bajty na kanał, potem 4 bity na próbkę
+            per_block = (self.block_align // self.channels - 4) * 2 + 1
+            self.frames *= per_block
+            if 0 < self.fact < self.frames:
+                self.frames = self.fact
+
+    def _parse_format(self, size):
+        if size < 16:
+            raise ValueError("fmt chunk too short")
+        fmt = self.file.read(size + (size & 1))
+        (self.format, self.channels, self.sample_rate, _, self.block_align,
+         self.bits) = struct.unpack_from("<HHIIHH", fmt, 0)
+        if self.format == FORMAT_EXTENSIBLE and size >= 26:
+            # Właściwy format to pierwsze 2 bajty GUID podformatu
+            self.format = struct.unpack_from("<H", fmt, 24)[0]
+        if not self.block_align:
+            raise ValueError("invalid block align")
+
+    def readinto(self, buf):
+        """
+        Wczytaj do buf (bytearray) tyle całych ramek, ile się zmieści;
+        zwraca liczbę bajtów (0 na końcu danych).
+        """
+        size = len(buf)
+        if size > self.remaining:
+            size = self.remaining
+        size -= size % self.block_align
+        if not size:
+            return 0
+        if size < len(buf):
+            count = self.file.readinto(memoryview(buf)[:size])
+        else:
+            count = self.file.readinto(buf)
+        if not count:
+            self.remaining = 0
+            return 0
+        self.remaining -= count
+        return count
+
+    def blocks(self, buf):
+        """Iterator kolejnych bloków: wczytuje do buf i zwraca liczbę bajtów"""
+        while True:
+            count = self.readinto(buf)
+            if not count:
+                return
+            yield count
+
+    def rewind(self):
+        """Wróć na początek danych"""
+        self.file.seek(self.data_offset)
+        self.remaining = self.data_size
+
+    def duration_ms(self):
+        return self.frames * 1000 // self.sample_rate if self.sample_rate else 0
+
+    def __repr__(self):
+        return "<WavFile format=%d channels=%d rate=%d bits=%d frames=%d>" % (
+            self.format, self.channels, self.sample_rate, self.bits, self.frames)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Fuzzing i pomiar wydajności parsera httpparse.RequestParser.
+
+Fuzzing generuje losowe żądania (także potokowe), dzieli je na losowe
+segmenty TCP i porównuje wynik parsera z oczekiwanym. Losowe śmieci
+mogą kończyć się wyłącznie wyjątkiem ValueError.
+
+    python bench/bench_httpparse.py --fuzz 20000
+    python bench/bench_httpparse.py --requests 100000
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from httpparse import RequestParser
+
+METHODS = [b"GET", b"POST", b"PUT", b"DELETE", b"OPTIONS"]
+PATH_CHARS = string.ascii_letters + string.digits + "/-_."
+
+
+def random_token(rng, chars, low, high):
+    return "".join(rng.choice(chars) for _ in range(rng.randint(low, high))).encode()
+
+
+def random_case(rng, name):
+    return bytes(c ^ 0x20 if 97 <= c <= 122 and rng.random() < 0.5 else c for c in name)
+
+
+def random_request(rng):
+    """Losowe żądanie i oczekiwany wynik parsowania"""
+    method = rng.choice(METHODS)
+    path = b"/" + random_token(rng, PATH_CHARS, 0, 40)
+    query = random_token(rng, string.ascii_letters + "=&", 1, 30) if rng.random() < 0.3 else None
+    body = os.urandom(rng.randint(0, 200)) if rng.random() < 0.6 else b""
+    version = rng.choice([b"HTTP/1.0", b"HTTP/1.1"])
+
+    target = path + (b"?" + query if query is not None else b"")
+    lines = [method + b" " + target + b" " + version]
+    headers = [(b"host", b"192.168.4.1"), (b"user-agent", b"fuzz")]
+    if body or rng.random() < 0.5:
+        headers.append((b"content-length", str(len(body)).encode()))
+    rng.shuffle(headers)
+    for name, value in headers:
+        lines.append(random_case(rng, name) + b":" + b" " * rng.randint(0, 2) + value)
+
+    eol = b"\r\n" if rng.random() < 0.9 else b"\n"
+    raw = eol.join(lines) + eol + eol + body
+    expected = (method, path, query or b"", body)
+    return raw, expected
+
+
+def split_segments(rng, data):
+    """Podziel dane na losowe segmenty jak w TCP"""
+    segments = []
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(1, 64) if rng.random() < 0.7 else len(data)
+        segments.append(data[pos:pos + size])
+        pos += size
+    return segments
+
+
+def fuzz_valid(rng, iterations):
+    parser = RequestParser(2048)
+    for i in range(iterations):
+        requests = [random_request(rng) for _ in range(rng.randint(1, 3))]
+        stream = b"".join(raw for raw, _ in requests)
+        results = []
+
+        parser.clear()
+        for segment in split_segments(rng, stream):
+            parser.feed(segment)
+            while parser.parse():
+                results.append((bytes(parser.method()), bytes(parser.path()),
+                                bytes(parser.query()), bytes(parser.body())))
+                parser.consume()
+
+        expected = [exp for _, exp in requests]
+        if results != expected:
+            print(f"❌ Rozbieżność w iteracji {i}:")
+            print(f"   dane:      {stream!r}")
+            print(f"   oczekiwano: {expected!r}")
+            print(f"   otrzymano:  {results!r}")
+            return False
+    return True
+
+
+def fuzz_garbage(rng, iterations):
+    parser = RequestParser(512)
+    valid, _ = random_request(rng)
+    for i in range(iterations):
+        if rng.random() < 0.5:
+            data = os.urandom(rng.randint(0, 600))
+        else:
+            # Uszkodzone poprawne żądanie
+            data = bytearray(valid)
+            for _ in range(rng.randint(1, 10)):
+                data[rng.randrange(len(data))] = rng.randrange(256)
+            data = bytes(data)
+
+        parser.clear()
+        try:
+            for segment in split_segments(rng, data):
+                parser.feed(segment)
+                while parser.parse():
+                    parser.method()
+                    parser.body()
+                    parser.consume()
+        except ValueError:
+            pass
+        except Exception as e:
+            print(f"❌ Nieoczekiwany wyjątek {type(e).__name__} w iteracji {i}: {e}")
+            print(f"   dane: {data!r}")
+            return False
+    return True
+
+
+def legacy_main(raw):
+    """Dotychczasowe parsowanie z main.py (str(bytes) + find)"""
+    request = str(raw)
+    if "POST /update_frequency" in request:
+        freq_start = request.find("frequency=") + 10
+        freq_end = request.find("HTTP", freq_start)
+        return int(request[freq_start:freq_end])
+
+
+def legacy_mouse(raw):
+    """Dotychczasowe parsowanie z mouse.py (decode + split)"""
+    request = raw.decode()
+    method = request.split()[0]
+    path = request.split()[1]
+    content_pos = request.find('\r\n\r\n')
+    return method, path, json.loads(request[content_pos:])
+
+
+def benchmark(count):
+    form = (b"POST /update_frequency HTTP/1.1\r\nHost: 192.168.4.1\r\n"
+            b"Content-Type: application/x-www-form-urlencoded\r\n"
+            b"Content-Length: 12\r\n\r\nfrequency=42")
+    vector = (b"POST /mouse/vector HTTP/1.1\r\nHost: 192.168.4.1\r\n"
+              b"Content-Type: text/plain\r\nContent-Length: 30\r\n\r\n"
+              b'{"x": 12, "y": -3, "speed": 1}')
+
+    parser = RequestParser()
+
+    def parse_form(raw):
+        parser.clear()
+        parser.feed(raw)
+        parser.parse()
+        return parser.form_int(b"frequency")
+
+    def parse_vector(raw):
+        parser.clear()
+        parser.feed(raw)
+        parser.parse()
+        return parser.path_is(b"/mouse/vector"), json.loads(bytes(parser.body()))
+
+    cases = [
+        ("main.py  (str + find)", legacy_main, form),
+        ("main.py  (RequestParser)", parse_form, form),
+        ("mouse.py (decode + split)", legacy_mouse, vector),
+        ("mouse.py (RequestParser)", parse_vector, vector),
+    ]
+
+    for name, func, raw in cases:
+        start = time.perf_counter()
+        for _ in range(count):
+            func(raw)
+        elapsed = time.perf_counter() - start
+        print(f"{name:28} {count / elapsed:12,.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzing i benchmark parsera HTTP")
+    parser.add_argument("--fuzz", type=int, default=5000, help="Liczba iteracji fuzzingu (0 = pomiń)")
+    parser.add_argument("--requests", type=int, default=50000, help="Liczba żądań w benchmarku (0 = pomiń)")
+    parser.add_argument("--seed", type=int, default=None, help="Ziarno generatora losowego")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    rng = random.Random(seed)
+
+    if args.fuzz:
+        print(f"🔍 Fuzzing ({args.fuzz} iteracji, ziarno {seed})...")
+        if not (fuzz_valid(rng, args.fuzz) and fuzz_garbage(rng, args.fuzz)):
+            sys.exit(1)
+        print("✅ Fuzzing zakończony bez błędów")
+
+    if args.requests:
+        print(f"\n⏱️  Przepustowość parsowania ({args.requests} żądań):")
+        benchmark(args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark i kontrola poprawności ruchu myszy (motion.py) na CPython.
+
+1. Trajektorie: losowe ruchy move_to() liczone w stałym przecinku
+   (MotionState, suma wysłanych raportów HID) porównywane z dotychczasową
+   wersją zmiennoprzecinkową - odchylenie nie może przekroczyć 1 piksela,
+   a ruch musi kończyć się dokładnie w celu.
+2. Profile ruchu: liczba taktów i raportów HID do celu dla każdego
+   profilu, także gdy co drugi takt timera zostaje pominięty (ruch
+   wyznaczany jest z upływu czasu, więc czas dojścia się nie zmienia).
+3. Takty na sekundę: dotychczasowy krok (słowniki + sqrt) i MotionState.
+
+Kończy się kodem 1, gdy trajektorie się rozjeżdżają.
+
+    python bench/bench_motion.py --moves 2000 --ticks 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from math import sqrt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from motion import MotionState, PROFILES
+
+
+class LegacyMotion:
+    """Dotychczasowy ruch z mouse.py: słowniki i liczby zmiennoprzecinkowe"""
+
+    def __init__(self):
+        self.vector = {"x": 0, "y": 0, "speed": 0}
+        self.current_pos = {"x": 0, "y": 0}
+        self.target_pos = {"x": 0, "y": 0}
+        self.is_moving = False
+
+    def move_to(self, x, y, speed):
+        self.target_pos["x"] = x
+        self.target_pos["y"] = y
+        dx = x - self.current_pos["x"]
+        dy = y - self.current_pos["y"]
+        distance = sqrt(dx * dx + dy * dy)
+        if distance > 0:
+            self.vector["x"] = dx / distance
+            self.vector["y"] = dy / distance
+            self.vector["speed"] = speed
+            self.is_moving = True
+
+    def tick(self):
+        dx = self.vector["x"] * self.vector["speed"]
+        dy = self.vector["y"] * self.vector["speed"]
+        self.current_pos["x"] += dx
+        self.current_pos["y"] += dy
+        distance_to_target = sqrt(
+            (self.target_pos["x"] - self.current_pos["x"]) ** 2 +
+            (self.target_pos["y"] - self.current_pos["y"]) ** 2
+        )
+        if distance_to_target < self.vector["speed"]:
+            self.is_moving = False
+            self.current_pos["x"] = self.target_pos["x"]
+            self.current_pos["y"] = self.target_pos["y"]
+        return int(dx), int(dy)
+
+
+def signed(byte):
+    return byte - 256 if byte > 127 else byte
+
+
+def fixed_trajectory(state, report, x, y, speed, accel=1.0, profile="linear", tick_ms=10):
+    """Pozycje wynikające z wysłanych raportów (co tick_ms ms) i liczba raportów"""
+    state.move_to(x, y, speed, accel, profile)
+    points = []
+    reports = 0
+    total_x = total_y = 0
+    now = 0
+    while state.moving():
+        state.step(now)
+        now += tick_ms
+        for _ in range(state.max_reports_per_tick):
+            if not state.pending():
+                break
+            state.take_into(report)
+            reports += 1
+            total_x += signed(report[1])
+            total_y += signed(report[2])
+        points.append((total_x, total_y))
+    return points, reports
+
+
+def float_trajectory(legacy, x, y, speed):
+    """Pozycje zmiennoprzecinkowe dotychczasowego algorytmu"""
+    legacy.move_to(x, y, speed)
+    points = []
+    while legacy.is_moving:
+        legacy.tick()
+        points.append((legacy.current_pos["x"], legacy.current_pos["y"]))
+    return points
+
+
+def check_trajectories(moves, seed):
+    rng = random.Random(seed)
+    state = MotionState()
+    legacy = LegacyMotion()
+    report = bytearray(4)
+    start = (0, 0)
+    worst = 0.0
+    tick_diff = 0
+
+    for _ in range(moves):
+        x = rng.randint(-2000, 2000)
+        y = rng.randint(-2000, 2000)
+        speed = rng.randint(1, 10)
+        if (x, y) == start:
+            continue
+
+        offset_x, offset_y = start
+        fixed = [(px + offset_x, py + offset_y)
+                 for px, py in fixed_trajectory(state, report, x, y, speed)[0]]
+        reference = float_trajectory(legacy, x, y, speed)
+        tick_diff = max(tick_diff, abs(len(fixed) - len(reference)))
+
+        if fixed[-1] != (x, y):
+            print(f"❌ Ruch do ({x}, {y}) zakończony w {fixed[-1]}")
+            return False
+
+        # Jeśli liczba taktów różni się o jeden, porównaj z pozycją końcową
+        for i in range(max(len(fixed), len(reference))):
+            fx, fy = fixed[min(i, len(fixed) - 1)]
+            rx, ry = reference[min(i, len(reference) - 1)]
+            worst = max(worst, abs(fx - rx), abs(fy - ry))
+        start = (x, y)
+
+    print(f"Trajektorie:       {moves} ruchów, maks. odchylenie {worst:.3f} px, "
+          f"różnica liczby taktów {tick_diff}")
+    if worst > 1.0 or tick_diff > 1:
+        print("❌ Trajektoria stałoprzecinkowa odbiega od zmiennoprzecinkowej")
+        return False
+    print("✅ Trajektorie zgodne (≤ 1 px)")
+    return True
+
+
+def check_profiles(speed, accel):
+    """Takty i raporty HID potrzebne do dojścia do celu dla każdego profilu"""
+    ok = True
+    report = bytearray(4)
+    print(f"\nProfile ruchu (prędkość {speed} px/takt, przyspieszenie {accel} px/takt²):")
+    print(f"{'profil':14} {'dystans':>8} {'takty':>6} {'raporty':>8} {'czas':>8} {'co 20 ms':>9}")
+
+    legacy = LegacyMotion()
+    for distance in (40, 300, 1500, 6000):
+        ticks = len(float_trajectory(legacy, legacy.current_pos["x"] + distance, 0, 5))
+        print(f"{'przed (5 px)':14} {distance:8} {ticks:6} {ticks:8} {ticks * 10:5} ms {'-':>9}")
+
+    for profile in PROFILES:
+        for distance in (40, 300, 1500, 6000):
+            state = MotionState()
+            points, reports = fixed_trajectory(state, report, distance, distance // 3,
+                                               speed, accel, profile)
+
+            # Pominięte takty: timer co 20 ms zamiast co 10 ms
+            slow, _ = fixed_trajectory(MotionState(), report, distance, distance // 3,
+                                       speed, accel, profile, tick_ms=20)
+            print(f"{profile:14} {distance:8} {len(points):6} {reports:8} "
+                  f"{len(points) * 10:5} ms {len(slow) * 20:6} ms")
+
+            if points[-1] != (distance, distance // 3) or slow[-1] != points[-1]:
+                print(f"❌ {profile}: ruch nie dotarł do celu")
+                ok = False
+            # Czas dojścia (ms) nie może zależeć od częstotliwości taktów
+            if abs(len(slow) * 20 - len(points) * 10) > 20:
+                print(f"❌ {profile}: czas ruchu zależy od liczby taktów")
+                ok = False
+    return ok
+
+
+def measure(name, tick, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        tick()
+    elapsed = time.perf_counter() - start
+    print(f"{name:34} {ticks / elapsed:12,.0f} taktów/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ruchu myszy w stałym przecinku")
+    parser.add_argument("--moves", type=int, default=1000, help="Liczba losowych ruchów do sprawdzenia")
+    parser.add_argument("--ticks", type=int, default=200000, help="Liczba taktów w pomiarze szybkości")
+    parser.add_argument("--seed", type=int, default=1, help="Ziarno generatora losowego")
+    parser.add_argument("--speed", type=float, default=127, help="Prędkość profili (px/takt)")
+    parser.add_argument("--accel", type=float, default=8.0, help="Przyspieszenie profili (px/takt²)")
+    args = parser.parse_args()
+
+    ok = check_trajectories(args.moves, args.seed)
+    ok = check_profiles(args.speed, args.accel) and ok
+
+    # Bardzo daleki cel, żeby ruch trwał przez cały pomiar
+    legacy = LegacyMotion()
+    report = bytearray(4)
+
+    def legacy_tick():
+        if not legacy.is_moving:
+            legacy.move_to(legacy.current_pos["x"] + 10 ** 7, 0, 7)
+        dx, dy = legacy.tick()
+        report[1] = dx & 0xFF
+        report[2] = dy & 0xFF
+
+    state = MotionState()
+
+    clock = [0]
+
+    def fixed_tick(profile):
+        if not state.moving():
+            state.move_to(10 ** 6, 10 ** 6 // 3, 7, 1.0, profile)
+        clock[0] += 10
+        state.step(clock[0])
+        if state.pending():
+            state.take_into(report)
+
+    print(f"\n⏱️  Takt ruchu ({args.ticks} taktów):")
+    measure("przed: słowniki + sqrt", legacy_tick, args.ticks)
+    measure("po: MotionState, linear", lambda: fixed_tick("linear"), args.ticks)
+    measure("po: MotionState, trapezoid", lambda: fixed_tick("trapezoid"), args.ticks)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Mikrobenchmark renderowania strony częstotliwości (main.py).
+
+Porównuje dotychczasowe składanie odpowiedzi z sześciu napisów
+z pagecache.CachedPage: czas na żądanie oraz szczytową pamięć
+alokowaną w trakcie jednego żądania (tracemalloc).
+
+    python bench/bench_pagecache.py --requests 100000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pagecache import CachedPage
+
+PARTS = (
+    "HTTP/1.0 200 OK\r\nContent-type: text/html\r\n\r\n"
+    "<h1>Current frequency: ",
+    " Hz</h1>"
+    "<form method='POST' action='/update_frequency'>"
+    "<input type='number' name='frequency' value='",
+    "'>"
+    "<input type='submit' value='Update Frequency'>"
+    "</form>",
+)
+
+
+class NullSocket:
+    """Gniazdo, które tylko zlicza wysłane bajty"""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.sent += len(data)
+
+    sendall = send
+
+
+def legacy_render(current_frequency):
+    """Dotychczasowa wersja z main.py"""
+    response = "HTTP/1.0 200 OK\r\nContent-type: text/html\r\n\r\n"
+    response += f"<h1>Current frequency: {current_frequency} Hz</h1>"
+    response += "<form method='POST' action='/update_frequency'>"
+    response += "<input type='number' name='frequency' value='" + str(current_frequency) + "'>"
+    response += "<input type='submit' value='Update Frequency'>"
+    response += "</form>"
+    return response
+
+
+def measure(name, handle, count):
+    sock = NullSocket()
+
+    start = time.perf_counter()
+    for i in range(count):
+        sock.sendall(handle(i))
+    elapsed = time.perf_counter() - start
+
+    # Szczytowa pamięć na żądanie, mierzona osobno (tracemalloc spowalnia)
+    samples = min(count, 2000)
+    tracemalloc.start()
+    total_peak = 0
+    for i in range(samples):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        sock.sendall(handle(i))
+        total_peak += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    print(f"{name:34} {elapsed / count * 1e6:8.2f} µs/req   {total_peak / samples:8.1f} B/req")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark renderowania strony częstotliwości")
+    parser.add_argument("--requests", type=int, default=100000, help="Liczba żądań")
+    args = parser.parse_args()
+
+    page = CachedPage(PARTS)
+    changing = CachedPage(PARTS)
+
+    print(f"⏱️  Renderowanie odpowiedzi ({args.requests} żądań):")
+    measure("przed: składanie str + encode", lambda i: legacy_render(440), args.requests)
+    measure("po: CachedPage (stała wartość)", lambda i: page.render(440), args.requests)
+    measure("po: CachedPage (zmiana co żądanie)", lambda i: changing.render(i), args.requests)
+    print(f"\nRenderowań CachedPage przy stałej wartości: {page.renders}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark generowania sinusa dla generator/main.py na CPython.
+
+Porównuje próbki na sekundę:
+  - dotychczasowe math.sin dla każdej próbki w każdej iteracji,
+  - akumulator fazy z tablicy (Oscillator.fill), także z interpolacją,
+  - Oscillator.block przy stałej częstotliwości (bufor bez przeliczania),
+oraz czas budowy tablicy w czystym Pythonie i w NumPy (jeśli dostępne).
+Sprawdza też błąd względem math.sin.
+
+    python bench/bench_wavetable.py --blocks 500
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "generator"))
+
+import wavetable
+from wavetable import Oscillator, sine_table
+
+SAMPLE_RATE = 16000
+BUFFER = 1024
+
+
+def legacy_fill(buffer, frequency):
+    """Dotychczasowa wersja z generator/main.py"""
+    for i in range(len(buffer)):
+        buffer[i] = int(32767 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))
+    return buffer
+
+
+def measure(name, produce, blocks):
+    start = time.perf_counter()
+    for _ in range(blocks):
+        produce()
+    elapsed = time.perf_counter() - start
+    print(f"{name:40} {blocks * BUFFER / elapsed:14,.0f} próbek/s")
+
+
+def max_error(frequency, interpolate):
+    """Największa różnica (w LSB) względem math.sin na pierwszym buforze"""
+    reference = legacy_fill(array("h", [0] * BUFFER), frequency)
+    osc = Oscillator(sine_table(), SAMPLE_RATE, array("h", [0] * BUFFER), interpolate)
+    produced = osc.block(frequency)
+    return max(abs(a - b) for a, b in zip(reference, produced))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generowania sinusa (wavetable)")
+    parser.add_argument("--blocks", type=int, default=500, help="Liczba buforów po 1024 próbki")
+    parser.add_argument("--frequency", type=float, default=1000, help="Częstotliwość tonu (Hz)")
+    args = parser.parse_args()
+
+    buffer = array("h", [0] * BUFFER)
+    continuous = Oscillator(sine_table(), SAMPLE_RATE, array("h", [0] * BUFFER))
+    continuous.set_frequency(args.frequency)
+    smooth = Oscillator(sine_table(), SAMPLE_RATE, array("h", [0] * BUFFER), interpolate=True)
+    smooth.set_frequency(args.frequency)
+    cached = Oscillator(sine_table(), SAMPLE_RATE, array("h", [0] * BUFFER))
+
+    print(f"⏱️  Sinus {args.frequency:g} Hz @ {SAMPLE_RATE} Hz, bufory po {BUFFER} próbek:")
+    measure("przed: math.sin na próbkę", lambda: legacy_fill(buffer, args.frequency), args.blocks)
+    measure("po: akumulator fazy (fill)", continuous.fill, args.blocks)
+    measure("po: akumulator fazy z interpolacją", smooth.fill, args.blocks)
+    measure("po: block() przy stałej częstotliwości", lambda: cached.block(args.frequency), args.blocks)
+    print(f"   bufor powtarzalny bez przeliczania: {'tak' if cached.looping else 'nie'}")
+
+    print("\n⏱️  Budowa tablicy (1024 próbki):")
+    start = time.perf_counter()
+    for _ in range(100):
+        table = array("h", [int(round(32767 * math.sin(2 * math.pi * i / 1024))) for i in range(1024)])
+    print(f"{'czysty Python':40} {(time.perf_counter() - start) * 10:10.3f} ms")
+    if wavetable.np is not None:
+        start = time.perf_counter()
+        for _ in range(100):
+            numpy_table = sine_table()
+        print(f"{'NumPy':40} {(time.perf_counter() - start) * 10:10.3f} ms")
+        if numpy_table != table:
+            print("❌ Tablica NumPy różni się od wersji w czystym Pythonie")
+    else:
+        print("NumPy niedostępne - tablica budowana w czystym Pythonie")
+
+    print("\n🔍 Maksymalny błąd względem math.sin (bez / z interpolacją):")
+    for frequency in (440, 1000, 2750.5):
+        print(f"{frequency:>10g} Hz: {max_error(frequency, False):4} / {max_error(frequency, True)} LSB")
+
+
+if __name__ == "__main__":
+    main()
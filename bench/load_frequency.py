@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Generator obciążenia dla serwera częstotliwości (main.py).
+
+Wysyła równolegle wiele formularzy POST /update_frequency i mierzy
+przepustowość oraz opóźnienia. Opcjonalnie otwiera "wolnych" klientów,
+którzy nic nie wysyłają - pozwala to sprawdzić, czy blokują pozostałych.
+
+    python bench/load_frequency.py 192.168.4.1 --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+
+def percentile(values, pct):
+    """Percentyl z posortowanej listy"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return values[index]
+
+
+async def post_frequency(host, port, frequency, timeout):
+    """Wyślij jeden formularz i poczekaj na pełną odpowiedź"""
+    body = f"frequency={frequency}".encode()
+    request = (
+        b"POST /update_frequency HTTP/1.0\r\n"
+        b"Content-Type: application/x-www-form-urlencoded\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+    )
+
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+
+    if not response.startswith(b"HTTP/1."):
+        raise ValueError("Nieprawidłowa odpowiedź")
+
+
+async def slow_client(host, port, hold):
+    """Klient, który łączy się i milczy przez `hold` sekund"""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        await asyncio.sleep(hold)
+        writer.close()
+    except OSError:
+        pass
+
+
+async def worker(host, port, queue, latencies, errors, timeout):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        start = time.perf_counter()
+        try:
+            await post_frequency(host, port, random.randint(1, 20), timeout)
+            latencies.append(time.perf_counter() - start)
+        except (OSError, ValueError, asyncio.TimeoutError):
+            errors.append(time.perf_counter() - start)
+
+
+async def run(args):
+    queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    latencies = []
+    errors = []
+
+    slow = [asyncio.create_task(slow_client(args.host, args.port, args.slow_hold))
+            for _ in range(args.slow_clients)]
+    if slow:
+        await asyncio.sleep(0.1)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(args.host, args.port, queue, latencies, errors, args.timeout)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    for task in slow:
+        task.cancel()
+
+    latencies.sort()
+    print(f"Żądania:        {len(latencies)} OK, {len(errors)} błędów")
+    print(f"Czas:           {elapsed:.2f}s")
+    print(f"Przepustowość:  {len(latencies) / elapsed:.1f} req/s")
+    print(f"Opóźnienie p50: {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Opóźnienie p99: {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążenia serwera częstotliwości")
+    parser.add_argument("host", help="Adres IP Pico (lub 127.0.0.1 dla symulacji)")
+    parser.add_argument("--port", type=int, default=80, help="Port serwera (domyślnie: 80)")
+    parser.add_argument("--requests", type=int, default=200, help="Liczba żądań")
+    parser.add_argument("--concurrency", type=int, default=10, help="Liczba równoległych klientów")
+    parser.add_argument("--slow-clients", type=int, default=0,
+                        help="Liczba klientów, którzy łączą się i nic nie wysyłają")
+    parser.add_argument("--slow-hold", type=float, default=10.0,
+                        help="Jak długo wolni klienci trzymają połączenie (s)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Limit czasu żądania (s)")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Generator obciążenia dla MouseServer (mouse.py).
+
+Odtwarza nagrany strumień zdarzeń mousemove jako żądania
+POST /mouse/vector i raportuje osiągniętą liczbę zdarzeń na sekundę
+oraz opóźnienia p50/p99.
+
+Tryby:
+  close     - nowe połączenie na każde zdarzenie (Connection: close)
+  keepalive - jedno trwałe połączenie HTTP/1.1, żądanie po żądaniu
+  pipeline  - jedno trwałe połączenie, do --depth żądań w locie
+
+Nagranie to plik JSON Lines: {"t": ms, "x": dx, "y": dy}. Bez --record
+używany jest syntetyczny gest (okręgi, 125 Hz).
+
+    python bench/mouse_load.py 192.168.4.1 --mode pipeline --depth 8
+    python bench/mouse_load.py 192.168.4.1 --save gest.jsonl
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+
+
+def synthetic_stream(count=2000, rate=125):
+    """Syntetyczny gest: kilka okręgów rysowanych myszą"""
+    events = []
+    last_x = last_y = 0
+    for i in range(count):
+        angle = 2 * math.pi * i / 250
+        x = round(150 * math.cos(angle))
+        y = round(150 * math.sin(angle))
+        events.append({"t": i * 1000 / rate, "x": x - last_x, "y": y - last_y})
+        last_x, last_y = x, y
+    return events
+
+
+def load_stream(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_stream(path, events):
+    with open(path, "w") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def build_request(host, event, keep_alive):
+    body = json.dumps({
+        "x": event["x"],
+        "y": event["y"],
+        "speed": math.sqrt(event["x"] ** 2 + event["y"] ** 2) / 10,
+    }).encode()
+    return (
+        b"POST /mouse/vector HTTP/1.1\r\n"
+        b"Host: " + host.encode() + b"\r\n"
+        b"Content-Type: text/plain\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        + (b"" if keep_alive else b"Connection: close\r\n")
+        + b"\r\n" + body
+    )
+
+
+async def read_response(reader):
+    """Odczytaj jedną odpowiedź HTTP/1.1 (nagłówki + Content-Length)"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    if not head.startswith(b"HTTP/1.1 200"):
+        raise ValueError(head.split(b"\r\n", 1)[0].decode(errors="replace"))
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    if length:
+        await reader.readexactly(length)
+
+
+async def pace(start, event, realtime):
+    if realtime:
+        delay = start + event["t"] / 1000 - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def run_close(args, events, latencies):
+    start = time.perf_counter()
+    for event in events:
+        await pace(start, event, args.realtime)
+        sent = time.perf_counter()
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+        writer.write(build_request(args.host, event, False))
+        await read_response(reader)
+        writer.close()
+        latencies.append(time.perf_counter() - sent)
+
+
+async def run_persistent(args, events, latencies, depth):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    in_flight = asyncio.Semaphore(depth)
+    sent_times = []
+
+    async def receive():
+        for _ in events:
+            await read_response(reader)
+            latencies.append(time.perf_counter() - sent_times[len(latencies)])
+            in_flight.release()
+
+    receiver = asyncio.create_task(receive())
+    start = time.perf_counter()
+    for event in events:
+        await pace(start, event, args.realtime)
+        await in_flight.acquire()
+        sent_times.append(time.perf_counter())
+        writer.write(build_request(args.host, event, True))
+        await writer.drain()
+
+    await asyncio.wait_for(receiver, args.timeout)
+    writer.close()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(args):
+    events = load_stream(args.record) if args.record else synthetic_stream(args.events)
+    if args.save:
+        save_stream(args.save, events)
+        print(f"💾 Zapisano {len(events)} zdarzeń do {args.save}")
+        return
+
+    latencies = []
+    start = time.perf_counter()
+    if args.mode == "close":
+        await run_close(args, events, latencies)
+    else:
+        depth = args.depth if args.mode == "pipeline" else 1
+        await run_persistent(args, events, latencies, depth)
+    elapsed = time.perf_counter() - start
+
+    recorded = (events[-1]["t"] - events[0]["t"]) / 1000 if len(events) > 1 else 0
+    latencies.sort()
+    print(f"Tryb:              {args.mode}" + (f" (głębokość {args.depth})" if args.mode == "pipeline" else ""))
+    print(f"Zdarzenia:         {len(latencies)} / {len(events)}")
+    print(f"Czas:              {elapsed:.2f}s (nagranie: {recorded:.2f}s)")
+    print(f"Zdarzenia/s:       {len(latencies) / elapsed:.1f}")
+    print(f"Opóźnienie p50:    {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Opóźnienie p99:    {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator obciążenia dla MouseServer")
+    parser.add_argument("host", help="Adres IP Pico (lub 127.0.0.1 dla symulacji)")
+    parser.add_argument("--port", type=int, default=80, help="Port serwera (domyślnie: 80)")
+    parser.add_argument("--mode", choices=["close", "keepalive", "pipeline"], default="pipeline",
+                        help="Sposób wysyłania żądań (domyślnie: pipeline)")
+    parser.add_argument("--depth", type=int, default=8, help="Liczba żądań w locie dla trybu pipeline")
+    parser.add_argument("--record", help="Plik JSON Lines z nagranymi zdarzeniami")
+    parser.add_argument("--events", type=int, default=2000, help="Liczba zdarzeń gestu syntetycznego")
+    parser.add_argument("--save", help="Zapisz strumień zdarzeń do pliku i zakończ")
+    parser.add_argument("--realtime", action="store_true", help="Odtwarzaj w tempie nagrania")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Limit czasu na odpowiedzi (s)")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Pomiar opóźnienia ramka WebSocket -> raport HID dla mouse.py na CPython.
+
+Uruchamia VectorMouse i MouseServer w symulatorze picosim (usb_hid
+zapisuje czas każdego raportu), sprawdza odrzucanie niepoprawnych
+żądań uzgadniania (400), łączy się przez WebSocket,
+wysyła ramki wektorów, kliknięć i przeciągania, a następnie raportuje opóźnienia
+od wysłania ramki do wywołania myszy i do raportu HID.
+
+    python bench/ws_latency.py --frames 2000 --clicks 20
+"""
+import argparse
+import base64
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import picosim
+
+
+def now():
+    """Czas zegara symulacji w sekundach (ten sam, którym usb_hid znaczy raporty)"""
+    return picosim.clock.current.now_us() / 1000000
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def handshake(port, method=b"GET", upgrade=b"websocket", key=True):
+    """Wyślij żądanie uzgadniania; zwraca (gniazdo, odpowiedź)"""
+    sock = socket.create_connection(("127.0.0.1", port))
+    request = method + b" /mouse/ws HTTP/1.1\r\nHost: localhost\r\n"
+    if upgrade:
+        request += b"Upgrade: " + upgrade + b"\r\n"
+    request += b"Connection: Upgrade\r\nSec-WebSocket-Version: 13\r\n"
+    if key:
+        request += b"Sec-WebSocket-Key: " + base64.b64encode(os.urandom(16)) + b"\r\n"
+    sock.sendall(request + b"\r\n")
+    response = b""
+    while b"\r\n\r\n" not in response:
+        data = sock.recv(1024)
+        if not data:
+            break
+        response += data
+    return sock, response
+
+
+def websocket_connect(port):
+    sock, response = handshake(port)
+    if not response.startswith(b"HTTP/1.1 101"):
+        raise RuntimeError(f"Uzgadnianie nieudane: {response!r}")
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def masked_frame(payload):
+    mask = os.urandom(4)
+    data = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+    return bytes((0x82, 0x80 | len(payload))) + mask + data
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = now() + timeout
+    while not condition():
+        if now() > deadline:
+            return False
+        time.sleep(0.0001)
+    return True
+
+
+def report(name, values):
+    if not values:
+        print(f"{name:30} brak danych")
+        return
+    values = sorted(values)
+    p50 = values[len(values) // 2] * 1000
+    p99 = values[min(len(values) - 1, int(len(values) * 0.99))] * 1000
+    print(f"{name:30} n={len(values):5}  p50={p50:7.3f} ms  p99={p99:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opóźnienie WebSocket -> HID dla mouse.py")
+    parser.add_argument("--frames", type=int, default=1000, help="Liczba ramek wektorów")
+    parser.add_argument("--clicks", type=int, default=10, help="Liczba kliknięć")
+    args = parser.parse_args()
+
+    picosim.install()
+    import mouse
+
+    vector_mouse = mouse.VectorMouse()
+    vector_mouse.start_movement_updates()
+    hid = vector_mouse.mouse
+
+    # Czas wywołania set_vector, żeby zmierzyć samą ścieżkę serwera
+    vector_calls = []
+    original_set_vector = vector_mouse.set_vector
+
+    def set_vector(x, y, speed):
+        vector_calls.append(now())
+        original_set_vector(x, y, speed)
+    vector_mouse.set_vector = set_vector
+
+    server = mouse.MouseServer(vector_mouse)
+    port = free_port()
+    threading.Thread(target=server.start, args=(port,), daemon=True).start()
+    time.sleep(0.2)
+
+    ok = True
+    for name, options in (("POST", {"method": b"POST"}), ("bez Upgrade", {"upgrade": None}),
+                          ("Upgrade: h2c", {"upgrade": b"h2c"}), ("bez Sec-WebSocket-Key", {"key": False})):
+        bad, response = handshake(port, **options)
+        bad.close()
+        good = response.startswith(b"HTTP/1.1 400")
+        status = response.split(b"\r\n", 1)[0].decode()
+        print(f"{'✅' if good else '❌'} Uzgadnianie {name}: {status}")
+        ok &= good
+
+    sock = websocket_connect(port)
+    to_call = []
+    to_report = []
+
+    for i in range(args.frames):
+        calls, reports = len(vector_calls), len(hid.reports)
+        sent = now()
+        sock.sendall(masked_frame(struct.pack("<hhBB", 3, -2, 1, 0)))
+        if wait_until(lambda: len(vector_calls) > calls):
+            to_call.append(vector_calls[calls] - sent)
+        if wait_until(lambda: len(hid.reports) > reports, 0.025):
+            to_report.append(hid.reports[reports][0] / 1000000 - sent)
+
+    clicks = []
+    for i in range(args.clicks):
+        reports = len(hid.reports)
+        sent = now()
+        sock.sendall(masked_frame(struct.pack("<hhBB", 0, 0, 0, 1)) +
+                     masked_frame(struct.pack("<hhBB", 0, 0, 0, 0)))
+        if wait_until(lambda: any(r[1][0] & 1 for r in hid.reports[reports:])):
+            pressed = next(r for r in hid.reports[reports:] if r[1][0] & 1)
+            clicks.append(pressed[0] / 1000000 - sent)
+        wait_until(lambda: hid.reports[-1][1][0] == 0)
+
+    # Przeciąganie w jednej paczce ramek: ruch z przytrzymanym przyciskiem,
+    # potem kolejna ramka - obsłużona bez czekania (dawniej click() spał 100 ms)
+    wait_until(lambda: not vector_mouse.motion.pending())
+    reports, calls = len(hid.reports), len(vector_calls)
+    sent = now()
+    sock.sendall(masked_frame(struct.pack("<hhBB", 0, 0, 0, 1)) +
+                 b"".join(masked_frame(struct.pack("<hhBB", 5, 0, 1, 1)) for _ in range(5)) +
+                 masked_frame(struct.pack("<hhBB", 0, 0, 0, 0)) +
+                 masked_frame(struct.pack("<hhBB", 1, 1, 1, 0)))
+    wait_until(lambda: len(vector_calls) > calls + 5)
+    after_release = (vector_calls[-1] - sent) * 1000 if len(vector_calls) > calls + 5 else float("inf")
+    wait_until(lambda: not vector_mouse.motion.pending())
+    drag = [r[1] for r in hid.reports[reports:]]
+    released = next((i for i, r in enumerate(drag) if i and not r[0] & 1), len(drag))
+    dragged = sum(r[1] for r in drag[:released] if r[0] & 1)
+    good = dragged > 0 and released < len(drag) and after_release < 10
+    print(f"{'✅' if good else '❌'} Przeciąganie: {dragged} px z przytrzymanym przyciskiem, "
+          f"ramka po zwolnieniu obsłużona po {after_release:.2f} ms")
+    ok &= good
+
+    sock.close()
+
+    print(f"⏱️  Ramki WebSocket -> mysz ({args.frames} wektorów, {args.clicks} kliknięć):")
+    report("ramka -> set_vector", to_call)
+    report("ramka wektora -> raport HID", to_report)
+    report("ramka kliknięcia -> raport HID", clicks)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
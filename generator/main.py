@@ -1,21 +1,27 @@
 import time
 import array
-import math
 import usb_hid
 from machine import Pin, PWM
 
+from wavetable import Oscillator, sine_table
+
 # Configure PWM
 pwm = PWM(Pin(0))  # Use GP0 for PWM output
 pwm.freq(1000)  # Set PWM frequency to 1 kHz
 
+SAMPLE_RATE = 16000
+FREQUENCY = 1000  # 1 kHz sine wave
+
 # Buffer for audio data
 audio_buffer = array.array('h', [0] * 1024)  # 16-bit signed integers
 
-def generate_sine_wave():
-    for i in range(len(audio_buffer)):
-        audio_buffer[i] = int(32767 * math.sin(2 * math.pi * 1000 * i / 16000))  # 1 kHz sine wave
+# Sine period computed once, tones come from a phase accumulator
+oscillator = Oscillator(sine_table(), SAMPLE_RATE, audio_buffer)
+
+def generate_sine_wave(frequency=FREQUENCY):
+    # Refilled only when the frequency changes (or the buffer holds partial periods)
+    return oscillator.block(frequency)
 
 while True:
-    generate_sine_wave()
-    usb_hid.send(audio_buffer)  # Send audio buffer over USB
+    usb_hid.send(generate_sine_wave())  # Send audio buffer over USB
 
@@ -0,0 +1,120 @@
+"""
+Synteza tablicowa (wavetable) dla MicroPython i CPython.
+
+Jeden okres sinusa jest liczony raz do array('h'). Dowolną częstotliwość
+uzyskuje się akumulatorem fazy: stałoprzecinkowy przyrost na próbkę,
+a starsze bity fazy wybierają próbkę z tablicy. Na hoście tablica
+budowana jest przez NumPy, jeśli jest dostępne.
+
+    osc = Oscillator(sine_table(), 16000, array('h', [0] * 1024))
+    usb_hid.send(osc.block(1000))  # bufor liczony tylko przy zmianie częstotliwości
+"""
+import math
+from array import array
+
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+
+try:
+    import micropython
+    _native = micropython.native
+except (ImportError, AttributeError):
+    def _native(func):
+        return func
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Faza: TABLE_BITS bitów indeksu + FRACTION_BITS bitów części ułamkowej,
+# razem 24 bity - mieści się w małej liczbie całkowitej MicroPython
+TABLE_BITS = const(10)
+FRACTION_BITS = const(14)
+PHASE_BITS = const(24)
+PHASE_MASK = const(0xFFFFFF)
+
+
+def sine_table(size=1 << TABLE_BITS, amplitude=32767):
+    """Jeden okres sinusa jako array('h')"""
+    if np is not None:
+        values = np.rint(amplitude * np.sin(2 * np.pi * np.arange(size) / size))
+        return array("h", values.astype("<i2").tobytes())
+    return array("h", [int(round(amplitude * math.sin(2 * math.pi * i / size))) for i in range(size)])
+
+
+@_native
+def _fill(buffer, count, table, phase, increment, shift, mask):
+    for i in range(count):
+        buffer[i] = table[phase >> shift]
+        phase = (phase + increment) & mask
+    return phase
+
+
+@_native
+def _fill_interpolated(buffer, count, table, phase, increment, shift, mask):
+    last = len(table) - 1
+    fraction = (1 << shift) - 1
+    for i in range(count):
+        index = phase >> shift
+        a = table[index]
+        b = table[(index + 1) & last]
+        buffer[i] = a + (((b - a) * (phase & fraction)) >> shift)
+        phase = (phase + increment) & mask
+    return phase
+
+
+class Oscillator:
+    """Oscylator z akumulatorem fazy, wypełniający stały bufor próbek"""
+
+    def __init__(self, table, sample_rate, buffer, interpolate=False):
+        size = len(table)
+        bits = 0
+        while (1 << bits) < size:
+            bits += 1
+        if size != 1 << bits or bits > PHASE_BITS:
+            raise ValueError("table size must be a power of two")
+        self.table = table
+        self.sample_rate = sample_rate
+        self.buffer = buffer
+        self.shift = PHASE_BITS - bits
+        self.phase = 0
+        self.increment = 0
+        self.frequency = None
+        self.looping = False  # bufor zawiera całe okresy i może być powtarzany
+        # Interpolacja liniowa między próbkami tablicy: dokładniej, ale wolniej
+        self._fill = _fill_interpolated if interpolate else _fill
+
+    def set_frequency(self, frequency):
+        """Ustaw częstotliwość, zwraca True gdy się zmieniła"""
+        if frequency == self.frequency:
+            return False
+        self.frequency = frequency
+        self.increment = int(frequency * (1 << PHASE_BITS) / self.sample_rate) & PHASE_MASK
+        self.looping = (len(self.buffer) * self.increment) & PHASE_MASK == 0
+        return True
+
+    def fill(self, buffer=None, count=None):
+        """Kolejne próbki (faza ciągła między wywołaniami)"""
+        if buffer is None:
+            buffer = self.buffer
+        if count is None:
+            count = len(buffer)
+        self.phase = self._fill(buffer, count, self.table, self.phase,
+                                self.increment, self.shift, PHASE_MASK)
+        return buffer
+
+    def block(self, frequency):
+        """
+        Bufor z tonem `frequency`. Przeliczany tylko po zmianie częstotliwości,
+        chyba że nie mieści całych okresów - wtedy jest dopełniany z ciągłą fazą.
+        """
+        if self.set_frequency(frequency):
+            self.phase = 0
+            return self.fill()
+        if not self.looping:
+            return self.fill()
+        return self.buffer
@@ -0,0 +1,355 @@
+"""
+Przyrostowy parser żądań HTTP/1.x dla MicroPython i CPython.
+
+Bajty trafiają do jednego, z góry zaalokowanego bufora. Linia żądania
+i nagłówki są analizowane w miarę napływu danych (każdy bajt jest
+przeglądany raz), a metoda, ścieżka, zapytanie i ciało są dostępne jako
+memoryview na ten bufor - bez tworzenia pośrednich napisów.
+
+    parser = RequestParser()
+    if parser.receive(conn):
+        if parser.method_is(b"POST") and parser.path_is(b"/update_frequency"):
+            value = parser.form_int(b"frequency")
+"""
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+
+try:
+    import micropython
+    _native = micropython.native
+except (ImportError, AttributeError):
+    def _native(func):
+        return func
+
+# Stany parsera
+_HEAD = const(0)
+_BODY = const(1)
+_DONE = const(2)
+
+_LF = const(10)
+_CR = const(13)
+_SPACE = const(32)
+_AMP = const(38)
+_COLON = const(58)
+_EQUALS = const(61)
+_QMARK = const(63)
+
+if hasattr(bytearray, "find"):
+    # Znajdź bajt w buf[start:end] (CPython - wyszukiwanie w C, bez opakowania)
+    _find_byte = bytearray.find
+else:
+    @_native
+    def _find_byte(buf, byte, start, end):
+        """Znajdź bajt w buf[start:end] (MicroPython - pętla natywna)"""
+        for i in range(start, end):
+            if buf[i] == byte:
+                return i
+        return -1
+
+if memoryview(b"ab")[:1] == b"a" and hasattr(bytearray, "lower"):
+    # CPython: porównanie wycinka memoryview w C (bez kopii); małe litery
+    # przez kopię tylko przy zgodnej długości (nazwy nagłówków)
+    def _equals(buf, mv, start, end, literal):
+        return mv[start:end] == literal
+
+    def _equals_lower(buf, mv, start, end, literal):
+        return end - start == len(literal) and buf[start:end].lower() == literal
+else:
+    @_native
+    def _equals(buf, mv, start, end, literal):
+        """Porównaj buf[start:end] z literałem bez tworzenia kopii"""
+        if end - start != len(literal):
+            return False
+        for i in range(len(literal)):
+            if buf[start + i] != literal[i]:
+                return False
+        return True
+
+    @_native
+    def _equals_lower(buf, mv, start, end, literal):
+        """Jak _equals, wielkie litery buf zamieniane na małe"""
+        if end - start != len(literal):
+            return False
+        for i in range(len(literal)):
+            c = buf[start + i]
+            if 65 <= c <= 90:
+                c += 32
+            if c != literal[i]:
+                return False
+        return True
+
+if hasattr(bytearray, "isdigit"):
+    def _digits(buf, start, end):
+        """Liczba bez znaku z cyfr ASCII w buf[start:end] (CPython - int() w C)"""
+        digits = buf[start:end]
+        if not digits.isdigit() or not digits.isascii():
+            raise ValueError("invalid number")
+        return int(digits)
+else:
+    @_native
+    def _digits(buf, start, end):
+        """Liczba bez znaku z cyfr ASCII w buf[start:end] (MicroPython - pętla natywna)"""
+        if start >= end:
+            raise ValueError("invalid number")
+        value = 0
+        for i in range(start, end):
+            digit = buf[i] - 48
+            if digit < 0 or digit > 9:
+                raise ValueError("invalid number")
+            value = value * 10 + digit
+        return value
+
+
+class RequestParser:
+    """Przyrostowy parser żądań HTTP na stałym buforze"""
+
+    def __init__(self, size=1024):
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.clear()
+
+    def clear(self):
+        """Wyczyść bufor i stan (nowe połączenie)"""
+        self.length = 0
+        self.reset()
+
+    def reset(self):
+        """Przygotuj parser na kolejne żądanie w tym samym buforze"""
+        self.state = _HEAD
+        self.scan = 0
+        self.line_start = 0
+        self.method_start = 0
+        self.method_end = -1
+        self.path_end = 0
+        self.query_start = 0
+        self.target_end = 0
+        self.headers_start = 0
+        self.body_start = 0
+        self.content_length = 0
+        self.http11 = False
+        self.connection = None  # True = keep-alive, False = close, None = brak nagłówka
+
+    # --- Dane wejściowe ---
+
+    def space(self):
+        """Wolna część bufora (do recv_into / readinto)"""
+        return self.mv[self.length:]
+
+    def advance(self, count):
+        """Zaznacz, że do space() zapisano `count` bajtów"""
+        self.length += count
+
+    def feed(self, data):
+        """Dopisz bajty do bufora"""
+        end = self.length + len(data)
+        if end > len(self.buf):
+            raise ValueError("request too large")
+        self.buf[self.length:end] = data
+        self.length = end
+
+    def recv(self, sock):
+        """Odczytaj jeden fragment z gniazda, zwróć liczbę bajtów (0 = koniec)"""
+        if self.length == len(self.buf):
+            raise ValueError("request too large")
+        if hasattr(sock, "recv_into"):
+            count = sock.recv_into(self.space())
+            self.length += count
+            return count
+        data = sock.recv(len(self.buf) - self.length)
+        self.feed(data)
+        return len(data)
+
+    def receive(self, sock):
+        """Czytaj z gniazda aż do pełnego żądania; False gdy połączenie się skończyło"""
+        while not self.parse():
+            if not self.recv(sock):
+                return False
+        return True
+
+    # --- Analiza ---
+
+    def parse(self):
+        """Przeanalizuj nowe bajty; True gdy żądanie (z ciałem) jest kompletne"""
+        buf = self.buf
+        length = self.length
+        # Pozycje w zmiennych lokalnych, zapisywane przy wyjściu z pętli
+        scan = self.scan
+        line_start = self.line_start
+        while self.state == _HEAD:
+            eol = _find_byte(buf, _LF, scan, length)
+            if eol < 0:
+                self.scan = length
+                self.line_start = line_start
+                if length == len(buf):
+                    raise ValueError("request header too large")
+                return False
+
+            end = eol
+            if end > line_start and buf[end - 1] == _CR:
+                end -= 1
+            scan = eol + 1
+
+            if self.method_end < 0:
+                # Puste linie przed linią żądania są dozwolone
+                if end > line_start:
+                    self._parse_request_line(line_start, end)
+                    self.headers_start = scan
+            elif end == line_start:
+                self.body_start = scan
+                self.state = _BODY
+            else:
+                colon = _find_byte(buf, _COLON, line_start, end)
+                if colon <= line_start:
+                    raise ValueError("malformed header")
+                # Potrzebne są tylko Content-Length (14) i Connection (10)
+                size = colon - line_start
+                if size == 14 or size == 10:
+                    self._parse_header(line_start, colon, end)
+            line_start = scan
+        self.scan = scan
+        self.line_start = line_start
+
+        if self.state == _BODY:
+            if self.length - self.body_start < self.content_length:
+                if self.body_start + self.content_length > len(buf):
+                    raise ValueError("request body too large")
+                return False
+            self.state = _DONE
+        return True
+
+    def _parse_request_line(self, start, end):
+        buf = self.buf
+        method_end = _find_byte(buf, _SPACE, start, end)
+        if method_end <= start:
+            raise ValueError("malformed request line")
+        target_end = _find_byte(buf, _SPACE, method_end + 1, end)
+        if target_end <= method_end + 1:
+            raise ValueError("malformed request line")
+
+        query = _find_byte(buf, _QMARK, method_end + 1, target_end)
+        if query < 0:
+            self.path_end = self.query_start = target_end
+        else:
+            self.path_end = query
+            self.query_start = query + 1
+
+        self.method_start = start
+        self.method_end = method_end
+        self.target_end = target_end
+        self.http11 = _equals(self.buf, self.mv, target_end + 1, end, b"HTTP/1.1")
+
+    def _parse_header(self, start, colon, end):
+        buf = self.buf
+        if _equals_lower(buf, self.mv, start, colon, b"content-length"):
+            value_start, value_end = self._strip(colon + 1, end)
+            self.content_length = self._to_int(value_start, value_end, False)
+        elif _equals_lower(buf, self.mv, start, colon, b"connection"):
+            value_start, value_end = self._strip(colon + 1, end)
+            if _equals_lower(buf, self.mv, value_start, value_end, b"close"):
+                self.connection = False
+            elif _equals_lower(buf, self.mv, value_start, value_end, b"keep-alive"):
+                self.connection = True
+
+    # --- Wyniki ---
+
+    def complete(self):
+        """Czy bieżące żądanie jest kompletne"""
+        return self.state == _DONE
+
+    def request_end(self):
+        """Pozycja pierwszego bajtu za bieżącym żądaniem"""
+        return self.body_start + self.content_length
+
+    def consume(self):
+        """Usuń obsłużone żądanie z bufora, zachowując bajty kolejnych (pipelining)"""
+        self.discard(self.request_end())
+        self.reset()
+
+    def discard(self, count):
+        """Usuń `count` bajtów z początku bufora"""
+        rest = self.length - count
+        if rest > 0:
+            self.buf[:rest] = bytes(self.mv[count:self.length])
+        self.length = rest if rest > 0 else 0
+
+    def method(self):
+        return self.mv[self.method_start:self.method_end]
+
+    def path(self):
+        return self.mv[self.method_end + 1:self.path_end]
+
+    def query(self):
+        return self.mv[self.query_start:self.target_end]
+
+    def body(self):
+        return self.mv[self.body_start:self.request_end()]
+
+    def keep_alive(self):
+        """Czy klient chce utrzymać połączenie"""
+        if self.connection is None:
+            return self.http11
+        return self.connection
+
+    def method_is(self, name):
+        return _equals(self.buf, self.mv, self.method_start, self.method_end, name)
+
+    def path_is(self, path):
+        return _equals(self.buf, self.mv, self.method_end + 1, self.path_end, path)
+
+    def path_startswith(self, prefix):
+        start = self.method_end + 1
+        if self.path_end - start < len(prefix):
+            return False
+        return _equals(self.buf, self.mv, start, start + len(prefix), prefix)
+
+    def header(self, name):
+        """Wartość nagłówka `name` (małe litery) jako memoryview lub None"""
+        buf = self.buf
+        start = self.headers_start
+        end = self.body_start
+        while start < end:
+            eol = _find_byte(buf, _LF, start, end)
+            if eol < 0:
+                break
+            colon = _find_byte(buf, _COLON, start, eol)
+            if colon > start and _equals_lower(self.buf, self.mv, start, colon, name):
+                value_start, value_end = self._strip(colon + 1, eol)
+                return self.mv[value_start:value_end]
+            start = eol + 1
+        return None
+
+    def form_int(self, name, default=None):
+        """Liczba całkowita z pola `name` w ciele application/x-www-form-urlencoded"""
+        buf = self.buf
+        start = self.body_start
+        end = self.request_end()
+        while start < end:
+            field_end = _find_byte(buf, _AMP, start, end)
+            if field_end < 0:
+                field_end = end
+            equals = _find_byte(buf, _EQUALS, start, field_end)
+            if equals > start and _equals(self.buf, self.mv, start, equals, name):
+                return self._to_int(equals + 1, field_end, True)
+            start = field_end + 1
+        return default
+
+    # --- Pomocnicze ---
+
+    def _strip(self, start, end):
+        buf = self.buf
+        while start < end and buf[start] in (_SPACE, 9):
+            start += 1
+        while end > start and buf[end - 1] in (_SPACE, 9, _CR):
+            end -= 1
+        return start, end
+
+    def _to_int(self, start, end, signed):
+        buf = self.buf
+        sign = 1
+        if signed and start < end and buf[start] == 45:  # '-'
+            sign = -1
+            start += 1
+        return sign * _digits(buf, start, end)
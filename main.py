@@ -6,11 +6,24 @@ PASSWORD = ""
 SAMPLE_RATE = 44100
 MAX_VOLUME = 65535  # For 16-bit PWM
 
+# Server configuration
+PORT = 80
+ASYNC_SERVE = True  # asyncio request loop instead of the blocking accept loop
+READ_TIMEOUT = 5  # Seconds a client gets to send its request
+
 import network
 import socket
 import time
 import machine
 
+from httpparse import RequestParser
+from pagecache import CachedPage
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
 
 # Global variable for frequency
 current_frequency = 2
@@ -45,39 +58,62 @@ def connect_wifi():
     
     return status[0]  # Return IP address
 
-def serve(ip):
+def apply_request(request):
+    """Update current_frequency from a parsed request, return True if it changed."""
     global current_frequency
-    
+
+    # Check if it's a POST request to update frequency
+    if not (request.method_is(b"POST") and request.path_is(b"/update_frequency")):
+        return False
+
+    new_frequency = request.form_int(b"frequency")
+    if new_frequency is None:
+        return False
+
+    current_frequency = new_frequency
+    print(f"Updated frequency to {current_frequency} Hz")
+    return True
+
+
+# Static parts of the page are encoded once, the frequency goes in between
+page = CachedPage((
+    "HTTP/1.0 200 OK\r\nContent-type: text/html\r\n\r\n"
+    "<h1>Current frequency: ",
+    " Hz</h1>"
+    "<form method='POST' action='/update_frequency'>"
+    "<input type='number' name='frequency' value='",
+    "'>"
+    "<input type='submit' value='Update Frequency'>"
+    "</form>",
+))
+
+
+def render_page():
+    # Re-rendered only when current_frequency changes
+    return page.render(current_frequency)
+
+
+def serve(ip):
     s = socket.socket()
-    s.bind((ip, 80))
+    s.bind((ip, PORT))
     s.listen(5)
     print('listening on', ip)
+
+    request = RequestParser()
     
     while True:
         try:
             conn, addr = s.accept()
             print('Got a connection from', addr)
-            request = conn.recv(1024)
-            request = str(request)
+            conn.settimeout(READ_TIMEOUT)
+            request.clear()
+            if not request.receive(conn):
+                raise ValueError("connection closed mid-request")
             
-            # Check if it's a POST request to update frequency
-            if "POST /update_frequency" in request:
-                freq_start = request.find("frequency=") + 10
-                freq_end = request.find("HTTP", freq_start)
-                new_frequency = int(request[freq_start:freq_end])
-                current_frequency = new_frequency
-                print(f"Updated frequency to {current_frequency} Hz")
+            if apply_request(request):
                 blinking()
             
-            # Prepare the response
-            response = "HTTP/1.0 200 OK\r\nContent-type: text/html\r\n\r\n"
-            response += f"<h1>Current frequency: {current_frequency} Hz</h1>"
-            response += "<form method='POST' action='/update_frequency'>"
-            response += "<input type='number' name='frequency' value='" + str(current_frequency) + "'>"
-            response += "<input type='submit' value='Update Frequency'>"
-            response += "</form>"
-            
-            conn.send(response)
+            conn.sendall(render_page())
             conn.close()
         
         except Exception as e:
@@ -85,6 +121,63 @@ def serve(ip):
             conn.close()
         
         print('Connection closed')
+
+
+# Set by request handlers, consumed by led_feedback()
+led_event = None
+
+# Parsers are reused across connections to avoid per-request buffers
+free_parsers = []
+
+
+async def led_feedback():
+    """Blink the LED after frequency updates without holding up any client."""
+    while True:
+        await led_event.wait()
+        led_event.clear()
+        delay = 1 / current_frequency if current_frequency > 0 else 1
+        led.off()
+        await asyncio.sleep(delay)
+        led.on()
+        await asyncio.sleep(delay)
+
+
+async def handle_client(reader, writer):
+    """Serve a single connection; runs as its own task."""
+    request = free_parsers.pop() if free_parsers else RequestParser()
+    request.clear()
+    try:
+        while not request.parse():
+            data = await asyncio.wait_for(reader.read(len(request.buf) - request.length), READ_TIMEOUT)
+            if not data:
+                raise ValueError("connection closed mid-request")
+            request.feed(data)
+
+        if apply_request(request):
+            led_event.set()
+
+        writer.write(render_page())
+        await writer.drain()
+
+    except asyncio.TimeoutError:
+        print("Client timed out")
+    except Exception as e:
+        print(f"Error: {e}")
+
+    free_parsers.append(request)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def serve_async(ip):
+    global led_event
+
+    led_event = asyncio.Event()
+    asyncio.create_task(led_feedback())
+
+    server = await asyncio.start_server(handle_client, ip, PORT, backlog=5)
+    print('listening on', ip, '(asyncio)')
+    await server.wait_closed()
         
         
 def blinking():
@@ -96,7 +189,10 @@ def blinking():
     
 def main():
     ip = connect_wifi()
-    serve(ip)
+    if ASYNC_SERVE:
+        asyncio.run(serve_async(ip))
+    else:
+        serve(ip)
     
         
 
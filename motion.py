@@ -0,0 +1,360 @@
+"""
+Logika ruchu myszy niezależna od sprzętu (MicroPython i CPython).
+
+MotionState przechowuje cały stan ruchu w jednej tablicy array('i')
+w arytmetyce stałoprzecinkowej (8 bitów części ułamkowej). Dzięki temu
+krok wykonywany w przerwaniu timera (step() i take_into()) nie alokuje
+pamięci - używa wyłącznie małych liczb całkowitych.
+
+Ruch move_to() przebiega według profilu (liniowy, trapezowy, ease-in-out).
+Profil jest liczony raz na ruch do gotowych tablic pozycji, a takt timera
+tylko wybiera z nich pozycję odpowiadającą czasowi, który upłynął od
+początku ruchu - pominięty takt nie spowalnia ruchu.
+
+Przesunięcia napływające między taktami timera są sumowane (opcjonalnie
+z balistyką wskaźnika) i dzielone na raporty HID - jeden raport przenosi
+najwyżej ±127 na oś, więc duże ruchy są rozkładane na kilka raportów
+bez utraty dystansu.
+"""
+from array import array
+from math import ceil, sqrt
+
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+
+try:
+    from time import ticks_diff
+except ImportError:
+    def ticks_diff(a, b):
+        return a - b
+
+# Zakres przesunięcia w jednym raporcie HID myszy
+REPORT_LIMIT = const(127)
+
+# Liczby stałoprzecinkowe: 8 bitów części ułamkowej
+FIX_SHIFT = const(8)
+FIX_ONE = const(256)
+
+# Najdłuższy ruch z tablicy profilu (w taktach)
+PATH_CAPACITY = const(256)
+
+# Balistyka wskaźnika: wzmocnienie w zależności od prędkości zdarzenia
+# (piksele na zdarzenie), interpolowane liniowo jak krzywe systemowe
+POINTER_CURVE = ((0, 1.0), (2, 1.0), (8, 1.6), (20, 2.4), (40, 3.0))
+
+# Indeksy w MotionState.state
+_PENDING_X = const(0)  # zaległe przesunięcie do wysłania
+_PENDING_Y = const(1)
+_POS_X = const(2)  # pozycja śledzona przez move_to()
+_POS_Y = const(3)
+_TARGET_X = const(4)
+_TARGET_Y = const(5)
+_BASE_X = const(6)  # pozycja na początku ruchu
+_BASE_Y = const(7)
+_STEP_X = const(8)  # profil liniowy: przesunięcie na takt (w dół)
+_STEP_Y = const(9)
+_REM_X = const(10)  # reszta kroku w jednostkach 1/_DISTANCE
+_REM_Y = const(11)
+_ERR_X = const(12)  # zebrana reszta (jak w algorytmie Bresenhama)
+_ERR_Y = const(13)
+_DISTANCE = const(14)
+_MOVING = const(15)  # _IDLE, _STARTING lub _RUNNING
+_TABLE = const(16)  # 1 gdy pozycje są w path_x/path_y
+_START_MS = const(17)  # czas pierwszego taktu ruchu
+_TICK_MS = const(18)
+_INDEX = const(19)  # wykonane takty ruchu
+_COUNT = const(20)  # liczba taktów ruchu (ostatni dociąga do celu)
+_EVENTS = const(21)
+_REPORTS = const(22)
+_STATE_SIZE = const(23)
+
+_IDLE = const(0)
+_STARTING = const(1)
+_RUNNING = const(2)
+
+
+def isqrt(value):
+    """Całkowity pierwiastek kwadratowy (metoda Newtona)"""
+    if value <= 0:
+        return 0
+    x = value
+    y = (x + 1) >> 1
+    while y < x:
+        x = y
+        y = (x + value // x) >> 1
+    return x
+
+
+def approx_length(dx, dy):
+    """Długość wektora w przybliżeniu oktagonalnym (błąd do ok. 8%)"""
+    if dx < 0:
+        dx = -dx
+    if dy < 0:
+        dy = -dy
+    if dx < dy:
+        dx, dy = dy, dx
+    return dx + ((dy * 13) >> 5)
+
+
+def _div(a, b):
+    """Dzielenie całkowite z obcięciem w stronę zera (jak int(a / b))"""
+    if a >= 0:
+        return a // b
+    return -((-a) // b)
+
+
+def gain_table(curve, size=64):
+    """Tablica wzmocnień (Q8) dla prędkości 0..size-1 z punktów krzywej"""
+    table = array("H", [0] * size)
+    for speed in range(size):
+        gain = curve[-1][1]
+        for i in range(1, len(curve)):
+            x0, g0 = curve[i - 1]
+            x1, g1 = curve[i]
+            if speed <= x1:
+                gain = g0 + (g1 - g0) * (speed - x0) / (x1 - x0)
+                break
+        table[speed] = int(gain * FIX_ONE)
+    return table
+
+
+# --- Profile ruchu ---
+# Profil wpisuje do table skumulowany dystans (Q8) po kolejnych taktach
+# i zwraca liczbę taktów, albo 0 gdy ruch nie mieści się w tablicy.
+# distance w pikselach, speed w pikselach na takt, accel w pikselach na takt².
+
+def trapezoid_profile(table, distance, speed, accel):
+    """Stałe przyspieszenie, jazda z prędkością speed, stałe hamowanie"""
+    ramp = speed / accel
+    ramp_distance = speed * ramp / 2
+    if 2 * ramp_distance > distance:
+        # Krótki ruch: profil trójkątny, bez odcinka stałej prędkości
+        speed = sqrt(distance * accel)
+        ramp = speed / accel
+        ramp_distance = distance / 2
+    cruise = (distance - 2 * ramp_distance) / speed
+    total = 2 * ramp + cruise
+
+    count = max(1, ceil(total))
+    if count > len(table):
+        return 0
+    for k in range(1, count + 1):
+        if k < ramp:
+            done = accel * k * k / 2
+        elif k < ramp + cruise:
+            done = ramp_distance + speed * (k - ramp)
+        elif k < total:
+            left = total - k
+            done = distance - accel * left * left / 2
+        else:
+            done = distance
+        table[k - 1] = int(done * FIX_ONE)
+    return count
+
+
+def ease_profile(table, distance, speed, accel):
+    """Krzywa ease-in-out 3u² - 2u³, czas dobrany do speed i accel"""
+    # Szczytowa prędkość 1.5 * d / T, szczytowe przyspieszenie 6 * d / T²
+    total = max(1.5 * distance / speed, sqrt(6 * distance / accel))
+
+    count = max(1, ceil(total))
+    if count > len(table):
+        return 0
+    for k in range(1, count + 1):
+        u = min(1.0, k / total)
+        table[k - 1] = int(distance * u * u * (3 - 2 * u) * FIX_ONE)
+    return count
+
+
+# Profil liniowy nie potrzebuje tablicy (krok stały, liczony w takcie)
+PROFILES = {
+    "linear": None,
+    "trapezoid": trapezoid_profile,
+    "ease": ease_profile,
+}
+
+
+class MotionState:
+    """Stan ruchu myszy w stałym przecinku, bez alokacji w takcie timera"""
+
+    __slots__ = ("state", "max_reports_per_tick", "gain", "path_x", "path_y")
+
+    def __init__(self, max_reports_per_tick=4, tick_ms=10):
+        self.state = array("i", [0] * _STATE_SIZE)
+        self.state[_TICK_MS] = tick_ms
+        self.max_reports_per_tick = max_reports_per_tick
+        self.gain = None  # tablica z gain_table() lub None (1:1)
+
+        # Tablice pozycji profilu, alokowane raz i używane przez każdy ruch
+        self.path_x = array("i", [0] * PATH_CAPACITY)
+        self.path_y = array("i", [0] * PATH_CAPACITY)
+
+    # --- Wejście (wątek serwera) ---
+
+    def add(self, dx, dy):
+        """Dodaj przesunięcie w pikselach (zdarzenie wejściowe)"""
+        s = self.state
+        gain = FIX_ONE
+        if self.gain is not None:
+            speed = approx_length(int(dx), int(dy))
+            gain = self.gain[min(speed, len(self.gain) - 1)]
+        s[_PENDING_X] += int(dx * gain)
+        s[_PENDING_Y] += int(dy * gain)
+        s[_EVENTS] += 1
+
+    def move_to(self, x, y, speed, accel=1.0, profile="linear"):
+        """
+        Zaplanuj ruch do punktu (x, y): prędkość `speed` pikseli na takt,
+        przyspieszenie `accel` pikseli na takt², profil z PROFILES.
+        """
+        s = self.state
+        target_x = int(x * FIX_ONE)
+        target_y = int(y * FIX_ONE)
+        dx = target_x - s[_POS_X]
+        dy = target_y - s[_POS_Y]
+        distance = isqrt(dx * dx + dy * dy)
+        speed = min(speed, REPORT_LIMIT)
+        step = int(speed * FIX_ONE)
+        if distance == 0 or step <= 0:
+            return False
+
+        fill = PROFILES[profile]
+        count = 0
+        while fill is not None:
+            count = fill(self.path_x, distance / FIX_ONE, speed, accel)
+            if count or speed >= REPORT_LIMIT:
+                break
+            # Za długi ruch na tablicę - szybciej, bo i tak mniej raportów
+            speed = min(REPORT_LIMIT, speed * 2)
+            accel *= 2
+
+        s[_TARGET_X] = target_x
+        s[_TARGET_Y] = target_y
+        s[_BASE_X] = s[_POS_X]
+        s[_BASE_Y] = s[_POS_Y]
+        s[_DISTANCE] = distance
+        s[_INDEX] = 0
+
+        if count:
+            # Skumulowany dystans -> pozycje na osiach względem początku
+            path_x = self.path_x
+            path_y = self.path_y
+            for k in range(count):
+                done = path_x[k]
+                path_y[k] = _div(dy * done, distance)
+                path_x[k] = _div(dx * done, distance)
+            s[_TABLE] = 1
+            s[_COUNT] = count
+        else:
+            # Krok = dx * step / distance jako część całkowita i reszta,
+            # żeby błąd zaokrąglenia nie narastał z każdym taktem
+            s[_STEP_X], s[_REM_X] = divmod(dx * step, distance)
+            s[_STEP_Y], s[_REM_Y] = divmod(dy * step, distance)
+            s[_ERR_X] = 0
+            s[_ERR_Y] = 0
+            s[_TABLE] = 0
+            # Ostatni takt dociąga do celu, jak w wersji zmiennoprzecinkowej
+            s[_COUNT] = max(1, distance // step)
+
+        s[_MOVING] = _STARTING
+        s[_EVENTS] += 1
+        return True
+
+    # --- Takt timera (bez alokacji) ---
+
+    def moving(self):
+        return self.state[_MOVING] != _IDLE
+
+    def step(self, now):
+        """
+        Przesuń ruch move_to() do chwili `now` (ms, time.ticks_ms()).
+        Pierwszy takt ruchu wyznacza jego początek; kolejne wynikają
+        z czasu, który upłynął, a nie z liczby wywołań.
+        """
+        s = self.state
+        if s[_MOVING] == _STARTING:
+            s[_START_MS] = now
+            s[_MOVING] = _RUNNING
+        tick = s[_TICK_MS]
+        index = (ticks_diff(now, s[_START_MS]) + (tick >> 1)) // tick + 1
+
+        if index >= s[_COUNT]:
+            x = s[_TARGET_X]
+            y = s[_TARGET_Y]
+            s[_MOVING] = _IDLE
+        elif s[_TABLE]:
+            x = s[_BASE_X] + self.path_x[index - 1]
+            y = s[_BASE_Y] + self.path_y[index - 1]
+        else:
+            # Profil liniowy: dogoń czas krokami Bresenhama
+            x = s[_POS_X]
+            y = s[_POS_Y]
+            while s[_INDEX] < index:
+                s[_INDEX] += 1
+                x += s[_STEP_X]
+                y += s[_STEP_Y]
+                s[_ERR_X] += s[_REM_X]
+                if s[_ERR_X] >= s[_DISTANCE]:
+                    s[_ERR_X] -= s[_DISTANCE]
+                    x += 1
+                s[_ERR_Y] += s[_REM_Y]
+                if s[_ERR_Y] >= s[_DISTANCE]:
+                    s[_ERR_Y] -= s[_DISTANCE]
+                    y += 1
+
+        s[_PENDING_X] += x - s[_POS_X]
+        s[_PENDING_Y] += y - s[_POS_Y]
+        s[_POS_X] = x
+        s[_POS_Y] = y
+
+    def pending(self):
+        """Czy zostało coś do wysłania (co najmniej jeden piksel)"""
+        s = self.state
+        return (s[_PENDING_X] >= FIX_ONE or s[_PENDING_X] <= -FIX_ONE or
+                s[_PENDING_Y] >= FIX_ONE or s[_PENDING_Y] <= -FIX_ONE)
+
+    def take_into(self, report):
+        """
+        Zapisz przesunięcie jednego raportu do report[1] (X) i report[2] (Y).
+        Duży ruch jest dzielony proporcjonalnie na obu osiach, reszta
+        (także części ułamkowe) zostaje na kolejne raporty.
+        """
+        s = self.state
+        dx = s[_PENDING_X]
+        dy = s[_PENDING_Y]
+
+        largest = dx if dx >= 0 else -dx
+        if dy > largest or -dy > largest:
+            largest = dy if dy >= 0 else -dy
+        limit = REPORT_LIMIT << FIX_SHIFT
+        if largest > limit:
+            parts = (largest + limit - 1) // limit
+            dx = _div(dx, parts)
+            dy = _div(dy, parts)
+
+        step_x = _div(dx, FIX_ONE)
+        step_y = _div(dy, FIX_ONE)
+        s[_PENDING_X] -= step_x << FIX_SHIFT
+        s[_PENDING_Y] -= step_y << FIX_SHIFT
+        report[1] = step_x & 0xFF
+        report[2] = step_y & 0xFF
+
+    def count_report(self):
+        self.state[_REPORTS] += 1
+
+    # --- Pozostałe ---
+
+    def clear(self):
+        s = self.state
+        s[_PENDING_X] = 0
+        s[_PENDING_Y] = 0
+
+    def position(self):
+        """Pozycja śledzona przez move_to() w pikselach"""
+        return self.state[_POS_X] / FIX_ONE, self.state[_POS_Y] / FIX_ONE
+
+    def stats(self):
+        return {"events": self.state[_EVENTS], "reports": self.state[_REPORTS]}
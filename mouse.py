@@ -1,14 +1,19 @@
 import network
 import socket
+import select
+import struct
 import json
 import time
 import board
 import usb_hid
 import digitalio
-from math import sqrt, atan2, cos, sin
 import _thread
 from machine import Timer
 
+from httpparse import RequestParser
+from motion import MotionState, POINTER_CURVE, gain_table
+import wsframe
+
 
 class VectorMouse:
     def __init__(self):
@@ -20,22 +25,23 @@ class VectorMouse:
         self.mouse_report = bytearray(4)  # [buttons, x, y, wheel]
         self.mouse = usb_hid.devices[1]  # Zwykle drugie urządzenie to mysz
 
-        # Parametry wektora ruchu
-        self.vector = {"x": 0, "y": 0, "speed": 0}
-        self.current_pos = {"x": 0, "y": 0}
-        self.target_pos = {"x": 0, "y": 0}
-
         # Parametry sterowania
-        self.is_moving = False
         self.update_interval = 0.01  # 10ms
-        self.acceleration = 1.0
-        self.max_speed = 10
+        self.acceleration = 8.0  # piksele na takt²
+        self.max_speed = 127  # piksele na takt (jeden raport HID na takt)
+        self.profile = "trapezoid"  # profil ruchu move_to(), patrz motion.PROFILES
 
         # Timer do aktualizacji pozycji
         self.update_timer = Timer()
 
+        # Stan ruchu w stałym przecinku, współdzielony przez wątek serwera i timer
+        self.motion = MotionState(tick_ms=int(self.update_interval * 1000))
+        self.motion.gain = gain_table(POINTER_CURVE)  # balistyka dla set_vector()
+        self.motion_lock = _thread.allocate_lock()
+
         # Stan przycisków
         self.buttons = 0
+        self.sent_buttons = 0
 
     def setup_wifi_ap(self):
         """Konfiguracja punktu dostępowego WiFi"""
@@ -59,64 +65,53 @@ class VectorMouse:
             time.sleep(0.1)
 
     def set_vector(self, x, y, speed):
-        """Ustaw wektor ruchu"""
-        self.vector["x"] = x
-        self.vector["y"] = y
-        self.vector["speed"] = min(speed, self.max_speed)
+        """Ustaw wektor ruchu; przesunięcie trafia do akumulatora"""
+        with self.motion_lock:
+            self.motion.add(x, y)
 
-    def move_to(self, x, y, speed=5):
+    def move_to(self, x, y, speed=None, profile=None):
         """Rozpocznij ruch do punktu docelowego"""
-        self.target_pos["x"] = x
-        self.target_pos["y"] = y
-
-        # Oblicz wektor
-        dx = x - self.current_pos["x"]
-        dy = y - self.current_pos["y"]
-        distance = sqrt(dx * dx + dy * dy)
-
-        if distance > 0:
-            # Normalizuj wektor i ustaw prędkość
-            self.vector["x"] = dx / distance
-            self.vector["y"] = dy / distance
-            self.vector["speed"] = min(speed, self.max_speed)
-            self.is_moving = True
+        if speed is None or speed > self.max_speed:
+            speed = self.max_speed
+        with self.motion_lock:
+            self.motion.move_to(x, y, speed, self.acceleration, profile or self.profile)
 
     def update_position(self, timer):
-        """Aktualizuj pozycję myszy na podstawie wektora"""
-        if not self.is_moving:
+        """Aktualizuj pozycję myszy: krok ruchu do celu i zaległe przesunięcia"""
+        # Nie blokuj w przerwaniu - spróbuj w następnym takcie
+        if not self.motion_lock.acquire(0):
             return
 
-        # Oblicz nową pozycję
-        dx = self.vector["x"] * self.vector["speed"]
-        dy = self.vector["y"] * self.vector["speed"]
-
-        # Aktualizuj pozycję
-        self.current_pos["x"] += dx
-        self.current_pos["y"] += dy
-
-        # Sprawdź czy osiągnięto cel
-        distance_to_target = sqrt(
-            (self.target_pos["x"] - self.current_pos["x"]) ** 2 +
-            (self.target_pos["y"] - self.current_pos["y"]) ** 2
-        )
-
-        if distance_to_target < self.vector["speed"]:
-            self.is_moving = False
-            dx = self.target_pos["x"] - self.current_pos["x"]
-            dy = self.target_pos["y"] - self.current_pos["y"]
-
-        # Wyślij ruch do USB HID
-        self.send_mouse_movement(int(dx), int(dy))
+        # Tylko liczby całkowite i gotowy bufor raportu - bez alokacji
+        try:
+            motion = self.motion
+            if motion.moving():
+                motion.step(time.ticks_ms())
+
+            # Wyślij zebrane przesunięcie, dzieląc duże ruchy na kilka raportów
+            for _ in range(motion.max_reports_per_tick):
+                if not motion.pending() and self.buttons == self.sent_buttons:
+                    break
+                motion.take_into(self.mouse_report)
+                self.send_report()
+        finally:
+            self.motion_lock.release()
 
     def send_mouse_movement(self, x, y):
         """Wyślij ruch myszy przez USB HID"""
-        self.mouse_report[0] = self.buttons  # przyciski
         self.mouse_report[1] = x & 0xFF  # ruch X
         self.mouse_report[2] = y & 0xFF  # ruch Y
+        self.send_report()
+
+    def send_report(self):
+        """Wyślij raport HID z przesunięciem zapisanym w mouse_report"""
+        self.mouse_report[0] = self.buttons  # przyciski
         self.mouse_report[3] = 0  # scroll
 
         try:
             self.mouse.send_report(self.mouse_report)
+            self.sent_buttons = self.buttons
+            self.motion.count_report()
             self.led.value = not self.led.value  # Sygnalizacja ruchu
         except Exception as e:
             print("Błąd wysyłania ruchu:", e)
@@ -124,13 +119,30 @@ class VectorMouse:
     def click(self, button=1):
         """Wykonaj kliknięcie"""
         # Ustaw bit przycisku
-        self.buttons |= button
-        self.send_mouse_movement(0, 0)
+        with self.motion_lock:
+            self.buttons |= button
+            self.send_mouse_movement(0, 0)
         time.sleep(0.1)
 
         # Zwolnij przycisk
-        self.buttons &= ~button
-        self.send_mouse_movement(0, 0)
+        with self.motion_lock:
+            self.buttons &= ~button
+            self.send_mouse_movement(0, 0)
+
+    def set_buttons(self, buttons):
+        """Ustaw stan przycisków (wciśnięcie i zwolnienie) bez czekania"""
+        with self.motion_lock:
+            # Ruch sprzed zmiany wysłany jeszcze z poprzednim stanem przycisków
+            motion = self.motion
+            while motion.pending():
+                motion.take_into(self.mouse_report)
+                self.send_report()
+            self.buttons = buttons
+            self.send_mouse_movement(0, 0)
+
+    def stats(self):
+        """Liczba odebranych zdarzeń ruchu i wysłanych raportów HID"""
+        return self.motion.stats()
 
     def start_movement_updates(self):
         """Rozpocznij aktualizacje pozycji"""
@@ -142,76 +154,243 @@ class VectorMouse:
 
 
 class MouseServer:
-    def __init__(self, mouse):
+    def __init__(self, mouse, max_connections=4, keepalive_timeout=5):
         self.mouse = mouse
         self.server_socket = None
 
+        # Połączenia HTTP/1.1 keep-alive
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout  # sekundy bezczynności
+        self.websocket_timeout = 60
+        self.send_timeout = 2
+        self.poller = None
+        # gniazdo -> [parser, ostatnia aktywność (ms), przyciski WebSocket lub None dla HTTP]
+        self.connections = {}
+        self.sockets = {}  # fd -> gniazdo (CPython zwraca z poll() numery fd)
+        self.free_parsers = []
+
+        # Gotowe odpowiedzi, kodowane raz
+        self.responses = {}
+        self.page = self.get_control_page().encode()
+
     def start(self, port=80):
         """Uruchom serwer HTTP"""
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server_socket.bind(('0.0.0.0', port))
-        self.server_socket.listen(1)
+        self.server_socket.listen(self.max_connections)
+
+        self.poller = select.poll()
+        self.poller.register(self.server_socket, select.POLLIN)
+        self._track(self.server_socket)
 
         print(f"Serwer uruchomiony na porcie {port}")
 
         while True:
             try:
-                conn, addr = self.server_socket.accept()
-                request = conn.recv(1024).decode()
-
-                if request:
-                    self.handle_request(conn, request)
+                for entry in self.poller.poll(500):
+                    sock = self.sockets.get(entry[0], entry[0])
+                    if sock is self.server_socket:
+                        self.accept()
+                    elif entry[1] & (select.POLLHUP | select.POLLERR):
+                        self.close(sock)
+                    else:
+                        self.serve(sock)
 
-                conn.close()
+                self.close_idle()
 
             except Exception as e:
                 print("Błąd serwera:", e)
 
-    def handle_request(self, conn, request):
-        """Obsługa żądań HTTP"""
+    def _track(self, sock):
+        if hasattr(sock, "fileno"):
+            self.sockets[sock.fileno()] = sock
+
+    def accept(self):
+        """Przyjmij nowe połączenie, zwalniając najstarsze przy braku miejsca"""
+        conn, addr = self.server_socket.accept()
+
+        if len(self.connections) >= self.max_connections:
+            oldest = None
+            for sock, state in self.connections.items():
+                if oldest is None or time.ticks_diff(state[1], self.connections[oldest][1]) < 0:
+                    oldest = sock
+            self.close(oldest)
+
+        conn.settimeout(self.send_timeout)
+        parser = self.free_parsers.pop() if self.free_parsers else RequestParser()
+        parser.clear()
+        self.connections[conn] = [parser, time.ticks_ms(), None]
+        self.poller.register(conn, select.POLLIN)
+        self._track(conn)
+
+    def serve(self, conn):
+        """Odczytaj dane i obsłuż wszystkie kompletne żądania (pipelining)"""
+        state = self.connections.get(conn)
+        if state is None:
+            return
+        parser = state[0]
+
         try:
-            # Parsuj żądanie
-            method = request.split()[0]
-            path = request.split()[1]
+            if not parser.recv(conn):
+                self.close(conn)
+                return
+            state[1] = time.ticks_ms()
+
+            if state[2] is not None:
+                self.serve_websocket(conn, state)
+                return
+
+            while parser.parse():
+                if parser.path_is(b"/mouse/ws"):
+                    if self.upgrade(conn, state):
+                        self.serve_websocket(conn, state)
+                    return
+                if not self.handle_request(conn, parser, parser.keep_alive()):
+                    self.close(conn)
+                    return
+                parser.consume()
 
-            if method == "POST" and "/mouse/" in path:
-                # Znajdź dane JSON
-                content_pos = request.find('\r\n\r\n')
-                if content_pos > 0:
-                    data = json.loads(request[content_pos:])
+        except Exception as e:
+            print("Błąd połączenia:", e)
+            self.close(conn)
+
+    def upgrade(self, conn, state):
+        """Przełącz połączenie na WebSocket"""
+        parser = state[0]
+        key = parser.header(b"sec-websocket-key")
+        upgrade = parser.header(b"upgrade")
+        if (not parser.method_is(b"GET") or key is None or not len(key) or upgrade is None or
+                bytes(upgrade).lower() != b"websocket"):
+            conn.sendall(self.response(b"Bad Request", False, b"400 Bad Request"))
+            self.close(conn)
+            return False
+
+        conn.sendall(wsframe.handshake_response(key))
+        parser.consume()
+        state[2] = 0
+        return True
+
+    def serve_websocket(self, conn, state):
+        """Obsłuż wszystkie kompletne ramki WebSocket w buforze"""
+        parser = state[0]
+        offset = 0
+        while True:
+            frame = wsframe.decode_frame(parser.buf, offset, parser.length)
+            if frame is None:
+                break
+            opcode, start, end = frame
+
+            if opcode == wsframe.OP_BINARY:
+                # Rekordy po 6 bajtów: dx, dy (int16), prędkość, przyciski (uint8)
+                for pos in range(start, end - 5, 6):
+                    self.handle_vector_frame(state, parser.buf, pos)
+            elif opcode == wsframe.OP_PING:
+                conn.sendall(wsframe.encode_frame(wsframe.OP_PONG, bytes(parser.mv[start:end])))
+            elif opcode == wsframe.OP_CLOSE:
+                conn.sendall(wsframe.encode_frame(wsframe.OP_CLOSE))
+                self.close(conn)
+                return
+            offset = end
+
+        parser.discard(offset)
+
+    def handle_vector_frame(self, state, buf, pos):
+        """Przekaż jeden rekord wektora do myszy"""
+        dx, dy, speed, buttons = struct.unpack_from("<hhBB", buf, pos)
+        if dx or dy:
+            self.mouse.set_vector(dx, dy, speed)
+
+        # Pełny stan przycisków z ramki (przytrzymanie, przeciąganie) - raport tylko przy zmianie
+        if buttons != state[2]:
+            state[2] = buttons
+            self.mouse.set_buttons(buttons)
+
+    def close(self, conn):
+        """Zamknij połączenie i oddaj jego parser do ponownego użycia"""
+        state = self.connections.pop(conn, None)
+        if state is not None:
+            self.free_parsers.append(state[0])
+        try:
+            self.poller.unregister(conn)
+        except (OSError, KeyError, ValueError):
+            pass
+        if hasattr(conn, "fileno"):
+            self.sockets.pop(conn.fileno(), None)
+        conn.close()
+
+    def close_idle(self):
+        """Zamknij połączenia bezczynne dłużej niż keepalive_timeout (websocket_timeout dla WebSocket)"""
+        now = time.ticks_ms()
+        http_limit = self.keepalive_timeout * 1000
+        websocket_limit = self.websocket_timeout * 1000
+        idle = [sock for sock, state in self.connections.items()
+                if time.ticks_diff(now, state[1]) > (http_limit if state[2] is None else websocket_limit)]
+        for sock in idle:
+            self.close(sock)
+
+    def response(self, body, keep_alive, status=b"200 OK", cache=True):
+        """Pełna odpowiedź HTTP/1.1 (nagłówki + treść), stałe odpowiedzi z pamięci podręcznej"""
+        key = (status, body, keep_alive)
+        response = self.responses.get(key) if cache else None
+        if response is None:
+            response = (
+                b"HTTP/1.1 " + status + b"\r\n"
+                b"Content-Type: text/html\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                + (b"Connection: keep-alive\r\n\r\n" if keep_alive else b"Connection: close\r\n\r\n")
+                + body
+            )
+            if cache:
+                self.responses[key] = response
+        return response
+
+    def handle_request(self, conn, request, keep_alive=False):
+        """Obsługa żądań HTTP, zwraca True gdy połączenie ma pozostać otwarte"""
+        try:
+            if request.method_is(b"POST") and request.path_startswith(b"/mouse/"):
+                # Dane JSON z ciała żądania
+                body = request.body()
+                if len(body):
+                    data = json.loads(bytes(body))
 
                     # Obsłuż różne komendy
-                    if "move" in path:
+                    if request.path_is(b"/mouse/move"):
                         self.mouse.move_to(
                             data.get("x", 0),
                             data.get("y", 0),
-                            data.get("speed", 5)
+                            data.get("speed"),
+                            data.get("profile")
                         )
-                    elif "click" in path:
+                    elif request.path_is(b"/mouse/click"):
                         self.mouse.click(data.get("button", 1))
-                    elif "vector" in path:
+                    elif request.path_is(b"/mouse/vector"):
                         self.mouse.set_vector(
                             data.get("x", 0),
                             data.get("y", 0),
                             data.get("speed", 5)
                         )
 
-                    response = "OK"
+                    response = b"OK"
                 else:
-                    response = "Bad Request"
+                    response = b"Bad Request"
+            elif request.path_is(b"/mouse/stats"):
+                # Liczniki zdarzeń i raportów HID (zmienne - bez pamięci podręcznej)
+                stats = json.dumps(self.mouse.stats()).encode()
+                conn.sendall(self.response(stats, keep_alive, cache=False))
+                return keep_alive
             else:
                 # Zwróć prostą stronę kontrolną
-                response = self.get_control_page()
+                response = self.page
 
-            # Wyślij odpowiedź
-            conn.send('HTTP/1.1 200 OK\r\n')
-            conn.send('Content-Type: text/html\r\n')
-            conn.send('Connection: close\r\n\r\n')
-            conn.send(response.encode())
+            # Wyślij odpowiedź jednym zapisem
+            conn.sendall(self.response(response, keep_alive))
+            return keep_alive
 
         except Exception as e:
             print("Błąd obsługi żądania:", e)
-            conn.send('HTTP/1.1 500 Internal Server Error\r\n\r\n')
+            conn.sendall(self.response(b"", False, b"500 Internal Server Error"))
+            return False
 
     def get_control_page(self):
         """Generuj stronę kontrolną"""
@@ -250,6 +429,32 @@ class MouseServer:
                 let lastX = 0;
                 let lastY = 0;
 
+                // Strumień wektorów przez WebSocket, POST jako zapas
+                let ws = null;
+                const frame = new DataView(new ArrayBuffer(6));
+
+                function connectSocket() {
+                    const socket = new WebSocket('ws://' + location.host + '/mouse/ws');
+                    socket.binaryType = 'arraybuffer';
+                    socket.onopen = () => { ws = socket; };
+                    socket.onclose = () => {
+                        ws = null;
+                        setTimeout(connectSocket, 2000);
+                    };
+                }
+
+                function sendFrame(dx, dy, speed, buttons) {
+                    if (!ws || ws.readyState !== WebSocket.OPEN) return false;
+                    frame.setInt16(0, dx, true);
+                    frame.setInt16(2, dy, true);
+                    frame.setUint8(4, Math.min(255, Math.round(speed)));
+                    frame.setUint8(5, buttons);
+                    ws.send(frame.buffer);
+                    return true;
+                }
+
+                connectSocket();
+
                 pad.addEventListener('mousedown', startVector);
                 pad.addEventListener('mousemove', updateVector);
                 pad.addEventListener('mouseup', stopVector);
@@ -266,14 +471,16 @@ class MouseServer:
                     const dy = e.offsetY - lastY;
                     const speed = Math.sqrt(dx*dx + dy*dy) / 10;
 
-                    fetch('/mouse/vector', {
-                        method: 'POST',
-                        body: JSON.stringify({
-                            x: dx,
-                            y: dy,
-                            speed: speed
-                        })
-                    });
+                    if (!sendFrame(dx, dy, speed, 0)) {
+                        fetch('/mouse/vector', {
+                            method: 'POST',
+                            body: JSON.stringify({
+                                x: dx,
+                                y: dy,
+                                speed: speed
+                            })
+                        });
+                    }
 
                     [lastX, lastY] = [e.offsetX, e.offsetY];
                 }
@@ -283,6 +490,7 @@ class MouseServer:
                 }
 
                 function click(button) {
+                    if (sendFrame(0, 0, 0, button) && sendFrame(0, 0, 0, 0)) return;
                     fetch('/mouse/click', {
                         method: 'POST',
                         body: JSON.stringify({button: button})
@@ -294,13 +502,18 @@ class MouseServer:
         """
 
 
-# Inicjalizacja i uruchomienie
-mouse = VectorMouse()
-mouse.setup_wifi_ap()
-mouse.start_movement_updates()
+def main():
+    # Inicjalizacja i uruchomienie
+    mouse = VectorMouse()
+    mouse.setup_wifi_ap()
+    mouse.start_movement_updates()
+
+    # Uruchom serwer w osobnym wątku
+    server = MouseServer(mouse)
+    _thread.start_new_thread(server.start, ())
+
+    print("System gotowy!")
 
-# Uruchom serwer w osobnym wątku
-server = MouseServer(mouse)
-_thread.start_new_thread(server.start, ())
 
-print("System gotowy!")
+if __name__ == "__main__":
+    main()
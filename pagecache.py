@@ -0,0 +1,45 @@
+"""
+Wstępnie wyrenderowane odpowiedzi HTTP.
+
+Statyczne fragmenty strony są kodowane do bytes raz, przy starcie.
+Zmienna wartość jest wstawiana między fragmenty do jednego bufora
+wielokrotnego użytku, a strona jest renderowana ponownie tylko wtedy,
+gdy wartość się zmieni. Niezmieniona strona nie alokuje niczego.
+"""
+
+
+class CachedPage:
+    """Strona z jedną wartością wstawianą między statyczne fragmenty"""
+
+    def __init__(self, parts, size=512):
+        self.parts = [part.encode() for part in parts]
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.value = None
+        self.view = self.mv[:0]
+        self.renders = 0
+
+    def render(self, value):
+        """Odpowiedź dla `value` jako memoryview (gotowa do sendall)"""
+        if value != self.value or self.renders == 0:
+            self._render(value)
+        return self.view
+
+    def _render(self, value):
+        text = str(value).encode()
+        size = sum(len(part) for part in self.parts) + len(text) * (len(self.parts) - 1)
+        if size > len(self.buf):
+            self.buf = bytearray(size)
+            self.mv = memoryview(self.buf)
+
+        pos = 0
+        for i, part in enumerate(self.parts):
+            if i:
+                self.buf[pos:pos + len(text)] = text
+                pos += len(text)
+            self.buf[pos:pos + len(part)] = part
+            pos += len(part)
+
+        self.value = value
+        self.view = self.mv[:pos]
+        self.renders += 1
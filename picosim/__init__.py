@@ -0,0 +1,117 @@
+"""
+Symulator sprzętu Raspberry Pi Pico (W) dla CPython.
+
+Podmienia moduły sprzętowe (machine, rp2, network, usb_hid, board, digitalio,
+micropython, storage, usb_cdc, audiocore, audiobusio, usb_audio) oraz
+time na wersje zastępcze, dzięki czemu firmware z tego repozytorium
+działa na hoście bez zmian. _thread pochodzi z CPython.
+
+Uruchamianie firmware (opcje symulatora przed skryptem, dalsze
+argumenty trafiają do firmware):
+
+    python -m picosim --duration 10 --port-offset 8000 mouse.py
+    python -m picosim --virtual --duration 3 audio/src3/main.py
+
+W benchmarkach:
+
+    import picosim
+    picosim.install(virtual=True)
+    import machine
+"""
+import importlib
+import sys
+
+from picosim import clock
+from picosim.clock import RealClock, SimulationExit, VirtualClock
+
+MODULES = (
+    "machine", "rp2", "network", "usb_hid", "board", "digitalio", "micropython",
+    "storage", "usb_cdc", "audiocore", "audiobusio", "usb_audio",
+)
+
+# Moduły standardowe ładowane przed podmianą time, żeby korzystały z prawdziwego
+_PRELOAD = ("asyncio", "json", "select", "selectors", "socket", "struct", "threading")
+
+
+def install(virtual=False, duration=None, read_cost_us=1, dma=True):
+    """
+    Zainstaluj moduły zastępcze i zegar; zwraca zegar symulacji.
+    dma=False pomija moduł rp2 (jak firmware bez rp2.DMA).
+    """
+    for name in _PRELOAD:
+        importlib.import_module(name)
+
+    if virtual:
+        clock.current = VirtualClock(duration, read_cost_us)
+    else:
+        clock.current = RealClock()
+
+    for name in MODULES:
+        if name == "rp2" and not dma:
+            continue
+        sys.modules[name] = importlib.import_module("picosim." + name)
+    mptime = importlib.import_module("picosim.mptime")
+    sys.modules["time"] = mptime
+    sys.modules["utime"] = mptime
+    return clock.current
+
+
+def report():
+    """Stan symulacji: przebiegi pinów, PWM, timery i raporty HID"""
+    machine = sys.modules["picosim.machine"]
+    usb_hid = sys.modules["picosim.usb_hid"]
+    devices = {device.name: device for device in usb_hid.devices}
+    for device in (usb_hid.Device.KEYBOARD, usb_hid.Device.MOUSE, usb_hid.Device.CONSUMER_CONTROL):
+        devices.setdefault(device.name, device)
+
+    return {
+        "time_us": clock.current.now_us(),
+        "virtual": clock.current.virtual,
+        "pins": {str(pin.id): {"value": pin.value, "trace": pin.trace} for pin in machine.PINS.values()},
+        "pwm": [pwm_report(pwm) for pwm in machine.PWMS],
+        "timers": [{"period_us": timer.period_us, "calls": timer.calls} for timer in machine.TIMERS],
+        "hid": {name: [(t, data.hex()) for t, data in device.reports]
+                for name, device in devices.items()},
+        "hid_buffers": usb_hid.sent_count,
+        "hid_bytes": usb_hid.sent_bytes,
+    }
+
+
+def pwm_report(pwm):
+    """
+    Przebieg PWM i osiągnięta częstotliwość zmian wypełnienia. Przerwa
+    dłuższa niż 1,5 okresu PWM w trakcie odtwarzania to niedobór próbek.
+    """
+    times = pwm.times
+    period = 1000000 / pwm.freq() if pwm.freq() else 0
+    rate = 0
+    gaps = 0
+    if len(times) > 2 and times[-2] > times[1]:
+        # Pomijamy pierwszy i ostatni zapis (zwykle wyciszenie przed i po)
+        rate = (len(times) - 3) * 1000000 / (times[-2] - times[1])
+        gaps = sum(1 for i in range(2, len(times) - 1) if times[i] - times[i - 1] > 1.5 * period)
+    return {"pin": str(pwm.pin.id), "freq": pwm.freq(), "clipped": pwm.clipped,
+            "rate": rate, "gaps": gaps, "timeline": list(pwm.timeline())}
+
+
+def summary():
+    """Wypisz podsumowanie symulacji"""
+    state = report()
+    kind = "wirtualny" if state["virtual"] else "rzeczywisty"
+    print(f"\n📊 Podsumowanie symulacji ({state['time_us'] / 1000000:.3f} s, zegar {kind}):")
+    for pin, pin_state in state["pins"].items():
+        changes = max(0, len(pin_state["trace"]) - 1)
+        print(f"  💡 Pin {pin}: {changes} zmian, stan końcowy {pin_state['value']}")
+    for pwm in state["pwm"]:
+        clipped = f", {pwm['clipped']} poza zakresem" if pwm["clipped"] else ""
+        print(f"  〰️  PWM {pwm['pin']}: {pwm['freq']} Hz, {len(pwm['timeline'])} zmian wypełnienia{clipped}")
+        if pwm["rate"]:
+            print(f"      osiągnięte tempo {pwm['rate']:.0f} zmian/s, przerwy (niedobory): {pwm['gaps']}")
+    for timer in state["timers"]:
+        if timer["calls"]:
+            print(f"  ⏱️  Timer ({timer['period_us'] / 1000:g} ms): {timer['calls']} wywołań")
+    for name, reports in state["hid"].items():
+        if reports:
+            print(f"  🖱️  usb_hid {name}: {len(reports)} raportów")
+    if state["hid_buffers"]:
+        print(f"  📦 usb_hid.send: {state['hid_buffers']} buforów ({state['hid_bytes'] / 1024:.1f} KB)")
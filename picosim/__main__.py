@@ -0,0 +1,78 @@
+"""
+Uruchom plik firmware w symulatorze:
+
+    python -m picosim [--virtual] [--duration S] [--port-offset N] [--no-dma]
+                      [--trace plik.json] [--fs katalog] skrypt.py [argumenty]
+"""
+import argparse
+import json
+import os
+import runpy
+import signal
+import sys
+
+import picosim
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m picosim",
+                                     description="Uruchom firmware Pico na hoście z symulowanym sprzętem")
+    parser.add_argument("script", help="Plik firmware (np. mouse.py, audio/src3/main.py)")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Argumenty przekazane do skryptu")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Czas symulacji w sekundach (domyślnie: do Ctrl+C)")
+    parser.add_argument("--virtual", action="store_true",
+                        help="Zegar wirtualny: sleep() nie czeka, timery wywoływane deterministycznie")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Limit czasu rzeczywistego dla zegara wirtualnego (s)")
+    parser.add_argument("--port-offset", type=int, default=0,
+                        help="Przesuń porty < 1024 otwierane przez firmware o N")
+    parser.add_argument("--trace", help="Zapisz przebiegi (piny, PWM, HID) do pliku JSON")
+    parser.add_argument("--no-dma", action="store_true",
+                        help="Bez modułu rp2 (firmware bez rp2.DMA)")
+    parser.add_argument("--fs", help="Katalog roboczy dla plików firmware (domyślnie: bieżący)")
+    args = parser.parse_args()
+
+    sim_clock = picosim.install(virtual=args.virtual, duration=args.duration,
+                                dma=not args.no_dma)
+    if args.port_offset:
+        sys.modules["network"].remap_ports(args.port_offset)
+
+    # Limit czasu rzeczywistego przerywa też firmware czekające w accept() itp.
+    wall_limit = args.timeout if args.virtual else args.duration
+    if wall_limit:
+        def stop(signum, frame):
+            raise picosim.SimulationExit()
+        signal.signal(signal.SIGALRM, stop)
+        signal.setitimer(signal.ITIMER_REAL, wall_limit)
+
+    script = os.path.abspath(args.script)
+    trace = os.path.abspath(args.trace) if args.trace else None
+    sys.argv = [script] + args.args
+    sys.path.insert(0, os.path.dirname(script))
+    if args.fs:
+        os.makedirs(args.fs, exist_ok=True)
+        os.chdir(args.fs)
+
+    print(f"🔍 picosim: {args.script} (zegar {'wirtualny' if args.virtual else 'rzeczywisty'})")
+    try:
+        runpy.run_path(script, run_name="__main__")
+        # Skrypt się zakończył - na płytce timery i wątki działają dalej
+        if args.duration is not None:
+            sim_clock.idle()
+    except picosim.SimulationExit:
+        pass
+    except KeyboardInterrupt:
+        print("\n⏹️  Przerwano")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    picosim.summary()
+    if trace:
+        with open(trace, "w") as f:
+            json.dump(picosim.report(), f)
+        print(f"💾 Przebiegi zapisane do {trace}")
+
+
+if __name__ == "__main__":
+    main()
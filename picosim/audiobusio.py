@@ -0,0 +1,27 @@
+"""Zastępczy moduł audiobusio (CircuitPython): I2SOut zapisuje odtwarzane próbki"""
+from picosim import clock as _clock
+
+
+class I2SOut:
+    def __init__(self, bit_clock, word_select, data, *, main_clock=None, left_justified=False):
+        self.pins = (bit_clock, word_select, data)
+        self.playing = False
+        self.paused = False
+        self.played = []  # (czas µs, próbka, loop)
+
+    def play(self, sample, *, loop=False):
+        self.played.append((_clock.current.now_us(), sample, loop))
+        self.playing = True
+        self.paused = False
+
+    def stop(self):
+        self.playing = False
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def deinit(self):
+        self.stop()
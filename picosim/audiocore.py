@@ -0,0 +1,45 @@
+"""Zastępczy moduł audiocore (CircuitPython): odczyt nagłówka WAV"""
+import struct
+
+
+class WaveFile:
+    def __init__(self, file, buffer=None):
+        self.file = file
+        header = file.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError("Invalid WAVE")
+        while True:
+            chunk = file.read(8)
+            if len(chunk) < 8:
+                raise ValueError("Invalid format")
+            chunk_id, size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                fmt = file.read(size)
+                _, self.channel_count, self.sample_rate, _, _, self.bits_per_sample = \
+                    struct.unpack("<HHIIHH", fmt[:16])
+            elif chunk_id == b"data":
+                self.data_offset = file.tell()
+                self.data_size = size
+                break
+            else:
+                file.seek(size + (size & 1), 1)
+
+    def deinit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.deinit()
+
+
+class RawSample:
+    def __init__(self, buffer, *, channel_count=1, sample_rate=8000):
+        self.buffer = buffer
+        self.channel_count = channel_count
+        self.sample_rate = sample_rate
+        self.bits_per_sample = 8 * getattr(buffer, "itemsize", 1)
+
+    def deinit(self):
+        pass
@@ -0,0 +1,10 @@
+"""Zastępczy moduł board (CircuitPython, Raspberry Pi Pico W)"""
+
+board_id = "raspberry_pi_pico_w"
+
+LED = "LED"
+
+# GP0..GP28 to numery pinów, jak w machine.Pin
+for _n in range(29):
+    globals()["GP%d" % _n] = _n
+del _n
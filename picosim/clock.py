@@ -0,0 +1,129 @@
+"""
+Zegar symulacji.
+
+RealClock - czas rzeczywisty, timery w osobnych wątkach (jak przerwania).
+VirtualClock - czas płynie tylko w sleep(); timery wywoływane są
+synchronicznie, gdy zegar mija ich termin. Symulacja jest wtedy
+deterministyczna i nie czeka naprawdę (np. sleep_us() na próbkę audio).
+"""
+import heapq
+import threading
+import time
+
+# Zegar używany przez moduły zastępcze, ustawiany przez picosim.install()
+current = None
+
+
+class SimulationExit(BaseException):
+    """
+    Koniec symulacji. Dziedziczy z BaseException, żeby pętle firmware
+    z `except Exception` go nie przechwytywały.
+    """
+
+
+class RealClock:
+    """Czas rzeczywisty od startu symulacji"""
+
+    virtual = False
+
+    def __init__(self):
+        self.started = time.perf_counter_ns()
+        # Wywołania timerów są szeregowane jak przerwania na jednym rdzeniu
+        self.irq_lock = threading.RLock()
+
+    def now_us(self):
+        return (time.perf_counter_ns() - self.started) // 1000
+
+    def read_us(self):
+        """Odczyt zegara przez firmware (ticks_us itp.)"""
+        return self.now_us()
+
+    def time(self):
+        return time.time()
+
+    def sleep_us(self, us):
+        if us > 0:
+            time.sleep(us / 1000000)
+
+    def start_timer(self, timer):
+        generation = timer.generation
+
+        def run():
+            due = time.perf_counter() + timer.period_us / 1000000
+            while timer.generation == generation:
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if timer.generation != generation:
+                    break
+                with self.irq_lock:
+                    if not timer.fire():
+                        break
+                due += timer.period_us / 1000000
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def idle(self):
+        """Firmware zakończyło skrypt - czekaj (timery i wątki działają)"""
+        while True:
+            time.sleep(0.1)
+
+
+class VirtualClock:
+    """Czas wirtualny w mikrosekundach, przesuwany przez sleep()"""
+
+    virtual = True
+
+    def __init__(self, duration=None, read_cost_us=1):
+        self.now = 0
+        self.epoch = time.time()
+        self.deadline_us = None if duration is None else int(duration * 1000000)
+        # Każdy odczyt zegara przez firmware trwa chwilę, żeby pętle
+        # czekające na ticks_ms() bez sleep() też się kończyły
+        self.read_cost_us = read_cost_us
+        self.irq_lock = threading.RLock()
+        self.timers = []  # kopiec (termin, numer, timer, generacja)
+        self.sequence = 0
+
+    def now_us(self):
+        return self.now
+
+    def read_us(self):
+        self.advance(self.now + self.read_cost_us)
+        return self.now
+
+    def time(self):
+        return self.epoch + self.now / 1000000
+
+    def sleep_us(self, us):
+        self.advance(self.now + max(0, int(us)))
+
+    def start_timer(self, timer):
+        self.schedule(timer, timer.generation, self.now + max(1, int(timer.period_us)))
+
+    def schedule(self, timer, generation, due):
+        self.sequence += 1
+        heapq.heappush(self.timers, (due, self.sequence, timer, generation))
+
+    def advance(self, target):
+        """Przesuń zegar do `target`, wywołując timery po drodze"""
+        with self.irq_lock:
+            while self.timers and self.timers[0][0] <= target:
+                due, _, timer, generation = heapq.heappop(self.timers)
+                if generation != timer.generation:
+                    continue
+                self.now = max(self.now, due)
+                self.check_deadline()
+                if timer.fire():
+                    self.schedule(timer, generation, due + max(1, int(timer.period_us)))
+            self.now = max(self.now, target)
+            self.check_deadline()
+
+    def check_deadline(self):
+        if self.deadline_us is not None and self.now >= self.deadline_us:
+            raise SimulationExit()
+
+    def idle(self):
+        """Firmware zakończyło skrypt - dolicz czas do końca symulacji"""
+        if self.deadline_us is not None:
+            self.advance(self.deadline_us)
@@ -0,0 +1,305 @@
+"""
+Zastępczy moduł machine (RP2040).
+
+Pin zapisuje przebieg stanów (np. LED), PWM - przebieg wypełnienia
+w czasie, Timer działa na zegarze symulacji.
+"""
+import sys
+import traceback
+from array import array
+
+from picosim import clock as _clock
+
+_cpu_freq = 125000000
+
+# Stan pinów współdzielony przez wszystkie obiekty Pin o tym samym numerze
+PINS = {}
+PWMS = []
+TIMERS = []
+
+# Rejestry PWM RP2040 (dostępne przez mem32)
+PWM_BASE = 0x40050000
+PWM_SLICE_SIZE = 0x14
+PWM_CC = 0x0C
+PWM_TOP = 0x10
+
+
+def _pin_id(id):
+    """'GP15' i 15 to ten sam pin"""
+    if isinstance(id, Pin):
+        return id.id
+    if isinstance(id, str) and id.startswith("GP") and id[2:].isdigit():
+        return int(id[2:])
+    return id
+
+
+class PinState:
+    """Wartość i przebieg jednego pinu: lista (czas µs, wartość)"""
+
+    def __init__(self, id):
+        self.id = id
+        self.mode = None
+        self.value = 0
+        self.trace = []
+
+    def set(self, value):
+        value = 1 if value else 0
+        if value != self.value or not self.trace:
+            self.trace.append((_clock.current.now_us(), value))
+        self.value = value
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, *, value=None):
+        self.id = _pin_id(id)
+        if self.id not in PINS:
+            PINS[self.id] = PinState(self.id)
+        self.state = PINS[self.id]
+        self.init(mode, pull, value=value)
+
+    def init(self, mode=-1, pull=-1, *, value=None):
+        if mode != -1:
+            self.state.mode = mode
+        if value is not None:
+            self.state.set(value)
+
+    def value(self, value=None):
+        if value is None:
+            return self.state.value
+        self.state.set(value)
+
+    __call__ = value
+
+    def on(self):
+        self.state.set(1)
+
+    def off(self):
+        self.state.set(0)
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self.state.set(not self.state.value)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self.handler = handler
+
+    def __repr__(self):
+        return "Pin(%r)" % (self.id,)
+
+
+class PWM:
+    """PWM zapisujący przebieg wypełnienia: times (µs) i duties (u16)"""
+
+    def __init__(self, dest, *, freq=None, duty_u16=None, duty_ns=None, invert=False):
+        self.pin = dest if isinstance(dest, Pin) else Pin(dest)
+        number = self.pin.id if isinstance(self.pin.id, int) else 0
+        self.slice = (number >> 1) & 7
+        self.channel = number & 1
+        self.top = 65535
+        self.cc = 0
+        self._freq = 0
+        self._duty = 0
+        self.times = array("q")
+        self.duties = array("H")
+        self.clipped = 0
+        self.active = True
+        PWMS.append(self)
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+        if duty_ns is not None:
+            self.duty_ns(duty_ns)
+
+    def init(self, *, freq=None, duty_u16=None, duty_ns=None, invert=False):
+        self.active = True
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+        if duty_ns is not None:
+            self.duty_ns(duty_ns)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        if not 8 <= value <= _cpu_freq // 2:
+            raise ValueError("freq out of range")
+        self._freq = int(value)
+        # Jak w porcie rp2: jak największe TOP przy dzielniku >= 1
+        divider = max(1, -(-_cpu_freq // (self._freq * 65536)))
+        self.top = min(65535, _cpu_freq // (self._freq * divider) - 1)
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty
+        # RP2040 obcina wartości spoza zakresu - liczymy je, bo to zwykle błąd
+        if not 0 <= value <= 65535:
+            self.clipped += 1
+            value = 0 if value < 0 else 65535
+        self._duty = int(value)
+        self.cc = self._duty * (self.top + 1) >> 16
+        self.record(self._duty, _clock.current.now_us())
+
+    def write_cc(self, cc, at_us=None):
+        """Zapis rejestru CC (np. przez DMA) w chwili at_us"""
+        self.cc = cc & 0xFFFF
+        self._duty = min(65535, (self.cc << 16) // (self.top + 1))
+        self.record(self._duty, _clock.current.now_us() if at_us is None else at_us)
+
+    def record(self, duty, at_us):
+        self.times.append(at_us)
+        self.duties.append(duty)
+
+    def duty_ns(self, value=None):
+        period_ns = 1000000000 // self._freq if self._freq else 0
+        if value is None:
+            return self._duty * period_ns // 65535
+        self.duty_u16(min(65535, value * 65535 // period_ns) if period_ns else 0)
+
+    def deinit(self):
+        self.active = False
+
+    def timeline(self):
+        """Pary (czas µs, wypełnienie)"""
+        return zip(self.times, self.duties)
+
+    def __repr__(self):
+        return "<PWM pin=%r freq=%d duty_u16=%d>" % (self.pin.id, self._freq, self._duty)
+
+
+def pwm_register(address):
+    """(PWM, przesunięcie rejestru) dla adresu w bloku PWM, inaczej (None, None)"""
+    offset = address - PWM_BASE
+    if not 0 <= offset < 8 * PWM_SLICE_SIZE:
+        return None, None
+    slice, register = divmod(offset, PWM_SLICE_SIZE)
+    for pwm in reversed(PWMS):
+        if pwm.slice == slice and pwm.active:
+            return pwm, register
+    return None, None
+
+
+class Memory:
+    """mem8/mem16/mem32: rejestry PWM z symulacji, reszta jako zwykła pamięć"""
+
+    def __init__(self, mask):
+        self.mask = mask
+        self.words = {}
+
+    def __getitem__(self, address):
+        pwm, register = pwm_register(address)
+        if register == PWM_TOP:
+            return pwm.top
+        if register == PWM_CC:
+            return pwm.cc << (16 * pwm.channel)
+        return self.words.get(address, 0) & self.mask
+
+    def __setitem__(self, address, value):
+        pwm, register = pwm_register(address)
+        if register == PWM_TOP:
+            pwm.top = value & 0xFFFF
+        elif register == PWM_CC:
+            pwm.write_cc(value >> (16 * pwm.channel))
+        else:
+            self.words[address] = value & self.mask
+
+
+mem8 = Memory(0xFF)
+mem16 = Memory(0xFFFF)
+mem32 = Memory(0xFFFFFFFF)
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self.mode = Timer.PERIODIC
+        self.period_us = 0
+        self.callback = None
+        self.generation = 0  # zmienia się przy init/deinit, unieważnia stary harmonogram
+        self.calls = 0
+        TIMERS.append(self)
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, *, mode=PERIODIC, freq=-1, period=-1, tick_hz=1000, callback=None):
+        if freq > 0:
+            period_us = 1000000 / freq
+        elif period >= 0:
+            period_us = period * 1000000 / tick_hz
+        else:
+            raise ValueError("need freq or period")
+        self.deinit()
+        self.mode = mode
+        self.period_us = period_us
+        self.callback = callback
+        _clock.current.start_timer(self)
+
+    def deinit(self):
+        self.generation += 1
+
+    def fire(self):
+        """Wywołaj callback jak przerwanie; zwraca True gdy timer działa dalej"""
+        if self.callback is None:
+            return self.mode == Timer.PERIODIC
+        try:
+            self.calls += 1
+            self.callback(self)
+        except _clock.SimulationExit:
+            raise
+        except Exception:
+            # Jak w MicroPython: wypisz wyjątek i wyłącz timer
+            print("Uncaught exception in IRQ callback handler", file=sys.stderr)
+            traceback.print_exc()
+            self.deinit()
+            return False
+        if self.mode == Timer.ONE_SHOT:
+            self.generation += 1
+            return False
+        return True
+
+
+def freq(hz=None):
+    global _cpu_freq
+    if hz is None:
+        return _cpu_freq
+    _cpu_freq = int(hz)
+
+
+def reset():
+    raise _clock.SimulationExit()
+
+
+def soft_reset():
+    raise _clock.SimulationExit()
+
+
+def unique_id():
+    return b"\xe6\x61\x41\x04\x03\x5c\x22\x2f"
+
+
+def idle():
+    _clock.current.sleep_us(1)
+
+
+def disable_irq():
+    _clock.current.irq_lock.acquire()
+    return 1
+
+
+def enable_irq(state=1):
+    _clock.current.irq_lock.release()
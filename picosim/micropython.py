@@ -0,0 +1,50 @@
+"""Zastępczy moduł micropython: dekoratory emitera są przezroczyste"""
+
+
+def const(value):
+    return value
+
+
+def native(func):
+    return func
+
+
+viper = native
+asm_thumb = native
+
+heap_locked = 0
+
+
+def heap_lock():
+    global heap_locked
+    heap_locked += 1
+
+
+def heap_unlock():
+    global heap_locked
+    heap_locked -= 1
+    return heap_locked
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def schedule(func, arg):
+    func(arg)
+
+
+def opt_level(level=None):
+    return 0 if level is None else None
+
+
+def mem_info(verbose=False):
+    print("mem: (picosim)")
+
+
+def qstr_info(verbose=False):
+    pass
+
+
+def kbd_intr(chr):
+    pass
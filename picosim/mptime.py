@@ -0,0 +1,51 @@
+"""
+Moduł time w wersji MicroPython (instalowany jako time i utime).
+
+Zawiera wszystko ze standardowego time oraz sleep_ms/sleep_us
+i ticks_* z zawijaniem jak na RP2040. Czas pochodzi z zegara symulacji.
+"""
+import time as _time
+
+from picosim import clock as _clock
+
+globals().update({name: getattr(_time, name) for name in dir(_time) if not name.startswith("_")})
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+
+def sleep(seconds):
+    _clock.current.sleep_us(seconds * 1000000)
+
+
+def sleep_ms(ms):
+    _clock.current.sleep_us(ms * 1000)
+
+
+def sleep_us(us):
+    _clock.current.sleep_us(us)
+
+
+def time():
+    return _clock.current.time()
+
+
+def ticks_us():
+    return _clock.current.read_us() & _TICKS_MAX
+
+
+def ticks_ms():
+    return (_clock.current.read_us() // 1000) & _TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
@@ -0,0 +1,85 @@
+"""
+Zastępczy moduł network (Pico W).
+
+WLAN łączy się od razu i zgłasza adres 127.0.0.1, więc serwery
+firmware nasłuchują na hoście. remap_ports() przesuwa porty
+uprzywilejowane (np. 80), gdy symulacja nie działa jako root.
+"""
+import socket
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 3
+STAT_CONNECT_FAIL = -1
+STAT_NO_AP_FOUND = -2
+STAT_WRONG_PASSWORD = -3
+
+HOST_IP = "127.0.0.1"
+
+_interfaces = {}
+
+
+class WLAN:
+    """Jeden obiekt na interfejs, jak w MicroPython"""
+
+    def __new__(cls, interface=STA_IF):
+        if interface not in _interfaces:
+            wlan = super().__new__(cls)
+            wlan.interface = interface
+            wlan._active = False
+            wlan._status = STAT_IDLE
+            wlan._config = {"essid": "PicoW" if interface == AP_IF else "", "channel": 1}
+            _interfaces[interface] = wlan
+        return _interfaces[interface]
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self._active
+        self._active = bool(is_active)
+        if self.interface == AP_IF:
+            self._status = STAT_GOT_IP if self._active else STAT_IDLE
+
+    def connect(self, ssid=None, key=None, **kwargs):
+        if not self._active:
+            raise OSError("WLAN not active")
+        self._config["ssid"] = ssid
+        self._status = STAT_GOT_IP
+
+    def disconnect(self):
+        self._status = STAT_IDLE
+
+    def status(self, param=None):
+        if param == "rssi":
+            return -40
+        return self._status
+
+    def isconnected(self):
+        return self._status == STAT_GOT_IP
+
+    def ifconfig(self, config=None):
+        if config is None:
+            return (HOST_IP, "255.0.0.0", HOST_IP, HOST_IP)
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config.get(args[0])
+        self._config.update(kwargs)
+
+    def scan(self):
+        return []
+
+
+def remap_ports(offset):
+    """Porty < 1024 otwierane przez firmware zostaną przesunięte o `offset`"""
+    bind = socket.socket.bind
+
+    def remapped_bind(sock, address):
+        if isinstance(address, tuple) and 0 < address[1] < 1024:
+            address = (address[0], address[1] + offset) + tuple(address[2:])
+            print("picosim: port %d -> %d" % (address[1] - offset, address[1]))
+        return bind(sock, address)
+
+    socket.socket.bind = remapped_bind
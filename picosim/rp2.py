@@ -0,0 +1,133 @@
+"""
+Zastępczy moduł rp2: DMA.
+
+Obsługiwane są dwa rodzaje transferów:
+- do rejestru CC PWM taktowane przez DREQ_PWM_WRAP - każda wartość
+  trafia do przebiegu PWM w chwili kolejnego zawinięcia licznika,
+- kopiowanie pamięć -> pamięć bez taktowania (TREQ 0x3F).
+"""
+from picosim import clock as _clock
+from picosim import machine as _machine
+
+DREQ_PWM_WRAP0 = 24
+TREQ_PERMANENT = 0x3F
+
+_CHANNELS = 12
+_used = [False] * _CHANNELS
+
+# Pola rejestru CTRL kanału DMA: nazwa -> (bit, szerokość)
+_CTRL_FIELDS = {
+    "enable": (0, 1),
+    "high_pri": (1, 1),
+    "size": (2, 2),
+    "inc_read": (4, 1),
+    "inc_write": (5, 1),
+    "ring_size": (6, 4),
+    "ring_sel": (10, 1),
+    "chain_to": (11, 4),
+    "treq_sel": (15, 6),
+    "irq_quiet": (21, 1),
+    "bswap": (22, 1),
+    "sniff_en": (23, 1),
+    "busy": (24, 1),
+}
+
+_SIZE_CODES = {0: "B", 1: "H", 2: "I"}
+
+
+class DMA:
+    def __init__(self):
+        if all(_used):
+            raise OSError("no free DMA channel")
+        self.channel = _used.index(False)
+        _used[self.channel] = True
+        self.read = None
+        self.write = None
+        self.count = 0
+        self.ctrl = self.pack_ctrl()
+        self.end_us = 0
+        self.handler = None
+        self.timer = None
+        self.transfers = 0
+
+    def pack_ctrl(self, default=None, **kwargs):
+        fields = {
+            "enable": 1, "high_pri": 0, "size": 2, "inc_read": 1, "inc_write": 1,
+            "ring_size": 0, "ring_sel": 0, "chain_to": self.channel, "treq_sel": TREQ_PERMANENT,
+            "irq_quiet": 1, "bswap": 0, "sniff_en": 0,
+        }
+        if default is not None:
+            fields = DMA.unpack_ctrl(default)
+        for name, value in kwargs.items():
+            if name not in _CTRL_FIELDS:
+                raise KeyError(name)
+            fields[name] = int(value)
+        ctrl = 0
+        for name, value in fields.items():
+            bit, width = _CTRL_FIELDS[name]
+            ctrl |= (value & ((1 << width) - 1)) << bit
+        return ctrl
+
+    @staticmethod
+    def unpack_ctrl(value):
+        return {name: (value >> bit) & ((1 << width) - 1)
+                for name, (bit, width) in _CTRL_FIELDS.items()}
+
+    def config(self, read=None, write=None, count=None, ctrl=None, trigger=False):
+        if read is not None:
+            self.read = read
+        if write is not None:
+            self.write = write
+        if count is not None:
+            self.count = count
+        if ctrl is not None:
+            self.ctrl = ctrl
+        if trigger:
+            self._start()
+
+    def active(self, value=None):
+        if value is None:
+            return _clock.current.read_us() < self.end_us
+        if value:
+            self._start()
+        else:
+            self.end_us = _clock.current.now_us()
+
+    def irq(self, handler=None, hard=False):
+        self.handler = handler
+
+    def close(self):
+        _used[self.channel] = False
+        if self.timer is not None:
+            self.timer.deinit()
+
+    def _start(self):
+        fields = DMA.unpack_ctrl(self.ctrl)
+        items = memoryview(self.read).cast("B").cast(_SIZE_CODES[fields["size"]])[:self.count]
+        now = _clock.current.now_us()
+        treq = fields["treq_sel"]
+
+        pwm, register = (None, None)
+        if isinstance(self.write, int):
+            pwm, register = _machine.pwm_register(self.write)
+
+        if register == _machine.PWM_CC and DREQ_PWM_WRAP0 <= treq < DREQ_PWM_WRAP0 + 8:
+            # Zapis 16-bitowy jest powielany na obie połówki rejestru CC
+            period = 1000000 / pwm.freq()
+            shift = 16 * pwm.channel if fields["size"] == 2 else 0
+            for k, value in enumerate(items):
+                pwm.write_cc(value >> shift, now + round((k + 1) * period))
+            self.end_us = now + round(len(items) * period)
+        elif treq == TREQ_PERMANENT and not isinstance(self.write, int):
+            target = memoryview(self.write).cast("B").cast(_SIZE_CODES[fields["size"]])
+            target[:len(items)] = items
+            self.end_us = now
+        else:
+            raise ValueError("picosim: unsupported DMA transfer")
+
+        self.transfers += 1
+        if self.handler is not None and not fields["irq_quiet"]:
+            if self.timer is None:
+                self.timer = _machine.Timer()
+            self.timer.init(mode=_machine.Timer.ONE_SHOT, period=max(1, self.end_us - now),
+                            tick_hz=1000000, callback=lambda timer: self.handler(self))
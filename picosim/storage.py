@@ -0,0 +1,22 @@
+"""Zastępczy moduł storage (CircuitPython)"""
+
+usb_drive_enabled = True
+readonly = False
+
+
+def disable_usb_drive():
+    global usb_drive_enabled
+    usb_drive_enabled = False
+
+
+def enable_usb_drive():
+    global usb_drive_enabled
+    usb_drive_enabled = True
+
+
+def remount(mount_path, readonly=False, *, disable_concurrent_write_protection=False):
+    globals()["readonly"] = readonly
+
+
+def getmount(mount_path):
+    return None
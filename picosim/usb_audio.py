@@ -0,0 +1,49 @@
+"""
+Zastępczy moduł usb_audio używany przez audio/src1 (nie ma go w
+CircuitPython ani MicroPython - zapisuje tylko odtwarzane próbki).
+
+play() trwa tyle, ile wynika z nagłówka WaveFile albo długości RawSample;
+do tego czasu `playing` jest True. `spans` to lista (początek, koniec µs)
+odtworzeń - przerwy między nimi to cisza między utworami.
+"""
+from picosim import clock as _clock
+
+
+def duration_us(sample):
+    """Czas odtwarzania próbki w µs"""
+    rate = getattr(sample, "sample_rate", 0)
+    channels = getattr(sample, "channel_count", 1) or 1
+    bits = getattr(sample, "bits_per_sample", 16) or 16
+    if not rate:
+        return 0
+    if hasattr(sample, "data_size"):
+        frames = sample.data_size // (channels * bits // 8)
+    else:
+        frames = len(sample.buffer) // channels
+    return frames * 1000000 // rate
+
+
+class AudioOut:
+    def __init__(self):
+        self.sample_rate = 44100
+        self.channels = 1
+        self.bits_per_sample = 16
+        self.end_us = 0
+        self.played = []  # (czas µs, próbka)
+        self.spans = []
+
+    @property
+    def playing(self):
+        return _clock.current.read_us() < self.end_us
+
+    def play(self, sample, *, loop=False):
+        now = _clock.current.now_us()
+        self.played.append((now, sample))
+        self.end_us = now + duration_us(sample)
+        self.spans.append([now, self.end_us])
+
+    def stop(self):
+        now = _clock.current.now_us()
+        if now < self.end_us:
+            self.end_us = now
+            self.spans[-1][1] = now
@@ -0,0 +1,16 @@
+"""Zastępczy moduł usb_cdc (CircuitPython)"""
+
+console = None
+data = None
+console_enabled = True
+data_enabled = False
+
+
+def enable(*, console=True, data=False):
+    global console_enabled, data_enabled
+    console_enabled = console
+    data_enabled = data
+
+
+def disable():
+    enable(console=False, data=False)
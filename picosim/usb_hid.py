@@ -0,0 +1,75 @@
+"""
+Zastępczy moduł usb_hid (CircuitPython).
+
+Każde urządzenie zapisuje wysłane raporty jako (czas µs, bytes).
+"""
+from collections import deque
+
+from picosim import clock as _clock
+
+# Ramka USB full-speed - send() przekazuje co najwyżej jeden bufor na ramkę
+USB_FRAME_US = 1000
+# Ile ostatnich buforów z send() zachować (reszta tylko w licznikach)
+BUFFER_HISTORY = 64
+
+
+class Device:
+    KEYBOARD = None
+    MOUSE = None
+    CONSUMER_CONTROL = None
+
+    def __init__(self, *, report_descriptor=b"", usage_page=0, usage=0,
+                 report_ids=(0,), in_report_lengths=(0,), out_report_lengths=(0,), name=None):
+        self.report_descriptor = report_descriptor
+        self.usage_page = usage_page
+        self.usage = usage
+        self.report_ids = tuple(report_ids)
+        self.in_report_lengths = tuple(in_report_lengths)
+        self.out_report_lengths = tuple(out_report_lengths)
+        self.name = name or "0x%02x:0x%02x" % (usage_page, usage)
+        self.reports = []
+
+    def send_report(self, report, report_id=None):
+        self.reports.append((_clock.current.now_us(), bytes(report)))
+
+    def get_last_received_report(self, report_id=None):
+        return None
+
+    def __repr__(self):
+        return "<Device %s>" % self.name
+
+
+Device.KEYBOARD = Device(usage_page=0x01, usage=0x06, report_ids=(1,),
+                         in_report_lengths=(8,), out_report_lengths=(1,), name="KEYBOARD")
+Device.MOUSE = Device(usage_page=0x01, usage=0x02, report_ids=(2,),
+                      in_report_lengths=(4,), out_report_lengths=(0,), name="MOUSE")
+Device.CONSUMER_CONTROL = Device(usage_page=0x0C, usage=0x01, report_ids=(3,),
+                                 in_report_lengths=(2,), out_report_lengths=(0,), name="CONSUMER_CONTROL")
+
+devices = (Device.KEYBOARD, Device.MOUSE, Device.CONSUMER_CONTROL)
+
+# Ostatnie surowe bufory przekazane do send() (używa go generator/main.py)
+# oraz liczniki wszystkich wysłanych
+buffers = deque(maxlen=BUFFER_HISTORY)
+sent_count = 0
+sent_bytes = 0
+
+
+def enable(new_devices, boot_device=0):
+    global devices
+    devices = tuple(new_devices)
+
+
+def disable():
+    global devices
+    devices = ()
+
+
+def send(buffer):
+    """Wyślij bufor; trwa jedną ramkę USB, więc pętla wysyłająca posuwa zegar"""
+    global sent_count, sent_bytes
+    data = bytes(buffer)
+    buffers.append((_clock.current.now_us(), data))
+    sent_count += 1
+    sent_bytes += len(data)
+    _clock.current.sleep_us(USB_FRAME_US)
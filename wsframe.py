@@ -0,0 +1,83 @@
+"""
+Minimalna obsługa WebSocket (RFC 6455) dla MicroPython i CPython.
+
+Wystarcza do odbierania strumienia małych ramek od przeglądarki:
+uzgadnianie połączenia, dekodowanie maskowanych ramek w miejscu
+(w buforze parsera HTTP) i wysyłanie ramek sterujących.
+"""
+import binascii
+import hashlib
+
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+
+OP_TEXT = const(1)
+OP_BINARY = const(2)
+OP_CLOSE = const(8)
+OP_PING = const(9)
+OP_PONG = const(10)
+
+_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def accept_key(key):
+    """Wartość Sec-WebSocket-Accept dla klucza klienta"""
+    digest = hashlib.sha1(bytes(key) + _GUID).digest()
+    return binascii.b2a_base64(digest)[:-1]
+
+
+def handshake_response(key):
+    """Odpowiedź 101 przełączająca połączenie na WebSocket"""
+    return (
+        b"HTTP/1.1 101 Switching Protocols\r\n"
+        b"Upgrade: websocket\r\n"
+        b"Connection: Upgrade\r\n"
+        b"Sec-WebSocket-Accept: " + accept_key(key) + b"\r\n\r\n"
+    )
+
+
+def decode_frame(buf, offset, length):
+    """
+    Zdekoduj ramkę klienta z buf[offset:length], odmaskowując ją w miejscu.
+    Zwraca (opcode, początek, koniec danych) lub None gdy ramka jest niepełna.
+    """
+    if length - offset < 2:
+        return None
+
+    opcode = buf[offset] & 0x0F
+    if not buf[offset] & 0x80:
+        raise ValueError("fragmented frames not supported")
+    if not buf[offset + 1] & 0x80:
+        raise ValueError("client frame not masked")
+
+    size = buf[offset + 1] & 0x7F
+    pos = offset + 2
+    if size == 126:
+        if length - offset < 4:
+            return None
+        size = (buf[pos] << 8) | buf[pos + 1]
+        pos += 2
+    elif size == 127:
+        raise ValueError("frame too large")
+
+    mask = pos
+    pos += 4
+    end = pos + size
+    if length < end:
+        if end - offset > len(buf):
+            raise ValueError("frame too large")
+        return None
+
+    for i in range(size):
+        buf[pos + i] ^= buf[mask + (i & 3)]
+    return opcode, pos, end
+
+
+def encode_frame(opcode, payload=b""):
+    """Ramka serwera (bez maski, do 125 bajtów danych)"""
+    if len(payload) > 125:
+        raise ValueError("payload too large")
+    return bytes((0x80 | opcode, len(payload))) + payload